@@ -0,0 +1,5 @@
+"""Offline benchmarks for the migration toolkit.
+
+Each module is runnable with ``python -m benchmarks.<module>`` and writes JSON results
+that can be compared against a stored baseline (see ``benchmarks.results``).
+"""
@@ -0,0 +1,153 @@
+"""Reproducible synthetic inputs (file trees and state DBs) for benchmarks."""
+
+from __future__ import annotations
+
+import hashlib
+import random
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List
+
+from migration_state_v2 import DatabaseConnection
+
+SUFFIXES = (".txt", ".log", ".csv", ".json", ".jpg", ".mp4", ".gz", ".001", ".py", ".dat")
+CACHE_DIR_NAMES = ("__pycache__", ".pytest_cache", ".cache", "node_modules")
+INSERT_BATCH_SIZE = 5000
+FIXTURE_TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+
+@dataclass(frozen=True)
+class SyntheticFile:
+    """One generated file and the metadata recorded for it."""
+
+    bucket: str
+    key: str
+    size: int
+    etag: str
+
+
+@dataclass(frozen=True)
+class TreeShape:
+    """Dimensions of a generated bucket tree."""
+
+    buckets: int = 2
+    top_level_dirs: int = 10
+    subdirs_per_dir: int = 5
+    files_per_dir: int = 20
+    min_file_size: int = 64
+    max_file_size: int = 4096
+    cache_dir_ratio: float = 0.1
+    seed: int = 1
+
+    @property
+    def total_files(self) -> int:
+        """Number of files the shape generates."""
+        return self.buckets * self.top_level_dirs * self.subdirs_per_dir * self.files_per_dir
+
+
+def generate_entries(shape: TreeShape) -> List[SyntheticFile]:
+    """Generate deterministic file metadata (content is derived from the key)."""
+    rng = random.Random(shape.seed)
+    entries: List[SyntheticFile] = []
+    for bucket_idx in range(shape.buckets):
+        bucket = f"bench-bucket-{bucket_idx:02d}"
+        for top_idx in range(shape.top_level_dirs):
+            for sub_idx in range(shape.subdirs_per_dir):
+                directory = f"project-{top_idx:03d}/module-{sub_idx:02d}"
+                if rng.random() < shape.cache_dir_ratio:
+                    directory = f"{directory}/{rng.choice(CACHE_DIR_NAMES)}"
+                for file_idx in range(shape.files_per_dir):
+                    key = f"{directory}/file-{file_idx:04d}{rng.choice(SUFFIXES)}"
+                    size = rng.randint(shape.min_file_size, shape.max_file_size)
+                    data = file_content(bucket, key, size)
+                    etag = hashlib.md5(data, usedforsecurity=False).hexdigest()
+                    entries.append(SyntheticFile(bucket, key, size, etag))
+    return entries
+
+
+def file_content(bucket: str, key: str, size: int) -> bytes:
+    """Deterministic file content for a generated entry."""
+    seed = hashlib.sha256(f"{bucket}/{key}".encode()).digest()
+    repeats = size // len(seed) + 1
+    return (seed * repeats)[:size]
+
+
+def materialize_tree(base_path: Path, entries: Iterable[SyntheticFile]) -> int:
+    """Write entries under base_path/<bucket>/<key>; returns the number of files written."""
+    written = 0
+    created_dirs: set[Path] = set()
+    for entry in entries:
+        path = base_path / entry.bucket / entry.key
+        if path.parent not in created_dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            created_dirs.add(path.parent)
+        path.write_bytes(file_content(entry.bucket, entry.key, entry.size))
+        written += 1
+    return written
+
+
+def build_state_db(db_path: Path, entries: Iterable[SyntheticFile], *, state: str = "synced") -> Path:
+    """Create a migrate_v2 state DB populated with entries."""
+    DatabaseConnection(str(db_path))
+    conn = sqlite3.connect(db_path)
+    try:
+        batch = []
+        for entry in entries:
+            batch.append(
+                (
+                    entry.bucket,
+                    entry.key,
+                    entry.size,
+                    entry.etag,
+                    "STANDARD",
+                    FIXTURE_TIMESTAMP,
+                    state,
+                    FIXTURE_TIMESTAMP,
+                    FIXTURE_TIMESTAMP,
+                )
+            )
+            if len(batch) >= INSERT_BATCH_SIZE:
+                _insert_batch(conn, batch)
+                batch = []
+        if batch:
+            _insert_batch(conn, batch)
+        conn.commit()
+    finally:
+        conn.close()
+    return db_path
+
+
+def _insert_batch(conn: sqlite3.Connection, batch: list) -> None:
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO files (
+            bucket, key, size, etag, storage_class, last_modified, state, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        batch,
+    )
+
+
+def write_large_file(path: Path, size: int, *, seed: int = 1) -> Path:
+    """Write a file of exactly size bytes in 1 MiB blocks."""
+    block = random.Random(seed).randbytes(1024 * 1024)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as handle:
+        remaining = size
+        while remaining > 0:
+            chunk = block[: min(remaining, len(block))]
+            handle.write(chunk)
+            remaining -= len(chunk)
+    return path
+
+
+__all__ = [
+    "SyntheticFile",
+    "TreeShape",
+    "build_state_db",
+    "file_content",
+    "generate_entries",
+    "materialize_tree",
+    "write_large_file",
+]
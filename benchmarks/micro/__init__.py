@@ -0,0 +1,17 @@
+"""Micro-benchmarks for the toolkit's pure-Python hot paths.
+
+Every case builds its inputs from seeded synthetic data (see ``benchmarks.fixtures``),
+runs the target several times and records min/median/mean/stdev. The median is the
+value compared against a baseline.
+
+Usage:
+    python -m benchmarks.micro                         # run all cases
+    python -m benchmarks.micro --case hash_file_in_chunks --repeat 10
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.micro --baseline micro.json   # exit 1 on regressions
+"""
+
+from .context import BenchContext, MicroOptions
+from .runner import CASES, main, run_cases, summarize, time_repeated
+
+__all__ = ["CASES", "BenchContext", "MicroOptions", "main", "run_cases", "summarize", "time_repeated"]
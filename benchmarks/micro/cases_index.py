@@ -0,0 +1,78 @@
+"""Micro-benchmark cases for the duplicate_tree directory index."""
+
+from __future__ import annotations
+
+import tracemalloc
+
+from .context import BenchContext
+
+PRUNE_DIRECTORIES = 50_000  # per scale unit; --scale 20 gives the 1M-directory index
+
+
+def _case_directory_index_add_file(ctx: BenchContext):
+    from duplicate_tree.core import DirectoryIndex  # pylint: disable=import-outside-toplevel
+
+    rows = [(entry.bucket, entry.key, entry.size, entry.etag) for entry in ctx.entries]
+
+    def _run():
+        index = DirectoryIndex()
+        for bucket, key, size, checksum in rows:
+            index.add_file(bucket, key, size, checksum)
+
+    return _run, len(rows), 0
+
+
+def _case_directory_index_finalize(ctx: BenchContext):
+    from duplicate_tree.core import DirectoryIndex  # pylint: disable=import-outside-toplevel
+
+    index = DirectoryIndex()
+    for entry in ctx.entries:
+        index.add_file(entry.bucket, entry.key, entry.size, entry.etag)
+    return index.finalize, len(index.nodes), 0
+
+
+def _case_directory_index_memory(ctx: BenchContext):
+    """Build and finalize an index from rows, recording the traced heap peak of one build."""
+    from duplicate_tree.core import DirectoryIndex  # pylint: disable=import-outside-toplevel
+
+    rows = [(entry.bucket, entry.key, entry.size, entry.etag) for entry in ctx.entries]
+
+    def _run():
+        index = DirectoryIndex()
+        for bucket, key, size, checksum in rows:
+            index.add_file(bucket, key, size, checksum)
+        index.finalize()
+        return index
+
+    tracemalloc.start()
+    try:
+        _run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return _run, len(rows), 0, {"traced_peak_bytes": peak, "traced_bytes_per_file": round(peak / max(len(rows), 1), 1)}
+
+
+def _case_find_exact_duplicates_pruning(ctx: BenchContext):
+    """Cluster an index of many independent duplicate pairs, each with a nested duplicate to prune."""
+    from duplicate_tree.core import DirectoryIndex, find_exact_duplicates  # pylint: disable=import-outside-toplevel
+
+    # Every pair adds copy-a/<n>, copy-a/<n>/sub, copy-b/<n> and copy-b/<n>/sub; the unique top-level
+    # files keep copy-a and copy-b apart so no single cluster hides the others.
+    pairs = PRUNE_DIRECTORIES * ctx.options.scale // 4
+    index = DirectoryIndex()
+    for copy in ("copy-a", "copy-b"):
+        index.add_file("bench", f"{copy}/unique", 1, copy)
+        for pair in range(pairs):
+            index.add_file("bench", f"{copy}/{pair}/top", 1, f"{pair:032x}")
+            index.add_file("bench", f"{copy}/{pair}/sub/leaf", 1, f"{pair:032x}")
+    index.finalize()
+    return (lambda: find_exact_duplicates(index)), index.node_count, 0
+
+
+CASES = {
+    "directory_index_add_file": _case_directory_index_add_file,
+    "directory_index_finalize": _case_directory_index_finalize,
+    "directory_index_memory": _case_directory_index_memory,
+    "find_exact_duplicates_pruning": _case_find_exact_duplicates_pruning,
+}
@@ -0,0 +1,123 @@
+"""Micro-benchmark cases for state DB and local tree scans."""
+
+from __future__ import annotations
+
+import io
+from collections import Counter
+from contextlib import redirect_stdout
+
+from .context import BenchContext
+
+
+def _case_scan_candidates_from_db(ctx: BenchContext):
+    # pylint: disable=import-outside-toplevel
+    from cleanup_temp_artifacts.categories import build_categories
+    from cleanup_temp_artifacts.core_scanner import scan_candidates_from_db
+
+    tree_root = ctx.tree_root
+    categories = list(build_categories().values())
+    total = len(ctx.entries)
+
+    def _run():
+        conn = ctx.connect()
+        try:
+            with redirect_stdout(io.StringIO()):
+                scan_candidates_from_db(conn, tree_root, categories, cutoff_ts=None, min_size_bytes=None, total_files=total)
+        finally:
+            conn.close()
+
+    return _run, total, 0
+
+
+def _case_find_candidates(ctx: BenchContext):
+    from find_compressible.analysis import find_candidates  # pylint: disable=import-outside-toplevel
+
+    tree_root = ctx.tree_root
+    total = len(ctx.entries)
+
+    def _run():
+        conn = ctx.connect()
+        try:
+            for _ in find_candidates(conn, tree_root, 0, [], Counter()):
+                pass
+        finally:
+            conn.close()
+
+    return _run, total, 0
+
+
+def _case_should_skip_by_suffix(ctx: BenchContext):
+    from find_compressible.analysis import should_skip_by_suffix  # pylint: disable=import-outside-toplevel
+
+    names = [(entry.key, entry.key.rsplit("/", 1)[-1]) for entry in ctx.entries]
+
+    def _run():
+        for key, name in names:
+            should_skip_by_suffix(key, name)
+
+    return _run, len(names), 0
+
+
+def _case_derive_local_path(ctx: BenchContext):
+    from migration_utils import derive_local_path  # pylint: disable=import-outside-toplevel
+
+    base = ctx.workdir / "tree"
+    pairs = [(entry.bucket, entry.key) for entry in ctx.entries]
+
+    def _run():
+        for bucket, key in pairs:
+            derive_local_path(base, bucket, key)
+
+    return _run, len(pairs), 0
+
+
+def _case_scan_local_directory(ctx: BenchContext):
+    # pylint: disable=import-outside-toplevel,protected-access
+    from migration_verify_inventory import _scan_local_directory
+
+    tree_root = ctx.tree_root
+    buckets = sorted({entry.bucket for entry in ctx.entries})
+    total = len(ctx.entries)
+
+    def _run():
+        with redirect_stdout(io.StringIO()):
+            for bucket in buckets:
+                _scan_local_directory(tree_root, bucket, total)
+
+    return _run, total, 0
+
+
+def _reseed_case(ctx: BenchContext, workers: int):
+    # pylint: disable=import-outside-toplevel
+    from state_db_admin import ReseedOptions, reseed_state_db_from_local_drive
+
+    tree_root = ctx.tree_root
+    db_path = ctx.workdir / f"reseed-{workers}.db"
+
+    def _run():
+        reseed_state_db_from_local_drive(tree_root, db_path, ReseedOptions(workers=workers))
+
+    return _run, len(ctx.entries), 0
+
+
+def _case_reseed_serial(ctx: BenchContext):
+    """Reseed with one scanning thread, the comparison point for the old serial os.walk."""
+    return _reseed_case(ctx, 1)
+
+
+def _case_reseed_parallel(ctx: BenchContext):
+    # pylint: disable=import-outside-toplevel
+    from state_db_admin import DEFAULT_RESEED_WORKERS
+
+    return _reseed_case(ctx, DEFAULT_RESEED_WORKERS)
+
+
+CASES = {
+    "scan_candidates_from_db": _case_scan_candidates_from_db,
+    "find_candidates": _case_find_candidates,
+    "should_skip_by_suffix": _case_should_skip_by_suffix,
+    "derive_local_path": _case_derive_local_path,
+    "scan_local_directory": _case_scan_local_directory,
+    "reseed_serial": _case_reseed_serial,
+    "reseed_parallel": _case_reseed_parallel,
+}
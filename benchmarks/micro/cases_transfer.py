@@ -0,0 +1,110 @@
+"""Micro-benchmark cases for hashing and the download write path."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+
+from ..fixtures import write_large_file
+from .context import BenchContext
+
+HASH_FILE_SIZE = 64 * 1024 * 1024
+DOWNLOAD_COPY_SIZE = 64 * 1024 * 1024
+LEGACY_CHUNK_SIZE = 1024  # botocore StreamingBody.iter_chunks() default
+WRITE_PATH_OBJECTS = 2000
+WRITE_PATH_OBJECT_SIZE = 4096
+
+
+def _case_hash_file_in_chunks(ctx: BenchContext):
+    from migration_utils import hash_file_in_chunks  # pylint: disable=import-outside-toplevel
+
+    size = HASH_FILE_SIZE * ctx.options.scale
+    path = write_large_file(ctx.workdir / "hash-input.bin", size, seed=ctx.options.seed)
+    return (lambda: hash_file_in_chunks(path, hashlib.md5(usedforsecurity=False))), 1, size
+
+
+def _download_payload(ctx: BenchContext) -> bytes:
+    return write_large_file(
+        ctx.workdir / "download-payload.bin", DOWNLOAD_COPY_SIZE * ctx.options.scale, seed=ctx.options.seed
+    ).read_bytes()
+
+
+def _case_download_copy_legacy(ctx: BenchContext):
+    """The per-KiB write loop _download_object used before copy_stream, kept as the comparison point."""
+    from migrate_v2_smoke_simulated import _InMemoryBody  # pylint: disable=import-outside-toplevel
+    from migration_utils import ProgressTracker  # pylint: disable=import-outside-toplevel
+
+    payload = _download_payload(ctx)
+
+    def _run():
+        tracker = ProgressTracker(update_interval=float("inf"))
+        interrupted_check = lambda: False  # noqa: E731 - mirrors the lambda passed by BucketSyncer
+        with open(os.devnull, "wb") as handle:
+            for chunk in _InMemoryBody(payload).iter_chunks(LEGACY_CHUNK_SIZE):
+                if interrupted_check():
+                    break
+                handle.write(chunk)
+                tracker.should_update()
+
+    return _run, 1, len(payload)
+
+
+def _case_download_copy_stream(ctx: BenchContext):
+    from migrate_v2_smoke_simulated import _InMemoryBody  # pylint: disable=import-outside-toplevel
+    from migration_sync import copy_stream  # pylint: disable=import-outside-toplevel
+
+    payload = _download_payload(ctx)
+
+    def _run():
+        with open(os.devnull, "wb") as handle:
+            copy_stream(_InMemoryBody(payload), handle, lambda: False)
+
+    return _run, 1, len(payload)
+
+
+def _write_path_case(ctx: BenchContext, cached: bool):
+    # pylint: disable=import-outside-toplevel
+    from benchmarks.synthetic_s3 import SizeDistribution, SyntheticBucketSpec, SyntheticS3Client
+    from migration_sync import DirectoryCache, DownloadOptions, _download_object, _list_objects, _ProgressState
+
+    sizes = SizeDistribution(kind="fixed", median=WRITE_PATH_OBJECT_SIZE)
+    spec = SyntheticBucketSpec(
+        name="bench", object_count=WRITE_PATH_OBJECTS * ctx.options.scale, sizes=sizes, keys_per_directory=50, seed=ctx.options.seed
+    )
+    client = SyntheticS3Client([spec])
+    objects = list(_list_objects(client, "bench"))
+    root = ctx.workdir / ("write-path-cached" if cached else "write-path-mkdir")
+
+    def _run():
+        directories = DirectoryCache() if cached else None
+        progress = _ProgressState(start_time=time.time())
+        for obj in objects:
+            _download_object(
+                client,
+                "bench",
+                obj["Key"],
+                root / obj["Key"],
+                lambda: False,
+                progress,
+                DownloadOptions(directories=directories, size=obj["Size"] if cached else None),
+            )
+
+    return _run, len(objects), len(objects) * WRITE_PATH_OBJECT_SIZE
+
+
+def _case_write_path_mkdir_per_file(ctx: BenchContext):
+    return _write_path_case(ctx, cached=False)
+
+
+def _case_write_path_directory_cache(ctx: BenchContext):
+    return _write_path_case(ctx, cached=True)
+
+
+CASES = {
+    "hash_file_in_chunks": _case_hash_file_in_chunks,
+    "download_copy_legacy": _case_download_copy_legacy,
+    "download_copy_stream": _case_download_copy_stream,
+    "write_path_mkdir_per_file": _case_write_path_mkdir_per_file,
+    "write_path_directory_cache": _case_write_path_directory_cache,
+}
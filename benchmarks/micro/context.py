@@ -0,0 +1,70 @@
+"""Options and lazily built shared inputs for the micro-benchmark cases."""
+
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..fixtures import TreeShape, build_state_db, generate_entries, materialize_tree
+
+DEFAULT_REPEAT = 5
+
+
+@dataclass(frozen=True)
+class MicroOptions:
+    """Input sizes shared by all cases."""
+
+    scale: int = 1
+    repeat: int = DEFAULT_REPEAT
+    seed: int = 1
+
+    @property
+    def shape(self) -> TreeShape:
+        """Tree shape scaled by ``scale`` (about 2,000 files per unit)."""
+        return TreeShape(buckets=2, top_level_dirs=10 * self.scale, subdirs_per_dir=5, files_per_dir=20, seed=self.seed)
+
+
+class BenchContext:  # pylint: disable=too-few-public-methods
+    """Lazily built inputs shared between cases in one run."""
+
+    def __init__(self, workdir: Path, options: MicroOptions):
+        self.workdir = workdir
+        self.options = options
+        self._entries = None
+        self._tree_root: Optional[Path] = None
+        self._db_path: Optional[Path] = None
+
+    @property
+    def entries(self):
+        """Synthetic file metadata."""
+        if self._entries is None:
+            self._entries = generate_entries(self.options.shape)
+        return self._entries
+
+    @property
+    def tree_root(self) -> Path:
+        """Materialized file tree matching ``entries``."""
+        if self._tree_root is None:
+            root = self.workdir / "tree"
+            materialize_tree(root, self.entries)
+            self._tree_root = root
+        return self._tree_root
+
+    @property
+    def db_path(self) -> Path:
+        """State DB whose ``files`` rows describe ``entries``."""
+        if self._db_path is None:
+            self._db_path = build_state_db(self.workdir / "state.db", self.entries)
+        return self._db_path
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the state DB with the Row factory used by the tools."""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+# Each case receives the context and returns (callable, items per call, bytes per call[, extra figures]).
+CaseSetup = Callable[[BenchContext], tuple]
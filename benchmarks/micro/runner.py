@@ -0,0 +1,106 @@
+"""Times the registered micro-benchmark cases and builds the report."""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..results import DEFAULT_REGRESSION_THRESHOLD, BenchmarkReport, Measurement, finish_report, peak_rss_bytes
+from . import cases_index, cases_scan, cases_transfer
+from .context import BenchContext, CaseSetup, MicroOptions
+
+SUITE_NAME = "micro"
+
+CASES: Dict[str, CaseSetup] = {**cases_transfer.CASES, **cases_index.CASES, **cases_scan.CASES}
+
+
+def time_repeated(func: Callable[[], object], repeat: int, cpu_timings: Optional[List[float]] = None) -> List[float]:
+    """Run func repeat times (after one warm-up call) and return each duration; CPU time goes to cpu_timings."""
+    func()
+    timings = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        func()
+        timings.append(time.perf_counter() - start)
+        if cpu_timings is not None:
+            cpu_timings.append(time.process_time() - cpu_start)
+    return timings
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """Return min/median/mean/stdev for a list of timings."""
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "runs": len(timings),
+    }
+
+
+def run_cases(options: MicroOptions, workdir: Path, names: Optional[List[str]] = None) -> BenchmarkReport:
+    """Run the selected cases (all by default) and return the report."""
+    report = BenchmarkReport(suite=SUITE_NAME, parameters=asdict(options))
+    ctx = BenchContext(workdir, options)
+    for name in names or list(CASES):
+        func, items, size, *extra = CASES[name](ctx)
+        cpu_timings: List[float] = []
+        stats = summarize(time_repeated(func, options.repeat, cpu_timings))
+        for figures in extra:
+            stats.update(figures)
+        if size:
+            stats["cpu_seconds_per_gb"] = statistics.median(cpu_timings) / size * 1_000_000_000
+        report.add(
+            Measurement(
+                name=name,
+                seconds=stats["median"],
+                items=items,
+                bytes=size,
+                extra=stats,
+            )
+        )
+    report.peak_rss_bytes = peak_rss_bytes()
+    return report
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.micro", description="Micro-benchmarks for toolkit hot paths")
+    defaults = MicroOptions()
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="Run only this case (repeatable)")
+    parser.add_argument("--scale", type=int, default=defaults.scale, help="Input size multiplier (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=defaults.repeat, help="Timed runs per case (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed for synthetic inputs")
+    parser.add_argument("--workdir", type=Path, help="Directory for generated inputs (default: temp dir)")
+    parser.add_argument("--keep", action="store_true", help="Keep the temp input directory after the run (--workdir is always kept)")
+    parser.add_argument("--output", type=Path, help="Write JSON results to this path")
+    parser.add_argument("--baseline", type=Path, help="Compare medians against a previously written results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="Allowed slowdown ratio before flagging a regression (default: %(default)s)",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point."""
+    args = _build_parser().parse_args(argv)
+    options = MicroOptions(scale=args.scale, repeat=args.repeat, seed=args.seed)
+    # Only a temp dir created here is removed afterwards; a --workdir the user chose is left alone.
+    created_workdir = args.workdir is None
+    workdir = Path(tempfile.mkdtemp(prefix="toolkit_micro_bench_")) if created_workdir else args.workdir
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        report = run_cases(options, workdir, args.case)
+    finally:
+        if created_workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return finish_report(report, args.output, args.baseline, args.threshold)
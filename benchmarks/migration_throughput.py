@@ -0,0 +1,240 @@
+"""End-to-end migrate_v2 throughput benchmark against a synthetic S3.
+
+Runs the real scan, Glacier restore, sync, verify and delete components against
+``SyntheticS3Client`` and times each phase separately.
+
+Usage:
+    python -m benchmarks.migration_throughput --buckets 4 --objects 50000
+    python -m benchmarks.migration_throughput --output results.json --baseline baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from cost_toolkit.common.format_utils import parse_size
+
+from .results import (
+    DEFAULT_REGRESSION_THRESHOLD,
+    BenchmarkReport,
+    Measurement,
+    finish_report,
+    peak_rss_bytes,
+)
+from .synthetic_s3 import (
+    SIZE_DISTRIBUTIONS,
+    SizeDistribution,
+    SyntheticBucketSpec,
+    SyntheticS3Client,
+    parse_storage_mix,
+)
+
+SUITE_NAME = "migration_throughput"
+GLACIER_CLASSES = frozenset({"GLACIER", "DEEP_ARCHIVE"})
+
+
+@dataclass(frozen=True)
+class ThroughputOptions:  # pylint: disable=too-many-instance-attributes
+    """Parameters describing the synthetic workload."""
+
+    buckets: int = 2
+    objects_per_bucket: int = 1000
+    size_distribution: str = "lognormal"
+    median_size: int = 16 * 1024
+    max_size: int = 16 * 1024 * 1024
+    storage_mix: str = "STANDARD=0.9,GLACIER=0.07,DEEP_ARCHIVE=0.03"
+    latency_ms: float = 0.0
+    seed: int = 1
+    keys_per_directory: int = 100
+
+    def bucket_specs(self) -> List[SyntheticBucketSpec]:
+        """Build one spec per synthetic bucket."""
+        sizes = SizeDistribution(kind=self.size_distribution, median=self.median_size, maximum=self.max_size)
+        mix = parse_storage_mix(self.storage_mix)
+        return [
+            SyntheticBucketSpec(
+                name=f"bench-bucket-{idx:03d}",
+                object_count=self.objects_per_bucket,
+                sizes=sizes,
+                storage_mix=mix,
+                keys_per_directory=self.keys_per_directory,
+                seed=self.seed,
+            )
+            for idx in range(self.buckets)
+        ]
+
+
+@contextmanager
+def _quiet_output(enabled: bool) -> Iterator[None]:
+    """Discard the phase banners and progress lines while timing."""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w", encoding="utf-8") as sink, redirect_stdout(sink):
+        yield
+
+
+def _timed(name: str, func: Callable[[], None], *, items: int = 0, size: int = 0, quiet: bool = True) -> Measurement:
+    start = time.perf_counter()
+    with _quiet_output(quiet):
+        func()
+    return Measurement(
+        name=name,
+        seconds=time.perf_counter() - start,
+        items=items,
+        bytes=size,
+    )
+
+
+def _bucket_totals(state, buckets: List[str]) -> tuple[int, int, int]:
+    """Return (files, bytes, glacier_files) recorded by the scan."""
+    files = total_bytes = glacier = 0
+    for bucket in buckets:
+        info = state.get_bucket_info(bucket)
+        files += info["file_count"]
+        total_bytes += info["total_size"]
+        counts = json.loads(info.get("storage_class_counts") or "{}")
+        glacier += sum(count for name, count in counts.items() if name in GLACIER_CLASSES)
+    return files, total_bytes, glacier
+
+
+def run_benchmark(options: ThroughputOptions, workdir: Path, *, quiet: bool = True) -> BenchmarkReport:
+    """Run every migration phase against a synthetic S3 and return per-phase timings."""
+    # pylint: disable=import-outside-toplevel,too-many-locals
+    # Imported lazily so ``--help`` works without config_local.py.
+    from migration_scanner import BucketScanner, GlacierRestorer, GlacierWaiter
+    from migration_state_v2 import MigrationStateV2
+    from migration_sync import BucketSyncer
+    from migration_verify_bucket import BucketVerifier
+    from migration_verify_delete import BucketDeleter
+
+    client = SyntheticS3Client(options.bucket_specs(), latency_seconds=options.latency_ms / 1000)
+    state = MigrationStateV2(str(workdir / "state.db"))
+    base_path = workdir / "drive"
+    base_path.mkdir(parents=True, exist_ok=True)
+    bucket_names = list(client.buckets)
+    report = BenchmarkReport(suite=SUITE_NAME, parameters=asdict(options))
+
+    scanner = BucketScanner(client, state)
+    report.add(_timed("scan", lambda: [scanner.scan_bucket(bucket) for bucket in bucket_names], quiet=quiet))
+    files, total_bytes, glacier_files = _bucket_totals(state, bucket_names)
+    report.measurements[-1].items = files
+
+    restorer = GlacierRestorer(client, state)
+    report.add(_timed("glacier_restore", restorer.request_all_restores, items=glacier_files, quiet=quiet))
+    waiter = GlacierWaiter(client, state)
+    waiter._wait_with_interrupt = lambda _seconds: None  # pylint: disable=protected-access
+    report.add(_timed("glacier_wait", waiter.wait_for_restores, items=glacier_files, quiet=quiet))
+
+    syncer = BucketSyncer(client, state, base_path)
+    verifier = BucketVerifier(state, base_path)
+    deleter = BucketDeleter(client, state)
+
+    def _sync_all():
+        for bucket in bucket_names:
+            syncer.sync_bucket(bucket)
+            state.mark_bucket_sync_complete(bucket)
+
+    def _verify_all():
+        for bucket in bucket_names:
+            results = verifier.verify_bucket(bucket)
+            state.mark_bucket_verify_complete(
+                bucket,
+                verified_file_count=results["verified_count"],
+                size_verified_count=results["size_verified"],
+                checksum_verified_count=results["checksum_verified"],
+                total_bytes_verified=results["total_bytes_verified"],
+                local_file_count=results["local_file_count"],
+            )
+
+    def _delete_all():
+        for bucket in bucket_names:
+            deleter.delete_bucket(bucket)
+            state.mark_bucket_delete_complete(bucket)
+
+    report.add(_timed("sync", _sync_all, items=files, size=total_bytes, quiet=quiet))
+    report.add(_timed("verify", _verify_all, items=files, size=total_bytes, quiet=quiet))
+    report.add(_timed("delete", _delete_all, items=files, quiet=quiet))
+    report.parameters["total_files"] = files
+    report.parameters["total_bytes"] = total_bytes
+    report.parameters["request_counts"] = dict(client.request_counts)
+    report.peak_rss_bytes = peak_rss_bytes()
+    return report
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark migrate_v2 phases against a synthetic S3")
+    defaults = ThroughputOptions()
+    parser.add_argument("--buckets", type=int, default=defaults.buckets, help="Number of synthetic buckets")
+    parser.add_argument("--objects", type=int, default=defaults.objects_per_bucket, help="Objects per bucket")
+    parser.add_argument("--size-distribution", choices=SIZE_DISTRIBUTIONS, default=defaults.size_distribution)
+    parser.add_argument(
+        "--median-size",
+        type=lambda value: parse_size(value, for_argparse=True),
+        default=defaults.median_size,
+        help="Median object size (e.g. 16K, 4M)",
+    )
+    parser.add_argument(
+        "--max-size",
+        type=lambda value: parse_size(value, for_argparse=True),
+        default=defaults.max_size,
+        help="Largest generated object (e.g. 64M)",
+    )
+    parser.add_argument(
+        "--storage-mix",
+        default=defaults.storage_mix,
+        help="Comma-separated CLASS=weight pairs (default: %(default)s)",
+    )
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Injected latency per S3 request")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed for deterministic object generation")
+    parser.add_argument("--workdir", type=Path, help="Directory for the state DB and downloaded files (default: temp dir)")
+    parser.add_argument("--keep", action="store_true", help="Keep the temp work directory after the run (--workdir is always kept)")
+    parser.add_argument("--output", type=Path, help="Write JSON results to this path")
+    parser.add_argument("--baseline", type=Path, help="Compare against a previously written results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="Allowed slowdown ratio before flagging a regression (default: %(default)s)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show the migration phase output")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point."""
+    args = _build_parser().parse_args(argv)
+    options = ThroughputOptions(
+        buckets=args.buckets,
+        objects_per_bucket=args.objects,
+        size_distribution=args.size_distribution,
+        median_size=args.median_size,
+        max_size=args.max_size,
+        storage_mix=args.storage_mix,
+        latency_ms=args.latency_ms,
+        seed=args.seed,
+    )
+    # Only a temp dir created here is removed afterwards; a --workdir the user chose is left alone.
+    created_workdir = args.workdir is None
+    workdir = Path(tempfile.mkdtemp(prefix="migrate_v2_bench_")) if created_workdir else args.workdir
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        report = run_benchmark(options, workdir, quiet=not args.verbose)
+    finally:
+        if created_workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return finish_report(report, args.output, args.baseline, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
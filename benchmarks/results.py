@@ -0,0 +1,200 @@
+"""Machine-readable benchmark results and baseline comparison."""
+
+from __future__ import annotations
+
+import json
+import platform
+import resource
+import sys
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+RESULTS_SCHEMA_VERSION = 2
+
+
+def peak_rss_bytes() -> int:
+    """Return the peak resident set size of this process in bytes.
+
+    This is a process-lifetime high-water mark, so it is reported once per run rather than per measurement.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    if sys.platform == "darwin":
+        return int(peak)
+    return int(peak) * 1024
+
+
+@dataclass
+class Measurement:
+    """A single named timing with optional throughput counters."""
+
+    name: str
+    seconds: float
+    items: int = 0
+    bytes: int = 0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def items_per_second(self) -> float:
+        """Items processed per second (0 when nothing was timed)."""
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        """Megabytes (10^6 bytes) processed per second."""
+        return self.bytes / 1_000_000 / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize including derived throughput figures."""
+        payload = asdict(self)
+        payload["items_per_second"] = round(self.items_per_second, 3)
+        payload["mb_per_second"] = round(self.mb_per_second, 3)
+        return payload
+
+
+@dataclass
+class BenchmarkReport:
+    """Collection of measurements from one benchmark run."""
+
+    suite: str
+    parameters: Dict[str, Any]
+    measurements: List[Measurement] = field(default_factory=list)
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    peak_rss_bytes: int = 0
+
+    def add(self, measurement: Measurement) -> Measurement:
+        """Append a measurement and return it."""
+        self.measurements.append(measurement)
+        return measurement
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the report to JSON-compatible primitives."""
+        return {
+            "schema_version": RESULTS_SCHEMA_VERSION,
+            "suite": self.suite,
+            "created_at": self.created_at,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": self.parameters,
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "measurements": [measurement.to_dict() for measurement in self.measurements],
+        }
+
+    def write(self, path: Path) -> Path:
+        """Write the report as pretty-printed JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        return path
+
+
+def load_report(path: Path) -> Dict[str, Any]:
+    """Load a previously written report."""
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """Timing comparison between a current measurement and its baseline."""
+
+    name: str
+    baseline_seconds: float
+    current_seconds: float
+
+    @property
+    def ratio(self) -> float:
+        """current / baseline; above 1.0 means slower."""
+        if self.baseline_seconds <= 0:
+            return 1.0
+        return self.current_seconds / self.baseline_seconds
+
+    def is_regression(self, threshold: float) -> bool:
+        """Return True when the current run is slower than baseline by more than threshold."""
+        return self.ratio > 1.0 + threshold
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Comparison]:
+    """Pair measurements by name; measurements missing from either side are skipped."""
+    baseline_by_name = {entry["name"]: entry for entry in baseline.get("measurements", [])}
+    comparisons = []
+    for entry in current.get("measurements", []):
+        previous = baseline_by_name.get(entry["name"])
+        if previous is None:
+            continue
+        comparisons.append(
+            Comparison(
+                name=entry["name"],
+                baseline_seconds=float(previous["seconds"]),
+                current_seconds=float(entry["seconds"]),
+            )
+        )
+    return comparisons
+
+
+def print_report(report: BenchmarkReport):
+    """Print a human-readable table of measurements."""
+    print("=" * 70)
+    print(f"BENCHMARK: {report.suite}")
+    print("=" * 70)
+    for measurement in report.measurements:
+        line = f"  {measurement.name:<28} {measurement.seconds:10.4f}s"
+        if measurement.items:
+            line += f"  {measurement.items_per_second:12,.1f} items/s"
+        if measurement.bytes:
+            line += f"  {measurement.mb_per_second:9.2f} MB/s"
+        print(line)
+    if report.peak_rss_bytes:
+        print(f"  Peak RSS for the whole run: {report.peak_rss_bytes / 1_000_000:.1f} MB")
+    print("=" * 70)
+
+
+def print_comparison(comparisons: List[Comparison], threshold: float) -> bool:
+    """Print comparison rows and return True when any regression was found."""
+    regressed = False
+    print("Comparison against baseline:")
+    for comparison in comparisons:
+        flag = ""
+        if comparison.is_regression(threshold):
+            flag = "  ✗ REGRESSION"
+            regressed = True
+        print(
+            f"  {comparison.name:<28} {comparison.baseline_seconds:10.4f}s -> "
+            f"{comparison.current_seconds:10.4f}s ({comparison.ratio:6.2f}x){flag}"
+        )
+    if not comparisons:
+        print("  (no overlapping measurements)")
+    return regressed
+
+
+def finish_report(
+    report: BenchmarkReport,
+    output: Optional[Path],
+    baseline: Optional[Path],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+) -> int:
+    """Print, persist and optionally compare a report; return a process exit code."""
+    print_report(report)
+    if output is not None:
+        written = report.write(output)
+        print(f"Results written to: {written}")
+    if baseline is None:
+        return 0
+    comparisons = compare_reports(report.to_dict(), load_report(baseline))
+    return 1 if print_comparison(comparisons, threshold) else 0
+
+
+__all__ = [
+    "BenchmarkReport",
+    "Comparison",
+    "DEFAULT_REGRESSION_THRESHOLD",
+    "Measurement",
+    "compare_reports",
+    "finish_report",
+    "load_report",
+    "peak_rss_bytes",
+    "print_comparison",
+    "print_report",
+]
@@ -0,0 +1,359 @@
+"""Lazily generated multi-bucket S3 stand-in for throughput benchmarks.
+
+Objects are derived deterministically from ``(seed, bucket, index)`` so a bucket with
+millions of keys costs no memory until it is listed or downloaded. The client implements
+the same subset of the boto3 S3 API as ``migrate_v2_smoke_simulated._SimulatedS3Client``
+plus the Glacier calls, across any number of buckets.
+
+It is a separate class rather than a subclass of ``_SimulatedS3Client``. The smoke
+client serves one bucket from files materialized on disk and keeps every listing
+entry in a dict, which is exactly the cost a million-object benchmark has to avoid.
+It also has no ``head_object``, ``restore_object`` or ranged ``get_object``, so every
+method would have been overridden. tests/test_benchmarks_migration_throughput.py checks that the
+two clients keep the same API surface.
+"""
+
+# pylint: disable=invalid-name  # boto3-style keyword arguments
+
+from __future__ import annotations
+
+import hashlib
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from threading import Event
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+PATTERN_SIZE = 64 * 1024
+SIZE_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+_LAST_MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_RESTORED = 'ongoing-request="false", expiry-date="Fri, 01 Jan 2100 00:00:00 GMT"'
+
+
+@dataclass(frozen=True)
+class SizeDistribution:
+    """Object size distribution for generated buckets."""
+
+    kind: str = "lognormal"
+    median: int = 64 * 1024
+    sigma: float = 1.0
+    minimum: int = 0
+    maximum: int = 64 * 1024 * 1024
+
+    def __post_init__(self):
+        if self.kind not in SIZE_DISTRIBUTIONS:
+            raise ValueError(f"Unknown size distribution {self.kind!r}; expected one of {', '.join(SIZE_DISTRIBUTIONS)}")
+
+    def sample(self, rng: random.Random) -> int:
+        """Draw one object size in bytes."""
+        if self.kind == "fixed":
+            size = self.median
+        elif self.kind == "uniform":
+            size = rng.randint(self.minimum, max(self.minimum, 2 * self.median - self.minimum))
+        else:
+            size = int(rng.lognormvariate(0.0, self.sigma) * self.median)
+        return max(self.minimum, min(self.maximum, size))
+
+
+def parse_storage_mix(value: str) -> Tuple[Tuple[str, float], ...]:
+    """Parse ``STANDARD=0.8,GLACIER=0.2`` into normalized (class, weight) pairs."""
+    pairs = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, weight = item.partition("=")
+        pairs.append((name.strip().upper(), float(weight) if weight else 1.0))
+    total = sum(weight for _, weight in pairs)
+    if not pairs or total <= 0:
+        raise ValueError(f"Invalid storage class mix: {value!r}")
+    return tuple((name, weight / total) for name, weight in pairs)
+
+
+@dataclass(frozen=True)
+class SyntheticBucketSpec:
+    """Shape of one generated bucket."""
+
+    name: str
+    object_count: int
+    sizes: SizeDistribution = field(default_factory=SizeDistribution)
+    storage_mix: Tuple[Tuple[str, float], ...] = (("STANDARD", 1.0),)
+    keys_per_directory: int = 100
+    seed: int = 0
+    multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD
+
+
+@dataclass(frozen=True)
+class SyntheticObject:
+    """Metadata for a single generated object."""
+
+    index: int
+    key: str
+    size: int
+    storage_class: str
+    etag: str
+    pattern_offset: int
+
+    def listing_entry(self) -> dict:
+        """Return the list_objects_v2 representation."""
+        return {
+            "Key": self.key,
+            "Size": self.size,
+            "ETag": f'"{self.etag}"',
+            "StorageClass": self.storage_class,
+            "LastModified": _LAST_MODIFIED,
+        }
+
+
+class SyntheticBody:
+    """Streaming body that tiles a fixed pattern to the requested length."""
+
+    def __init__(self, pattern: bytes, offset: int, size: int):
+        self._pattern = pattern
+        self._offset = offset
+        self._remaining = size
+
+    def _take(self, amount: int) -> bytes:
+        amount = min(amount, self._remaining)
+        if amount <= 0:
+            return b""
+        parts = []
+        needed = amount
+        while needed:
+            chunk = self._pattern[self._offset : self._offset + needed]
+            parts.append(chunk)
+            needed -= len(chunk)
+            self._offset = (self._offset + len(chunk)) % len(self._pattern)
+        self._remaining -= amount
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        """Read up to amt bytes (all remaining bytes when amt is None)."""
+        return self._take(self._remaining if amt is None else amt)
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Yield the body in chunk_size pieces."""
+        while self._remaining:
+            yield self._take(chunk_size)
+
+    def close(self):
+        """Discard any unread content."""
+        self._remaining = 0
+
+
+def _object_index(key: str) -> int:
+    return int(key.rsplit("obj-", 1)[1].split(".", 1)[0])
+
+
+class _SyntheticBucket:
+    """Generates object metadata for one bucket on demand."""
+
+    def __init__(self, spec: SyntheticBucketSpec):
+        self.spec = spec
+        self.pattern = random.Random(f"{spec.seed}:{spec.name}:pattern").randbytes(PATTERN_SIZE)
+        self.deleted = bytearray(spec.object_count)
+        self.bucket_deleted = False
+        self.restore_requests = 0
+        self.object_at = lru_cache(maxsize=4096)(self._generate)
+
+    def key_for(self, index: int) -> str:
+        """Return the key for index; keys sort in index order like S3 listings."""
+        directory = index // max(self.spec.keys_per_directory, 1)
+        return f"p{directory // 1000:04d}/d{directory % 1000:03d}/obj-{index:09d}.bin"
+
+    def _storage_class(self, rng: random.Random) -> str:
+        roll = rng.random()
+        cumulative = 0.0
+        for name, weight in self.spec.storage_mix:
+            cumulative += weight
+            if roll < cumulative:
+                return name
+        return self.spec.storage_mix[-1][0]
+
+    def _generate(self, index: int) -> SyntheticObject:
+        rng = random.Random(f"{self.spec.seed}:{self.spec.name}:{index}")
+        size = self.spec.sizes.sample(rng)
+        storage_class = self._storage_class(rng)
+        offset = rng.randrange(PATTERN_SIZE)
+        if size >= self.spec.multipart_threshold:
+            parts = -(-size // DEFAULT_PART_SIZE)
+            digest = hashlib.md5(f"{self.spec.name}:{index}:{size}".encode(), usedforsecurity=False).hexdigest()
+            etag = f"{digest}-{parts}"
+        else:
+            md5 = hashlib.md5(usedforsecurity=False)
+            for chunk in SyntheticBody(self.pattern, offset, size).iter_chunks():
+                md5.update(chunk)
+            etag = md5.hexdigest()
+        return SyntheticObject(index, self.key_for(index), size, storage_class, etag, offset)
+
+    def lookup(self, key: str) -> SyntheticObject:
+        """Return the live object stored under key."""
+        try:
+            index = _object_index(key)
+        except (IndexError, ValueError) as exc:
+            raise KeyError(key) from exc
+        if not 0 <= index < self.spec.object_count or self.deleted[index] or self.key_for(index) != key:
+            raise KeyError(key)
+        return self.object_at(index)
+
+    def live_indexes(self, start: int = 0) -> Iterator[int]:
+        """Yield indexes of objects that have not been deleted."""
+        for index in range(start, self.spec.object_count):
+            if not self.deleted[index]:
+                yield index
+
+
+class SyntheticS3Client:
+    """Multi-bucket simulated S3 client with lazily generated objects."""
+
+    def __init__(self, specs: Sequence[SyntheticBucketSpec], *, latency_seconds: float = 0.0):
+        self.buckets: Dict[str, _SyntheticBucket] = {spec.name: _SyntheticBucket(spec) for spec in specs}
+        self.latency_seconds = latency_seconds
+        self.request_counts: Dict[str, int] = {}
+        self._latency_event = Event()
+
+    def _request(self, operation: str):
+        self.request_counts[operation] = self.request_counts.get(operation, 0) + 1
+        if self.latency_seconds > 0:
+            self._latency_event.wait(self.latency_seconds)
+
+    def _bucket(self, name: str) -> _SyntheticBucket:
+        bucket = self.buckets.get(name)
+        if bucket is None or bucket.bucket_deleted:
+            raise RuntimeError(f"Unknown bucket {name}")
+        return bucket
+
+    def _object(self, bucket: str, key: str) -> SyntheticObject:
+        try:
+            return self._bucket(bucket).lookup(key)
+        except KeyError as exc:
+            raise RuntimeError(f"Missing object {bucket}/{key}") from exc
+
+    def list_buckets(self):
+        self._request("list_buckets")
+        return {"Buckets": [{"Name": name} for name, bucket in self.buckets.items() if not bucket.bucket_deleted]}
+
+    def get_paginator(self, operation_name: str):
+        if operation_name in {"list_objects_v2", "list_object_versions"}:
+            return _SyntheticPaginator(self, operation_name)
+        if operation_name == "list_multipart_uploads":
+            return _SyntheticEmptyPaginator(self, operation_name)
+        raise NotImplementedError(f"Unsupported paginator: {operation_name}")
+
+    def head_object(self, *, Bucket: str, Key: str):
+        self._request("head_object")
+        obj = self._object(Bucket, Key)
+        response = {"ContentLength": obj.size, "ETag": f'"{obj.etag}"', "StorageClass": obj.storage_class}
+        if obj.storage_class in {"GLACIER", "DEEP_ARCHIVE"}:
+            response["Restore"] = _RESTORED
+        return response
+
+    def restore_object(self, *, Bucket: str, Key: str, RestoreRequest: dict):  # pylint: disable=unused-argument
+        self._request("restore_object")
+        self._object(Bucket, Key)
+        self.buckets[Bucket].restore_requests += 1
+        return {}
+
+    def get_object(self, *, Bucket: str, Key: str, **kwargs):
+        self._request("get_object")
+        obj = self._object(Bucket, Key)
+        start = 0
+        byte_range = kwargs.get("Range")
+        if byte_range:
+            start = int(byte_range.removeprefix("bytes=").split("-", 1)[0])
+        length = max(obj.size - start, 0)
+        offset = (obj.pattern_offset + start) % PATTERN_SIZE
+        return {
+            "Body": SyntheticBody(self.buckets[Bucket].pattern, offset, length),
+            "ContentLength": length,
+            "ETag": f'"{obj.etag}"',
+        }
+
+    def delete_objects(self, *, Bucket: str, Delete: dict):
+        self._request("delete_objects")
+        bucket = self._bucket(Bucket)
+        deleted = []
+        for entry in Delete.get("Objects", []):
+            try:
+                obj = bucket.lookup(entry["Key"])
+            except KeyError:
+                continue
+            bucket.deleted[obj.index] = 1
+            deleted.append(entry)
+        return {"Deleted": deleted}
+
+    def delete_bucket(self, *, Bucket: str):
+        self._request("delete_bucket")
+        self._bucket(Bucket).bucket_deleted = True
+
+    def abort_multipart_upload(self, *, Bucket: str, Key: str, UploadId: str):
+        self._request("abort_multipart_upload")
+        self._bucket(Bucket)
+        return {"Aborted": True, "Key": Key, "UploadId": UploadId}
+
+
+class _SyntheticPaginator:
+    """Paginator yielding generated listings in S3 key order."""
+
+    def __init__(self, client: SyntheticS3Client, operation_name: str):
+        self.client = client
+        self.operation_name = operation_name
+
+    def paginate(self, Bucket: str, PaginationConfig: Optional[dict] = None, **_kwargs):
+        config = PaginationConfig or {}
+        page_size = int(config.get("PageSize", DEFAULT_PAGE_SIZE))
+        max_items = config.get("MaxItems")
+        bucket = self.client._bucket(Bucket)  # pylint: disable=protected-access
+        page: list = []
+        emitted = 0
+        for index in bucket.live_indexes():
+            if max_items is not None and emitted >= max_items:
+                break
+            page.append(self._entry(bucket.object_at(index)))
+            emitted += 1
+            if len(page) >= page_size:
+                yield self._page(page)
+                page = []
+        if page or emitted == 0:
+            yield self._page(page)
+
+    def _entry(self, obj: SyntheticObject) -> dict:
+        if self.operation_name == "list_object_versions":
+            return {"Key": obj.key, "VersionId": "null", "IsLatest": True, "Size": obj.size}
+        return obj.listing_entry()
+
+    def _page(self, entries: list) -> dict:
+        self.client._request(self.operation_name)  # pylint: disable=protected-access
+        if self.operation_name == "list_object_versions":
+            return {"Versions": entries} if entries else {}
+        if not entries:
+            return {"KeyCount": 0}
+        return {"Contents": entries, "KeyCount": len(entries)}
+
+
+class _SyntheticEmptyPaginator:
+    """Paginator that yields a single empty page after validating the bucket."""
+
+    def __init__(self, client: SyntheticS3Client, operation_name: str):
+        self.client = client
+        self.operation_name = operation_name
+
+    def paginate(self, Bucket: str, **_kwargs):
+        self.client._bucket(Bucket)  # pylint: disable=protected-access
+        self.client._request(self.operation_name)  # pylint: disable=protected-access
+        yield {}
+
+
+__all__ = [
+    "SIZE_DISTRIBUTIONS",
+    "SizeDistribution",
+    "SyntheticBody",
+    "SyntheticBucketSpec",
+    "SyntheticObject",
+    "SyntheticS3Client",
+    "parse_storage_mix",
+]
@@ -13,6 +13,8 @@ import sqlite3
 from dataclasses import dataclass
 from pathlib import Path
 
+from migration_state_compact import LAYOUT_COMPACT, files_layout
+
 from .cache import (  # pylint: disable=no-name-in-module
     CacheReadError,
     CacheValidationError,
@@ -61,14 +63,16 @@ class ScanContext:
 
 
 def _get_db_file_stats(conn: sqlite3.Connection) -> tuple[int, int]:
-    """Get total file count and max rowid from database."""
+    """Get total file count and a change marker (max rowid, or newest updated_ms for compact DBs)."""
     try:
         total_files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
     except sqlite3.OperationalError as exc:
         raise CandidateLoadError("Migration database missing expected 'files' table") from exc
 
+    # The compact ``files`` view sits on a WITHOUT ROWID table, so its rowid is always NULL.
+    marker_sql = "SELECT MAX(updated_ms) FROM file_records" if files_layout(conn) == LAYOUT_COMPACT else "SELECT MAX(rowid) FROM files"
     try:
-        max_rowid_row = conn.execute("SELECT MAX(rowid) FROM files").fetchone()
+        max_rowid_row = conn.execute(marker_sql).fetchone()
         max_rowid = max_rowid_row[0] if max_rowid_row and max_rowid_row[0] is not None else 0
     except sqlite3.OperationalError as exc:
         raise CandidateLoadError("Migration database missing expected 'rowid' column") from exc
@@ -9,11 +9,11 @@ from __future__ import annotations
 import csv
 import json
 import logging
-import shutil
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 from cost_toolkit.common.format_utils import format_bytes, parse_size
+from tree_deletion import DEFAULT_DELETE_WORKERS, TreeDeleter
 
 if TYPE_CHECKING:
     from cleanup_temp_artifacts.core_scanner import Candidate
@@ -78,26 +78,27 @@ def order_candidates(
     return sorted(candidates, key=lambda c: str(c.path))
 
 
-def delete_paths(candidates: list[Candidate], *, root: Path) -> list[tuple[Candidate, Exception]]:
+def delete_paths(
+    candidates: list[Candidate], *, root: Path, workers: int = DEFAULT_DELETE_WORKERS
+) -> list[tuple[Candidate, Exception]]:
     """Delete files and directories, returning list of (candidate, error) for failures."""
     errors: list[tuple[Candidate, Exception]] = []
-    for candidate in candidates:
-        resolved = candidate.path.resolve()
-        try:
-            resolved.relative_to(root)
-        except ValueError:
-            errors.append((candidate, ValueError(f"{resolved} escapes root {root}")))
-            continue
-        try:
-            if resolved.is_dir():
-                shutil.rmtree(resolved)
+    with TreeDeleter(workers) as deleter:
+        for candidate in candidates:
+            resolved = candidate.path.resolve()
+            try:
+                resolved.relative_to(root)
+            except ValueError:
+                errors.append((candidate, ValueError(f"{resolved} escapes root {root}")))
+                continue
+            try:
+                deleter.delete(resolved)
+            except OSError as exc:
+                logging.exception("Failed to delete %s", resolved)
+                errors.append((candidate, exc))
             else:
-                resolved.unlink()
-        except (OSError, shutil.Error) as exc:
-            logging.exception("Failed to delete %s", resolved)
-            errors.append((candidate, exc))
-        else:
-            logging.info("Deleted %s", resolved)
+                logging.info("Deleted %s", resolved)
+    logging.info("%s", deleter.progress.summary())
     return errors
 
 
@@ -26,6 +26,19 @@ STATE_DB_PATH: str = "s3_migration_state.db"
 GLACIER_RESTORE_DAYS: int = 1  # Days to keep restored file available
 GLACIER_RESTORE_TIER: str = "Standard"  # Options: Expedited, Standard, Bulk
 
+# Shared transfer scheduler: downloads from every pending bucket share one worker pool.
+# Set TRANSFER_WORKERS to 0 to sync one bucket at a time instead.
+TRANSFER_WORKERS: int = 8
+MAX_BYTES_IN_FLIGHT: int = 1024 * 1024 * 1024  # Admission budget across all in-flight downloads
+
+# Durability of downloaded files. Each download is written to a temp name and renamed into place;
+# "none" leaves flushing to the OS, "file" fsyncs every file and its directory,
+# "batch" fsyncs files and directories together every DURABILITY_BATCH_FILES files or DURABILITY_BATCH_BYTES bytes.
+DURABILITY_MODE: str = "batch"
+DURABILITY_BATCH_FILES: int = 1000
+DURABILITY_BATCH_BYTES: int = 1024 * 1024 * 1024
+DOWNLOAD_READ_SIZE: int = 8 * 1024 * 1024  # Bytes per read from the S3 response stream
+
 # Bucket exclusions
 # Set this in config_local.py (not committed to git)
 # Add bucket names to skip during scanning (e.g., buckets you don't own or can't access)
@@ -0,0 +1,11 @@
+"""File-level duplicate detection package."""
+
+from __future__ import annotations
+
+from .core import DuplicateFileSet, FileCandidate, find_duplicate_files
+
+__all__ = [
+    "DuplicateFileSet",
+    "FileCandidate",
+    "find_duplicate_files",
+]
@@ -0,0 +1,57 @@
+"""Hash cache for file-level duplicate detection, stored in the state DB."""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from duplicate_files.core import FileCandidate
+
+HASH_CACHE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS duplicate_file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    partial_hash TEXT,
+    full_hash TEXT
+) WITHOUT ROWID
+"""
+
+# (partial hash, full hash); either may be None when that stage never ran for the file.
+CachedHashes = Tuple[Optional[str], Optional[str]]
+
+
+class HashCache:
+    """Partial and full hashes from earlier runs, trusted while a file's size and mtime are unchanged."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._pending: Dict[FileCandidate, CachedHashes] = {}
+        conn.execute(HASH_CACHE_TABLE_SQL)
+        conn.commit()
+
+    def get(self, candidate: FileCandidate) -> CachedHashes:
+        """Return the cached hashes for a file, or (None, None) when it is unknown or changed."""
+        if candidate in self._pending:
+            return self._pending[candidate]
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, partial_hash, full_hash FROM duplicate_file_hashes WHERE path = ?",
+            (str(candidate.path),),
+        ).fetchone()
+        if row is None or (row[0], row[1]) != (candidate.size, candidate.mtime_ns):
+            return None, None
+        return row[2], row[3]
+
+    def put(self, candidate: FileCandidate, partial_hash: Optional[str], full_hash: Optional[str]):
+        """Record hashes for a file; written on the next flush()."""
+        self._pending[candidate] = (partial_hash, full_hash)
+
+    def flush(self):
+        """Write recorded hashes and commit, so an interrupted run keeps finished stages."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO duplicate_file_hashes (path, size, mtime_ns, partial_hash, full_hash) VALUES (?, ?, ?, ?, ?)",
+            [(str(candidate.path), candidate.size, candidate.mtime_ns, *hashes) for candidate, hashes in self._pending.items()],
+        )
+        self._conn.commit()
+        self._pending.clear()
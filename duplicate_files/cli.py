@@ -0,0 +1,113 @@
+"""CLI workflow for file-level duplicate detection."""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Sequence
+
+import config as config_module
+from cost_toolkit.common.cli_utils import (
+    create_migration_cli_parser,
+    handle_state_db_reset,
+)
+from cost_toolkit.common.format_utils import parse_size
+from duplicate_files.core import (
+    DEFAULT_HASH_WORKERS,
+    DEFAULT_MIN_SIZE,
+    find_duplicate_files,
+    total_stored_bytes,
+)
+from duplicate_files.reporting import render_duplicate_sets, render_summary
+from state_db_admin import reseed_state_db_from_local_drive
+
+
+def _parse_size_argparse(value: str) -> int:
+    """Argparse wrapper for canonical parse_size in format_utils."""
+    return parse_size(value, for_argparse=True)
+
+
+def _add_module_specific_args(parser: argparse.ArgumentParser) -> None:
+    """Add duplicate_files-specific arguments to the parser."""
+    parser.add_argument(
+        "--min-size",
+        type=_parse_size_argparse,
+        default=DEFAULT_MIN_SIZE,
+        help="Minimum file size to consider (accepts suffixes like 512K, 1M). Default: 1M",
+    )
+    parser.add_argument(
+        "--bucket",
+        action="append",
+        dest="buckets",
+        default=[],
+        help="Optional bucket filter. Repeat --bucket for multiple buckets.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_HASH_WORKERS,
+        help="Threads reading files for the partial and full hashes (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        help="Report at most this many duplicate sets, largest first (0 means no limit).",
+    )
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Parse CLI arguments for the file-level duplicate report."""
+    # pylint: disable=no-member  # Attributes imported from config_local at runtime
+    parser = create_migration_cli_parser(
+        description=(
+            "Find identical files on the external drive: group by size from migrate_v2's SQLite "
+            "metadata, then by a head/tail hash, and fully hash only the files that still collide."
+        ),
+        db_path_default=config_module.STATE_DB_PATH,
+        base_path_default=config_module.LOCAL_BASE_PATH,
+        add_custom_args=_add_module_specific_args,
+    )
+    # pylint: enable=no-member
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the file-level duplicate report workflow."""
+    args = parse_args(argv)
+    base_path = Path(args.base_path).expanduser()
+    db_path = Path(args.db_path).expanduser()
+
+    db_path = handle_state_db_reset(base_path, db_path, args.reset_state_db, args.yes, reseed_state_db_from_local_drive)
+
+    if not db_path.exists():
+        print(f"State DB not found at {db_path}. Run migrate_v2 first.", file=sys.stderr)
+        return 1
+
+    print(f"Using database: {db_path}")
+    print(f"Assumed drive root: {base_path}")
+    buckets = sorted(set(args.buckets))
+    stats: Counter = Counter()
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    try:
+        sets = find_duplicate_files(
+            conn,
+            base_path,
+            min_size=max(0, args.min_size),
+            buckets=buckets,
+            workers=max(1, args.workers),
+            stats=stats,
+        )
+        naive_bytes = total_stored_bytes(conn, buckets)
+    finally:
+        conn.close()
+
+    reported = sets[: args.limit] if args.limit > 0 else sets
+    print(render_duplicate_sets(reported), end="")
+    print(render_summary(sets, stats, naive_bytes), end="")
+    print("Done.")
+    return 0
@@ -0,0 +1,266 @@
+"""Staged file-level duplicate detection.
+
+Candidates are narrowed in three stages so most files are never read in full:
+
+1. files sharing a size in the state DB (one SQL GROUP BY, no disk reads);
+2. a SHA-256 of the first and last PARTIAL_READ_BYTES of each remaining file;
+3. a full SHA-256 of the files that still collide.
+
+Stages 2 and 3 read files on a thread pool (hashlib releases the GIL), and their results
+are cached in the state DB keyed by local path, size and mtime, so re-runs only read
+files that changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import stat
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from duplicate_files.cache import HashCache
+from migration_utils import derive_local_path, hash_file_in_chunks
+from migration_verify_common import should_ignore_key
+
+PARTIAL_READ_BYTES = 16 * 1024
+DEFAULT_MIN_SIZE = 1024 * 1024  # 1 MiB
+# Reads dominate; a few concurrent readers keep SSDs and RAID busy without thrashing a single HDD.
+DEFAULT_HASH_WORKERS = 4
+PROGRESS_EVERY = 1000
+
+
+@dataclass(frozen=True)
+class FileCandidate:
+    """A local file that shares its size with at least one other file."""
+
+    bucket: str
+    key: str
+    path: Path
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class DuplicateFileSet:
+    """Files with identical content."""
+
+    size: int
+    digest: str
+    files: List[FileCandidate]
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        """Bytes freed by keeping a single copy."""
+        return self.size * (len(self.files) - 1)
+
+
+def _bucket_filter(buckets: Sequence[str]) -> tuple[str, list[object]]:
+    if not buckets:
+        return "", []
+    return f" AND bucket IN ({','.join('?' for _ in buckets)})", list(buckets)
+
+
+def size_collision_rows(conn: sqlite3.Connection, min_size: int, buckets: Sequence[str]) -> Iterator[sqlite3.Row]:
+    """Yield (bucket, key, size) rows whose size is shared by another row, smallest size first."""
+    bucket_sql, bucket_params = _bucket_filter(buckets)
+    cursor = conn.execute(
+        f"""
+        SELECT bucket, key, size FROM files
+        WHERE size IN (
+            SELECT size FROM files WHERE size >= ?{bucket_sql} GROUP BY size HAVING COUNT(*) > 1
+        ){bucket_sql}
+        ORDER BY size, bucket, key
+        """,
+        [min_size, *bucket_params, *bucket_params],
+    )
+    yield from cursor
+
+
+def total_stored_bytes(conn: sqlite3.Connection, buckets: Sequence[str]) -> int:
+    """Bytes a naive full hash of every tracked file would read."""
+    bucket_sql, bucket_params = _bucket_filter(buckets)
+    return conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM files WHERE 1 = 1{bucket_sql}", bucket_params).fetchone()[0]
+
+
+def _stat_regular_file(base_path: Path, bucket: str, key: str, stats: Counter) -> Optional[tuple[Path, os.stat_result]]:
+    """Return (local path, stat) for a row's regular file, or None after counting why it was skipped."""
+    if should_ignore_key(key):
+        stats["skipped_ignored"] += 1
+        return None
+    local_path = derive_local_path(base_path, bucket, key)
+    if local_path is None:
+        stats["skipped_invalid_path"] += 1
+        return None
+    try:
+        info = local_path.stat()
+    except OSError:
+        stats["missing_local_files"] += 1
+        return None
+    if not stat.S_ISREG(info.st_mode):
+        stats["skipped_non_file"] += 1
+        return None
+    return local_path, info
+
+
+def collect_size_groups(
+    conn: sqlite3.Connection,
+    base_path: Path,
+    min_size: int,
+    buckets: Sequence[str],
+    stats: Counter,
+) -> List[List[FileCandidate]]:
+    """Group files present on disk by size, keeping only sizes shared by two or more distinct files.
+
+    Sizes come from stat(), so a file that changed since the scan lands in its real group;
+    paths that are already hard links to one another count once.
+    """
+    groups: Dict[int, List[FileCandidate]] = {}
+    seen_inodes: set[tuple[int, int]] = set()
+    for row in size_collision_rows(conn, min_size, buckets):
+        stats["rows_examined"] += 1
+        bucket, key = row["bucket"], row["key"]
+        found = _stat_regular_file(base_path, bucket, key, stats)
+        if found is None:
+            continue
+        local_path, info = found
+        if (info.st_dev, info.st_ino) in seen_inodes:
+            stats["already_linked"] += 1
+            continue
+        seen_inodes.add((info.st_dev, info.st_ino))
+        if info.st_size != row["size"]:
+            stats["size_changed"] += 1
+            if info.st_size < min_size:
+                continue
+        groups.setdefault(info.st_size, []).append(
+            FileCandidate(bucket=bucket, key=key, path=local_path, size=info.st_size, mtime_ns=info.st_mtime_ns)
+        )
+    return [files for files in groups.values() if len(files) > 1]
+
+
+def is_fully_read_by_partial(size: int) -> bool:
+    """True when the head and tail reads cover the whole file, making the partial hash a full hash."""
+    return size <= 2 * PARTIAL_READ_BYTES
+
+
+def partial_hash(candidate: FileCandidate) -> Optional[str]:
+    """SHA-256 of the first and last PARTIAL_READ_BYTES, or of the whole file when it is that small."""
+    hasher = hashlib.sha256()
+    try:
+        with open(candidate.path, "rb") as handle:
+            if is_fully_read_by_partial(candidate.size):
+                hasher.update(handle.read())
+            else:
+                hasher.update(handle.read(PARTIAL_READ_BYTES))
+                handle.seek(-PARTIAL_READ_BYTES, os.SEEK_END)
+                hasher.update(handle.read(PARTIAL_READ_BYTES))
+    except OSError:
+        return None
+    return hasher.hexdigest()
+
+
+def full_hash(candidate: FileCandidate) -> Optional[str]:
+    """SHA-256 of the whole file, or None when it cannot be read."""
+    hasher = hashlib.sha256()
+    try:
+        hash_file_in_chunks(candidate.path, hasher)
+    except OSError:
+        return None
+    return hasher.hexdigest()
+
+
+def _hash_with_progress(
+    pool: ThreadPoolExecutor,
+    hasher: Callable[[FileCandidate], Optional[str]],
+    files: List[FileCandidate],
+    label: str,
+) -> List[Optional[str]]:
+    digests: List[Optional[str]] = []
+    for done, digest in enumerate(pool.map(hasher, files), start=1):
+        digests.append(digest)
+        if done % PROGRESS_EVERY == 0 or done == len(files):
+            print(f"\r  {label}: {done:,}/{len(files):,} files", end="", flush=True)
+    if files:
+        print()
+    return digests
+
+
+def _regroup(
+    groups: List[List[FileCandidate]], digests: Dict[FileCandidate, Optional[str]], stats: Counter
+) -> List[tuple[str, List[FileCandidate]]]:
+    """Split each group by digest, keeping (digest, files) sub-groups that still have two or more files."""
+    regrouped: List[tuple[str, List[FileCandidate]]] = []
+    for group in groups:
+        by_digest: Dict[str, List[FileCandidate]] = {}
+        for candidate in group:
+            digest = digests[candidate]
+            if digest is None:
+                stats["unreadable"] += 1
+                continue
+            by_digest.setdefault(digest, []).append(candidate)
+        for digest, files in by_digest.items():
+            if len(files) > 1:
+                regrouped.append((digest, files))
+    return regrouped
+
+
+def _partial_stage(
+    groups: List[List[FileCandidate]], cache: HashCache, pool: ThreadPoolExecutor, stats: Counter
+) -> List[List[FileCandidate]]:
+    files = [candidate for group in groups for candidate in group]
+    digests = {candidate: cache.get(candidate)[0] for candidate in files}
+    todo = [candidate for candidate in files if digests[candidate] is None]
+    stats["partial_cached"] += len(files) - len(todo)
+    for candidate, digest in zip(todo, _hash_with_progress(pool, partial_hash, todo, "Partial hashing")):
+        digests[candidate] = digest
+        stats["bytes_read"] += min(candidate.size, 2 * PARTIAL_READ_BYTES)
+        if digest is not None:
+            cache.put(candidate, digest, digest if is_fully_read_by_partial(candidate.size) else None)
+    cache.flush()
+    return [files for _, files in _regroup(groups, digests, stats)]
+
+
+def _full_stage(
+    groups: List[List[FileCandidate]], cache: HashCache, pool: ThreadPoolExecutor, stats: Counter
+) -> List[tuple[str, List[FileCandidate]]]:
+    files = [candidate for group in groups for candidate in group]
+    cached = {candidate: cache.get(candidate) for candidate in files}
+    digests = {candidate: hashes[1] for candidate, hashes in cached.items()}
+    todo = [candidate for candidate in files if digests[candidate] is None]
+    stats["full_cached"] += len(files) - len(todo)
+    for candidate, digest in zip(todo, _hash_with_progress(pool, full_hash, todo, "Full hashing")):
+        digests[candidate] = digest
+        stats["bytes_read"] += candidate.size
+        if digest is not None:
+            cache.put(candidate, cached[candidate][0], digest)
+    cache.flush()
+    return _regroup(groups, digests, stats)
+
+
+def find_duplicate_files(
+    conn: sqlite3.Connection,
+    base_path: Path,
+    *,
+    min_size: int = DEFAULT_MIN_SIZE,
+    buckets: Sequence[str] = (),
+    workers: int = DEFAULT_HASH_WORKERS,
+    stats: Optional[Counter] = None,
+) -> List[DuplicateFileSet]:
+    """Return sets of identical files at least min_size bytes, most reclaimable bytes first."""
+    stats = stats if stats is not None else Counter()
+    cache = HashCache(conn)
+    groups = collect_size_groups(conn, base_path, min_size, buckets, stats)
+    stats["size_candidates"] = sum(len(group) for group in groups)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="dedupe-hash") as pool:
+        groups = _partial_stage(groups, cache, pool, stats)
+        stats["partial_candidates"] = sum(len(group) for group in groups)
+        duplicates = _full_stage(groups, cache, pool, stats)
+    sets = [
+        DuplicateFileSet(size=files[0].size, digest=digest, files=sorted(files, key=lambda c: (c.bucket, c.key)))
+        for digest, files in duplicates
+    ]
+    return sorted(sets, key=lambda item: (-item.reclaimable_bytes, item.files[0].bucket, item.files[0].key))
@@ -0,0 +1,52 @@
+"""Report rendering for file-level duplicate detection."""
+
+from __future__ import annotations
+
+import io
+from collections import Counter
+from typing import Sequence
+
+from cost_toolkit.common.format_utils import format_bytes
+from duplicate_files.core import DuplicateFileSet
+
+
+def render_duplicate_sets(sets: Sequence[DuplicateFileSet]) -> str:
+    """Generate the human-readable list of duplicate file sets."""
+    buffer = io.StringIO()
+    if not sets:
+        buffer.write("No duplicate files found.\n")
+        return buffer.getvalue()
+    buffer.write("\n")
+    buffer.write("=" * 70 + "\n")
+    buffer.write("DUPLICATE FILES\n")
+    buffer.write("=" * 70 + "\n")
+    for idx, duplicate_set in enumerate(sets, start=1):
+        buffer.write(
+            f"[{idx}] {len(duplicate_set.files)} copies of {format_bytes(duplicate_set.size)}, "
+            f"{format_bytes(duplicate_set.reclaimable_bytes)} reclaimable\n"
+        )
+        for candidate in duplicate_set.files:
+            buffer.write(f"  - {candidate.path}\n")
+        buffer.write("\n")
+    return buffer.getvalue()
+
+
+def render_summary(sets: Sequence[DuplicateFileSet], stats: Counter, naive_bytes: int) -> str:
+    """Summarize how far each stage narrowed the candidates and how much data was read."""
+    reclaimable = sum(duplicate_set.reclaimable_bytes for duplicate_set in sets)
+    files = sum(len(duplicate_set.files) for duplicate_set in sets)
+    share = stats["bytes_read"] / naive_bytes * 100 if naive_bytes else 0.0
+    lines = [
+        f"Same size:           {stats['size_candidates']:,} files",
+        f"Same head/tail hash: {stats['partial_candidates']:,} files ({stats['partial_cached']:,} cached)",
+        f"Same full hash:      {files:,} files in {len(sets):,} sets ({stats['full_cached']:,} cached)",
+        f"Read from disk:      {format_bytes(stats['bytes_read'])} "
+        f"({share:.2f}% of the {format_bytes(naive_bytes)} a full hash would read)",
+        f"Reclaimable:         {format_bytes(reclaimable)}",
+    ]
+    skipped = {
+        name: count for name, count in stats.items() if name.startswith(("missing", "skipped", "unreadable", "size_changed", "already"))
+    }
+    if skipped:
+        lines.append("Skipped:             " + ", ".join(f"{name}={count:,}" for name, count in sorted(skipped.items())))
+    return "\n".join(lines) + "\n"
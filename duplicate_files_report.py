@@ -0,0 +1,21 @@
+"""Public API for file-level duplicate detection plus CLI shim."""
+
+from __future__ import annotations
+
+from duplicate_files.cli import main
+from duplicate_files.core import (
+    DuplicateFileSet,
+    FileCandidate,
+    find_duplicate_files,
+)
+
+__all__ = [
+    "DuplicateFileSet",
+    "FileCandidate",
+    "find_duplicate_files",
+    "main",
+]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
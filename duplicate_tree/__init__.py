@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
-from . import analysis, cache, cli, deletion, workflow
+from . import analysis, cache, cli, deletion, linking, similarity, workflow
 
 __all__ = [
     "analysis",
     "cache",
     "cli",
     "deletion",
+    "linking",
+    "similarity",
     "workflow",
 ]
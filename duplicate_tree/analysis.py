@@ -14,10 +14,12 @@ from cost_toolkit.common.format_utils import format_bytes
 from duplicate_tree.core import (
     DirectoryIndex,
     DuplicateCluster,
-    find_exact_duplicates,
 )
+from duplicate_tree.signatures import DEFAULT_SIGNATURE_WORKERS
 from duplicate_tree_models import (
+    DirectoryNode,
     FilesTableReadError,
+    NearDuplicatePair,
     PathTuple,
     ProgressPrinter,
 )
@@ -38,51 +40,54 @@ class ScanFingerprint:
     checksum: str
 
 
-def build_directory_index_from_db(  # pylint: disable=too-many-locals
-    db_path: str, progress_label: str = "Scanning files"
+def scan_files_table(
+    conn: sqlite3.Connection, db_path: str, progress_label: str = "Scanning files"
 ) -> tuple[DirectoryIndex, ScanFingerprint]:
-    """Stream the files table and construct the in-memory directory index."""
+    """Stream the files table on conn into an index that still needs finalize()."""
     index = DirectoryIndex()
+    try:
+        total_files = conn.execute("SELECT COUNT(*) FROM files WHERE key NOT LIKE '%/'").fetchone()[0]
+    except sqlite3.OperationalError as exc:
+        raise FilesTableReadError(db_path) from exc
+    progress = ProgressPrinter(total_files, progress_label)
+    start_time = time.time()
+    cursor = conn.execute(
+        """
+        SELECT bucket, key, size,
+               COALESCE(local_checksum, etag, '') AS checksum
+        FROM files
+        ORDER BY bucket, key
+        """
+    )
+    processed = 0
+    hasher = hashlib.sha256()
+    try:
+        for processed, (bucket, key, size, checksum) in enumerate(cursor, start=1):
+            checksum = checksum or ""
+            index.add_file(bucket, key, size, checksum)
+            for value in (bucket, key, str(size), checksum):
+                hasher.update(value.encode("utf-8"))
+                hasher.update(b"\0")
+            progress.update(processed)
+    except KeyboardInterrupt:
+        print("\n\n✗ Scan interrupted by user.")
+        raise
+    finally:
+        elapsed = time.time() - start_time
+        progress.finish(f"{progress_label} processed {processed:,}/{total_files:,} files in {elapsed:.1f}s")
+    return index, ScanFingerprint(total_files=total_files, checksum=hasher.hexdigest())
+
+
+def build_directory_index_from_db(
+    db_path: str, progress_label: str = "Scanning files", workers: int = DEFAULT_SIGNATURE_WORKERS
+) -> tuple[DirectoryIndex, ScanFingerprint]:
+    """Stream the files table and construct the in-memory directory index (signed with workers processes)."""
     conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
     try:
-        try:
-            total_files = conn.execute("SELECT COUNT(*) FROM files WHERE key NOT LIKE '%/'").fetchone()[0]
-        except sqlite3.OperationalError as exc:
-            raise FilesTableReadError(db_path) from exc
-        progress = ProgressPrinter(total_files, progress_label)
-        start_time = time.time()
-        cursor = conn.execute(
-            """
-            SELECT bucket, key, size,
-                   COALESCE(local_checksum, etag, '') AS checksum
-            FROM files
-            ORDER BY bucket, key
-            """
-        )
-        processed = 0
-        hasher = hashlib.sha256()
-        try:
-            for processed, row in enumerate(cursor, start=1):
-                checksum = row["checksum"] if row["checksum"] else ""
-                bucket = row["bucket"]
-                key = row["key"]
-                size = row["size"]
-                index.add_file(bucket, key, size, checksum)
-                for value in (bucket, key, str(size), checksum):
-                    hasher.update(value.encode("utf-8"))
-                    hasher.update(b"\0")
-                progress.update(processed)
-        except KeyboardInterrupt:
-            print("\n\n✗ Scan interrupted by user.")
-            raise
-        finally:
-            elapsed = time.time() - start_time
-            progress.finish(f"{progress_label} processed {processed:,}/{total_files:,} files in {elapsed:.1f}s")
+        index, fingerprint = scan_files_table(conn, db_path, progress_label)
     finally:
         conn.close()
-    index.finalize()
-    fingerprint = ScanFingerprint(total_files=total_files, checksum=hasher.hexdigest())
+    index.finalize(workers=workers)
     return index, fingerprint
 
 
@@ -96,9 +101,15 @@ def apply_thresholds(clusters: Sequence[DuplicateCluster], min_files: int, min_b
     return filtered
 
 
-def cache_key(fingerprint: ScanFingerprint, min_files: int, min_bytes: int) -> str:
-    """Build cache key from fingerprint and thresholds."""
-    return f"{fingerprint.checksum}|files>{min_files}|bytes>={min_bytes}"
+def _node_rows(nodes: Sequence[DirectoryNode]) -> List[NodeRow]:
+    return [
+        {
+            "path": list(node.path),
+            "total_files": node.total_files,
+            "total_size": node.total_size,
+        }
+        for node in nodes
+    ]
 
 
 def clusters_to_rows(clusters: Sequence[DuplicateCluster]) -> List[Dict[str, Any]]:
@@ -107,14 +118,7 @@ def clusters_to_rows(clusters: Sequence[DuplicateCluster]) -> List[Dict[str, Any
     for cluster in clusters:
         if not cluster.nodes:
             continue
-        node_rows = [
-            {
-                "path": list(node.path),
-                "total_files": node.total_files,
-                "total_size": node.total_size,
-            }
-            for node in cluster.nodes
-        ]
+        node_rows = _node_rows(cluster.nodes)
         rows.append(
             {
                 "total_files": node_rows[0]["total_files"],
@@ -125,6 +129,18 @@ def clusters_to_rows(clusters: Sequence[DuplicateCluster]) -> List[Dict[str, Any
     return rows
 
 
+def near_duplicates_to_rows(pairs: Sequence[NearDuplicatePair]) -> List[ClusterRow]:
+    """Convert near-duplicate pairs to serializable row format."""
+    return [
+        {
+            "similarity": pair.similarity,
+            "reclaimable_bytes": pair.reclaimable_bytes,
+            "nodes": _node_rows(pair.nodes),
+        }
+        for pair in pairs
+    ]
+
+
 def render_report_rows(cluster_rows: List[ClusterRow], base_path: Path) -> str:
     """Generate human-readable report from cluster rows."""
     buffer = io.StringIO()
@@ -146,6 +162,27 @@ def render_report_rows(cluster_rows: List[ClusterRow], base_path: Path) -> str:
     return buffer.getvalue()
 
 
+def render_near_duplicate_rows(pair_rows: List[ClusterRow], base_path: Path, threshold: float) -> str:
+    """Generate the human-readable near-duplicate section from pair rows."""
+    buffer = io.StringIO()
+    if not pair_rows:
+        buffer.write(f"No near-duplicate directories found at {threshold:.0%} similarity.\n")
+        return buffer.getvalue()
+    buffer.write("\n")
+    buffer.write("=" * 70 + "\n")
+    buffer.write(f"NEAR-DUPLICATE TREES (similarity >= {threshold:.0%})\n")
+    buffer.write("=" * 70 + "\n")
+    for idx, pair in enumerate(pair_rows, start=1):
+        buffer.write(f"[{idx}] ~{pair['similarity']:.0%} similar, ~{format_bytes(pair['reclaimable_bytes'])} reclaimable\n")
+        for node in pair["nodes"]:
+            buffer.write(
+                f"  - {format_bytes(node['total_size']):>12}  {node['total_files']:>8,} files  "
+                f"{path_on_disk(base_path, tuple(node['path']))}\n"
+            )
+        buffer.write("\n")
+    return buffer.getvalue()
+
+
 def sort_node_rows(node_rows: Sequence[NodeRow]) -> List[NodeRow]:
     """Sort node rows by size (desc) then path for deterministic output."""
     return sorted(
@@ -157,15 +194,3 @@ def sort_node_rows(node_rows: Sequence[NodeRow]) -> List[NodeRow]:
 def path_on_disk(base_path: Path, node_path: PathTuple) -> Path:
     """Construct filesystem path from base path and node path tuple."""
     return base_path.joinpath(*node_path)
-
-
-def recompute_clusters_for_deletion(index: DirectoryIndex, min_files: int, min_bytes: int) -> List[ClusterRow]:
-    """Recompute duplicate clusters when cached data lacks structured rows."""
-    clusters = find_exact_duplicates(index)
-    clusters = apply_thresholds(clusters, min_files, min_bytes)
-    clusters = sorted(
-        clusters,
-        key=lambda c: c.nodes[0].total_size if c.nodes else 0,
-        reverse=True,
-    )
-    return clusters_to_rows(clusters)
@@ -1,140 +1,193 @@
-"""Cache management for duplicate tree analysis results."""
+"""Cache management for duplicate tree analysis results.
+
+The unfiltered cluster set of the latest snapshot is stored in normalized tables
+(one row per cluster and per member directory, with the member totals indexed), so
+any ``--min-files``/``--min-size-gb`` combination is answered by a SQL query and
+large reports can be read one page at a time.
+"""
 
 from __future__ import annotations
 
 import json
 import sqlite3
 from datetime import datetime, timezone
-from typing import Optional, Sequence, TypedDict, cast
+from typing import Dict, List, Optional, Sequence, TypedDict
 
 from duplicate_tree.analysis import (
-    MIN_REPORT_BYTES,
-    MIN_REPORT_FILES,
+    MIN_DUPLICATE_NODES,
     ClusterRow,
     ScanFingerprint,
-    cache_key,
-    clusters_to_rows,
 )
 from duplicate_tree.core import DuplicateCluster
 
-CACHE_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS duplicate_tree_cache (
+CLUSTER_SETS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS duplicate_tree_cluster_sets (
+    fingerprint TEXT PRIMARY KEY,
+    total_files INTEGER NOT NULL,
+    generated_at TEXT NOT NULL
+)
+"""
+CLUSTERS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS duplicate_tree_clusters (
+    cluster_id INTEGER PRIMARY KEY,
     fingerprint TEXT NOT NULL,
-    tolerance REAL NOT NULL,
-    base_path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    signature TEXT NOT NULL
+)
+"""
+CLUSTERS_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_duplicate_tree_clusters_fingerprint ON duplicate_tree_clusters(fingerprint, position)"
+MEMBERS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS duplicate_tree_cluster_members (
+    cluster_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    path TEXT NOT NULL,
     total_files INTEGER NOT NULL,
-    generated_at TEXT NOT NULL,
-    report TEXT NOT NULL,
-    PRIMARY KEY (fingerprint, tolerance, base_path)
+    total_size INTEGER NOT NULL,
+    PRIMARY KEY (cluster_id, position)
+) WITHOUT ROWID
+"""
+MEMBERS_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_duplicate_tree_cluster_members_totals "
+    "ON duplicate_tree_cluster_members(total_size, total_files)"
+)
+# Superseded single-blob cache; dropped the first time the normalized tables are created.
+LEGACY_CACHE_TABLE = "duplicate_tree_cache"
+
+_QUALIFYING_CTE = """
+WITH qualifying AS (
+    SELECT m.cluster_id, m.position, m.total_size
+    FROM duplicate_tree_cluster_members AS m
+    JOIN duplicate_tree_clusters AS c ON c.cluster_id = m.cluster_id
+    WHERE c.fingerprint = :fingerprint AND m.total_files > :min_files AND m.total_size >= :min_bytes
+),
+kept AS (
+    SELECT cluster_id, MIN(position) AS lead_position
+    FROM qualifying
+    GROUP BY cluster_id
+    HAVING COUNT(*) >= :min_nodes
 )
 """
 
-EXACT_TOLERANCE = 1.0
 
-
-class CachedReportBase(TypedDict):
-    """Common metadata for cached duplicate analysis reports."""
+class CachedReport(TypedDict):
+    """One page of cached duplicate clusters that pass the requested thresholds."""
 
     generated_at: str
-    total_files: str
-
+    total_files: int
+    total_clusters: int
+    rows: List[ClusterRow]
 
-class CachedRowsReport(CachedReportBase):
-    """Cached report containing parsed cluster rows."""
 
-    rows: list[ClusterRow]
-
-
-class CachedRawReport(CachedReportBase):
-    """Cached report containing the raw JSON payload."""
-
-    rows: list[ClusterRow]
-    report: str
-
-
-CachedReport = CachedRowsReport | CachedRawReport
-
-
-def ensure_cache_table(conn: sqlite3.Connection):
-    """Create cache table if it doesn't exist."""
-    conn.execute(CACHE_TABLE_SQL)
+def ensure_cache_tables(conn: sqlite3.Connection):
+    """Create the cluster cache tables if they don't exist."""
+    for statement in (CLUSTER_SETS_TABLE_SQL, CLUSTERS_TABLE_SQL, CLUSTERS_INDEX_SQL, MEMBERS_TABLE_SQL, MEMBERS_INDEX_SQL):
+        conn.execute(statement)
+    conn.execute(f"DROP TABLE IF EXISTS {LEGACY_CACHE_TABLE}")
     conn.commit()
 
 
-def load_cached_report(
+def _page_cluster_ids(conn: sqlite3.Connection, params: Dict[str, object]) -> List[int]:
+    """Cluster ids on the page, largest lead directory first and discovery order for ties."""
+    rows = conn.execute(
+        _QUALIFYING_CTE
+        + """
+        SELECT k.cluster_id
+        FROM kept AS k
+        JOIN qualifying AS q ON q.cluster_id = k.cluster_id AND q.position = k.lead_position
+        JOIN duplicate_tree_clusters AS c ON c.cluster_id = k.cluster_id
+        ORDER BY q.total_size DESC, c.position
+        LIMIT :limit OFFSET :offset
+        """,
+        params,
+    )
+    return [row[0] for row in rows]
+
+
+def _page_rows(conn: sqlite3.Connection, cluster_ids: List[int], params: Dict[str, object]) -> List[ClusterRow]:
+    """Build clusters_to_rows-shaped rows holding only the members that pass the thresholds."""
+    nodes: Dict[int, List[Dict[str, object]]] = {cluster_id: [] for cluster_id in cluster_ids}
+    placeholders = ", ".join("?" * len(cluster_ids))
+    for cluster_id, path, total_files, total_size in conn.execute(
+        f"""
+        SELECT cluster_id, path, total_files, total_size
+        FROM duplicate_tree_cluster_members
+        WHERE cluster_id IN ({placeholders}) AND total_files > ? AND total_size >= ?
+        ORDER BY cluster_id, position
+        """,
+        (*cluster_ids, params["min_files"], params["min_bytes"]),
+    ):
+        nodes[cluster_id].append({"path": json.loads(path), "total_files": total_files, "total_size": total_size})
+    return [
+        {"total_files": members[0]["total_files"], "total_size": members[0]["total_size"], "nodes": members}
+        for members in (nodes[cluster_id] for cluster_id in cluster_ids)
+    ]
+
+
+def load_cached_report(  # pylint: disable=too-many-arguments
     db_path: str,
     fingerprint: ScanFingerprint,
-    base_path: str,
-    min_files: int = MIN_REPORT_FILES,
-    min_bytes: int = MIN_REPORT_BYTES,
+    min_files: int,
+    min_bytes: int,
+    *,
+    limit: Optional[int] = None,
+    offset: int = 0,
 ) -> Optional[CachedReport]:
-    """Return cached report metadata if it matches the current snapshot."""
+    """Return the cached clusters passing the thresholds, or None when the snapshot is not cached.
+
+    Rows match ``clusters_to_rows(apply_thresholds(...))`` sorted by size; limit/offset select a page.
+    """
     conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
     try:
-        ensure_cache_table(conn)
-        key = cache_key(fingerprint, min_files, min_bytes)
-        row = conn.execute(
-            """
-            SELECT total_files, generated_at, report
-            FROM duplicate_tree_cache
-            WHERE fingerprint = ? AND tolerance = ? AND base_path = ?
-            """,
-            (key, EXACT_TOLERANCE, base_path),
+        ensure_cache_tables(conn)
+        snapshot = conn.execute(
+            "SELECT total_files, generated_at FROM duplicate_tree_cluster_sets WHERE fingerprint = ?",
+            (fingerprint.checksum,),
         ).fetchone()
-        if row is None:
-            return None
-        if row["total_files"] != fingerprint.total_files:
+        if snapshot is None or snapshot[0] != fingerprint.total_files:
             return None
-        payload = row["report"]
-        try:
-            rows = cast(list[ClusterRow], json.loads(payload))
-            return {
-                "generated_at": row["generated_at"],
-                "rows": rows,
-                "total_files": str(row["total_files"]),
-            }
-        except json.JSONDecodeError:
-            print(f"⚠️  Cached report has corrupted JSON payload. Generated at: {row['generated_at']}")
-            return {
-                "generated_at": row["generated_at"],
-                "rows": [],
-                "total_files": str(row["total_files"]),
-                "report": payload,
-            }
+        params: Dict[str, object] = {
+            "fingerprint": fingerprint.checksum,
+            "min_files": min_files,
+            "min_bytes": min_bytes,
+            "min_nodes": MIN_DUPLICATE_NODES,
+            "limit": -1 if limit is None else limit,
+            "offset": offset,
+        }
+        total_clusters = conn.execute(_QUALIFYING_CTE + "SELECT COUNT(*) FROM kept", params).fetchone()[0]
+        cluster_ids = _page_cluster_ids(conn, params)
+        rows = _page_rows(conn, cluster_ids, params) if cluster_ids else []
     finally:
         conn.close()
+    return {"generated_at": snapshot[1], "total_files": snapshot[0], "total_clusters": total_clusters, "rows": rows}
 
 
-def store_cached_report(  # pylint: disable=too-many-positional-arguments  # cache key requires all params
-    db_path: str,
-    fingerprint: ScanFingerprint,
-    base_path: str,
-    clusters: Sequence[DuplicateCluster],
-    min_files: int = MIN_REPORT_FILES,
-    min_bytes: int = MIN_REPORT_BYTES,
-):
-    """Persist the latest duplicate analysis snapshot."""
+def store_cached_report(db_path: str, fingerprint: ScanFingerprint, clusters: Sequence[DuplicateCluster]):
+    """Persist the unfiltered clusters of a snapshot, replacing any previously cached snapshot."""
     conn = sqlite3.connect(db_path)
     try:
-        ensure_cache_table(conn)
-        key = cache_key(fingerprint, min_files, min_bytes)
-        payload = json.dumps(clusters_to_rows(clusters))
+        ensure_cache_tables(conn)
+        conn.execute("DELETE FROM duplicate_tree_cluster_members")
+        conn.execute("DELETE FROM duplicate_tree_clusters")
+        conn.execute("DELETE FROM duplicate_tree_cluster_sets")
         conn.execute(
-            """
-            INSERT OR REPLACE INTO duplicate_tree_cache (
-                fingerprint, tolerance, base_path, total_files, generated_at, report
-            ) VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (
-                key,
-                EXACT_TOLERANCE,
-                base_path,
-                fingerprint.total_files,
-                datetime.now(timezone.utc).isoformat(),
-                payload,
-            ),
+            "INSERT INTO duplicate_tree_cluster_sets (fingerprint, total_files, generated_at) VALUES (?, ?, ?)",
+            (fingerprint.checksum, fingerprint.total_files, datetime.now(timezone.utc).isoformat()),
         )
+        for position, cluster in enumerate(clusters):
+            cluster_id = conn.execute(
+                "INSERT INTO duplicate_tree_clusters (fingerprint, position, signature) VALUES (?, ?, ?)",
+                (fingerprint.checksum, position, cluster.signature),
+            ).lastrowid
+            conn.executemany(
+                """
+                INSERT INTO duplicate_tree_cluster_members (cluster_id, position, path, total_files, total_size)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (cluster_id, member, json.dumps(list(node.path)), node.total_files, node.total_size)
+                    for member, node in enumerate(cluster.nodes)
+                ],
+            )
         conn.commit()
     finally:
         conn.close()
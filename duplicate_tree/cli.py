@@ -5,7 +5,7 @@ from __future__ import annotations
 import argparse
 import sys
 from pathlib import Path
-from typing import Optional, Sequence
+from typing import List, Optional, Sequence
 
 import config as config_module
 from cost_toolkit.common.cli_utils import (
@@ -15,15 +15,21 @@ from cost_toolkit.common.cli_utils import (
 from duplicate_tree.analysis import (
     MIN_REPORT_BYTES,
     MIN_REPORT_FILES,
-    build_directory_index_from_db,
-    recompute_clusters_for_deletion,
+    ClusterRow,
 )
+from duplicate_tree.signatures import DEFAULT_SIGNATURE_WORKERS
 from duplicate_tree.deletion import delete_duplicate_directories
+from duplicate_tree.incremental import load_incremental_directory_index, load_persisted_fingerprint
+from duplicate_tree.linking import DEFAULT_LINK_MODE, DEFAULT_LINK_WORKERS, LINK_MODES, link_duplicate_directories
+from duplicate_tree.similarity import DEFAULT_SIMILARITY_THRESHOLD
 from duplicate_tree.workflow import (
     DuplicateAnalysisContext,
+    compute_near_duplicates,
+    load_cached_duplicates,
     load_or_compute_duplicates,
 )
 from state_db_admin import reseed_state_db_from_local_drive
+from tree_deletion import DEFAULT_DELETE_WORKERS
 
 
 def _add_module_specific_args(parser: argparse.ArgumentParser) -> None:
@@ -31,7 +37,7 @@ def _add_module_specific_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--refresh-cache",
         action="store_true",
-        help="Ignore cached duplicate analysis and recompute from scratch.",
+        help="Ignore cached duplicate analysis and recompute from scratch (any thresholds are served from the cache otherwise).",
     )
     parser.add_argument(
         "--min-files",
@@ -46,10 +52,64 @@ def _add_module_specific_args(parser: argparse.ArgumentParser) -> None:
         help="Minimum directory size (GiB) to include (default: %(default).2f).",
     )
     parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Report at most this many clusters, largest first (default: all).",
+    )
+    parser.add_argument(
+        "--offset",
+        type=int,
+        default=0,
+        help="Skip this many clusters before the reported page (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--signature-workers",
+        type=int,
+        default=DEFAULT_SIGNATURE_WORKERS,
+        help="Worker processes for hashing large directory levels during a full index build (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--similarity",
+        type=float,
+        nargs="?",
+        const=DEFAULT_SIMILARITY_THRESHOLD,
+        default=None,
+        help=(
+            "Also report near-duplicate directories whose file sets are at least this similar "
+            "(estimated Jaccard, 0-1; %(const)s when given without a value). Scans the files table once more."
+        ),
+    )
+    actions = parser.add_mutually_exclusive_group()
+    actions.add_argument(
         "--delete",
         action="store_true",
         help=("After reporting duplicates, delete every directory except the first entry " "in each cluster (requires confirmation)."),
     )
+    actions.add_argument(
+        "--link",
+        nargs="?",
+        const=DEFAULT_LINK_MODE,
+        choices=LINK_MODES,
+        default=None,
+        help=(
+            "After reporting duplicates, keep every path but replace the files of all directories except the first "
+            "in each cluster with reflinks (FICLONE) or hard links to the kept copy, after checking size and SHA-256 "
+            "per file (requires confirmation; %(const)s tries reflinks first). Interrupted runs resume."
+        ),
+    )
+    parser.add_argument(
+        "--link-workers",
+        type=int,
+        default=DEFAULT_LINK_WORKERS,
+        help="Threads verifying and linking files for --link (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--delete-workers",
+        type=int,
+        default=DEFAULT_DELETE_WORKERS,
+        help="Threads unlinking files and removing directories for --delete (default: %(default)s).",
+    )
 
 
 def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
@@ -65,6 +125,24 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     return parser.parse_args(argv)
 
 
+def _analyze(context: DuplicateAnalysisContext, workers: int) -> tuple[List[ClusterRow], str]:
+    """Serve a cached report when the persisted index is unchanged; otherwise update the index and analyze it.
+
+    Near-duplicate detection always needs the index, so it bypasses the cached fast path.
+    """
+    if context.use_cache and context.similarity is None:
+        # Reads only the change log and bucket-level nodes, so a cache hit never touches the files table.
+        fingerprint = load_persisted_fingerprint(context.db_path)
+        cached = load_cached_duplicates(context, fingerprint) if fingerprint is not None else None
+        if cached is not None:
+            return cached
+    index, fingerprint = load_incremental_directory_index(context.db_path, workers=workers)
+    cluster_rows, report_text = load_or_compute_duplicates(index, fingerprint, context)
+    if context.similarity is not None:
+        report_text += compute_near_duplicates(index, context)
+    return cluster_rows, report_text
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
     """Run the duplicate tree report workflow."""
     args = parse_args(argv)
@@ -82,31 +160,29 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     print(f"Using database: {db_path}")
     print(f"Assumed drive root: {base_path}")
 
-    index, fingerprint = build_directory_index_from_db(str(db_path))
+    workers = max(1, args.signature_workers)
     base_path_str = str(base_path)
-    can_cache_results = args.min_files == MIN_REPORT_FILES and min_bytes == MIN_REPORT_BYTES
-    use_cache = (not args.refresh_cache) and can_cache_results
-
     context = DuplicateAnalysisContext(
         db_path=str(db_path),
         base_path=base_path,
         base_path_str=base_path_str,
         min_files=min_files,
         min_bytes=min_bytes,
-        use_cache=use_cache,
-        can_cache_results=can_cache_results,
+        use_cache=not args.refresh_cache,
+        limit=args.limit if args.limit and args.limit > 0 else None,
+        offset=max(0, args.offset),
+        similarity=None if args.similarity is None else min(1.0, max(0.0, args.similarity)),
     )
 
-    cluster_rows, report_text = load_or_compute_duplicates(index, fingerprint, context)
+    cluster_rows, report_text = _analyze(context, workers)
 
     if report_text:
         print(report_text, end="" if report_text.endswith("\n") else "\n")
 
     if args.delete:
-        if cluster_rows is None:
-            print("Cached report lacks structured duplicate data. Recomputing duplicates to prepare deletion plan...")
-            cluster_rows = recompute_clusters_for_deletion(index, min_files, min_bytes)
-        delete_duplicate_directories(cluster_rows or [], base_path)
+        delete_duplicate_directories(cluster_rows, base_path, workers=max(1, args.delete_workers))
+    elif args.link:
+        link_duplicate_directories(cluster_rows, base_path, str(db_path), mode=args.link, workers=max(1, args.link_workers))
 
     print("Done.")
     return 0
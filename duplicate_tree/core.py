@@ -2,97 +2,325 @@
 
 from __future__ import annotations
 
-import hashlib
-import json
 import time
-from typing import Dict, Iterable, List, Set
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 
+from duplicate_tree.signatures import (
+    DEFAULT_SIGNATURE_WORKERS,
+    DIGEST_BYTES,
+    DIGEST_MODULUS,
+    LevelSigner,
+    SignatureInput,
+    compute_signature,
+    file_entry_digest,
+)
 from duplicate_tree_models import (
     ChildSignatureMissingError,
     DirectoryNode,
     DuplicateCluster,
-    FileEntry,
     PathTuple,
     ProgressPrinter,
 )
 from migration_verify_common import should_ignore_key
 
 MIN_DUPLICATE_CLUSTER = 2
+NO_PARENT = -1
+REMOVED = -2
+_COMPONENT_BITS = 32
+
+
+def split_file_key(bucket: str, key: str) -> Optional[tuple[PathTuple, str]]:
+    """Return (directory path, filename) for an indexed key, or None for placeholders and ignored files."""
+    if not key or key.endswith("/"):  # Ignore directory placeholders
+        return None
+    if should_ignore_key(key):
+        return None
+    parts = [p for p in key.split("/") if p]
+    if not parts:
+        return None
+    return (bucket,) + tuple(parts[:-1]), parts[-1]
+
+
+class _NodeView(Mapping):
+    """Read-only PathTuple -> DirectoryNode mapping over a DirectoryIndex."""
+
+    def __init__(self, index: "DirectoryIndex"):
+        self._index = index
+
+    def __getitem__(self, path: PathTuple) -> DirectoryNode:
+        node_id = self._index.find(path)
+        if node_id is None:
+            raise KeyError(path)
+        return self._index.node(node_id)
+
+    def __contains__(self, path: object) -> bool:
+        return isinstance(path, tuple) and self._index.find(path) is not None
+
+    def __iter__(self) -> Iterator[PathTuple]:
+        return (self._index.path_of(node_id) for node_id in self._index.node_ids())
+
+    def __len__(self) -> int:
+        return self._index.node_count
+
 
+class DirectoryIndex:  # pylint: disable=too-many-instance-attributes
+    """Builds directory nodes from file metadata.
 
-class DirectoryIndex:
-    """Builds directory nodes from file metadata."""
+    Nodes live in parallel columns indexed by an integer node id. Each node stores its
+    parent id and an interned path component, so paths are never repeated; full paths and
+    DirectoryNode objects are only materialized on request. Files are folded into their
+    directory's counters and files digest as they are added, so nothing is kept per file.
+    """
 
     def __init__(self):
-        self.nodes: Dict[PathTuple, DirectoryNode] = {}
+        self._component_ids: Dict[str, int] = {}
+        self._components: List[str] = []
+        self._child_ids: Dict[int, int] = {}
+        self._parent = array("q")
+        self._name = array("q")
+        self._depth = array("l")
+        self._direct_size = array("q")
+        self._direct_files = array("q")
+        self._total_size = array("q")
+        self._total_files = array("q")
+        self._digest: List[int] = []
+        self._signature: List[Optional[bytes]] = []
+        self._live = 0
+        self._last_dir: Optional[PathTuple] = None
+        self._last_dir_id = NO_PARENT
+
+    @property
+    def nodes(self) -> Mapping[PathTuple, DirectoryNode]:
+        """Mapping of directory path to a materialized DirectoryNode."""
+        return _NodeView(self)
+
+    @property
+    def node_count(self) -> int:
+        """Number of directories currently in the index."""
+        return self._live
+
+    def node_ids(self) -> Iterator[int]:
+        """Ids of all live nodes, parents before children."""
+        return (node_id for node_id, parent in enumerate(self._parent) if parent != REMOVED)
+
+    def _child_key(self, parent_id: int, name: str) -> Optional[int]:
+        component = self._component_ids.get(name)
+        if component is None:
+            return None
+        return ((parent_id + 1) << _COMPONENT_BITS) | component
+
+    def find(self, path: PathTuple) -> Optional[int]:
+        """Return the node id for path, or None when it is not indexed."""
+        node_id = NO_PARENT
+        for name in path:
+            key = self._child_key(node_id, name)
+            node_id = self._child_ids.get(key) if key is not None else None
+            if node_id is None:
+                return None
+        return node_id if path else None
+
+    def path_of(self, node_id: int) -> PathTuple:
+        """Rebuild the full path of a node from its parent chain."""
+        names: List[str] = []
+        while node_id != NO_PARENT:
+            names.append(self._components[self._name[node_id]])
+            node_id = self._parent[node_id]
+        return tuple(reversed(names))
+
+    def parent_id(self, node_id: int) -> int:
+        """Parent node id, or NO_PARENT for bucket roots."""
+        return self._parent[node_id]
+
+    def name_of(self, node_id: int) -> str:
+        """Last path component of a node."""
+        return self._components[self._name[node_id]]
+
+    def files_digest(self, node_id: int) -> int:
+        """Order-independent digest of the files directly inside a node."""
+        return self._digest[node_id]
+
+    def totals(self, node_id: int) -> tuple[int, int]:
+        """(files, size) of a node's whole subtree; valid after finalize()."""
+        return self._total_files[node_id], self._total_size[node_id]
+
+    def raw_signature(self, node_id: int) -> Optional[bytes]:
+        """SHA-256 signature of a node as bytes, or None before finalize()."""
+        return self._signature[node_id]
+
+    def node(self, node_id: int) -> DirectoryNode:
+        """Materialize one node with its full path, totals and hex signature."""
+        signature = self._signature[node_id]
+        return DirectoryNode(
+            path=self.path_of(node_id),
+            direct_size=self._direct_size[node_id],
+            direct_files=self._direct_files[node_id],
+            total_size=self._total_size[node_id],
+            total_files=self._total_files[node_id],
+            signature=signature.hex() if signature is not None else None,
+            node_id=node_id,
+        )
+
+    def _new_node(self, parent_id: int, name: str) -> int:
+        component = self._component_ids.get(name)
+        if component is None:
+            component = self._component_ids[name] = len(self._components)
+            self._components.append(name)
+        node_id = len(self._parent)
+        self._child_ids[((parent_id + 1) << _COMPONENT_BITS) | component] = node_id
+        self._parent.append(parent_id)
+        self._name.append(component)
+        self._depth.append(self._depth[parent_id] + 1 if parent_id != NO_PARENT else 1)
+        for column in (self._direct_size, self._direct_files, self._total_size, self._total_files):
+            column.append(0)
+        self._digest.append(0)
+        self._signature.append(None)
+        self._live += 1
+        return node_id
+
+    def _ensure_path(self, path: PathTuple) -> int:
+        # Rows arrive sorted by key, so consecutive files usually share a directory.
+        if path == self._last_dir:
+            return self._last_dir_id
+        node_id = NO_PARENT
+        for name in path:
+            key = self._child_key(node_id, name)
+            child = self._child_ids.get(key) if key is not None else None
+            node_id = child if child is not None else self._new_node(node_id, name)
+        self._last_dir, self._last_dir_id = path, node_id
+        return node_id
 
     def add_file(self, bucket: str, key: str, size: int, checksum: str):
         """Add a file entry to the proper directory node hierarchy."""
-        if not key or key.endswith("/"):  # Ignore directory placeholders
-            return
-        if should_ignore_key(key):
-            return
-        parts = [p for p in key.split("/") if p]
-        if not parts:
-            return
-        filename = parts[-1]
-        dir_parts = (bucket,) + tuple(parts[:-1]) if len(parts) > 1 else (bucket,)
-        node = self._ensure_node(dir_parts)
-        node.files.append(FileEntry(filename, size, checksum))
-        node.direct_size += size
-        node.direct_files += 1
-        # Register intermediate directories
-        for depth in range(1, len(dir_parts)):
-            parent = dir_parts[:depth]
-            child = dir_parts[: depth + 1]
-            parent_node = self._ensure_node(parent)
-            parent_node.children.add(child)
-
-    def _ensure_node(self, path: PathTuple) -> DirectoryNode:
-        if path not in self.nodes:
-            self.nodes[path] = DirectoryNode(path=path)
-        return self.nodes[path]
-
-    def finalize(self):
-        """Compute aggregate stats and signatures bottom-up."""
-        for path in sorted(self.nodes, key=len, reverse=True):
-            node = self.nodes[path]
-            total_size = node.direct_size
-            total_files = node.direct_files
-            child_signatures: List[tuple[str, str]] = []
-            for child_path in sorted(node.children):
-                child_node = self.nodes[child_path]
-                total_size += child_node.total_size
-                total_files += child_node.total_files
-                if child_node.signature is None:
-                    raise ChildSignatureMissingError(child_path)
-                child_name = child_path[-1]
-                child_signatures.append((child_name, child_node.signature))
-            file_entries = sorted((f.name, f.size, f.checksum) for f in node.files)
-            payload = json.dumps(
-                {"files": file_entries, "dirs": child_signatures},
-                separators=(",", ":"),
-            )
-            node.signature = hashlib.sha256(payload.encode("utf-8")).hexdigest()
-            node.total_size = total_size
-            node.total_files = total_files
+        self.apply_change(bucket, key, size, checksum, 1)
+
+    def apply_change(self, bucket: str, key: str, size: int, checksum: str, delta: int) -> Optional[int]:
+        """Add (delta=1) or remove (delta=-1) one file; return the id of its directory.
+
+        Indexes changed after finalize() are brought up to date with refinalize().
+        """
+        split = split_file_key(bucket, key)
+        if split is None:
+            return None
+        dir_parts, filename = split
+        node_id = self._ensure_path(dir_parts)
+        self._direct_size[node_id] += delta * size
+        self._direct_files[node_id] += delta
+        self._digest[node_id] = (self._digest[node_id] + delta * file_entry_digest(filename, size, checksum)) % DIGEST_MODULUS
+        return node_id
+
+    def restore_node(  # pylint: disable=too-many-arguments
+        self,
+        parent_id: int,
+        name: str,
+        direct: tuple[int, int],
+        totals: tuple[int, int],
+        files_digest: int,
+        signature: str,
+    ) -> int:
+        """Re-create a previously signed node; direct and totals are (files, size) pairs."""
+        node_id = self._new_node(parent_id, name)
+        self._direct_files[node_id], self._direct_size[node_id] = direct
+        self._total_files[node_id], self._total_size[node_id] = totals
+        self._digest[node_id] = files_digest
+        self._signature[node_id] = bytes.fromhex(signature)
+        return node_id
+
+    def _children_map(self) -> Dict[int, List[int]]:
+        children: Dict[int, List[int]] = {}
+        for node_id in self.node_ids():
+            parent = self._parent[node_id]
+            if parent != NO_PARENT:
+                children.setdefault(parent, []).append(node_id)
+        return children
+
+    def _signature_input(self, node_id: int, children: List[int]) -> SignatureInput:
+        """Set a node's totals from its (already signed) children and return what its signature covers."""
+        total_size = self._direct_size[node_id]
+        total_files = self._direct_files[node_id]
+        child_entries: List[tuple[bytes, bytes]] = []
+        for child_id in children:
+            total_size += self._total_size[child_id]
+            total_files += self._total_files[child_id]
+            signature = self._signature[child_id]
+            if signature is None:
+                raise ChildSignatureMissingError(self.path_of(child_id))
+            child_entries.append((self._components[self._name[child_id]].encode("utf-8"), signature))
+        self._total_size[node_id] = total_size
+        self._total_files[node_id] = total_files
+        return self._digest[node_id].to_bytes(DIGEST_BYTES, "big"), child_entries
+
+    def _sign(self, node_id: int, children: List[int]):
+        self._signature[node_id] = compute_signature(*self._signature_input(node_id, children))
+
+    def finalize(self, workers: int = DEFAULT_SIGNATURE_WORKERS):
+        """Compute aggregate stats and signatures bottom-up, one depth level at a time.
+
+        Nodes on the same level only depend on deeper levels, so large levels are hashed
+        in worker processes; the result does not depend on workers.
+        """
+        children = self._children_map()
+        levels: Dict[int, List[int]] = {}
+        for node_id in self.node_ids():
+            levels.setdefault(self._depth[node_id], []).append(node_id)
+        with LevelSigner(workers) as signer:
+            for depth in sorted(levels, reverse=True):
+                level = levels[depth]
+                inputs = [self._signature_input(node_id, children.get(node_id, [])) for node_id in level]
+                for node_id, signature in zip(level, signer.sign(inputs)):
+                    self._signature[node_id] = signature
+
+    def _remove(self, node_id: int):
+        parent = self._parent[node_id]
+        del self._child_ids[((parent + 1) << _COMPONENT_BITS) | self._name[node_id]]
+        self._parent[node_id] = REMOVED
+        self._signature[node_id] = None
+        self._live -= 1
+        self._last_dir = None
+
+    def refinalize(self, dirty: Iterable[int]) -> tuple[Set[int], List[int]]:
+        """Re-sign only the dirty directories and their ancestors, deepest first.
+
+        Directories left without files are dropped. Returns (re-signed ids, removed ids).
+        """
+        pending: Set[int] = set()
+        for node_id in dirty:
+            while node_id != NO_PARENT and node_id not in pending:
+                pending.add(node_id)
+                node_id = self._parent[node_id]
+        children = self._children_map()
+        updated: Set[int] = set()
+        removed: List[int] = []
+        for node_id in sorted(pending, key=self._depth.__getitem__, reverse=True):
+            node_children = children.get(node_id, [])
+            if self._direct_files[node_id] <= 0 and not node_children:
+                parent = self._parent[node_id]
+                if parent != NO_PARENT:
+                    children[parent].remove(node_id)
+                self._remove(node_id)
+                removed.append(node_id)
+                continue
+            self._sign(node_id, node_children)
+            updated.add(node_id)
+        return updated, removed
 
 
 def find_exact_duplicates(index: DirectoryIndex) -> List[DuplicateCluster]:
     """Group directories by identical signatures."""
-    groups: Dict[str, List[DirectoryNode]] = {}
-    nodes = list(index.nodes.values())
-    total = len(nodes)
+    groups: Dict[bytes, List[int]] = {}
+    total = index.node_count
     progress = ProgressPrinter(total, "Grouping directories")
     start_time = time.time()
     processed = 0
     try:
-        for processed, node in enumerate(nodes, start=1):
-            if node.signature is None:
+        for processed, node_id in enumerate(index.node_ids(), start=1):
+            signature = index.raw_signature(node_id)
+            if signature is None:
                 continue
-            if node.signature not in groups:
-                groups[node.signature] = []
-            groups[node.signature].append(node)
+            if signature not in groups:
+                groups[signature] = []
+            groups[signature].append(node_id)
             progress.update(processed)
     except KeyboardInterrupt:
         print("\n\n✗ Duplicate grouping interrupted by user.")
@@ -101,40 +329,49 @@ def find_exact_duplicates(index: DirectoryIndex) -> List[DuplicateCluster]:
         elapsed = time.time() - start_time
         progress.finish(f"Grouping directories processed {processed:,}/{total:,} entries in {elapsed:.1f}s")
     clusters = []
-    for signature, sig_nodes in groups.items():
-        collapsed_nodes = _collapse_nested_nodes(sig_nodes)
+    for signature, node_ids in groups.items():
+        if len(node_ids) < MIN_DUPLICATE_CLUSTER:
+            continue
+        collapsed_nodes = _collapse_nested_nodes(index, (index.node(node_id) for node_id in node_ids))
         if len(collapsed_nodes) < MIN_DUPLICATE_CLUSTER:
             continue
-        clusters.append(DuplicateCluster(signature=signature, nodes=collapsed_nodes))
+        clusters.append(DuplicateCluster(signature=signature.hex(), nodes=collapsed_nodes))
     sorted_clusters = sorted(clusters, key=lambda c: (len(c.nodes[0].path), c.nodes[0].path))
-    return _prune_nested_clusters(sorted_clusters)
+    return _prune_nested_clusters(index, sorted_clusters)
+
+
+def has_ancestor_in(index: DirectoryIndex, node_id: int, node_ids: Set[int]) -> bool:
+    """True when node_id or one of its ancestors is in node_ids; walks the parent chain in O(depth)."""
+    while node_id != NO_PARENT:
+        if node_id in node_ids:
+            return True
+        node_id = index.parent_id(node_id)
+    return False
 
 
-def _collapse_nested_nodes(nodes: Iterable[DirectoryNode]) -> List[DirectoryNode]:
+def _collapse_nested_nodes(index: DirectoryIndex, nodes: Iterable[DirectoryNode]) -> List[DirectoryNode]:
     """Return only the top-most directories from a duplicate cluster."""
     sorted_nodes = sorted(nodes, key=lambda n: len(n.path))
+    kept: Set[int] = set()
     collapsed: List[DirectoryNode] = []
     for node in sorted_nodes:
-        if any(node.path[: len(parent.path)] == parent.path for parent in collapsed):
+        if has_ancestor_in(index, node.node_id, kept):
             continue
+        kept.add(node.node_id)
         collapsed.append(node)
     return collapsed
 
 
-def _has_seen_ancestor(path: PathTuple, seen_paths: Set[PathTuple]) -> bool:
-    return any(path[: len(candidate)] == candidate for candidate in seen_paths)
-
-
-def _prune_nested_clusters(clusters: List[DuplicateCluster]) -> List[DuplicateCluster]:
+def _prune_nested_clusters(index: DirectoryIndex, clusters: List[DuplicateCluster]) -> List[DuplicateCluster]:
     """Remove duplicate sets fully contained within already-reported parents."""
-    seen_paths: Set[PathTuple] = set()
+    seen: Set[int] = set()
     pruned: List[DuplicateCluster] = []
     for cluster in clusters:
-        node_paths = [node.path for node in cluster.nodes]
-        if node_paths and all(_has_seen_ancestor(path, seen_paths) for path in node_paths):
+        node_ids = [node.node_id for node in cluster.nodes]
+        if node_ids and all(has_ancestor_in(index, node_id, seen) for node_id in node_ids):
             continue
         pruned.append(cluster)
-        seen_paths.update(node_paths)
+        seen.update(node_ids)
     return pruned
 
 
@@ -142,4 +379,5 @@ __all__ = [
     "DirectoryIndex",
     "DuplicateCluster",
     "find_exact_duplicates",
+    "has_ancestor_in",
 ]
@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-import shutil
 from pathlib import Path
 from typing import List, Sequence
 
 from cost_toolkit.common.cli_utils import ConfirmationNotReceivedError, confirm_action
+from tree_deletion import DEFAULT_DELETE_WORKERS, TreeDeleter
 
 from .analysis import (
     ClusterRow,
@@ -59,28 +59,31 @@ def confirm_deletion(total_dirs: int, total_bytes: int) -> bool:
         return False
 
 
-def perform_deletions(deletion_groups: Sequence[tuple[int, NodeRow, List[NodeRow]]], base_path: Path) -> List[tuple[Path, Exception]]:
+def perform_deletions(
+    deletion_groups: Sequence[tuple[int, NodeRow, List[NodeRow]]],
+    base_path: Path,
+    workers: int = DEFAULT_DELETE_WORKERS,
+) -> List[tuple[Path, Exception]]:
     """Execute deletion of duplicate directories, returning any errors encountered."""
     errors: List[tuple[Path, Exception]] = []
-    for _, _, delete_nodes in deletion_groups:
-        for node in delete_nodes:
-            path = path_on_disk(base_path, tuple(node["path"]))
-            if not path.exists():
-                print(f"Skipping missing directory: {path}")
-                continue
-            try:
-                if path.is_file() or path.is_symlink():
-                    path.unlink()
-                else:
-                    shutil.rmtree(path)
-                print(f"Deleted {path}")
-            except (OSError, PermissionError) as exc:
-                errors.append((path, exc))
-                print(f"Error deleting {path}: {exc}")
+    with TreeDeleter(workers) as deleter:
+        for _, _, delete_nodes in deletion_groups:
+            for node in delete_nodes:
+                path = path_on_disk(base_path, tuple(node["path"]))
+                if not path.exists():
+                    print(f"Skipping missing directory: {path}")
+                    continue
+                try:
+                    deleter.delete(path)
+                    print(f"Deleted {path}")
+                except OSError as exc:
+                    errors.append((path, exc))
+                    print(f"Error deleting {path}: {exc}")
+    print(deleter.progress.summary())
     return errors
 
 
-def delete_duplicate_directories(cluster_rows: Sequence[ClusterRow], base_path: Path):
+def delete_duplicate_directories(cluster_rows: Sequence[ClusterRow], base_path: Path, workers: int = DEFAULT_DELETE_WORKERS):
     """Delete every duplicate directory except the first entry in each cluster."""
     deletion_groups, total_bytes, total_dirs = build_deletion_groups(cluster_rows)
 
@@ -94,7 +97,7 @@ def delete_duplicate_directories(cluster_rows: Sequence[ClusterRow], base_path:
         print("Deletion cancelled.")
         return
 
-    errors = perform_deletions(deletion_groups, base_path)
+    errors = perform_deletions(deletion_groups, base_path, workers)
 
     if errors:
         print(f"Completed with {len(errors)} error(s).")
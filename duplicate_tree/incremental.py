@@ -0,0 +1,327 @@
+"""Persisted DirectoryIndex that is updated from logged ``files`` changes.
+
+The first run streams every file, as ``build_directory_index_from_db`` does, and
+stores one ``duplicate_tree_nodes`` row per directory: totals, the order-independent
+files digest, the signature and a parent pointer. It also installs triggers that
+append the old and new (bucket, key, size, checksum) of every changed file to
+``duplicate_tree_changes``. The scan runs on a read snapshot outside the write lock;
+changes logged after it are replayed before the nodes are committed.
+
+Later runs load the directory rows, which are far fewer than the files, apply the
+logged deltas, and re-sign only the dirty directories and their ancestors. Only
+those rows are written back. If the triggers are missing, for example because
+``state_db_admin compact`` replaced the legacy table, the next run rebuilds
+everything from scratch.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set
+
+from duplicate_tree.analysis import ScanFingerprint, build_directory_index_from_db, scan_files_table
+from duplicate_tree.core import NO_PARENT, DirectoryIndex
+from duplicate_tree.signatures import DEFAULT_SIGNATURE_WORKERS, SIGNATURE_VERSION
+from migration_state_compact import LAYOUT_COMPACT, LAYOUT_LEGACY, decoded_etag_sql, files_layout
+
+ROOT_PARENT_ID = 0
+_TRACKED_COLUMNS = ("bucket", "key", "size", "etag", "local_checksum")
+
+NODES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS duplicate_tree_nodes (
+    node_id INTEGER PRIMARY KEY,
+    parent_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    direct_files INTEGER NOT NULL,
+    direct_size INTEGER NOT NULL,
+    files_digest BLOB NOT NULL,
+    total_files INTEGER NOT NULL,
+    total_size INTEGER NOT NULL,
+    signature TEXT NOT NULL
+)
+"""
+NODES_INDEX_SQL = "CREATE UNIQUE INDEX IF NOT EXISTS idx_duplicate_tree_nodes_parent ON duplicate_tree_nodes(parent_id, name)"
+CHANGES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS duplicate_tree_changes (
+    seq INTEGER PRIMARY KEY,
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    delta INTEGER NOT NULL
+)
+"""
+META_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS duplicate_tree_index_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+)
+"""
+TRIGGER_NAMES = ("duplicate_tree_track_insert", "duplicate_tree_track_update", "duplicate_tree_track_delete")
+
+
+def _log_sql(row: str, bucket: str, checksum: str, delta: int) -> str:
+    return (
+        "INSERT INTO duplicate_tree_changes (bucket, key, size, checksum, delta) "
+        f"VALUES ({bucket}, {row}.key, {row}.size, {checksum}, {delta});"
+    )
+
+
+def _tracking_triggers(layout: str) -> tuple[str, ...]:
+    """Triggers logging file changes on the table that actually stores rows for layout."""
+    if layout == LAYOUT_COMPACT:
+        table = "file_records"
+        bucket = "(SELECT name FROM buckets WHERE bucket_id = {row}.bucket_id)"
+        checksum = "COALESCE({row}.local_checksum, " + decoded_etag_sql("{row}.etag") + ", '')"
+        columns = "bucket_id, key, size, etag, local_checksum"
+        identity = "OLD.bucket_id IS NOT NEW.bucket_id"
+    else:
+        table = "files"
+        bucket = "{row}.bucket"
+        checksum = "COALESCE({row}.local_checksum, {row}.etag, '')"
+        columns = ", ".join(_TRACKED_COLUMNS)
+        identity = "OLD.bucket IS NOT NEW.bucket"
+
+    def _log(row: str, delta: int) -> str:
+        return _log_sql(row, bucket.format(row=row), checksum.format(row=row), delta)
+
+    # Status-only updates (state, local_path, timestamps) leave signatures unchanged and are not logged.
+    changed = (
+        f"{identity} OR OLD.key IS NOT NEW.key OR OLD.size IS NOT NEW.size "
+        f"OR {checksum.format(row='OLD')} IS NOT {checksum.format(row='NEW')}"
+    )
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {TRIGGER_NAMES[0]} AFTER INSERT ON {table} BEGIN {_log('NEW', 1)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {TRIGGER_NAMES[1]} AFTER UPDATE OF {columns} ON {table} WHEN {changed} "
+        f"BEGIN {_log('OLD', -1)} {_log('NEW', 1)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {TRIGGER_NAMES[2]} AFTER DELETE ON {table} BEGIN {_log('OLD', -1)} END",
+    )
+
+
+def _trackable_layout(conn: sqlite3.Connection) -> Optional[str]:
+    """Return the files layout when change tracking can be installed, else None."""
+    layout = files_layout(conn)
+    if layout == LAYOUT_COMPACT:
+        table, required = "file_records", ("bucket_id",) + _TRACKED_COLUMNS[1:]
+    elif layout == LAYOUT_LEGACY:
+        table, required = "files", _TRACKED_COLUMNS
+    else:
+        return None
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    return layout if columns.issuperset(required) else None
+
+
+def _index_is_current(conn: sqlite3.Connection, layout: str) -> bool:
+    """True when a persisted index with current signatures exists and every change since it was built has been logged."""
+    meta = dict(conn.execute("SELECT key, value FROM duplicate_tree_index_meta"))
+    if meta.get("layout") != layout or meta.get("signature_version") != str(SIGNATURE_VERSION):
+        return False
+    placeholders = ", ".join("?" * len(TRIGGER_NAMES))
+    installed = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})", TRIGGER_NAMES
+    ).fetchone()[0]
+    return installed == len(TRIGGER_NAMES)
+
+
+def _node_row(index: DirectoryIndex, node_id: int, row_ids: List[int]) -> tuple:
+    parent = index.parent_id(node_id)
+    node = index.node(node_id)
+    return (
+        row_ids[node_id],
+        row_ids[parent] if parent != NO_PARENT else ROOT_PARENT_ID,
+        index.name_of(node_id),
+        node.direct_files,
+        node.direct_size,
+        index.files_digest(node_id).to_bytes(32, "big"),
+        node.total_files,
+        node.total_size,
+        node.signature,
+    )
+
+
+def _insert_nodes(conn: sqlite3.Connection, index: DirectoryIndex, node_ids: Iterable[int], row_ids: List[int]) -> None:
+    conn.executemany(
+        "INSERT OR REPLACE INTO duplicate_tree_nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (_node_row(index, node_id, row_ids) for node_id in node_ids),
+    )
+
+
+def _load_index(conn: sqlite3.Connection) -> tuple[DirectoryIndex, List[int]]:
+    """Rebuild the in-memory index from duplicate_tree_nodes; also return the row id of each index node."""
+    index = DirectoryIndex()
+    node_ids: Dict[int, int] = {ROOT_PARENT_ID: NO_PARENT}
+    row_ids: List[int] = []
+    for row in conn.execute("SELECT * FROM duplicate_tree_nodes ORDER BY node_id"):
+        row_id, parent_row_id, name, direct_files, direct_size, digest, total_files, total_size, signature = row
+        node_ids[row_id] = index.restore_node(
+            node_ids[parent_row_id],
+            name,
+            (direct_files, direct_size),
+            (total_files, total_size),
+            int.from_bytes(digest, "big"),
+            signature,
+        )
+        row_ids.append(row_id)
+    return index, row_ids
+
+
+def _roots_fingerprint(roots: Iterable[tuple[str, Optional[str], int]]) -> ScanFingerprint:
+    """Fingerprint the indexed content from (bucket, signature, total_files) of each bucket root."""
+    hasher = hashlib.sha256()
+    total_files = 0
+    for bucket, signature, files in sorted(roots):
+        hasher.update(f"{bucket}\0{signature or ''}\0".encode("utf-8"))
+        total_files += files
+    return ScanFingerprint(total_files=total_files, checksum=hasher.hexdigest())
+
+
+def _fingerprint(index: DirectoryIndex) -> ScanFingerprint:
+    nodes = (index.node(node_id) for node_id in index.node_ids() if index.parent_id(node_id) == NO_PARENT)
+    return _roots_fingerprint((node.path[0], node.signature, node.total_files) for node in nodes)
+
+
+def _install_tracking(conn: sqlite3.Connection, layout: str) -> None:
+    """Install the change triggers and empty the persisted index; run inside a short write transaction."""
+    for statement in _tracking_triggers(layout):
+        conn.execute(statement)
+    for table in ("duplicate_tree_changes", "duplicate_tree_nodes", "duplicate_tree_index_meta"):
+        conn.execute(f"DELETE FROM {table}")
+
+
+def _scan_snapshot(conn: sqlite3.Connection, db_path: str, progress_label: str) -> tuple[DirectoryIndex, int]:
+    """Stream every file in one read transaction; also return the last change logged before that snapshot."""
+    conn.execute("BEGIN")
+    try:
+        watermark = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM duplicate_tree_changes").fetchone()[0]
+        index, _ = scan_files_table(conn, db_path, progress_label)
+    finally:
+        conn.execute("COMMIT")
+    return index, watermark
+
+
+def _full_rebuild(conn: sqlite3.Connection, db_path: str, layout: str, progress_label: str, workers: int) -> DirectoryIndex:
+    """Build from a read snapshot without the write lock, then persist it and replay changes logged since.
+
+    The triggers are already installed, so every write after the snapshot sits in the change
+    log above the watermark, and writers are never locked out for the length of a full scan.
+    """
+    index, watermark = _scan_snapshot(conn, db_path, progress_label)
+    index.finalize(workers=workers)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Changes up to the watermark are already part of the snapshot.
+        conn.execute("DELETE FROM duplicate_tree_changes WHERE seq <= ?", (watermark,))
+        # A fresh index has dense ids with parents first, so row ids can simply be offset by one.
+        node_ids = list(index.node_ids())
+        row_ids = [node_id + 1 for node_id in node_ids]
+        _insert_nodes(conn, index, node_ids, row_ids)
+        conn.executemany(
+            "INSERT OR REPLACE INTO duplicate_tree_index_meta (key, value) VALUES (?, ?)",
+            [("layout", layout), ("signature_version", str(SIGNATURE_VERSION))],
+        )
+        _apply_logged_changes(conn, index, row_ids)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return index
+
+
+def _apply_logged_changes(conn: sqlite3.Connection, index: DirectoryIndex, row_ids: List[int]) -> int:
+    """Apply and consume the change log; return the number of directories re-signed or removed."""
+    last_seq = conn.execute("SELECT MAX(seq) FROM duplicate_tree_changes").fetchone()[0]
+    if last_seq is None:
+        return 0
+    dirty: Set[int] = set()
+    for bucket, key, size, checksum, delta in conn.execute(
+        "SELECT bucket, key, size, checksum, delta FROM duplicate_tree_changes WHERE seq <= ? ORDER BY seq", (last_seq,)
+    ):
+        node_id = index.apply_change(bucket, key, size, checksum, delta)
+        if node_id is not None:
+            dirty.add(node_id)
+    persisted = len(row_ids)
+    updated, removed = index.refinalize(dirty)
+    removed_rows = [(row_ids[node_id],) for node_id in removed if node_id < persisted]
+    conn.executemany("DELETE FROM duplicate_tree_nodes WHERE node_id = ?", removed_rows)
+    # Index ids grow parents-first, so handing out row ids in the same order keeps that property on disk.
+    next_row_id = (conn.execute("SELECT MAX(node_id) FROM duplicate_tree_nodes").fetchone()[0] or ROOT_PARENT_ID) + 1
+    new_nodes = max(max(updated, default=0) + 1 - persisted, 0)
+    row_ids.extend(range(next_row_id, next_row_id + new_nodes))
+    _insert_nodes(conn, index, sorted(updated), row_ids)
+    conn.execute("DELETE FROM duplicate_tree_changes WHERE seq <= ?", (last_seq,))
+    return len(updated) + len(removed)
+
+
+def load_incremental_directory_index(
+    db_path: str, progress_label: str = "Scanning files", workers: int = DEFAULT_SIGNATURE_WORKERS
+) -> tuple[DirectoryIndex, ScanFingerprint]:
+    """Return an up-to-date DirectoryIndex, recomputing only directories whose files changed.
+
+    workers only applies to full rebuilds; incremental updates re-sign few enough nodes to stay serial.
+    Databases whose files table cannot carry the tracking triggers fall back to a
+    full in-memory build each run.
+    """
+    conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+    try:
+        layout = _trackable_layout(conn)
+        if layout is None:
+            return build_directory_index_from_db(db_path, progress_label, workers)
+        # The write lock keeps the change log consistent with the stored nodes; a full
+        # rebuild only holds it briefly, before and after its scan.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in (NODES_TABLE_SQL, NODES_INDEX_SQL, CHANGES_TABLE_SQL, META_TABLE_SQL):
+                conn.execute(statement)
+            current = _index_is_current(conn, layout)
+            if current:
+                index, row_ids = _load_index(conn)
+                changed = _apply_logged_changes(conn, index, row_ids)
+            else:
+                _install_tracking(conn, layout)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if current:
+            print(f"Loaded {index.node_count:,} directories from the persisted index ({changed:,} recomputed)")
+        else:
+            index = _full_rebuild(conn, db_path, layout, progress_label, workers)
+    finally:
+        conn.close()
+    return index, _fingerprint(index)
+
+
+def load_persisted_fingerprint(db_path: str) -> Optional[ScanFingerprint]:
+    """Fingerprint of the persisted index without reading files or nodes below the bucket roots.
+
+    Returns None unless change tracking is current and the change log is empty, i.e.
+    the stored nodes describe the files table exactly.
+    """
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    try:
+        layout = _trackable_layout(conn)
+        try:
+            if layout is None or not _index_is_current(conn, layout):
+                return None
+            if conn.execute("SELECT 1 FROM duplicate_tree_changes LIMIT 1").fetchone() is not None:
+                return None
+            roots = conn.execute(
+                "SELECT name, signature, total_files FROM duplicate_tree_nodes WHERE parent_id = ?", (ROOT_PARENT_ID,)
+            ).fetchall()
+        except sqlite3.OperationalError:  # Index tables not created yet
+            return None
+    finally:
+        conn.close()
+    return _roots_fingerprint(roots)
+
+
+def drop_incremental_index(conn: sqlite3.Connection) -> None:
+    """Remove the persisted index and its triggers so the next run rebuilds from scratch."""
+    for name in TRIGGER_NAMES:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for table in ("duplicate_tree_nodes", "duplicate_tree_changes", "duplicate_tree_index_meta"):
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+__all__ = ["drop_incremental_index", "load_incremental_directory_index", "load_persisted_fingerprint"]
@@ -0,0 +1,282 @@
+"""Replace files in duplicate trees with reflinks or hard links to the kept copy.
+
+Every path survives: each file under a duplicate directory is checked against the
+file at the same relative path under the kept directory (size, then SHA-256) and only
+then swapped for a link by writing it next to the original and renaming over it.
+Finished files are journaled in the state DB, so an interrupted run resumes where it stopped.
+"""
+
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+import shutil
+import sqlite3
+import stat
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, Sequence, Union
+
+from cost_toolkit.common.cli_utils import ConfirmationNotReceivedError, confirm_action
+from migration_utils import hash_file_in_chunks
+
+from .analysis import ClusterRow, NodeRow, format_bytes, path_on_disk
+from .deletion import build_deletion_groups
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms only get hard links
+    fcntl = None  # type: ignore[assignment]
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+LINK_MODES = ("auto", "reflink", "hardlink")
+DEFAULT_LINK_MODE = "auto"
+DEFAULT_LINK_WORKERS = 4
+LINK_BATCH_SIZE = 1000
+LINK_TEMP_SUFFIX = ".dedupe-link-tmp"
+# errno values meaning "this filesystem cannot clone", as opposed to a real I/O failure.
+_REFLINK_UNSUPPORTED = {errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.ENOSYS}
+
+LINK_JOURNAL_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS duplicate_tree_links (
+    path TEXT PRIMARY KEY,
+    target TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    method TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+DeletionGroup = tuple[int, NodeRow, List[NodeRow]]
+
+
+class FileMismatchError(ValueError):
+    """Raised when a duplicate file cannot safely be replaced by a link to the kept copy."""
+
+    def __init__(self, path: Path, reason: str) -> None:
+        super().__init__(f"{path}: {reason}")
+
+
+@dataclass(frozen=True)
+class LinkTask:
+    """One duplicate file and the kept file it should point at."""
+
+    kept: Path
+    duplicate: Path
+
+
+@dataclass(frozen=True)
+class LinkOutcome:
+    """Result of linking one file; method is reflink, hardlink or already-linked."""
+
+    task: LinkTask
+    method: str
+    size: int
+    mtime_ns: int
+
+
+def iter_link_tasks(deletion_groups: Sequence[DeletionGroup], base_path: Path) -> Iterator[LinkTask]:
+    """Pair every file under each duplicate directory with the same relative path under the kept one."""
+    for _, keep_node, duplicate_nodes in deletion_groups:
+        keep_dir = path_on_disk(base_path, tuple(keep_node["path"]))
+        for node in duplicate_nodes:
+            duplicate_dir = path_on_disk(base_path, tuple(node["path"]))
+            for root, _, names in os.walk(duplicate_dir):
+                for name in sorted(names):
+                    if name.endswith(LINK_TEMP_SUFFIX):
+                        continue
+                    duplicate = Path(root) / name
+                    yield LinkTask(kept=keep_dir / duplicate.relative_to(duplicate_dir), duplicate=duplicate)
+
+
+def reflink(source: Path, destination: Path):
+    """Create destination as a copy-on-write clone of source (FICLONE); raises OSError when unsupported."""
+    if fcntl is None:
+        raise OSError(errno.ENOTSUP, "reflinks need fcntl.ioctl", str(destination))
+    with open(source, "rb") as src, open(destination, "xb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    hash_file_in_chunks(path, hasher)
+    return hasher.hexdigest()
+
+
+def _replace_with_link(task: LinkTask, mode: str) -> str:
+    """Link the kept file to a temporary name beside the duplicate, then rename it over the duplicate."""
+    temp = task.duplicate.with_name(task.duplicate.name + LINK_TEMP_SUFFIX)
+    temp.unlink(missing_ok=True)  # left behind by an interrupted run
+    method = "hardlink"
+    if mode != "hardlink":
+        try:
+            reflink(task.kept, temp)
+            shutil.copystat(task.duplicate, temp)
+            method = "reflink"
+        except OSError as exc:
+            temp.unlink(missing_ok=True)
+            if mode == "reflink" or exc.errno not in _REFLINK_UNSUPPORTED:
+                raise
+    if method == "hardlink":
+        os.link(task.kept, temp)
+    os.replace(temp, task.duplicate)
+    return method
+
+
+def link_file(task: LinkTask, mode: str = DEFAULT_LINK_MODE) -> LinkOutcome:
+    """Verify one duplicate against the kept copy and replace it with a link (runs in worker threads)."""
+    kept_info = os.lstat(task.kept)
+    duplicate_info = os.lstat(task.duplicate)
+    if not (stat.S_ISREG(kept_info.st_mode) and stat.S_ISREG(duplicate_info.st_mode)):
+        raise FileMismatchError(task.duplicate, "not a regular file on both sides")
+    if (kept_info.st_dev, kept_info.st_ino) == (duplicate_info.st_dev, duplicate_info.st_ino):
+        return LinkOutcome(task, "already-linked", duplicate_info.st_size, duplicate_info.st_mtime_ns)
+    if kept_info.st_size != duplicate_info.st_size:
+        raise FileMismatchError(task.duplicate, f"size {duplicate_info.st_size:,} != kept {kept_info.st_size:,}")
+    if _sha256(task.kept) != _sha256(task.duplicate):
+        raise FileMismatchError(task.duplicate, f"checksum differs from {task.kept}")
+    current = os.lstat(task.duplicate)
+    if (current.st_size, current.st_mtime_ns) != (duplicate_info.st_size, duplicate_info.st_mtime_ns):
+        raise FileMismatchError(task.duplicate, "changed while it was being verified")
+    method = _replace_with_link(task, mode)
+    linked = os.lstat(task.duplicate)
+    return LinkOutcome(task, method, linked.st_size, linked.st_mtime_ns)
+
+
+def _link_or_error(task: LinkTask, mode: str) -> Union[LinkOutcome, Exception]:
+    try:
+        return link_file(task, mode)
+    except (OSError, FileMismatchError) as exc:
+        return exc
+
+
+class LinkJournal:
+    """Files already replaced by a link, trusted while their size, mtime and target are unchanged.
+
+    Paths are stored absolute so migration_sync can find hard-linked files and skip them on a re-sync.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._pending: List[LinkOutcome] = []
+        conn.execute(LINK_JOURNAL_TABLE_SQL)
+        conn.commit()
+
+    def is_done(self, task: LinkTask) -> bool:
+        """True when a previous run already linked this file to the same target."""
+        row = self._conn.execute(
+            "SELECT target, size, mtime_ns FROM duplicate_tree_links WHERE path = ?", (os.path.abspath(task.duplicate),)
+        ).fetchone()
+        if row is None or row[0] != os.path.abspath(task.kept):
+            return False
+        try:
+            info = os.lstat(task.duplicate)
+        except OSError:
+            return False
+        return (row[1], row[2]) == (info.st_size, info.st_mtime_ns)
+
+    def record(self, outcome: LinkOutcome):
+        """Remember a linked file; written on the next flush()."""
+        self._pending.append(outcome)
+
+    def flush(self):
+        """Write recorded links and commit."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO duplicate_tree_links (path, target, size, mtime_ns, method) VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    os.path.abspath(outcome.task.duplicate),
+                    os.path.abspath(outcome.task.kept),
+                    outcome.size,
+                    outcome.mtime_ns,
+                    outcome.method,
+                )
+                for outcome in self._pending
+            ],
+        )
+        self._conn.commit()
+        self._pending.clear()
+
+
+def perform_links(
+    deletion_groups: Sequence[DeletionGroup],
+    base_path: Path,
+    db_path: str,
+    *,
+    mode: str = DEFAULT_LINK_MODE,
+    workers: int = DEFAULT_LINK_WORKERS,
+) -> tuple[Counter, List[tuple[Path, Exception]]]:
+    """Link every duplicate file to its kept copy, returning per-method counts and per-path errors."""
+    stats: Counter = Counter()
+    errors: List[tuple[Path, Exception]] = []
+    conn = sqlite3.connect(db_path)
+    try:
+        journal = LinkJournal(conn)
+        tasks = iter_link_tasks(deletion_groups, base_path)
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="dedupe-link") as pool:
+            while batch := list(islice(tasks, LINK_BATCH_SIZE)):
+                pending = [task for task in batch if not journal.is_done(task)]
+                stats["resumed"] += len(batch) - len(pending)
+                for task, result in zip(pending, pool.map(lambda task: _link_or_error(task, mode), pending)):
+                    if isinstance(result, Exception):
+                        errors.append((task.duplicate, result))
+                        print(f"\nError linking {task.duplicate}: {result}")
+                        continue
+                    stats[result.method] += 1
+                    if result.method != "already-linked":
+                        stats["bytes"] += result.size
+                    journal.record(result)
+                journal.flush()
+                print(f"\r  Linked {stats['reflink'] + stats['hardlink']:,} files ({format_bytes(stats['bytes'])})", end="", flush=True)
+        print()
+    finally:
+        conn.close()
+    return stats, errors
+
+
+def print_link_plan(deletion_groups: Sequence[DeletionGroup], base_path: Path, mode: str):
+    """Display which directories keep their data and which get linked to it."""
+    print(f"\nLink plan ({mode}; files in each duplicate become links to the first directory shown):")
+    for cluster_idx, keep_node, duplicate_nodes in deletion_groups:
+        print(f"[{cluster_idx}] Keep {path_on_disk(base_path, tuple(keep_node['path']))}")
+        for node in duplicate_nodes:
+            print(f"    link   {format_bytes(node['total_size']):>12}  {path_on_disk(base_path, tuple(node['path']))}")
+        print()
+
+
+def link_duplicate_directories(
+    cluster_rows: Sequence[ClusterRow],
+    base_path: Path,
+    db_path: str,
+    *,
+    mode: str = DEFAULT_LINK_MODE,
+    workers: int = DEFAULT_LINK_WORKERS,
+):
+    """Replace the files of every duplicate directory except the first per cluster with links."""
+    deletion_groups, total_bytes, total_dirs = build_deletion_groups(cluster_rows)
+    if not deletion_groups:
+        print("No duplicate directories meet the link criteria.")
+        return
+
+    print_link_plan(deletion_groups, base_path, mode)
+    try:
+        confirmed = confirm_action(f"Replace files in {total_dirs} directories ({format_bytes(total_bytes)}) with links? [y/N]: ")
+    except (EOFError, ConfirmationNotReceivedError):
+        confirmed = False
+    if not confirmed:
+        print("Linking cancelled.")
+        return
+
+    stats, errors = perform_links(deletion_groups, base_path, db_path, mode=mode, workers=workers)
+    print(
+        f"Reflinked {stats['reflink']:,}, hard linked {stats['hardlink']:,}, already linked {stats['already-linked']:,}, "
+        f"resumed {stats['resumed']:,} files; {format_bytes(stats['bytes'])} reclaimed."
+    )
+    if errors:
+        print(f"Completed with {len(errors)} error(s); mismatched files were left untouched.")
+    else:
+        print("Linking complete.")
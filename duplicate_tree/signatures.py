@@ -0,0 +1,94 @@
+"""Directory signature hashing for duplicate tree detection.
+
+A directory's signature covers the digest of its own files plus the names and
+signatures of its subdirectories, so equal signatures mean equal subtrees. Large
+depth levels are signed in worker processes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Iterable, List, Optional
+
+DIGEST_BYTES = 32
+DIGEST_MODULUS = 1 << (8 * DIGEST_BYTES)
+SIGNATURE_VERSION = 2
+SIGNATURE_TAG = f"duplicate-tree-signature-v{SIGNATURE_VERSION}\0".encode("ascii")
+DEFAULT_SIGNATURE_WORKERS = 1
+PARALLEL_MIN_LEVEL_NODES = 50_000
+PARALLEL_CHUNKS_PER_WORKER = 4
+
+# (files digest, [(child name, child signature), ...]) hashed into one directory signature.
+SignatureInput = tuple[bytes, List[tuple[bytes, bytes]]]
+
+
+def file_entry_digest(name: str, size: int, checksum: str) -> int:
+    """Hash one (name, size, checksum) entry; a directory's files digest is the sum of these."""
+    payload = f"{name}\0{size}\0{checksum}".encode("utf-8")
+    return int.from_bytes(hashlib.sha256(payload).digest(), "big")
+
+
+def compute_signature(files_digest: bytes, children: Iterable[tuple[bytes, bytes]]) -> bytes:
+    """SHA-256 over a canonical binary encoding of one directory.
+
+    The encoding is a version tag, the directory's files digest, then each child's
+    length-prefixed UTF-8 name and signature in name order, so two directories share a
+    signature exactly when their files and named subtrees match.
+    """
+    hasher = hashlib.sha256(SIGNATURE_TAG)
+    hasher.update(files_digest)
+    for name, signature in sorted(children):
+        hasher.update(len(name).to_bytes(4, "big"))
+        hasher.update(name)
+        hasher.update(signature)
+    return hasher.digest()
+
+
+def sign_batch(inputs: List[SignatureInput]) -> List[bytes]:
+    """Sign a batch of (files digest, children) inputs; runs in finalize worker processes."""
+    return [compute_signature(files_digest, children) for files_digest, children in inputs]
+
+
+class LevelSigner:
+    """Signs one depth level at a time; use as a context manager.
+
+    Levels of at least PARALLEL_MIN_LEVEL_NODES directories are split into chunks and
+    hashed on a process pool that is started on first use; smaller levels are signed
+    inline. The signatures do not depend on workers.
+    """
+
+    def __init__(self, workers: int = DEFAULT_SIGNATURE_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "LevelSigner":
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def sign(self, inputs: List[SignatureInput]) -> Iterable[bytes]:
+        """Signatures for inputs, in the same order."""
+        if self.workers <= 1 or len(inputs) < PARALLEL_MIN_LEVEL_NODES:
+            return sign_batch(inputs)
+        self._pool = self._pool or ProcessPoolExecutor(max_workers=self.workers)
+        chunk = -(-len(inputs) // (self.workers * PARALLEL_CHUNKS_PER_WORKER))
+        batches = [inputs[start : start + chunk] for start in range(0, len(inputs), chunk)]
+        return chain.from_iterable(self._pool.map(sign_batch, batches))
+
+
+__all__ = [
+    "DEFAULT_SIGNATURE_WORKERS",
+    "DIGEST_BYTES",
+    "DIGEST_MODULUS",
+    "SIGNATURE_VERSION",
+    "LevelSigner",
+    "SignatureInput",
+    "compute_signature",
+    "file_entry_digest",
+    "sign_batch",
+]
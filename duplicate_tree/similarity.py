@@ -0,0 +1,231 @@
+"""Near-duplicate directory detection with MinHash sketches and LSH banding.
+
+Every directory is sketched over the (name, size, checksum) entries of all files in its
+subtree with one-permutation MinHash: an entry's digest selects one of SKETCH_BINS bins
+and each bin keeps the smallest value it has seen. A directory's sketch is the element-wise
+minimum of its own files' sketch and its children's sketches, so subtree sketches are
+merged bottom-up in a single pass. Directories agreeing on a whole band of bins share an
+LSH bucket, and only pairs sharing a bucket are compared.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from array import array
+from itertools import combinations
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from duplicate_tree.core import (
+    NO_PARENT,
+    DirectoryIndex,
+    has_ancestor_in,
+    split_file_key,
+)
+from duplicate_tree.signatures import file_entry_digest
+from duplicate_tree_models import (
+    DirectoryNode,
+    FilesTableReadError,
+    NearDuplicatePair,
+    PathTuple,
+    ProgressPrinter,
+)
+
+SKETCH_BINS = 64
+LSH_BANDS = 8  # 8 bins per band: pairs near 0.77 similarity become candidates half of the time
+DEFAULT_SIMILARITY_THRESHOLD = 0.8
+EMPTY_BIN = 0xFFFFFFFF
+_BIN_MASK = SKETCH_BINS - 1
+_VALUE_SHIFT = 64
+_BAND_BYTES = SKETCH_BINS // LSH_BANDS * array("I").itemsize
+_EMPTY_BAND = (array("I", [EMPTY_BIN]) * (SKETCH_BINS // LSH_BANDS)).tobytes()
+
+
+def empty_sketch() -> array:
+    """Sketch of an empty file set."""
+    return array("I", [EMPTY_BIN]) * SKETCH_BINS
+
+
+def add_entry(sketch: array, entry_digest: int):
+    """Fold one file_entry_digest() into a sketch in place."""
+    value = (entry_digest >> _VALUE_SHIFT) % EMPTY_BIN
+    bin_index = entry_digest & _BIN_MASK
+    if value < sketch[bin_index]:
+        sketch[bin_index] = value
+
+
+def merge_sketches(left: array, right: array) -> array:
+    """Sketch of the union of two file sets."""
+    return array("I", map(min, left, right))
+
+
+def estimate_similarity(left: array, right: array) -> float:
+    """Estimated Jaccard similarity: matching bins over the bins that are not empty in both sketches."""
+    matches = 0
+    empty = 0
+    for left_value, right_value in zip(left, right):
+        if left_value == right_value:
+            if left_value == EMPTY_BIN:
+                empty += 1
+            else:
+                matches += 1
+    filled = SKETCH_BINS - empty
+    return matches / filled if filled else 0.0
+
+
+def estimate_reclaimable_bytes(similarity: float, left: DirectoryNode, right: DirectoryNode) -> int:
+    """Bytes of the smaller directory estimated to also exist in the larger one.
+
+    A Jaccard similarity J between file sets A and B means J * (|A| + |B|) / (1 + J) shared
+    files, priced at the smaller directory's mean file size.
+    """
+    smaller = min(left, right, key=lambda node: (node.total_size, node.total_files))
+    if not smaller.total_files:
+        return 0
+    shared_files = similarity * (left.total_files + right.total_files) / (1 + similarity)
+    return min(smaller.total_size, int(smaller.total_size * shared_files / smaller.total_files))
+
+
+def _files_cursor(conn: sqlite3.Connection, db_path: str) -> tuple[int, sqlite3.Cursor]:
+    """Return (file count, cursor over bucket, key, size, checksum in key order) for the files table."""
+    try:
+        total_files = conn.execute("SELECT COUNT(*) FROM files WHERE key NOT LIKE '%/'").fetchone()[0]
+    except sqlite3.OperationalError as exc:
+        raise FilesTableReadError(db_path) from exc
+    cursor = conn.execute(
+        """
+        SELECT bucket, key, size,
+               COALESCE(local_checksum, etag, '') AS checksum
+        FROM files
+        ORDER BY bucket, key
+        """
+    )
+    return total_files, cursor
+
+
+def _sketch_rows(rows: Iterable[tuple], index: DirectoryIndex, on_row: Callable[[int], None]) -> Dict[int, array]:
+    """Sketch key-ordered (bucket, key, size, checksum) rows into per-directory sketches of their direct files."""
+    sketches: Dict[int, array] = {}
+    last_dir: Optional[PathTuple] = None
+    sketch: Optional[array] = None
+    for processed, (bucket, key, size, checksum) in enumerate(rows, start=1):
+        on_row(processed)
+        split = split_file_key(bucket, key)
+        if split is None:
+            continue
+        dir_parts, filename = split
+        if dir_parts != last_dir:
+            last_dir = dir_parts
+            node_id = index.find(dir_parts)
+            sketch = None if node_id is None else sketches.setdefault(node_id, empty_sketch())
+        if sketch is not None:
+            add_entry(sketch, file_entry_digest(filename, size, checksum or ""))
+    return sketches
+
+
+def _direct_sketches(db_path: str, index: DirectoryIndex, progress_label: str) -> Dict[int, array]:
+    """Stream the files table once and sketch the files directly inside each directory."""
+    conn = sqlite3.connect(db_path)
+    try:
+        total_files, rows = _files_cursor(conn, db_path)
+        progress = ProgressPrinter(total_files, progress_label)
+        start_time = time.time()
+        processed = 0
+
+        def _on_row(count: int) -> None:
+            nonlocal processed
+            processed = count
+            progress.update(count)
+
+        try:
+            return _sketch_rows(rows, index, _on_row)
+        except KeyboardInterrupt:
+            print("\n\n✗ Sketching interrupted by user.")
+            raise
+        finally:
+            elapsed = time.time() - start_time
+            progress.finish(f"{progress_label} processed {processed:,}/{total_files:,} files in {elapsed:.1f}s")
+    finally:
+        conn.close()
+
+
+def sketch_directories(
+    db_path: str,
+    index: DirectoryIndex,
+    is_candidate: Callable[[int], bool],
+    progress_label: str = "Sketching files",
+) -> Dict[int, array]:
+    """Return subtree sketches for the candidate directories of a finalized index.
+
+    Sketches are pushed from children to parents in one reverse pass over the node ids
+    (children always have larger ids), so only candidates and the current frontier stay in memory.
+    """
+    partial = _direct_sketches(db_path, index, progress_label)
+    sketches: Dict[int, array] = {}
+    for node_id in reversed(list(index.node_ids())):
+        sketch = partial.pop(node_id, None)
+        if sketch is None:
+            continue
+        parent = index.parent_id(node_id)
+        if parent != NO_PARENT:
+            parent_sketch = partial.get(parent)
+            partial[parent] = sketch if parent_sketch is None else merge_sketches(parent_sketch, sketch)
+        if is_candidate(node_id):
+            sketches[node_id] = sketch
+    return sketches
+
+
+def _candidate_pairs(index: DirectoryIndex, sketches: Dict[int, array]) -> Set[tuple[int, int]]:
+    """(lower id, higher id) pairs sharing at least one LSH band, one directory per exact signature."""
+    representatives: Dict[Optional[bytes], int] = {}
+    for node_id in sorted(sketches):
+        representatives.setdefault(index.raw_signature(node_id), node_id)
+    buckets: Dict[bytes, List[int]] = {}
+    for node_id in representatives.values():
+        raw = sketches[node_id].tobytes()
+        for band in range(LSH_BANDS):
+            key = raw[band * _BAND_BYTES : (band + 1) * _BAND_BYTES]
+            if key != _EMPTY_BAND:
+                buckets.setdefault(bytes([band]) + key, []).append(node_id)
+    pairs: Set[tuple[int, int]] = set()
+    for members in buckets.values():
+        pairs.update(combinations(members, 2))
+    return pairs
+
+
+def find_near_duplicates(
+    index: DirectoryIndex,
+    sketches: Dict[int, array],
+    threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+) -> List[NearDuplicatePair]:
+    """Pairs of sketched directories at or above threshold similarity, most reclaimable bytes first.
+
+    Exact duplicates are left to find_exact_duplicates, a directory is never paired with its
+    own ancestor, and pairs nested inside an already reported pair are dropped.
+    """
+    matches: List[tuple[int, float, int, int]] = []
+    for left, right in _candidate_pairs(index, sketches):
+        if has_ancestor_in(index, right, {left}):
+            continue
+        similarity = estimate_similarity(sketches[left], sketches[right])
+        if similarity >= threshold:
+            depth = min(len(index.path_of(left)), len(index.path_of(right)))
+            matches.append((depth, -similarity, left, right))
+    seen: Set[int] = set()
+    pairs: List[NearDuplicatePair] = []
+    for _, negative_similarity, left, right in sorted(matches):
+        if has_ancestor_in(index, left, seen) and has_ancestor_in(index, right, seen):
+            continue
+        seen.update((left, right))
+        nodes = sorted((index.node(left), index.node(right)), key=lambda node: (-node.total_size, node.path))
+        similarity = -negative_similarity
+        pairs.append(NearDuplicatePair(similarity, estimate_reclaimable_bytes(similarity, *nodes), nodes))
+    return sorted(pairs, key=lambda pair: (-pair.reclaimable_bytes, -pair.similarity, pair.nodes[0].path))
+
+
+__all__ = [
+    "DEFAULT_SIMILARITY_THRESHOLD",
+    "estimate_similarity",
+    "find_near_duplicates",
+    "sketch_directories",
+]
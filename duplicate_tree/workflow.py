@@ -11,17 +11,20 @@ from duplicate_tree.analysis import (
     ScanFingerprint,
     apply_thresholds,
     clusters_to_rows,
+    near_duplicates_to_rows,
+    render_near_duplicate_rows,
     render_report_rows,
 )
-from duplicate_tree.cache import load_cached_report, store_cached_report
+from duplicate_tree.cache import CachedReport, load_cached_report, store_cached_report
 from duplicate_tree.core import (
     DirectoryIndex,
     find_exact_duplicates,
 )
+from duplicate_tree.similarity import DEFAULT_SIMILARITY_THRESHOLD, find_near_duplicates, sketch_directories
 
 
 @dataclass(frozen=True)
-class DuplicateAnalysisContext:
+class DuplicateAnalysisContext:  # pylint: disable=too-many-instance-attributes
     """Context for duplicate analysis operations."""
 
     db_path: str
@@ -30,34 +33,43 @@ class DuplicateAnalysisContext:
     min_files: int
     min_bytes: int
     use_cache: bool
-    can_cache_results: bool
+    limit: Optional[int] = None
+    offset: int = 0
+    similarity: Optional[float] = None
+
+
+def _page_report(context: DuplicateAnalysisContext, cluster_rows: List[ClusterRow], total: int) -> tuple[List[ClusterRow], str]:
+    report_text = render_report_rows(cluster_rows, context.base_path)
+    if cluster_rows and len(cluster_rows) < total:
+        first = context.offset + 1
+        report_text += f"Showing clusters {first:,}-{first + len(cluster_rows) - 1:,} of {total:,}.\n"
+    return cluster_rows, report_text
+
+
+def _load_page(context: DuplicateAnalysisContext, fingerprint: ScanFingerprint) -> Optional[CachedReport]:
+    return load_cached_report(
+        context.db_path,
+        fingerprint,
+        context.min_files,
+        context.min_bytes,
+        limit=context.limit,
+        offset=context.offset,
+    )
 
 
 def load_cached_duplicates(
     context: DuplicateAnalysisContext,
     fingerprint: ScanFingerprint,
-) -> Optional[tuple[Optional[List[ClusterRow]], str]]:
+) -> Optional[tuple[List[ClusterRow], str]]:
     """Attempt to load cached duplicate analysis."""
     if not context.use_cache:
         return None
-    cached_report = load_cached_report(
-        context.db_path,
-        fingerprint,
-        context.base_path_str,
-        context.min_files,
-        context.min_bytes,
-    )
+    cached_report = _load_page(context, fingerprint)
     if not cached_report:
         return None
 
-    print("Using cached duplicate analysis from " f"{cached_report['generated_at']} " f"({int(cached_report['total_files']):,} files).")
-    if "rows" in cached_report:
-        cluster_rows: Optional[List[ClusterRow]] = cached_report["rows"]
-        report_text = render_report_rows(cluster_rows, context.base_path)
-    else:
-        cluster_rows = None
-        report_text: str = cached_report["report"]
-    return cluster_rows, report_text
+    print("Using cached duplicate analysis from " f"{cached_report['generated_at']} " f"({cached_report['total_files']:,} files).")
+    return _page_report(context, cached_report["rows"], cached_report["total_clusters"])
 
 
 def compute_fresh_duplicates(
@@ -65,29 +77,33 @@ def compute_fresh_duplicates(
     context: DuplicateAnalysisContext,
     fingerprint: ScanFingerprint,
 ) -> tuple[List[ClusterRow], str]:
-    """Compute fresh duplicate analysis from index."""
+    """Compute fresh duplicate analysis from index, cache every cluster and report the requested page."""
     clusters = find_exact_duplicates(index)
+    store_cached_report(context.db_path, fingerprint, clusters)
     clusters = apply_thresholds(clusters, context.min_files, context.min_bytes)
     clusters = sorted(clusters, key=lambda c: c.nodes[0].total_size if c.nodes else 0, reverse=True)
-    cluster_rows = clusters_to_rows(clusters)
-    report_text = render_report_rows(cluster_rows, context.base_path)
-    if context.can_cache_results:
-        store_cached_report(
-            context.db_path,
-            fingerprint,
-            context.base_path_str,
-            clusters,
-            context.min_files,
-            context.min_bytes,
-        )
-    return cluster_rows, report_text
+    end = None if context.limit is None else context.offset + context.limit
+    return _page_report(context, clusters_to_rows(clusters[context.offset : end]), len(clusters))
+
+
+def compute_near_duplicates(index: DirectoryIndex, context: DuplicateAnalysisContext) -> str:
+    """Sketch directories passing the thresholds and report pairs at or above context.similarity."""
+    threshold = DEFAULT_SIMILARITY_THRESHOLD if context.similarity is None else context.similarity
+
+    def _is_candidate(node_id: int) -> bool:
+        total_files, total_size = index.totals(node_id)
+        return total_files > context.min_files and total_size >= context.min_bytes
+
+    sketches = sketch_directories(context.db_path, index, _is_candidate)
+    pairs = find_near_duplicates(index, sketches, threshold)
+    return render_near_duplicate_rows(near_duplicates_to_rows(pairs), context.base_path, threshold)
 
 
 def load_or_compute_duplicates(
     index: DirectoryIndex,
     fingerprint: ScanFingerprint,
     context: DuplicateAnalysisContext,
-) -> tuple[Optional[List[ClusterRow]], str]:
+) -> tuple[List[ClusterRow], str]:
     """Load cached duplicates or compute fresh analysis."""
     cached_result = load_cached_duplicates(context, fingerprint)
     if cached_result is not None:
@@ -3,8 +3,8 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass, field
-from typing import List, Optional, Set, Tuple
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 
 PathTuple = Tuple[str, ...]
 PROGRESS_MIN_INTERVAL = 5.0
@@ -24,27 +24,17 @@ class FilesTableReadError(RuntimeError):
         super().__init__((f"Unable to read files table from {db_path!r}. " "Ensure migrate_v2 has initialized the database."))
 
 
-@dataclass
-class FileEntry:
-    """Basic file metadata tracked for duplicate comparison."""
-
-    name: str
-    size: int
-    checksum: str
-
-
-@dataclass
-class DirectoryNode:  # pylint: disable=too-many-instance-attributes
-    """Directory representation built from the metadata database."""
+@dataclass(slots=True)
+class DirectoryNode:
+    """Directory representation materialized from a DirectoryIndex."""
 
     path: PathTuple
-    files: List[FileEntry] = field(default_factory=list)
-    children: Set[PathTuple] = field(default_factory=set)
     direct_size: int = 0
     direct_files: int = 0
     total_size: int = 0
     total_files: int = 0
     signature: Optional[str] = None
+    node_id: Optional[int] = None
 
 
 @dataclass
@@ -55,6 +45,15 @@ class DuplicateCluster:
     nodes: List[DirectoryNode]
 
 
+@dataclass
+class NearDuplicatePair:
+    """Two directories whose file sets are similar but not identical."""
+
+    similarity: float
+    reclaimable_bytes: int
+    nodes: List[DirectoryNode]
+
+
 class ProgressPrinter:  # pylint: disable=too-few-public-methods
     """Simple in-place progress bar."""
 
@@ -96,8 +95,8 @@ __all__ = [
     "ChildSignatureMissingError",
     "DirectoryNode",
     "DuplicateCluster",
-    "FileEntry",
     "FilesTableReadError",
+    "NearDuplicatePair",
     "PathTuple",
     "ProgressPrinter",
     "PROGRESS_MIN_INTERVAL",
@@ -18,35 +18,53 @@ Usage:
     python migrate_v2.py           # Run/resume migration
     python migrate_v2.py status    # Show current status
     python migrate_v2.py reset     # Reset and start over
+    python migrate_v2.py worker    # Sync/verify leased buckets alongside other workers
+    python migrate_v2.py rescan    # Pick up objects changed or deleted since the scan
+    python migrate_v2.py --profile DIR # Run with per-phase cProfile output in DIR
 """
 import argparse
 import shutil
 import signal
 import sys
+from contextlib import nullcontext
 from dataclasses import dataclass
 from pathlib import Path
-
-import boto3
+from typing import Optional
 
 import config as config_module
-import migrate_v2_smoke as smoke_tests
 from migration_orchestrator import (
     BucketMigrationOrchestrator,
     BucketMigrator,
     MigrationFatalError,
     StatusReporter,
 )
+from migration_profiling import PhaseProfiler
+from migration_rescan import run_rescan
 from migration_scanner import BucketScanner, GlacierRestorer, GlacierWaiter
 from migration_state_v2 import MigrationStateV2, Phase
+from migration_sync_durability import DurabilityPolicy
+from migration_transfer_scheduler import GlobalTransferScheduler
+from migration_worker import DEFAULT_LEASE_SECONDS, WORKER_PHASES, BucketLeaseWorker
 from state_db_admin import recreate_state_db
 
 # pylint: disable=no-member  # Attributes imported from config_local at runtime
 LOCAL_BASE_PATH = config_module.LOCAL_BASE_PATH
 STATE_DB_PATH = config_module.STATE_DB_PATH
+TRANSFER_WORKERS = config_module.TRANSFER_WORKERS
+MAX_BYTES_IN_FLIGHT = config_module.MAX_BYTES_IN_FLIGHT
+DURABILITY_MODE = config_module.DURABILITY_MODE
+DURABILITY_BATCH_FILES = config_module.DURABILITY_BATCH_FILES
+DURABILITY_BATCH_BYTES = config_module.DURABILITY_BATCH_BYTES
+DOWNLOAD_READ_SIZE = config_module.DOWNLOAD_READ_SIZE
 # pylint: enable=no-member
 config = config_module  # expose module for tests
 
 
+def durability_policy() -> DurabilityPolicy:
+    """Build the download durability policy from config."""
+    return DurabilityPolicy(mode=DURABILITY_MODE, batch_files=DURABILITY_BATCH_FILES, batch_bytes=DURABILITY_BATCH_BYTES)
+
+
 def reset_migration_state():
     """Reset all cached migrate_v2 state and recreate an empty database."""
 
@@ -129,8 +147,14 @@ class MigrationComponents:
 class S3MigrationV2:  # pylint: disable=too-many-instance-attributes
     """Main orchestrator for S3 to local migration using AWS CLI"""
 
-    def __init__(self, state: MigrationStateV2, components: MigrationComponents):
+    def __init__(
+        self,
+        state: MigrationStateV2,
+        components: MigrationComponents,
+        profiler: Optional[PhaseProfiler] = None,
+    ):
         self.state = state
+        self.profiler = profiler
         self.drive_checker = components.drive_checker
         self.scanner = components.scanner
         self.glacier_restorer = components.glacier_restorer
@@ -150,6 +174,8 @@ class S3MigrationV2:  # pylint: disable=too-many-instance-attributes
         self.bucket_migrator.interrupted = True
         self.bucket_migrator.syncer.interrupted = True
         self.migration_orchestrator.interrupted = True
+        if self.migration_orchestrator.transfer_scheduler is not None:
+            self.migration_orchestrator.transfer_scheduler.interrupted = True
 
     def signal_handler(self, _signum, _frame):
         """Handle Ctrl+C gracefully"""
@@ -182,24 +208,42 @@ class S3MigrationV2:  # pylint: disable=too-many-instance-attributes
             return
         print(f"Resuming from: {current_phase.value}")
         print()
+        try:
+            self._run_phases(current_phase)
+        finally:
+            if self.profiler is not None:
+                self.profiler.print_report()
+
+    def _run_phases(self, current_phase: Phase):
+        """Run every phase from current_phase onward"""
         if current_phase == Phase.SCANNING:
-            self.scanner.scan_all_buckets()
+            with self._phase_context(Phase.SCANNING):
+                self.scanner.scan_all_buckets()
             current_phase = Phase.GLACIER_RESTORE
         if current_phase == Phase.GLACIER_RESTORE:
-            self.glacier_restorer.request_all_restores()
+            with self._phase_context(Phase.GLACIER_RESTORE):
+                self.glacier_restorer.request_all_restores()
             current_phase = Phase.GLACIER_WAIT
         if current_phase == Phase.GLACIER_WAIT:
-            self.glacier_waiter.wait_for_restores()
+            with self._phase_context(Phase.GLACIER_WAIT):
+                self.glacier_waiter.wait_for_restores()
             current_phase = Phase.SYNCING
         if current_phase in {Phase.SYNCING, Phase.VERIFYING, Phase.DELETING}:
             try:
-                self.migration_orchestrator.migrate_all_buckets()
+                with self._phase_context(current_phase):
+                    self.migration_orchestrator.migrate_all_buckets()
             except MigrationFatalError:
                 sys.exit(1)
             current_phase = self.state.get_current_phase()
         if current_phase == Phase.COMPLETE:
             self._print_completion_message()
 
+    def _phase_context(self, phase: Phase):
+        """Return a profiling context for phase, or a no-op when profiling is off"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.profile(phase.value)
+
     def _print_completion_message(self):
         """Print migration completion message"""
         self.state.set_current_phase(Phase.COMPLETE)
@@ -219,8 +263,10 @@ class S3MigrationV2:  # pylint: disable=too-many-instance-attributes
         reset_migration_state()
 
 
-def create_migrator() -> S3MigrationV2:
+def create_migrator(profile_dir: Optional[str] = None) -> S3MigrationV2:
     """Factory function to create S3MigrationV2 with all dependencies"""
+    import boto3  # pylint: disable=import-outside-toplevel
+
     state = MigrationStateV2(config.STATE_DB_PATH)
     s3 = boto3.client("s3")
     base_path = Path(config.LOCAL_BASE_PATH)
@@ -228,8 +274,22 @@ def create_migrator() -> S3MigrationV2:
     scanner = BucketScanner(s3, state)
     glacier_restorer = GlacierRestorer(s3, state)
     glacier_waiter = GlacierWaiter(s3, state)
-    bucket_migrator = BucketMigrator(s3, state, base_path)
-    migration_orchestrator = BucketMigrationOrchestrator(s3, state, base_path, drive_checker, bucket_migrator)
+    durability = durability_policy()
+    bucket_migrator = BucketMigrator(s3, state, base_path, durability=durability, read_size=DOWNLOAD_READ_SIZE)
+    transfer_scheduler = None
+    if TRANSFER_WORKERS > 0:
+        transfer_scheduler = GlobalTransferScheduler(
+            s3,
+            state,
+            base_path,
+            workers=TRANSFER_WORKERS,
+            max_bytes_in_flight=MAX_BYTES_IN_FLIGHT,
+            durability=durability,
+            read_size=DOWNLOAD_READ_SIZE,
+        )
+    migration_orchestrator = BucketMigrationOrchestrator(
+        s3, state, base_path, drive_checker, bucket_migrator, transfer_scheduler=transfer_scheduler
+    )
     status_reporter = StatusReporter(state)
     components = MigrationComponents(
         drive_checker=drive_checker,
@@ -240,11 +300,45 @@ def create_migrator() -> S3MigrationV2:
         bucket_migrator=bucket_migrator,
         status_reporter=status_reporter,
     )
-    return S3MigrationV2(state, components)
+    profiler = PhaseProfiler(Path(profile_dir), state) if profile_dir else None
+    return S3MigrationV2(state, components, profiler=profiler)
+
+
+def show_migration_status():
+    """Display status from a read-only state DB without building S3 clients."""
+    db_path = Path(config.STATE_DB_PATH)
+    if not db_path.exists():
+        print(f"No migration state found at {db_path}")
+        return
+    StatusReporter(MigrationStateV2(str(db_path), read_only=True)).show_status()
+
+
+def run_worker(worker_id: Optional[str] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+    """Sync and verify buckets claimed through DB leases; returns the process exit code."""
+    import boto3  # pylint: disable=import-outside-toplevel
+
+    state = MigrationStateV2(config.STATE_DB_PATH)
+    current_phase = state.get_current_phase()
+    if current_phase not in WORKER_PHASES:
+        print(f"Workers start after scanning and Glacier restores (current phase: {current_phase.value}).")
+        print("Run 'python migrate_v2.py' first.")
+        return 1
+    base_path = Path(config.LOCAL_BASE_PATH)
+    bucket_migrator = BucketMigrator(
+        boto3.client("s3"), state, base_path, confirm_delete=False, durability=durability_policy(), read_size=DOWNLOAD_READ_SIZE
+    )
+    worker = BucketLeaseWorker(state, bucket_migrator, DriveChecker(base_path), worker_id=worker_id, lease_seconds=lease_seconds)
+    try:
+        worker.run()
+    except MigrationFatalError:
+        return 1
+    return 0
 
 
 def run_smoke_test():
     """Run the smoke test using the shared helper module."""
+    import migrate_v2_smoke as smoke_tests  # pylint: disable=import-outside-toplevel
+
     smoke_tests.run_smoke_test(config, DriveChecker, create_migrator)
 
 
@@ -257,7 +351,7 @@ def main():
     parser.add_argument(
         "command",
         nargs="?",
-        choices=["status", "reset"],
+        choices=["status", "reset", "worker", "rescan"],
         help="Command to execute (default: run migration)",
     )
     parser.add_argument(
@@ -265,14 +359,32 @@ def main():
         action="store_true",
         help="Run a local smoke test that simulates the backup workflow",
     )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="DIR",
+        help="Profile each phase (and the threads it starts) with cProfile and write results to DIR",
+    )
+    parser.add_argument("--worker-id", help="Lease owner id for worker mode (default: hostname:pid)")
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        help=f"Worker lease duration; expired leases are taken over (default: {DEFAULT_LEASE_SECONDS:g})",
+    )
     args = parser.parse_args()
     if args.test:
         run_smoke_test()
         return
-    migrator = create_migrator()
     if args.command == "status":
-        migrator.show_status()
-    elif args.command == "reset":
+        show_migration_status()
+        return
+    if args.command == "worker":
+        sys.exit(run_worker(args.worker_id, args.lease_seconds))
+    if args.command == "rescan":
+        sys.exit(run_rescan(config.STATE_DB_PATH))
+    migrator = create_migrator(profile_dir=args.profile)
+    if args.command == "reset":
         migrator.reset()
     else:
         migrator.run()
@@ -6,6 +6,7 @@ from __future__ import annotations
 
 import builtins
 import hashlib
+import io
 import shutil
 import tempfile
 import uuid
@@ -50,11 +51,15 @@ class _InMemoryBody:
 
     def __init__(self, data: bytes):
         self._data = data
+        self._stream = io.BytesIO(data)
 
     def iter_chunks(self, chunk_size: int = 1024 * 1024):
         for idx in range(0, len(self._data), chunk_size):
             yield self._data[idx : idx + chunk_size]
 
+    def readinto(self, buffer) -> int:
+        return self._stream.readinto(buffer)
+
 
 class _SimulatedS3Client:
     """Minimal S3 client that serves the generated sample data."""
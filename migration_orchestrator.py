@@ -1,10 +1,13 @@
 """Orchestration components: Managing bucket migration and status reporting"""
 
 from pathlib import Path
+from typing import Iterator, List, Optional
 
 from cost_toolkit.common.format_utils import format_bytes
 from migration_state_v2 import MigrationStateV2, Phase
-from migration_sync import BucketSyncer
+from migration_sync import DEFAULT_READ_SIZE, BucketSyncer
+from migration_sync_durability import DurabilityPolicy
+from migration_transfer_scheduler import GlobalTransferScheduler, ScheduledSync
 from migration_utils import print_verification_success_messages
 from migration_verify_bucket import BucketVerifier
 from migration_verify_delete import BucketDeleter
@@ -64,11 +67,20 @@ def show_verification_summary(bucket_info: dict):
 class BucketMigrator:  # pylint: disable=too-few-public-methods
     """Handles migrating a single bucket through sync → verify → delete pipeline"""
 
-    def __init__(self, s3, state: MigrationStateV2, base_path: Path):
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        s3,
+        state: MigrationStateV2,
+        base_path: Path,
+        confirm_delete: bool = True,
+        durability: Optional[DurabilityPolicy] = None,
+        read_size: int = DEFAULT_READ_SIZE,
+    ):
         self.s3 = s3
         self.state = state
         self.base_path = base_path
-        self.syncer = BucketSyncer(s3, state, base_path)
+        self.confirm_delete = confirm_delete
+        self.syncer = BucketSyncer(s3, state, base_path, durability, read_size)
         self.verifier = BucketVerifier(state, base_path)
         self.deleter = BucketDeleter(s3, state)
         self.interrupted = False
@@ -83,6 +95,8 @@ class BucketMigrator:  # pylint: disable=too-few-public-methods
             print("→ Step 1/3: Syncing from S3...")
             print()
             self.syncer.sync_bucket(bucket)
+            if self.interrupted:
+                return
             self.state.mark_bucket_sync_complete(bucket)
             print()
             print("  ✓ Sync complete")
@@ -99,6 +113,8 @@ class BucketMigrator:  # pylint: disable=too-few-public-methods
                 print("→ Step 2/3: Verifying local files...")
             print()
             verify_results = self.verifier.verify_bucket(bucket)
+            if self.interrupted:
+                return
             self.state.mark_bucket_verify_complete(
                 bucket,
                 verified_file_count=verify_results["verified_count"],
@@ -113,7 +129,10 @@ class BucketMigrator:  # pylint: disable=too-few-public-methods
         else:
             print("→ Step 2/3: Already verified ✓")
             print()
-        if not bucket_info["delete_complete"]:
+        if not bucket_info["delete_complete"] and not self.confirm_delete:
+            print("→ Step 3/3: Delete deferred - run 'python migrate_v2.py' to confirm deletion")
+            print()
+        elif not bucket_info["delete_complete"]:
             bucket_info = self.state.get_bucket_info(bucket)
             _require_bucket_fields(bucket, bucket_info)
             self.state.set_current_phase(Phase.DELETING)
@@ -206,19 +225,18 @@ class StatusReporter:  # pylint: disable=too-few-public-methods
             print(f"  Total Files: {summary['total_files']:,}")
             print(f"  Total Size: {format_bytes(summary['total_size'], binary_units=False)}")
             print()
-        all_buckets = self.state.get_all_buckets()
-        if all_buckets:
-            completed = len(self.state.get_completed_buckets_for_phase("delete_complete"))
+        statuses = self.state.get_all_bucket_statuses()
+        if statuses:
+            completed = sum(1 for status in statuses if status.delete_complete)
             print("Bucket Progress:")
-            print(f"  Completed: {completed}/{len(all_buckets)} buckets")
+            print(f"  Completed: {completed}/{len(statuses)} buckets")
             print()
             print("Bucket Details:")
-            for bucket in all_buckets:
-                status = self.state.get_bucket_status(bucket)
+            for status in statuses:
                 sync = "✓" if status.sync_complete else "○"
                 verify = "✓" if status.verify_complete else "○"
                 delete = "✓" if status.delete_complete else "○"
-                print(f"  {bucket}")
+                print(f"  {status.bucket}")
                 file_size = format_bytes(status.total_size, binary_units=False)
                 file_info = f"{status.file_count:,} files, {file_size}"
                 print(f"    Sync:{sync} Verify:{verify} Delete:{delete}  ({file_info})")
@@ -235,12 +253,14 @@ class BucketMigrationOrchestrator:  # pylint: disable=too-few-public-methods
         base_path: Path,
         drive_checker,
         bucket_migrator: BucketMigrator,
+        transfer_scheduler: Optional[GlobalTransferScheduler] = None,
     ):
         self.s3 = s3
         self.state = state
         self.base_path = base_path
         self.drive_checker = drive_checker
         self.bucket_migrator = bucket_migrator
+        self.transfer_scheduler = transfer_scheduler
         self.interrupted = False
 
     def migrate_all_buckets(self):
@@ -258,12 +278,34 @@ class BucketMigrationOrchestrator:  # pylint: disable=too-few-public-methods
         print(f"Migrating {len(remaining_buckets)} bucket(s)")
         print(f"Already complete: {len(completed_buckets)} bucket(s)")
         print()
-        for idx, bucket in enumerate(remaining_buckets, 1):
-            if self.interrupted:
-                return
-            self.migrate_single_bucket(idx, bucket, len(remaining_buckets))
+        ordered = self._buckets_in_sync_order(remaining_buckets)
+        try:
+            for idx, bucket in enumerate(ordered, 1):
+                if self.interrupted:
+                    return
+                self.migrate_single_bucket(idx, bucket, len(remaining_buckets))
+        finally:
+            # Stops any background downloads if we leave early.
+            ordered.close()
         self.print_completion_status(all_buckets)
 
+    def _buckets_in_sync_order(self, remaining_buckets: List[str]) -> Iterator[str]:
+        """Yield buckets in processing order; with a shared scheduler, in the order their sync finishes"""
+        if self.transfer_scheduler is None:
+            yield from remaining_buckets
+            return
+        synced = set(self.state.get_completed_buckets_for_phase("sync_complete"))
+        yield from (bucket for bucket in remaining_buckets if bucket in synced)
+        pending = [bucket for bucket in remaining_buckets if bucket not in synced]
+        if not pending:
+            return
+        try:
+            yield from ScheduledSync(self.transfer_scheduler, pending)
+        except (FileNotFoundError, PermissionError, OSError) as e:
+            handle_drive_error(e)
+        except (RuntimeError, ValueError) as e:
+            handle_migration_error(self.transfer_scheduler.failed_bucket or ", ".join(pending), e)
+
     def migrate_single_bucket(self, idx, bucket, total):
         """Migrate a single bucket with error handling"""
         self.drive_checker.check_available()
@@ -0,0 +1,225 @@
+"""Per-phase profiling support for migrate_v2 runs.
+
+Each phase executed by ``S3MigrationV2.run`` can be wrapped in a cProfile session.
+Threads started during the phase (transfer pool workers, the scheduler thread) get
+their own profiler, merged into the phase's stats, so S3, disk and hashing time spent
+off the main thread is attributed too. The profiler writes a ``.pstats`` file and a
+ranked text summary per phase and records wall-clock/CPU timings in
+``migration_metadata`` under ``profile:<run_id>:<phase>`` so runs can be compared.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+
+if TYPE_CHECKING:
+    from migration_state_v2 import MigrationStateV2
+
+PROFILE_METADATA_PREFIX = "profile:"
+SUMMARY_FUNCTION_LIMIT = 40
+
+# Exclusive (tottime) time is attributed to the first category whose markers match
+# the function's file name or builtin description. Everything else is Python overhead.
+_CATEGORY_MARKERS = (
+    ("sqlite", ("sqlite3",)),
+    ("hashing", ("_hashlib", "_md5", "_sha", "hashlib")),
+    ("s3_network", ("botocore", "boto3", "s3transfer", "urllib3", "_socket", "_ssl", "socket.py", "ssl.py")),
+    ("disk_io", ("_io.", "BufferedWriter", "BufferedReader", "posix.")),
+)
+PYTHON_CATEGORY = "python"
+# From 3.12 cProfile hooks sys.monitoring, which is interpreter-wide: the phase profiler
+# already sees every thread and a second profiler cannot be enabled alongside it.
+_PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+
+@dataclass(frozen=True)
+class PhaseProfile:
+    """Timing results for a single profiled phase."""
+
+    phase: str
+    wall_seconds: float
+    cpu_seconds: float
+    stats_path: str
+    summary_path: str
+    breakdown: Dict[str, float] = field(default_factory=dict)
+    recorded_at: str = ""
+    threads: int = 1
+
+    @property
+    def wait_seconds(self) -> float:
+        """Wall time not spent on the CPU (network, disk, and lock waits)."""
+        return max(self.wall_seconds - self.cpu_seconds, 0.0)
+
+
+def _categorize(func_key: tuple) -> str:
+    """Return the time category for a pstats function key."""
+    filename, _, name = func_key
+    haystack = f"{filename} {name}"
+    for category, markers in _CATEGORY_MARKERS:
+        if any(marker in haystack for marker in markers):
+            return category
+    return PYTHON_CATEGORY
+
+
+def profile_metadata_key(run_id: str, phase: str) -> str:
+    """migration_metadata key for one phase of one profiled run."""
+    return f"{PROFILE_METADATA_PREFIX}{run_id}:{phase}"
+
+
+def compute_breakdown(stats: pstats.Stats) -> Dict[str, float]:
+    """Sum exclusive time per category so the buckets add up to the profiled total."""
+    breakdown: Dict[str, float] = {category: 0.0 for category, _ in _CATEGORY_MARKERS}
+    breakdown[PYTHON_CATEGORY] = 0.0
+    for func_key, func_stats in stats.stats.items():  # type: ignore[attr-defined]
+        tottime = func_stats[2]
+        breakdown[_categorize(func_key)] += tottime
+    return {category: round(seconds, 6) for category, seconds in breakdown.items()}
+
+
+def render_summary(profile: PhaseProfile, stats: pstats.Stats, limit: int = SUMMARY_FUNCTION_LIMIT) -> str:
+    """Render a ranked text summary of hot functions for one phase."""
+    buffer = io.StringIO()
+    buffer.write(f"Phase: {profile.phase}\n")
+    buffer.write(f"Wall clock: {profile.wall_seconds:.3f}s\n")
+    buffer.write(f"CPU time:   {profile.cpu_seconds:.3f}s\n")
+    buffer.write(f"Waiting:    {profile.wait_seconds:.3f}s\n")
+    buffer.write(f"Threads:    {profile.threads}\n")
+    buffer.write("\nExclusive time by category:\n")
+    for category, seconds in sorted(profile.breakdown.items(), key=lambda item: -item[1]):
+        buffer.write(f"  {category:<12} {seconds:10.3f}s\n")
+    for sort_key, title in (("cumulative", "cumulative time"), ("tottime", "exclusive time")):
+        buffer.write(f"\nTop {limit} functions by {title}:\n")
+        stats.stream = buffer  # type: ignore[attr-defined]
+        stats.sort_stats(sort_key).print_stats(limit)
+    return buffer.getvalue()
+
+
+class _ThreadProfiles:
+    """cProfile sessions for threads started while a phase is being profiled."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._previous_hook = None
+        self.profilers: list[cProfile.Profile] = []
+
+    def _start(self, *_args):
+        """threading profile hook: swap itself for a cProfile session owned by the new thread"""
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        with self._lock:
+            self.profilers.append(profiler)
+        profiler.enable()
+
+    def install(self):
+        """Profile every thread started from now on"""
+        if _PER_THREAD_PROFILES:
+            self._previous_hook = threading.getprofile()
+            threading.setprofile(self._start)
+
+    def uninstall(self):
+        """Stop profiling new threads"""
+        if _PER_THREAD_PROFILES:
+            threading.setprofile(self._previous_hook)
+
+    def merge_into(self, stats: pstats.Stats) -> int:
+        """Add every thread's stats to stats; return how many threads contributed"""
+        with self._lock:
+            profilers = list(self.profilers)
+        merged = 0
+        for profiler in profilers:
+            profiler.create_stats()
+            if profiler.stats:  # type: ignore[attr-defined]
+                stats.add(profiler)
+                merged += 1
+        return merged
+
+
+class PhaseProfiler:
+    """Wraps migration phases in cProfile and persists the results."""
+
+    def __init__(self, output_dir: Path, state: Optional["MigrationStateV2"] = None):
+        self.output_dir = Path(output_dir)
+        self.state = state
+        self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.results: list[PhaseProfile] = []
+
+    @contextmanager
+    def profile(self, phase: str) -> Iterator[None]:
+        """Profile the enclosed block, including threads it starts, and record its results under *phase*."""
+        profiler = cProfile.Profile()
+        thread_profiles = _ThreadProfiles()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        thread_profiles.install()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            thread_profiles.uninstall()
+            wall_seconds = time.perf_counter() - wall_start
+            cpu_seconds = time.process_time() - cpu_start
+            stats = pstats.Stats(profiler)
+            threads = 1 + thread_profiles.merge_into(stats)
+            self._record(phase, stats, threads, wall_seconds, cpu_seconds)
+
+    def _record(self, phase: str, stats: pstats.Stats, threads: int, wall_seconds: float, cpu_seconds: float) -> PhaseProfile:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.run_id}-{phase}"
+        stats_path = self.output_dir / f"{stem}.pstats"
+        summary_path = self.output_dir / f"{stem}.txt"
+        stats.dump_stats(str(stats_path))
+        result = PhaseProfile(
+            phase=phase,
+            wall_seconds=round(wall_seconds, 6),
+            cpu_seconds=round(cpu_seconds, 6),
+            stats_path=str(stats_path),
+            summary_path=str(summary_path),
+            breakdown=compute_breakdown(stats),
+            recorded_at=datetime.now(timezone.utc).isoformat(),
+            threads=threads,
+        )
+        summary_path.write_text(render_summary(result, stats), encoding="utf-8")
+        self.results.append(result)
+        if self.state is not None:
+            payload = asdict(result)
+            payload["run_id"] = self.run_id
+            payload["wait_seconds"] = round(result.wait_seconds, 6)
+            self.state.set_metadata(profile_metadata_key(self.run_id, phase), json.dumps(payload, sort_keys=True))
+        return result
+
+    def print_report(self):
+        """Print where profiles were written and the per-phase timings."""
+        if not self.results:
+            return
+        print("=" * 70)
+        print("PROFILE SUMMARY")
+        print("=" * 70)
+        for result in self.results:
+            print(
+                f"  {result.phase:<18} wall {result.wall_seconds:9.2f}s  "
+                f"cpu {result.cpu_seconds:9.2f}s  wait {result.wait_seconds:9.2f}s"
+            )
+        print(f"Profiles written to: {self.output_dir}")
+        print("=" * 70)
+
+
+__all__ = [
+    "PROFILE_METADATA_PREFIX",
+    "PhaseProfile",
+    "PhaseProfiler",
+    "compute_breakdown",
+    "profile_metadata_key",
+    "render_summary",
+]
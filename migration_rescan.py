@@ -0,0 +1,81 @@
+"""Incremental rescans: re-list scanned buckets and reopen the pipeline for any that changed"""
+
+from migration_scanner import BucketScanner, BucketStats
+from migration_state_rescan import RescanDelta
+from migration_state_v2 import MigrationStateV2, Phase
+
+
+class BucketRescanner(BucketScanner):
+    """Reconciles already scanned buckets with their current listings"""
+
+    def rescan_bucket(self, bucket: str):
+        """Reconcile an already scanned bucket with its current listing; returns a RescanDelta, or None if interrupted.
+
+        Each listing page is compared with the stored rows for the same key range in one
+        query, so unchanged buckets cost one read per page and no writes.
+        """
+        stats = BucketStats()
+        delta = RescanDelta()
+        after = None
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket):
+            if self.interrupted:
+                return None
+            rows = [self._listing_row(obj) for obj in self._get_page_contents(bucket, page) if not obj["Key"].endswith("/")]
+            if not rows:
+                continue
+            delta += self.state.rescan_files(bucket, rows, after, rows[-1][0])
+            after = rows[-1][0]
+            for _, size, _, storage_class, _ in rows:
+                stats.record(size, storage_class)
+            self._print_progress(stats)
+        delta += self.state.rescan_files(bucket, [], after, None)
+        self.state.update_bucket_scan_totals(bucket, stats.file_count, stats.total_size, stats.storage_classes)
+        print(
+            f"  {stats.file_count:,} files: {delta.added:,} new, {delta.changed:,} changed, "
+            f"{delta.deleted:,} deleted, {delta.unchanged:,} unchanged" + " " * 20
+        )
+        return delta
+
+    def rescan_all_buckets(self) -> list[str]:
+        """Rescan every bucket incrementally; return the buckets that need syncing again"""
+        print("=" * 70)
+        print("INCREMENTAL RESCAN")
+        print("=" * 70)
+        print()
+        buckets = self._list_included_buckets()
+        changed = []
+        for idx, bucket in enumerate(buckets, 1):
+            if self.interrupted:
+                break
+            info = self.state.get_bucket_info(bucket)
+            if info.get("delete_complete"):
+                print(f"[{idx}/{len(buckets)}] Skipping {bucket}: already deleted from S3")
+                continue
+            if info.get("scan_complete"):
+                print(f"[{idx}/{len(buckets)}] Rescanning: {bucket}")
+                delta = self.rescan_bucket(bucket)
+                if delta is not None and delta.modified:
+                    changed.append(bucket)
+            else:
+                print(f"[{idx}/{len(buckets)}] Scanning new bucket: {bucket}")
+                self.scan_bucket(bucket)
+                changed.append(bucket)
+            print()
+        print("=" * 70)
+        print(f"✓ RESCAN COMPLETE: {len(changed)} bucket(s) changed")
+        print("=" * 70)
+        print()
+        return changed
+
+
+def run_rescan(state_db_path: str) -> int:
+    """Re-list scanned buckets and reopen the pipeline for any that changed; returns the exit code."""
+    import boto3  # pylint: disable=import-outside-toplevel
+
+    state = MigrationStateV2(state_db_path)
+    changed = BucketRescanner(boto3.client("s3"), state).rescan_all_buckets()
+    if changed and state.get_current_phase() not in (Phase.SCANNING, Phase.GLACIER_RESTORE):
+        state.set_current_phase(Phase.GLACIER_RESTORE)
+        print(f"{len(changed)} bucket(s) changed; run 'python migrate_v2.py' to restore, sync and verify them.")
+    return 0
@@ -17,7 +17,7 @@ GLACIER_RESTORE_TIER = config_module.GLACIER_RESTORE_TIER
 
 
 @dataclass
-class _BucketStats:
+class BucketStats:
     file_count: int = 0
     total_size: int = 0
     storage_classes: dict[str, int] = field(default_factory=dict)
@@ -48,7 +48,7 @@ class BucketScanner:  # pylint: disable=too-few-public-methods
             return []
         return contents
 
-    def _print_progress(self, stats: _BucketStats):
+    def _print_progress(self, stats: BucketStats):
         size_str = format_bytes(stats.total_size, binary_units=False)
         print(
             f"  Found {stats.file_count:,} files, {size_str}...",
@@ -56,29 +56,25 @@ class BucketScanner:  # pylint: disable=too-few-public-methods
             flush=True,
         )
 
-    def _process_object(self, bucket: str, obj: dict, stats: _BucketStats):
-        key = obj["Key"]
-        if key.endswith("/"):
+    @staticmethod
+    def _listing_row(obj: dict) -> tuple:
+        """Return (key, size, etag, storage_class, last_modified) as stored in the files table"""
+        return (obj["Key"], obj["Size"], obj["ETag"].strip('"'), obj.get("StorageClass", "STANDARD"), obj["LastModified"].isoformat())
+
+    def _process_object(self, bucket: str, obj: dict, stats: BucketStats):
+        if obj["Key"].endswith("/"):
             return
-        size = obj["Size"]
-        etag = obj["ETag"].strip('"')
-        storage_class = obj.get("StorageClass", "STANDARD")
-        last_modified = obj["LastModified"].isoformat()
+        key, size, etag, storage_class, last_modified = self._listing_row(obj)
         self.state.add_file(bucket, key, size, etag, storage_class, last_modified)
         stats.record(size, storage_class)
         if stats.file_count % 10000 == 0:
             self._print_progress(stats)
 
-    def _save_bucket_stats(self, bucket: str, stats: _BucketStats):
+    def _save_bucket_stats(self, bucket: str, stats: BucketStats):
         self.state.save_bucket_status(bucket, stats.file_count, stats.total_size, stats.storage_classes, scan_complete=True)
         print(f"  Found {stats.file_count:,} files, " f"{format_bytes(stats.total_size, binary_units=False)}" + " " * 20)
 
-    def scan_all_buckets(self):
-        """Scan all S3 buckets and track in database"""
-        print("=" * 70)
-        print("PHASE 1/4: SCANNING BUCKETS")
-        print("=" * 70)
-        print()
+    def _list_included_buckets(self) -> list[str]:
         response = self.s3.list_buckets()
         buckets = [b["Name"] for b in response["Buckets"]]
         excluded = EXCLUDED_BUCKETS
@@ -87,6 +83,15 @@ class BucketScanner:  # pylint: disable=too-few-public-methods
         if excluded:
             print(f"Excluded {len(excluded)} bucket(s): {', '.join(excluded)}")
         print()
+        return buckets
+
+    def scan_all_buckets(self):
+        """Scan all S3 buckets and track in database"""
+        print("=" * 70)
+        print("PHASE 1/4: SCANNING BUCKETS")
+        print("=" * 70)
+        print()
+        buckets = self._list_included_buckets()
         for idx, bucket in enumerate(buckets, 1):
             if self.interrupted:
                 return
@@ -101,7 +106,7 @@ class BucketScanner:  # pylint: disable=too-few-public-methods
 
     def scan_bucket(self, bucket: str):
         """Scan a single bucket"""
-        stats = _BucketStats()
+        stats = BucketStats()
         paginator = self.s3.get_paginator("list_objects_v2")
         for page in paginator.paginate(Bucket=bucket):
             if self.interrupted:
@@ -125,18 +130,21 @@ class GlacierRestorer:  # pylint: disable=too-few-public-methods
         print("PHASE 2/4: REQUESTING GLACIER RESTORES")
         print("=" * 70)
         print()
-        files = self.state.get_glacier_files_needing_restore()
-        if not files:
+        total = self.state.count_glacier_files_needing_restore()
+        if not total:
             print("✓ No Glacier files need restore")
             print()
             self.state.set_current_phase(Phase.GLACIER_WAIT)
             return
-        print(f"Requesting restores for {len(files):,} file(s)")
+        print(f"Requesting restores for {total:,} file(s)")
         print()
-        for idx, file in enumerate(files, 1):
-            if self.interrupted:
-                return
-            self.request_restore(file, idx, len(files))
+        idx = 0
+        for batch in self.state.iter_glacier_files_needing_restore():
+            for file in batch:
+                if self.interrupted:
+                    return
+                idx += 1
+                self.request_restore(file, idx, total)
         self.state.set_current_phase(Phase.GLACIER_WAIT)
         print()
         print("=" * 70)
@@ -193,15 +201,18 @@ class GlacierWaiter:  # pylint: disable=too-few-public-methods
         print("=" * 70)
         print()
         while not self.interrupted:
-            restoring = self.state.get_files_restoring()
-            if not restoring:
+            total = self.state.count_files_restoring()
+            if not total:
                 break
-            print(f"Checking {len(restoring):,} file(s) still restoring...")
-            for idx, file in enumerate(restoring):
-                if self.interrupted:
-                    return
-                if self.check_restore_status(file):
-                    print(f"  [{idx+1}/{len(restoring)}] Restored: {file['bucket']}/{file['key']}")
+            print(f"Checking {total:,} file(s) still restoring...")
+            idx = 0
+            for batch in self.state.iter_files_restoring():
+                for file in batch:
+                    if self.interrupted:
+                        return
+                    idx += 1
+                    if self.check_restore_status(file):
+                        print(f"  [{idx}/{total}] Restored: {file['bucket']}/{file['key']}")
             print()
             print("Waiting 5 minutes before next check...")
             self._wait_with_interrupt(300)
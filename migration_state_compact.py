@@ -0,0 +1,363 @@
+"""Compact storage layout for the migrate_v2 ``files`` table.
+
+The compact layout stores one ``file_records`` row per object in a WITHOUT ROWID
+table clustered on ``(bucket_id, key)``:
+
+- bucket names, file states and storage classes are interned into small lookup tables
+- timestamps are integer epoch milliseconds
+- plain and multipart MD5 ETags are stored as 16-byte blobs (plus the ``-N`` part suffix)
+
+``files`` becomes a view with INSTEAD OF triggers that decodes every column back to
+the legacy TEXT representation, so existing SQL (``MigrationStateV2`` and the
+duplicate_tree / find_compressible / cleanup_temp_artifacts readers) keeps working.
+This module holds the schema and the SQL that encodes and decodes it; row codecs and
+direct writers live in ``migration_state_compact_records`` and the online conversion
+of legacy databases in ``migration_state_compact_convert``.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Optional
+
+COMPACT_SCHEMA_VERSION = 2
+LAYOUT_LEGACY = "legacy"
+LAYOUT_COMPACT = "compact"
+
+KNOWN_FILE_STATES = ("discovered", "synced")
+KNOWN_STORAGE_CLASSES = (
+    "STANDARD",
+    "STANDARD_IA",
+    "ONEZONE_IA",
+    "INTELLIGENT_TIERING",
+    "GLACIER",
+    "GLACIER_IR",
+    "DEEP_ARCHIVE",
+    "REDUCED_REDUNDANCY",
+    "OUTPOSTS",
+    "SNOW",
+    "EXPRESS_ONEZONE",
+)
+
+# (table, id column) for each interned lookup table.
+_LOOKUP_TABLES = {
+    "bucket": ("buckets", "bucket_id"),
+    "state": ("file_states", "state_id"),
+    "storage_class": ("storage_classes", "storage_class_id"),
+}
+LOOKUP_KINDS = tuple(_LOOKUP_TABLES)
+
+LOOKUP_TABLE_SQL = tuple(
+    f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+        {id_column} INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    """
+    for table, id_column in _LOOKUP_TABLES.values()
+)
+
+FILE_RECORDS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS file_records (
+        bucket_id INTEGER NOT NULL,
+        key TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        etag BLOB,
+        storage_class_id INTEGER,
+        last_modified_ms INTEGER,
+        local_path TEXT,
+        local_checksum TEXT,
+        state_id INTEGER NOT NULL,
+        error_message TEXT,
+        glacier_restore_requested_ms INTEGER,
+        glacier_restored_ms INTEGER,
+        created_ms INTEGER,
+        updated_ms INTEGER,
+        PRIMARY KEY (bucket_id, key)
+    ) WITHOUT ROWID
+"""
+
+COMPACT_INDEX_DEFINITIONS = ("CREATE INDEX IF NOT EXISTS idx_file_records_state ON file_records(state_id)",)
+# Superseded by the partial restore-queue indexes below.
+SUPERSEDED_COMPACT_INDEXES = ("idx_file_records_storage_class",)
+
+# Glacier work queues. Each queue has a partial index on the keyset order, so
+# paging through it touches only queued rows however large files grows.
+GLACIER_STORAGE_CLASSES = ("GLACIER", "DEEP_ARCHIVE")
+GLACIER_BATCH_SIZE = 1000
+RESTORE_PENDING = "restore_pending"
+RESTORING = "restoring"
+_LEGACY_QUEUE_WHERE = {
+    RESTORE_PENDING: "glacier_restore_requested_at IS NULL",
+    RESTORING: "glacier_restore_requested_at IS NOT NULL AND glacier_restored_at IS NULL",
+}
+_COMPACT_QUEUE_WHERE = {
+    RESTORE_PENDING: "glacier_restore_requested_ms IS NULL",
+    RESTORING: "glacier_restore_requested_ms IS NOT NULL AND glacier_restored_ms IS NULL",
+}
+
+# (view column, file_records column, kind) in legacy column order.
+_COLUMNS = (
+    ("bucket", "bucket_id", "bucket"),
+    ("key", "key", "plain"),
+    ("size", "size", "plain"),
+    ("etag", "etag", "etag"),
+    ("storage_class", "storage_class_id", "storage_class"),
+    ("last_modified", "last_modified_ms", "time"),
+    ("local_path", "local_path", "plain"),
+    ("local_checksum", "local_checksum", "plain"),
+    ("state", "state_id", "state"),
+    ("error_message", "error_message", "plain"),
+    ("glacier_restore_requested_at", "glacier_restore_requested_ms", "time"),
+    ("glacier_restored_at", "glacier_restored_ms", "time"),
+    ("created_at", "created_ms", "time"),
+    ("updated_at", "updated_ms", "time"),
+)
+LEGACY_COLUMNS = tuple(column for column, _, _ in _COLUMNS)
+RECORD_COLUMNS = tuple(record_column for _, record_column, _ in _COLUMNS)
+
+
+def _sql_iso_to_ms(expr: str) -> str:
+    return f"CAST(ROUND((julianday({expr}) - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def _sql_ms_to_iso(expr: str) -> str:
+    return f"strftime('%Y-%m-%dT%H:%M:%f', {expr} / 1000.0, 'unixepoch') || '+00:00'"
+
+
+def sql_lookup_id(kind: str, name_expr: str) -> str:
+    """SQL scalar subquery returning the interned id of name_expr in the kind's lookup table."""
+    table, id_column = _LOOKUP_TABLES[kind]
+    return f"(SELECT {id_column} FROM {table} WHERE name = {name_expr})"
+
+
+def sql_intern(kind: str, name_expr: str) -> str:
+    """INSERT statement adding name_expr to the kind's lookup table unless it is already there."""
+    table, _ = _LOOKUP_TABLES[kind]
+    # NOT EXISTS instead of INSERT OR IGNORE: an outer INSERT OR REPLACE on the view would
+    # otherwise turn this into a REPLACE and hand the name a new id.
+    return (
+        f"INSERT INTO {table} (name) SELECT {name_expr} "
+        f"WHERE {name_expr} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {table} WHERE name = {name_expr})"
+    )
+
+
+def _sql_encode(kind: str, new_expr: str) -> str:
+    if kind in _LOOKUP_TABLES:
+        return sql_lookup_id(kind, new_expr)
+    if kind == "time":
+        return _sql_iso_to_ms(new_expr)
+    return new_expr
+
+
+def decoded_etag_sql(expr: str) -> str:
+    """SQL expression turning a stored compact etag back into its hex text form."""
+    return (
+        f"CASE WHEN typeof({expr}) = 'blob' "
+        f"THEN lower(hex(substr({expr}, 1, 16))) || CAST(substr({expr}, 17) AS TEXT) "
+        f"ELSE {expr} END"
+    )
+
+
+def _sql_decoded_column(column: str, record_column: str, kind: str) -> str:
+    if kind == "bucket":
+        return "b.name AS bucket"
+    if kind in _LOOKUP_TABLES:
+        # Scalar lookups keep the view a two-table join, so ORDER BY bucket, key stays index-ordered.
+        table, id_column = _LOOKUP_TABLES[kind]
+        return f"(SELECT name FROM {table} WHERE {id_column} = r.{record_column}) AS {column}"
+    if kind == "time":
+        return f"{_sql_ms_to_iso('r.' + record_column)} AS {column}"
+    if kind == "etag":
+        return f"{decoded_etag_sql('r.etag')} AS etag"
+    return f"r.{record_column} AS {column}"
+
+
+_DECODED_COLUMNS_SQL = ", ".join(_sql_decoded_column(*column) for column in _COLUMNS)
+
+# CROSS JOIN pins buckets as the outer loop so scans of the view walk file_records in
+# clustered (bucket_id, key) order even before ANALYZE has run.
+FILES_VIEW_SQL = (
+    f"CREATE VIEW IF NOT EXISTS files AS SELECT {_DECODED_COLUMNS_SQL} "
+    "FROM buckets b CROSS JOIN file_records r ON r.bucket_id = b.bucket_id"
+)
+
+
+def compact_files_query(where: str) -> str:
+    """Build a query returning legacy ``files`` columns, filtered on ``file_records r`` columns.
+
+    file_records is the outer loop here so the filter can use its secondary indexes.
+    """
+    return (
+        f"SELECT {_DECODED_COLUMNS_SQL} FROM file_records r CROSS JOIN buckets b "
+        f"ON b.bucket_id = r.bucket_id WHERE {where}"
+    )
+
+
+_INTERN_NEW = "\n".join(f"        {sql_intern(kind, 'NEW.' + kind)};" for kind in _LOOKUP_TABLES)
+_OLD_RECORD_MATCH = f"bucket_id = {sql_lookup_id('bucket', 'OLD.bucket')} AND key = OLD.key"
+
+
+def _sql_update_assignment(column: str, record_column: str, kind: str) -> str:
+    encoded = _sql_encode(kind, f"NEW.{column}")
+    if kind in ("etag", "time"):
+        # Unchanged values keep their stored encoding (binary ETag, exact milliseconds).
+        encoded = f"CASE WHEN NEW.{column} IS OLD.{column} THEN {record_column} ELSE {encoded} END"
+    return f"{record_column} = {encoded}"
+
+
+FILES_VIEW_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS files_insert INSTEAD OF INSERT ON files
+    BEGIN
+{_INTERN_NEW}
+        INSERT INTO file_records ({", ".join(RECORD_COLUMNS)})
+        VALUES ({", ".join(_sql_encode(kind, "NEW." + column) for column, _, kind in _COLUMNS)});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS files_update INSTEAD OF UPDATE ON files
+    BEGIN
+{_INTERN_NEW}
+        UPDATE file_records SET {", ".join(_sql_update_assignment(*column) for column in _COLUMNS)}
+        WHERE {_OLD_RECORD_MATCH};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS files_delete INSTEAD OF DELETE ON files
+    BEGIN
+        DELETE FROM file_records WHERE {_OLD_RECORD_MATCH};
+    END
+    """,
+)
+
+
+def files_layout(conn: sqlite3.Connection) -> Optional[str]:
+    """Return the layout of the ``files`` object, or None when it does not exist yet."""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'files'").fetchone()
+    if row is None:
+        return None
+    return LAYOUT_COMPACT if row[0] == "view" else LAYOUT_LEGACY
+
+
+def legacy_restore_queue_where(queue: str) -> str:
+    """WHERE clause (matching the partial index) selecting a Glacier queue from the legacy table."""
+    classes = ", ".join(f"'{name}'" for name in GLACIER_STORAGE_CLASSES)
+    return f"storage_class IN ({classes}) AND {_LEGACY_QUEUE_WHERE[queue]}"
+
+
+def glacier_storage_class_ids(conn: sqlite3.Connection) -> tuple[int, ...]:
+    """Interned ids of the Glacier storage classes, in GLACIER_STORAGE_CLASSES order."""
+    lookup = dict(
+        conn.execute(
+            f"SELECT name, storage_class_id FROM storage_classes WHERE name IN ({', '.join('?' * len(GLACIER_STORAGE_CLASSES))})",
+            GLACIER_STORAGE_CLASSES,
+        ).fetchall()
+    )
+    return tuple(lookup[name] for name in GLACIER_STORAGE_CLASSES if name in lookup)
+
+
+def compact_restore_queue_where(queue: str, glacier_ids: tuple[int, ...], alias: str = "") -> str:
+    """WHERE clause selecting a Glacier queue from file_records.
+
+    The ids are inlined as literals because SQLite only uses a partial index when the
+    query repeats the index's WHERE terms.
+    """
+    prefix = f"{alias}." if alias else ""
+    queue_terms = _COMPACT_QUEUE_WHERE[queue].replace("glacier_", f"{prefix}glacier_")
+    ids = ", ".join(str(value) for value in glacier_ids) or "NULL"
+    return f"{prefix}storage_class_id IN ({ids}) AND {queue_terms}"
+
+
+def legacy_restore_queue_indexes() -> tuple[str, ...]:
+    """Partial indexes backing the Glacier queues on the legacy files table."""
+    return tuple(
+        f"CREATE INDEX IF NOT EXISTS idx_files_{queue} ON files(bucket, key) WHERE {legacy_restore_queue_where(queue)}"
+        for queue in (RESTORE_PENDING, RESTORING)
+    )
+
+
+def create_compact_storage(conn: sqlite3.Connection) -> None:
+    """Create the lookup tables, file_records and its indexes (idempotent)."""
+    for statement in LOOKUP_TABLE_SQL:
+        conn.execute(statement)
+    conn.execute(FILE_RECORDS_TABLE_SQL)
+    for statement in COMPACT_INDEX_DEFINITIONS:
+        conn.execute(statement)
+    for name in SUPERSEDED_COMPACT_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.executemany(sql_intern("state", "?"), [(name, name, name) for name in KNOWN_FILE_STATES])
+    conn.executemany(sql_intern("storage_class", "?"), [(name, name, name) for name in KNOWN_STORAGE_CLASSES])
+    glacier_ids = glacier_storage_class_ids(conn)
+    for queue in (RESTORE_PENDING, RESTORING):
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_file_records_{queue} ON file_records(bucket_id, key) "
+            f"WHERE {compact_restore_queue_where(queue, glacier_ids)}"
+        )
+
+
+def create_files_view(conn: sqlite3.Connection) -> None:
+    """Create the ``files`` view and its INSTEAD OF triggers and stamp the schema version."""
+    conn.execute(FILES_VIEW_SQL)
+    for statement in FILES_VIEW_TRIGGERS:
+        conn.execute(statement)
+    conn.execute(f"PRAGMA user_version = {COMPACT_SCHEMA_VERSION}")
+
+
+def create_compact_schema(conn: sqlite3.Connection) -> None:
+    """Create the compact tables, the ``files`` view and its triggers (idempotent)."""
+    create_compact_storage(conn)
+    create_files_view(conn)
+
+
+def copy_rows_sql(where: str) -> str:
+    """INSERT OR REPLACE copying legacy ``files f`` rows matching where into file_records.
+
+    ETags go through the ``compact_etag`` SQL function, which callers register.
+    """
+    values = ", ".join(
+        {
+            "bucket": sql_lookup_id("bucket", "f.bucket"),
+            "state": sql_lookup_id("state", "f.state"),
+            "storage_class": sql_lookup_id("storage_class", "f.storage_class"),
+            "etag": "compact_etag(f.etag)",
+            "time": _sql_iso_to_ms(f"f.{column}"),
+        }.get(kind, f"f.{column}")
+        for column, _, kind in _COLUMNS
+    )
+    return f"INSERT OR REPLACE INTO file_records ({', '.join(RECORD_COLUMNS)}) SELECT {values} FROM files f WHERE {where}"
+
+
+def intern_names_sql(kind: str, where: str) -> str:
+    """INSERT adding the kind's names used by legacy ``files f`` rows matching where to its lookup table."""
+    table, _ = _LOOKUP_TABLES[kind]
+    return (
+        f"INSERT INTO {table} (name) SELECT DISTINCT f.{kind} FROM files f "
+        f"WHERE {where} AND f.{kind} IS NOT NULL AND f.{kind} NOT IN (SELECT name FROM {table})"
+    )
+
+
+__all__ = [
+    "COMPACT_SCHEMA_VERSION",
+    "GLACIER_BATCH_SIZE",
+    "GLACIER_STORAGE_CLASSES",
+    "LAYOUT_COMPACT",
+    "LAYOUT_LEGACY",
+    "LOOKUP_KINDS",
+    "RESTORE_PENDING",
+    "RESTORING",
+    "compact_files_query",
+    "compact_restore_queue_where",
+    "copy_rows_sql",
+    "create_compact_schema",
+    "create_compact_storage",
+    "create_files_view",
+    "decoded_etag_sql",
+    "files_layout",
+    "glacier_storage_class_ids",
+    "intern_names_sql",
+    "legacy_restore_queue_indexes",
+    "legacy_restore_queue_where",
+    "sql_intern",
+    "sql_lookup_id",
+]
@@ -0,0 +1,204 @@
+"""Online conversion of a legacy ``files`` table to the compact layout.
+
+Rows are copied into ``file_records`` in short batches while writers keep using the
+legacy table. Triggers on the legacy table record every row changed behind the copy
+cursor, and those rows are replayed in the same transaction that swaps the table
+for the ``files`` view.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from migration_state_compact import (
+    LAYOUT_LEGACY,
+    LOOKUP_KINDS,
+    copy_rows_sql,
+    create_compact_schema,
+    create_compact_storage,
+    create_files_view,
+    files_layout,
+    intern_names_sql,
+    sql_lookup_id,
+)
+from migration_state_compact_records import encode_etag
+
+DEFAULT_COMPACT_BATCH_SIZE = 50_000
+COMPACT_CURSOR_KEY = "compact:cursor"
+
+LEGACY_INDEX_NAMES = (
+    "idx_files_state",
+    "idx_files_storage_class",
+    "idx_files_bucket",
+    "idx_files_restore_pending",
+    "idx_files_restoring",
+)
+
+_PENDING_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS files_compact_pending (
+        bucket TEXT NOT NULL,
+        key TEXT NOT NULL,
+        PRIMARY KEY (bucket, key)
+    ) WITHOUT ROWID
+"""
+_PENDING_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS files_compact_pending_insert AFTER INSERT ON files
+    BEGIN
+        INSERT OR IGNORE INTO files_compact_pending (bucket, key) VALUES (NEW.bucket, NEW.key);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS files_compact_pending_update AFTER UPDATE ON files
+    BEGIN
+        INSERT OR IGNORE INTO files_compact_pending (bucket, key) VALUES (OLD.bucket, OLD.key);
+        INSERT OR IGNORE INTO files_compact_pending (bucket, key) VALUES (NEW.bucket, NEW.key);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS files_compact_pending_delete AFTER DELETE ON files
+    BEGIN
+        INSERT OR IGNORE INTO files_compact_pending (bucket, key) VALUES (OLD.bucket, OLD.key);
+    END
+    """,
+)
+_PENDING_TRIGGER_NAMES = ("files_compact_pending_insert", "files_compact_pending_update", "files_compact_pending_delete")
+
+
+@dataclass
+class CompactResult:
+    """Outcome of a compact_files_table run."""
+
+    rows_copied: int
+    batches: int
+    pending_replayed: int
+    already_compact: bool = False
+
+
+def _copy_range(conn: sqlite3.Connection, where: str, params: tuple) -> int:
+    for kind in LOOKUP_KINDS:
+        conn.execute(intern_names_sql(kind, where), params)
+    return conn.execute(copy_rows_sql(where), params).rowcount
+
+
+def _load_cursor(conn: sqlite3.Connection) -> Optional[tuple]:
+    row = conn.execute("SELECT value FROM migration_metadata WHERE key = ?", (COMPACT_CURSOR_KEY,)).fetchone()
+    return tuple(json.loads(row[0])) if row else None
+
+
+def _save_cursor(conn: sqlite3.Connection, cursor: tuple, now: str) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO migration_metadata (key, value, updated_at) VALUES (?, ?, ?)",
+        (COMPACT_CURSOR_KEY, json.dumps(list(cursor)), now),
+    )
+
+
+def _prepare_legacy_copy(conn: sqlite3.Connection) -> None:
+    create_compact_storage(conn)
+    conn.execute(_PENDING_TABLE_SQL)
+    for statement in _PENDING_TRIGGERS:
+        conn.execute(statement)
+    conn.commit()
+
+
+def _copy_next_batch(conn: sqlite3.Connection, cursor: Optional[tuple], batch_size: int) -> tuple[Optional[tuple], int]:
+    """Copy the next batch after cursor; returns (new cursor, rows copied)."""
+    after_sql, after_params = ("(bucket, key) > (?, ?)", cursor) if cursor else ("1", ())
+    last = conn.execute(
+        f"SELECT bucket, key FROM files WHERE {after_sql} ORDER BY bucket, key LIMIT 1 OFFSET ?",
+        (*after_params, batch_size - 1),
+    ).fetchone()
+    if last is None:
+        where, params = after_sql.replace("(bucket, key)", "(f.bucket, f.key)"), after_params
+        new_cursor = None
+    else:
+        where = after_sql.replace("(bucket, key)", "(f.bucket, f.key)") + " AND (f.bucket, f.key) <= (?, ?)"
+        params = (*after_params, last[0], last[1])
+        new_cursor = (last[0], last[1])
+    return new_cursor, _copy_range(conn, where, params)
+
+
+def _replay_pending(conn: sqlite3.Connection) -> int:
+    pending = conn.execute("SELECT COUNT(*) FROM files_compact_pending").fetchone()[0]
+    conn.execute(
+        f"""DELETE FROM file_records WHERE EXISTS (
+            SELECT 1 FROM files_compact_pending p
+            WHERE file_records.bucket_id = {sql_lookup_id("bucket", "p.bucket")} AND file_records.key = p.key
+            AND NOT EXISTS (SELECT 1 FROM files f WHERE f.bucket = p.bucket AND f.key = p.key))"""
+    )
+    _copy_range(conn, "(f.bucket, f.key) IN (SELECT bucket, key FROM files_compact_pending)", ())
+    return pending
+
+
+def _swap_in_view(conn: sqlite3.Connection) -> int:
+    """Replay pending changes and replace the legacy table with the view in one transaction."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        replayed = _replay_pending(conn)
+        for name in _PENDING_TRIGGER_NAMES:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute("DROP TABLE files_compact_pending")
+        for name in LEGACY_INDEX_NAMES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute("DROP TABLE files")
+        create_files_view(conn)
+        conn.execute("DELETE FROM migration_metadata WHERE key = ?", (COMPACT_CURSOR_KEY,))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return replayed
+
+
+def compact_files_table(
+    db_path: str,
+    *,
+    batch_size: int = DEFAULT_COMPACT_BATCH_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> CompactResult:
+    """Convert a legacy ``files`` table to the compact layout while it stays in use.
+
+    Each batch is its own short transaction and the copy cursor is persisted, so an
+    interrupted run resumes where it stopped.
+    """
+    conn = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+    conn.create_function("compact_etag", 1, encode_etag, deterministic=True)
+    try:
+        layout = files_layout(conn)
+        if layout != LAYOUT_LEGACY:
+            if layout is None:
+                create_compact_schema(conn)
+            return CompactResult(rows_copied=0, batches=0, pending_replayed=0, already_compact=True)
+        conn.execute("BEGIN")
+        _prepare_legacy_copy(conn)
+        cursor = _load_cursor(conn)
+        rows_copied = batches = 0
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor, copied = _copy_next_batch(conn, cursor, batch_size)
+            if cursor is not None:
+                _save_cursor(conn, cursor, datetime.now(timezone.utc).isoformat())
+            conn.execute("COMMIT")
+            rows_copied += copied
+            batches += 1
+            if progress is not None:
+                progress(rows_copied)
+            if cursor is None:
+                break
+        replayed = _swap_in_view(conn)
+        return CompactResult(rows_copied=rows_copied, batches=batches, pending_replayed=replayed)
+    finally:
+        conn.close()
+
+
+__all__ = [
+    "COMPACT_CURSOR_KEY",
+    "CompactResult",
+    "DEFAULT_COMPACT_BATCH_SIZE",
+    "LEGACY_INDEX_NAMES",
+    "compact_files_table",
+]
@@ -0,0 +1,111 @@
+"""Row codecs and direct writers for the compact ``file_records`` layout.
+
+Values are encoded the same way the ``files`` view triggers encode them in SQL:
+MD5 and multipart ETags become 16-byte blobs (plus the ``-N`` part suffix) and
+ISO-8601 timestamps become integer epoch milliseconds.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+from migration_state_compact import LAYOUT_COMPACT, sql_intern, sql_lookup_id
+
+_ETAG_RE = re.compile(r"^([0-9a-f]{32})(-[0-9]+)?$")
+
+
+def encode_etag(etag: Optional[str]) -> Union[bytes, str, None]:
+    """Pack an MD5 or multipart ETag into bytes; other values are kept as text."""
+    if etag is None:
+        return None
+    match = _ETAG_RE.match(etag)
+    if not match:
+        return etag
+    suffix = match.group(2) or ""
+    return bytes.fromhex(match.group(1)) + suffix.encode("ascii")
+
+
+def iso_to_epoch_ms(value: Optional[str]) -> Optional[int]:
+    """Convert an ISO-8601 timestamp to epoch milliseconds (naive values are UTC).
+
+    A trailing ``Z`` is accepted on every supported Python (fromisoformat only learned it
+    in 3.11); anything else that is not ISO-8601 raises ValueError instead of being stored as NULL.
+    """
+    if value is None:
+        return None
+    if value.endswith(("Z", "z")):
+        value = f"{value[:-1]}+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return round(parsed.timestamp() * 1000)
+
+
+@dataclass(frozen=True)
+class FileRecord:
+    """One object from a bucket listing, as written to ``file_records``."""
+
+    bucket: str
+    key: str
+    size: int
+    etag: Optional[str]
+    storage_class: Optional[str]
+    last_modified: Optional[str]
+    state: str = "discovered"
+
+
+def insert_file_record(conn: sqlite3.Connection, record: FileRecord, now: str) -> None:
+    """Insert one object directly into ``file_records`` with encoded values."""
+    conn.execute(sql_intern("bucket", "?"), (record.bucket,) * 3)
+    conn.execute(sql_intern("storage_class", "?"), (record.storage_class,) * 3)
+    now_ms = iso_to_epoch_ms(now)
+    conn.execute(
+        f"""
+        INSERT INTO file_records
+        (bucket_id, key, size, etag, storage_class_id, last_modified_ms,
+         state_id, created_ms, updated_ms)
+        VALUES ({sql_lookup_id("bucket", "?")}, ?, ?, ?, {sql_lookup_id("storage_class", "?")}, ?,
+                {sql_lookup_id("state", "?")}, ?, ?)
+        """,
+        (
+            record.bucket,
+            record.key,
+            record.size,
+            encode_etag(record.etag),
+            record.storage_class,
+            iso_to_epoch_ms(record.last_modified),
+            record.state,
+            now_ms,
+            now_ms,
+        ),
+    )
+
+
+def insert_discovered_file(conn: sqlite3.Connection, layout: Optional[str], listed: tuple, bucket: str, now: str) -> None:
+    """Insert one (key, size, etag, storage_class, last_modified) listing row as discovered in either layout."""
+    key, size, etag, storage_class, last_modified = listed
+    if layout == LAYOUT_COMPACT:
+        insert_file_record(conn, FileRecord(bucket, key, size, etag, storage_class, last_modified), now)
+    else:
+        conn.execute(
+            """
+            INSERT INTO files
+            (bucket, key, size, etag, storage_class, last_modified,
+             state, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, 'discovered', ?, ?)
+        """,
+            (bucket, key, size, etag, storage_class, last_modified, now, now),
+        )
+
+
+__all__ = [
+    "FileRecord",
+    "encode_etag",
+    "insert_discovered_file",
+    "insert_file_record",
+    "iso_to_epoch_ms",
+]
@@ -0,0 +1,94 @@
+"""Bucket leases that let several migrate_v2 workers share one state DB"""
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from importlib import import_module
+from typing import TYPE_CHECKING, Optional
+
+_PACKAGE_PREFIX = f"{__package__}." if __package__ else ""
+get_utc_now = import_module(f"{_PACKAGE_PREFIX}migration_utils").get_utc_now
+
+if TYPE_CHECKING:
+    from .migration_state_v2 import DatabaseConnection
+
+
+# A bucket needs a worker until it is verified; deletion stays with the interactive run.
+_LEASABLE_BUCKET_WHERE = "s.delete_complete = 0 AND (s.verify_complete = 0 OR s.verified_file_count IS NULL)"
+
+
+@dataclass(frozen=True)
+class BucketLease:
+    """A worker's claim on one bucket, valid until expires_at (epoch seconds)."""
+
+    bucket: str
+    worker_id: str
+    expires_at: float
+    claim_count: int
+
+
+class BucketLeaseManager:
+    """Manages bucket leases that let several workers share one state DB"""
+
+    def __init__(self, db_conn: "DatabaseConnection"):
+        self.db_conn = db_conn
+
+    def claim(self, worker_id: str, lease_seconds: float, now: Optional[float] = None) -> Optional[BucketLease]:
+        """Atomically lease the first claimable bucket, taking over expired leases"""
+        now = time.time() if now is None else now
+        with self.db_conn.get_connection() as conn:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    f"""SELECT s.bucket FROM bucket_status s
+                    LEFT JOIN bucket_leases l ON l.bucket = s.bucket
+                    WHERE {_LEASABLE_BUCKET_WHERE}
+                    AND (l.bucket IS NULL OR l.expires_at <= ? OR l.worker_id = ?)
+                    ORDER BY s.bucket LIMIT 1""",
+                    (now, worker_id),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                lease = conn.execute(
+                    """INSERT INTO bucket_leases (bucket, worker_id, expires_at, heartbeat_at, claimed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(bucket) DO UPDATE SET worker_id = excluded.worker_id,
+                    expires_at = excluded.expires_at, heartbeat_at = excluded.heartbeat_at,
+                    claim_count = claim_count + 1, claimed_at = excluded.claimed_at
+                    RETURNING bucket, worker_id, expires_at, claim_count""",
+                    (row["bucket"], worker_id, now + lease_seconds, now, get_utc_now()),
+                ).fetchone()
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        return BucketLease(**dict(lease))
+
+    def renew(self, bucket: str, worker_id: str, lease_seconds: float, now: Optional[float] = None) -> bool:
+        """Push a held lease's expiry forward; False when the lease was lost"""
+        now = time.time() if now is None else now
+        with self.db_conn.get_connection() as conn:
+            cursor = conn.execute(
+                "UPDATE bucket_leases SET expires_at = ?, heartbeat_at = ? WHERE bucket = ? AND worker_id = ?",
+                (now + lease_seconds, now, bucket, worker_id),
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def release(self, bucket: str, worker_id: str):
+        """Delete a lease if worker_id still holds it"""
+        with self.db_conn.get_connection() as conn:
+            conn.execute("DELETE FROM bucket_leases WHERE bucket = ? AND worker_id = ?", (bucket, worker_id))
+            conn.commit()
+
+    def count_active(self, now: Optional[float] = None) -> int:
+        """Count claimable-state buckets held by an unexpired lease"""
+        now = time.time() if now is None else now
+        with self.db_conn.get_connection() as conn:
+            return conn.execute(
+                f"""SELECT COUNT(*) FROM bucket_leases l JOIN bucket_status s ON s.bucket = l.bucket
+                WHERE {_LEASABLE_BUCKET_WHERE} AND l.expires_at > ?""",
+                (now,),
+            ).fetchone()[0]
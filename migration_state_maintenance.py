@@ -0,0 +1,319 @@
+"""Routine maintenance for the migrate_v2 SQLite state database.
+
+Months of inserts and updates leave free pages behind, and the query planner has no
+statistics until ``ANALYZE`` runs. ``maintain_state_db`` runs the requested steps in a
+safe order and times each one:
+
+1. ``integrity_check`` (or ``quick_check``); later steps are skipped if it fails
+2. an online copy via the sqlite3 backup API, safe while a migration is writing
+3. ``ANALYZE`` (bounded by ``analysis_limit``) followed by ``PRAGMA optimize``
+4. ``incremental_vacuum`` when the DB uses ``auto_vacuum = INCREMENTAL``
+5. a ``VACUUM`` rebuild, which is also how page_size and auto_vacuum changes take effect
+
+Only the rebuild needs exclusive access; the other steps run alongside writers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from cost_toolkit.common.format_utils import format_bytes
+
+AUTO_VACUUM_MODES = ("none", "full", "incremental")
+INTEGRITY_MODES = ("quick", "full", "none")
+DEFAULT_ANALYSIS_LIMIT = 1000
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_TEMP_SUFFIX = ".backup-tmp"
+_VALID_PAGE_SIZES = tuple(1 << shift for shift in range(9, 17))
+
+
+@dataclass(frozen=True)
+class MaintenanceOptions:  # pylint: disable=too-many-instance-attributes
+    """Steps requested from maintain_state_db."""
+
+    integrity: str = "quick"
+    backup_path: Optional[Path] = None
+    analyze: bool = True
+    analysis_limit: int = DEFAULT_ANALYSIS_LIMIT
+    incremental_vacuum: bool = True
+    vacuum: bool = False
+    page_size: Optional[int] = None
+    auto_vacuum: Optional[str] = None
+
+    def __post_init__(self):
+        if self.integrity not in INTEGRITY_MODES:
+            raise ValueError(f"Unknown integrity mode {self.integrity!r}; expected one of {', '.join(INTEGRITY_MODES)}")
+        if self.auto_vacuum is not None and self.auto_vacuum not in AUTO_VACUUM_MODES:
+            raise ValueError(f"Unknown auto_vacuum mode {self.auto_vacuum!r}; expected one of {', '.join(AUTO_VACUUM_MODES)}")
+        if self.page_size is not None and self.page_size not in _VALID_PAGE_SIZES:
+            raise ValueError(f"page_size must be a power of two between 512 and 65536, got {self.page_size}")
+
+    @property
+    def rebuild(self) -> bool:
+        """True when a VACUUM rebuild is needed"""
+        return self.vacuum or self.page_size is not None or self.auto_vacuum is not None
+
+
+@dataclass(frozen=True)
+class MaintenanceStep:
+    """One timed maintenance step."""
+
+    name: str
+    seconds: float
+    detail: str = ""
+
+
+@dataclass
+class MaintenanceResult:
+    """Sizes, timings and integrity outcome of a maintenance run."""
+
+    size_before: int
+    size_after: int = 0
+    integrity_ok: bool = True
+    integrity_errors: List[str] = field(default_factory=list)
+    steps: List[MaintenanceStep] = field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        """Wall-clock time spent across all steps"""
+        return sum(step.seconds for step in self.steps)
+
+
+def database_size(db_path: Path) -> int:
+    """Bytes used by the database file plus its WAL, if any."""
+    total = 0
+    for path in (db_path, db_path.with_name(db_path.name + "-wal")):
+        try:
+            total += path.stat().st_size
+        except FileNotFoundError:
+            continue
+    return total
+
+
+def _pragma_value(conn: sqlite3.Connection, name: str):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def check_integrity(conn: sqlite3.Connection, mode: str) -> List[str]:
+    """Run quick_check or integrity_check and return the reported problems (empty when ok)."""
+    pragma = "quick_check" if mode == "quick" else "integrity_check"
+    messages = [row[0] for row in conn.execute(f"PRAGMA {pragma}")]
+    return [] if messages == ["ok"] else messages
+
+
+def backup_database(
+    conn: sqlite3.Connection,
+    target: Path,
+    *,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Path:
+    """Copy the live database to target with the online backup API.
+
+    The copy proceeds a few pages at a time inside one read transaction on conn, so it
+    is a consistent snapshot that commits from other connections cannot restart from
+    page one. In WAL mode those writers keep going; with a rollback journal they wait
+    for the copy like any other reader. It lands under a temporary name that is renamed
+    over target at the end.
+    """
+    target = Path(target).expanduser()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target.with_name(target.name + BACKUP_TEMP_SUFFIX)
+    temp_path.unlink(missing_ok=True)
+
+    def _report(_status: int, remaining: int, total: int) -> None:
+        if progress is not None:
+            progress(remaining, total)
+
+    destination = sqlite3.connect(str(temp_path))
+    own_transaction = not conn.in_transaction
+    try:
+        if own_transaction:
+            conn.execute("BEGIN")
+            # BEGIN is deferred; the first read pins the snapshot the backup steps share.
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        conn.backup(destination, pages=pages, progress=_report)
+    finally:
+        if own_transaction and conn.in_transaction:
+            conn.execute("COMMIT")
+        destination.close()
+    os.replace(temp_path, target)
+    return target
+
+
+def analyze_database(conn: sqlite3.Connection, analysis_limit: int = DEFAULT_ANALYSIS_LIMIT) -> None:
+    """Refresh planner statistics; analysis_limit samples that many rows per index (0 = all)."""
+    conn.execute(f"PRAGMA analysis_limit = {int(analysis_limit)}")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+
+
+def incremental_vacuum(conn: sqlite3.Connection) -> int:
+    """Return free pages to the OS when auto_vacuum is INCREMENTAL; returns the pages released."""
+    if _pragma_value(conn, "auto_vacuum") != AUTO_VACUUM_MODES.index("incremental"):
+        return 0
+    free_pages = _pragma_value(conn, "freelist_count")
+    if free_pages:
+        # Each step of the pragma frees one page and Cursor.execute steps once; sqlite3_exec runs it to completion.
+        conn.executescript("PRAGMA incremental_vacuum;")
+    return free_pages - _pragma_value(conn, "freelist_count")
+
+
+def rebuild_database(conn: sqlite3.Connection, page_size: Optional[int] = None, auto_vacuum: Optional[str] = None) -> None:
+    """VACUUM the database, applying a new page_size and/or auto_vacuum mode on the way.
+
+    page_size cannot change while the DB is in WAL mode, so WAL is switched off for the
+    rebuild and restored afterwards.
+    """
+    journal_mode = _pragma_value(conn, "journal_mode")
+    if page_size is not None and journal_mode == "wal":
+        conn.execute("PRAGMA journal_mode = DELETE").fetchall()
+    if page_size is not None:
+        conn.execute(f"PRAGMA page_size = {int(page_size)}")
+    if auto_vacuum is not None:
+        conn.execute(f"PRAGMA auto_vacuum = {auto_vacuum.upper()}")
+    conn.execute("VACUUM")
+    if _pragma_value(conn, "journal_mode") != journal_mode:
+        conn.execute(f"PRAGMA journal_mode = {journal_mode}").fetchall()
+
+
+def _timed(result: MaintenanceResult, name: str, func: Callable[[], Optional[str]]) -> None:
+    start = time.perf_counter()
+    detail = func()
+    result.steps.append(MaintenanceStep(name=name, seconds=time.perf_counter() - start, detail=detail or ""))
+
+
+def _run_integrity(conn: sqlite3.Connection, options: MaintenanceOptions, result: MaintenanceResult) -> str:
+    result.integrity_errors = check_integrity(conn, options.integrity)
+    result.integrity_ok = not result.integrity_errors
+    return "ok" if result.integrity_ok else f"{len(result.integrity_errors)} problem(s)"
+
+
+def _run_rebuild(conn: sqlite3.Connection, options: MaintenanceOptions) -> str:
+    rebuild_database(conn, options.page_size, options.auto_vacuum)
+    return (
+        f"page_size={_pragma_value(conn, 'page_size')}, "
+        f"auto_vacuum={AUTO_VACUUM_MODES[_pragma_value(conn, 'auto_vacuum')]}"
+    )
+
+
+def maintain_state_db(
+    db_path: str,
+    options: MaintenanceOptions,
+    *,
+    backup_progress: Optional[Callable[[int, int], None]] = None,
+) -> MaintenanceResult:
+    """Run the requested maintenance steps on db_path and report sizes and timings."""
+    path = Path(db_path).expanduser()
+    result = MaintenanceResult(size_before=database_size(path))
+    conn = sqlite3.connect(str(path), timeout=30.0, isolation_level=None)
+    try:
+        if options.integrity != "none":
+            _timed(result, f"{options.integrity} integrity check", lambda: _run_integrity(conn, options, result))
+            if not result.integrity_ok:
+                result.size_after = database_size(path)
+                return result
+        if options.backup_path is not None:
+            _timed(result, "online backup", lambda: str(backup_database(conn, options.backup_path, progress=backup_progress)))
+        if options.analyze:
+            _timed(result, "analyze + optimize", lambda: analyze_database(conn, options.analysis_limit))
+        if options.incremental_vacuum and not options.rebuild:
+            _timed(result, "incremental vacuum", lambda: f"{incremental_vacuum(conn):,} page(s) released")
+        if options.rebuild:
+            _timed(result, "vacuum rebuild", lambda: _run_rebuild(conn, options))
+    finally:
+        conn.close()
+    result.size_after = database_size(path)
+    return result
+
+
+def run_state_db_maintenance(db_path: str, options: MaintenanceOptions) -> MaintenanceResult:
+    """Run maintenance steps on an existing state DB, printing backup progress."""
+    path = Path(db_path).expanduser()
+    if not path.exists():
+        raise FileNotFoundError(f"State DB does not exist: {path}")
+
+    def _progress(remaining: int, total: int) -> None:
+        print(f"\r  Backed up {total - remaining:,}/{total:,} pages", end="", flush=True)
+
+    result = maintain_state_db(str(path), options, backup_progress=_progress)
+    if options.backup_path is not None and result.integrity_ok:
+        print()
+    return result
+
+
+def _print_maintenance_report(db_path: str, result: MaintenanceResult) -> None:
+    print("=" * 70)
+    print(f"STATE DB MAINTENANCE: {db_path}")
+    print("=" * 70)
+    for step in result.steps:
+        detail = f" ({step.detail})" if step.detail else ""
+        print(f"  {step.name:<24} {step.seconds:8.2f}s{detail}")
+    for message in result.integrity_errors[:20]:
+        print(f"  ✗ {message}")
+    print(f"  DB size: {format_bytes(result.size_before)} → {format_bytes(result.size_after)} in {result.total_seconds:.2f}s")
+    print("=" * 70)
+
+
+def add_maintenance_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the ``state_db_admin.py maintain`` options to parser."""
+    parser.add_argument("--db-path", help="Path to the state DB (default: config.STATE_DB_PATH)")
+    parser.add_argument(
+        "--integrity",
+        choices=INTEGRITY_MODES,
+        default="quick",
+        help="quick_check, full integrity_check, or skip (default: %(default)s)",
+    )
+    parser.add_argument("--backup", metavar="PATH", help="Copy the DB to PATH with the online backup API first")
+    parser.add_argument("--no-analyze", action="store_true", help="Skip ANALYZE and PRAGMA optimize")
+    parser.add_argument(
+        "--analysis-limit",
+        type=int,
+        default=DEFAULT_ANALYSIS_LIMIT,
+        help="Rows sampled per index by ANALYZE; 0 analyzes everything (default: %(default)s)",
+    )
+    parser.add_argument("--vacuum", action="store_true", help="Rebuild with VACUUM (needs exclusive access)")
+    parser.add_argument("--page-size", type=int, help="Rebuild with this page size, e.g. 8192 or 16384")
+    parser.add_argument("--auto-vacuum", choices=AUTO_VACUUM_MODES, help="Rebuild with this auto_vacuum mode")
+
+
+def run_maintenance_command(args: argparse.Namespace, db_path: str) -> int:
+    """Run the maintain subcommand parsed by add_maintenance_arguments; returns the exit code."""
+    options = MaintenanceOptions(
+        integrity=args.integrity,
+        backup_path=Path(args.backup) if args.backup else None,
+        analyze=not args.no_analyze,
+        analysis_limit=args.analysis_limit,
+        vacuum=args.vacuum,
+        page_size=args.page_size,
+        auto_vacuum=args.auto_vacuum,
+    )
+    result = run_state_db_maintenance(db_path, options)
+    _print_maintenance_report(db_path, result)
+    return 0 if result.integrity_ok else 1
+
+
+__all__ = [
+    "AUTO_VACUUM_MODES",
+    "DEFAULT_ANALYSIS_LIMIT",
+    "INTEGRITY_MODES",
+    "MaintenanceOptions",
+    "MaintenanceResult",
+    "MaintenanceStep",
+    "add_maintenance_arguments",
+    "analyze_database",
+    "backup_database",
+    "check_integrity",
+    "database_size",
+    "incremental_vacuum",
+    "maintain_state_db",
+    "rebuild_database",
+    "run_maintenance_command",
+    "run_state_db_maintenance",
+]
@@ -1,5 +1,6 @@
 """State manager classes for file, bucket, and phase operations"""
 
+import json
 import sqlite3
 from dataclasses import dataclass
 from importlib import import_module
@@ -7,6 +8,7 @@ from typing import TYPE_CHECKING, Dict, List, Optional
 
 _PACKAGE_PREFIX = f"{__package__}." if __package__ else ""
 get_utc_now = import_module(f"{_PACKAGE_PREFIX}migration_utils").get_utc_now
+insert_discovered_file = import_module(f"{_PACKAGE_PREFIX}migration_state_compact_records").insert_discovered_file
 
 if TYPE_CHECKING:
     from .migration_state_v2 import DatabaseConnection, Phase
@@ -42,8 +44,6 @@ class BucketVerificationResult:
 
 def save_bucket_status_to_db(conn, status: BucketScanStatus):
     """Helper to save bucket status to database"""
-    import json  # pylint: disable=import-outside-toplevel
-
     now = get_utc_now()
     storage_json = json.dumps(status.storage_classes)
     conn.execute(
@@ -112,27 +112,30 @@ def get_bucket_info_from_db(conn, bucket: str) -> Dict:
     return dict(row) if row else {}
 
 
-def get_storage_class_counts(conn) -> Dict[str, int]:
-    """Get storage class counts from database"""
-    cursor = conn.execute("SELECT storage_class, COUNT(*) as count FROM files GROUP BY storage_class")
-    return {r["storage_class"]: r["count"] for r in cursor.fetchall()}
+def get_all_bucket_rows_from_db(conn) -> List[Dict]:
+    """Get every bucket_status row in one query"""
+    return [dict(r) for r in conn.execute("SELECT * FROM bucket_status ORDER BY bucket")]
+
+
+def sum_storage_class_counts(rows) -> Dict[str, int]:
+    """Add up the per-bucket storage class counters recorded at scan time"""
+    totals: Dict[str, int] = {}
+    for row in rows:
+        if not row["storage_class_counts"]:
+            continue
+        for storage_class, count in json.loads(row["storage_class_counts"]).items():
+            totals[storage_class] = totals.get(storage_class, 0) + count
+    return totals
 
 
 def get_scan_summary_from_db(conn) -> Dict:
-    """Get summary of scanned buckets"""
-    cursor = conn.execute(
-        """SELECT COUNT(*) as bucket_count,
-        COALESCE(SUM(file_count), 0) as total_files,
-        COALESCE(SUM(total_size), 0) as total_size
-        FROM bucket_status WHERE scan_complete = 1"""
-    )
-    row = cursor.fetchone()
-    storage_classes = get_storage_class_counts(conn)
+    """Get summary of scanned buckets from bucket_status (never scans the files table)"""
+    rows = conn.execute("SELECT file_count, total_size, storage_class_counts FROM bucket_status WHERE scan_complete = 1").fetchall()
     return {
-        "bucket_count": row["bucket_count"],
-        "total_files": row["total_files"],
-        "total_size": row["total_size"],
-        "storage_classes": storage_classes,
+        "bucket_count": len(rows),
+        "total_files": sum(row["file_count"] for row in rows),
+        "total_size": sum(row["total_size"] for row in rows),
+        "storage_classes": sum_storage_class_counts(rows),
     }
 
 
@@ -155,15 +158,7 @@ class FileStateManager:
         now = get_utc_now()
         with self.db_conn.get_connection() as conn:
             try:
-                conn.execute(
-                    """
-                    INSERT INTO files
-                    (bucket, key, size, etag, storage_class, last_modified,
-                     state, created_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, 'discovered', ?, ?)
-                """,
-                    (bucket, key, size, etag, storage_class, last_modified, now, now),
-                )
+                insert_discovered_file(conn, self.db_conn.layout, (key, size, etag, storage_class, last_modified), bucket, now)
                 conn.commit()
             except sqlite3.IntegrityError as e:
                 if "UNIQUE constraint failed" not in str(e):
@@ -192,25 +187,6 @@ class FileStateManager:
             )
             conn.commit()
 
-    def get_glacier_files_needing_restore(self) -> List[Dict]:
-        """Get Glacier files that need restore requests"""
-        with self.db_conn.get_connection() as conn:
-            cursor = conn.execute(
-                """SELECT * FROM files WHERE storage_class IN ('GLACIER', 'DEEP_ARCHIVE')
-                AND glacier_restore_requested_at IS NULL"""
-            )
-            return [dict(row) for row in cursor.fetchall()]
-
-    def get_files_restoring(self) -> List[Dict]:
-        """Get files currently being restored"""
-        with self.db_conn.get_connection() as conn:
-            cursor = conn.execute(
-                """SELECT * FROM files WHERE storage_class IN ('GLACIER', 'DEEP_ARCHIVE')
-                AND glacier_restore_requested_at IS NOT NULL
-                AND glacier_restored_at IS NULL"""
-            )
-            return [dict(row) for row in cursor.fetchall()]
-
 
 class BucketStateManager:
     """Manages bucket-level state operations"""
@@ -237,6 +213,16 @@ class BucketStateManager:
         with self.db_conn.get_connection() as conn:
             save_bucket_status_to_db(conn, status)
 
+    def update_bucket_scan_totals(self, bucket: str, file_count: int, total_size: int, storage_classes: Dict[str, int]):
+        """Refresh a rescanned bucket's totals without touching its pipeline flags"""
+        with self.db_conn.get_connection() as conn:
+            conn.execute(
+                """UPDATE bucket_status SET file_count = ?, total_size = ?, storage_class_counts = ?,
+                scan_complete = 1, updated_at = ? WHERE bucket = ?""",
+                (file_count, total_size, json.dumps(storage_classes), get_utc_now(), bucket),
+            )
+            conn.commit()
+
     def mark_bucket_sync_complete(self, bucket: str):
         """Mark bucket as synced"""
         with self.db_conn.get_connection() as conn:
@@ -283,6 +269,11 @@ class BucketStateManager:
         with self.db_conn.get_connection() as conn:
             return get_bucket_info_from_db(conn, bucket)
 
+    def get_all_bucket_rows(self) -> List[Dict]:
+        """Get all bucket status rows"""
+        with self.db_conn.get_connection() as conn:
+            return get_all_bucket_rows_from_db(conn)
+
     def get_scan_summary(self) -> Dict:
         """Get summary of scanned buckets"""
         with self.db_conn.get_connection() as conn:
@@ -292,9 +283,10 @@ class BucketStateManager:
 class PhaseManager:
     """Manages migration phase tracking"""
 
-    def __init__(self, db_conn: "DatabaseConnection"):
+    def __init__(self, db_conn: "DatabaseConnection", initialize: bool = True):
         self.db_conn = db_conn
-        self._init_phase()
+        if initialize:
+            self._init_phase()
 
     def _init_phase(self):
         """Initialize phase if not set"""
@@ -322,3 +314,20 @@ class PhaseManager:
                 (phase.value, now),
             )
             conn.commit()
+
+    def set_metadata(self, key: str, value: str):
+        """Store an arbitrary metadata value alongside the phase marker"""
+        now = get_utc_now()
+        with self.db_conn.get_connection() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO migration_metadata
+                (key, value, updated_at) VALUES (?, ?, ?)""",
+                (key, value, now),
+            )
+            conn.commit()
+
+    def get_metadata(self, key: str) -> Optional[str]:
+        """Return a stored metadata value, or None when unset"""
+        with self.db_conn.get_connection() as conn:
+            row = conn.execute("SELECT value FROM migration_metadata WHERE key = ?", (key,)).fetchone()
+            return row["value"] if row else None
@@ -0,0 +1,141 @@
+"""Incremental rescans: reconcile stored rows with a fresh listing and keep tombstones"""
+
+from dataclasses import dataclass
+from importlib import import_module
+from typing import TYPE_CHECKING, Iterable, Optional, Sequence, Set
+
+_PACKAGE_PREFIX = f"{__package__}." if __package__ else ""
+get_utc_now = import_module(f"{_PACKAGE_PREFIX}migration_utils").get_utc_now
+insert_discovered_file = import_module(f"{_PACKAGE_PREFIX}migration_state_compact_records").insert_discovered_file
+
+if TYPE_CHECKING:
+    from .migration_state_v2 import DatabaseConnection
+
+# Objects a rescan no longer found in S3; their local copies are kept and excused from verification.
+FILE_TOMBSTONES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS file_tombstones (
+        bucket TEXT NOT NULL,
+        key TEXT NOT NULL,
+        size INTEGER,
+        etag TEXT,
+        deleted_at TEXT NOT NULL,
+        PRIMARY KEY (bucket, key)
+    ) WITHOUT ROWID
+"""
+
+
+@dataclass
+class RescanDelta:
+    """How a rescanned listing differed from the stored rows."""
+
+    added: int = 0
+    changed: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+    @property
+    def modified(self) -> int:
+        """Objects that were added, changed or deleted"""
+        return self.added + self.changed + self.deleted
+
+    def __iadd__(self, other: "RescanDelta") -> "RescanDelta":
+        self.added += other.added
+        self.changed += other.changed
+        self.deleted += other.deleted
+        self.unchanged += other.unchanged
+        return self
+
+
+# A changed object starts over as newly discovered, including its Glacier restore.
+_RESET_CHANGED_FILE_SQL = """
+    UPDATE files SET size = ?, etag = ?, storage_class = ?, last_modified = ?, state = 'discovered',
+        local_path = NULL, local_checksum = NULL, error_message = NULL,
+        glacier_restore_requested_at = NULL, glacier_restored_at = NULL, updated_at = ?
+    WHERE bucket = ? AND key = ?
+"""
+_TOMBSTONE_LOOKUP_CHUNK = 500
+
+
+class RescanManager:
+    """Applies rescanned listing pages to the files table and answers tombstone lookups"""
+
+    def __init__(self, db_conn: "DatabaseConnection"):
+        self.db_conn = db_conn
+
+    def rescan_files(self, bucket: str, listed: Sequence[tuple], after: Optional[str], through: Optional[str]) -> RescanDelta:
+        """Reconcile stored rows with one listing page in a single transaction.
+
+        listed holds (key, size, etag, storage_class, last_modified) tuples and must cover
+        every key in (after, through]; None leaves that end of the range open. New keys are
+        inserted, changed ones reset to discovered, and stored keys missing from the page are
+        moved to file_tombstones. Any difference clears the bucket's sync and verify flags.
+        """
+        conditions, params = ["bucket = ?"], [bucket]
+        if after is not None:
+            conditions.append("key > ?")
+            params.append(after)
+        if through is not None:
+            conditions.append("key <= ?")
+            params.append(through)
+        now = get_utc_now()
+        delta = RescanDelta()
+        with self.db_conn.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stored = {
+                row["key"]: (row["size"], row["etag"], row["storage_class"])
+                for row in conn.execute(f"SELECT key, size, etag, storage_class FROM files WHERE {' AND '.join(conditions)}", params)
+            }
+            added, changed = [], []
+            for row in listed:
+                key, size, etag, storage_class, last_modified = row
+                current = stored.pop(key, None)
+                if current is None:
+                    insert_discovered_file(conn, self.db_conn.layout, row, bucket, now)
+                    added.append((bucket, key))
+                elif current != (size, etag, storage_class):
+                    changed.append((size, etag, storage_class, last_modified, now, bucket, key))
+                else:
+                    delta.unchanged += 1
+            conn.executemany(_RESET_CHANGED_FILE_SQL, changed)
+            conn.executemany("DELETE FROM file_tombstones WHERE bucket = ? AND key = ?", added)
+            conn.executemany(
+                "INSERT OR REPLACE INTO file_tombstones (bucket, key, size, etag, deleted_at) VALUES (?, ?, ?, ?, ?)",
+                [(bucket, key, size, etag, now) for key, (size, etag, _) in stored.items()],
+            )
+            conn.executemany("DELETE FROM files WHERE bucket = ? AND key = ?", [(bucket, key) for key in stored])
+            delta.added, delta.changed, delta.deleted = len(added), len(changed), len(stored)
+            if delta.modified:
+                conn.execute(
+                    "UPDATE bucket_status SET sync_complete = 0, verify_complete = 0, updated_at = ? WHERE bucket = ?",
+                    (now, bucket),
+                )
+            conn.commit()
+        return delta
+
+    def get_tombstoned_keys(self, bucket: str, keys: Iterable[str]) -> Set[str]:
+        """Return the subset of keys recorded as deleted from bucket by a rescan"""
+        candidates = list(keys)
+        found: Set[str] = set()
+        with self.db_conn.get_connection() as conn:
+            for start in range(0, len(candidates), _TOMBSTONE_LOOKUP_CHUNK):
+                chunk = candidates[start : start + _TOMBSTONE_LOOKUP_CHUNK]
+                rows = conn.execute(
+                    f"SELECT key FROM file_tombstones WHERE bucket = ? AND key IN ({', '.join('?' * len(chunk))})",
+                    (bucket, *chunk),
+                )
+                found.update(row["key"] for row in rows)
+        return found
+
+
+class RescanOperationsMixin:
+    """Rescan operations of MigrationStateV2, delegated to RescanManager."""
+
+    rescans: RescanManager
+
+    def rescan_files(self, bucket: str, listed: Sequence[tuple], after: Optional[str], through: Optional[str]) -> RescanDelta:
+        """Reconcile stored rows for keys in (after, through] with one listing page."""
+        return self.rescans.rescan_files(bucket, listed, after, through)
+
+    def get_tombstoned_keys(self, bucket: str, keys: Iterable[str]) -> Set[str]:
+        """Return which of keys a rescan found deleted from bucket."""
+        return self.rescans.get_tombstoned_keys(bucket, keys)
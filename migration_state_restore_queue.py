@@ -0,0 +1,87 @@
+"""Streamed Glacier restore work queues served by their partial indexes"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+_PACKAGE_PREFIX = f"{__package__}." if __package__ else ""
+_compact = import_module(f"{_PACKAGE_PREFIX}migration_state_compact")
+LAYOUT_COMPACT = _compact.LAYOUT_COMPACT
+compact_files_query = _compact.compact_files_query
+RESTORE_PENDING = _compact.RESTORE_PENDING
+RESTORING = _compact.RESTORING
+GLACIER_BATCH_SIZE = _compact.GLACIER_BATCH_SIZE
+
+if TYPE_CHECKING:
+    from .migration_state_v2 import DatabaseConnection
+
+
+class RestoreQueueManager:
+    """Reads the Glacier restore-pending and restoring queues in bounded keyset pages"""
+
+    def __init__(self, db_conn: "DatabaseConnection"):
+        self.db_conn = db_conn
+
+    def _queue_where(self, conn, queue: str) -> str:
+        """WHERE clause selecting a Glacier queue through its partial index"""
+        if self.db_conn.layout == LAYOUT_COMPACT:
+            return _compact.compact_restore_queue_where(queue, _compact.glacier_storage_class_ids(conn), alias="r")
+        return _compact.legacy_restore_queue_where(queue)
+
+    def _queue_page(self, conn, queue: str, after: Optional[tuple], limit: int) -> List[Dict]:
+        """Fetch the next keyset page of a Glacier queue, grouped by bucket and ordered by key within each"""
+        where = self._queue_where(conn, queue)
+        if self.db_conn.layout == LAYOUT_COMPACT:
+            if after:
+                where += " AND (r.bucket_id, r.key) > ((SELECT bucket_id FROM buckets WHERE name = ?), ?)"
+            sql = f"{compact_files_query(where)} ORDER BY r.bucket_id, r.key LIMIT ?"
+        else:
+            if after:
+                where += " AND (bucket, key) > (?, ?)"
+            sql = f"SELECT * FROM files WHERE {where} ORDER BY bucket, key LIMIT ?"
+        return [dict(row) for row in conn.execute(sql, (*(after or ()), limit))]
+
+    def _iter_queue(self, queue: str, batch_size: int) -> Iterator[List[Dict]]:
+        """Yield a Glacier queue in bounded batches; each page uses a short-lived connection"""
+        after = None
+        while True:
+            with self.db_conn.get_connection() as conn:
+                batch = self._queue_page(conn, queue, after, batch_size)
+            if not batch:
+                return
+            yield batch
+            if len(batch) < batch_size:
+                return
+            after = (batch[-1]["bucket"], batch[-1]["key"])
+
+    def _count_queue(self, queue: str) -> int:
+        """Count a Glacier queue without materializing its rows"""
+        with self.db_conn.get_connection() as conn:
+            if self.db_conn.layout == LAYOUT_COMPACT:
+                sql = f"SELECT COUNT(*) FROM file_records r WHERE {self._queue_where(conn, queue)}"
+            else:
+                sql = f"SELECT COUNT(*) FROM files WHERE {self._queue_where(conn, queue)}"
+            return conn.execute(sql).fetchone()[0]
+
+    def iter_glacier_files_needing_restore(self, batch_size: int = GLACIER_BATCH_SIZE) -> Iterator[List[Dict]]:
+        """Yield batches of Glacier files that need restore requests"""
+        return self._iter_queue(RESTORE_PENDING, batch_size)
+
+    def iter_files_restoring(self, batch_size: int = GLACIER_BATCH_SIZE) -> Iterator[List[Dict]]:
+        """Yield batches of files currently being restored"""
+        return self._iter_queue(RESTORING, batch_size)
+
+    def count_glacier_files_needing_restore(self) -> int:
+        """Count Glacier files that need restore requests"""
+        return self._count_queue(RESTORE_PENDING)
+
+    def count_files_restoring(self) -> int:
+        """Count files currently being restored"""
+        return self._count_queue(RESTORING)
+
+    def get_glacier_files_needing_restore(self) -> List[Dict]:
+        """Get Glacier files that need restore requests"""
+        return [file for batch in self.iter_glacier_files_needing_restore() for file in batch]
+
+    def get_files_restoring(self) -> List[Dict]:
+        """Get files currently being restored"""
+        return [file for batch in self.iter_files_restoring() for file in batch]
@@ -5,14 +5,23 @@ import json
 import sqlite3
 from contextlib import contextmanager
 from enum import Enum
-from typing import TYPE_CHECKING, Dict, List
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+from migration_state_compact import (
+    GLACIER_BATCH_SIZE,
+    LAYOUT_COMPACT,
+    LAYOUT_LEGACY,
+    create_compact_schema,
+    files_layout,
+    legacy_restore_queue_indexes,
+)
+from migration_state_rescan import FILE_TOMBSTONES_TABLE_SQL, RescanManager, RescanOperationsMixin
 
 if TYPE_CHECKING:
-    from migration_state_managers import (
-        BucketStateManager,
-        FileStateManager,
-        PhaseManager,
-    )
+    from migration_state_leases import BucketLease, BucketLeaseManager
+    from migration_state_managers import BucketStateManager, FileStateManager, PhaseManager
+    from migration_state_restore_queue import RestoreQueueManager
 
 
 class Phase(Enum):
@@ -89,18 +98,33 @@ METADATA_TABLE_SQL = """
     )
 """
 
+BUCKET_LEASES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS bucket_leases (
+        bucket TEXT PRIMARY KEY,
+        worker_id TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        heartbeat_at REAL NOT NULL,
+        claim_count INTEGER NOT NULL DEFAULT 1,
+        claimed_at TEXT NOT NULL
+    )
+"""
+
 TABLE_DEFINITIONS = (
-    FILE_TABLE_SQL,
     BUCKET_STATUS_TABLE_SQL,
     METADATA_TABLE_SQL,
+    BUCKET_LEASES_TABLE_SQL,
+    FILE_TOMBSTONES_TABLE_SQL,
 )
 
 INDEX_DEFINITIONS = (
     "CREATE INDEX IF NOT EXISTS idx_files_state ON files(state)",
-    "CREATE INDEX IF NOT EXISTS idx_files_storage_class ON files(storage_class)",
     "CREATE INDEX IF NOT EXISTS idx_files_bucket ON files(bucket)",
+    *legacy_restore_queue_indexes(),
 )
 
+# Replaced by the partial Glacier queue indexes.
+SUPERSEDED_INDEXES = ("idx_files_storage_class",)
+
 BUCKET_STATUS_MIGRATIONS = (
     "verified_file_count INTEGER",
     "size_verified_count INTEGER",
@@ -112,14 +136,22 @@ BUCKET_STATUS_MIGRATIONS = (
 class DatabaseConnection:  # pylint: disable=too-few-public-methods
     """Handles database connection and schema initialization"""
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, read_only: bool = False):
         self.db_path = db_path
-        self._init_schema()
+        self.read_only = read_only
+        if not read_only:
+            self._init_schema()
+        # A legacy layout may be compacted later; its SQL keeps working through the files view.
+        self.layout = self._detect_layout()
 
     @contextmanager
     def get_connection(self):
         """Yield a SQLite connection with the configured row factory."""
-        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        if self.read_only:
+            uri = f"{Path(self.db_path).expanduser().resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=30.0)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=30.0)
         conn.row_factory = sqlite3.Row
         try:
             yield conn
@@ -129,17 +161,28 @@ class DatabaseConnection:  # pylint: disable=too-few-public-methods
     def _init_schema(self):
         with self.get_connection() as conn:
             self._create_tables(conn)
-            self._create_indices(conn)
             self._migrate_existing_schema(conn)
             conn.commit()
 
     def _create_tables(self, conn):
         for statement in TABLE_DEFINITIONS:
             conn.execute(statement)
+        if files_layout(conn) == LAYOUT_LEGACY:
+            # Existing databases keep the legacy layout until compact_files_table runs.
+            conn.execute(FILE_TABLE_SQL)
+            self._create_indices(conn)
+        else:
+            create_compact_schema(conn)
 
     def _create_indices(self, conn):
         for statement in INDEX_DEFINITIONS:
             conn.execute(statement)
+        for name in SUPERSEDED_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def _detect_layout(self) -> str:
+        with self.get_connection() as conn:
+            return files_layout(conn) or LAYOUT_COMPACT
 
     def _migrate_existing_schema(self, conn):
         for column in BUCKET_STATUS_MIGRATIONS:
@@ -153,9 +196,10 @@ class DatabaseConnection:  # pylint: disable=too-few-public-methods
 
 
 class _FileOperationsMixin:
-    """Common file operations delegated to FileStateManager."""
+    """File operations delegated to FileStateManager and RestoreQueueManager."""
 
     files: "FileStateManager"
+    restore_queue: "RestoreQueueManager"
 
     def add_file(
         self,
@@ -179,11 +223,27 @@ class _FileOperationsMixin:
 
     def get_glacier_files_needing_restore(self) -> List[Dict]:
         """Return Glacier objects still waiting on restore requests."""
-        return self.files.get_glacier_files_needing_restore()
+        return self.restore_queue.get_glacier_files_needing_restore()
 
     def get_files_restoring(self) -> List[Dict]:
         """Return Glacier objects currently restoring."""
-        return self.files.get_files_restoring()
+        return self.restore_queue.get_files_restoring()
+
+    def iter_glacier_files_needing_restore(self, batch_size: int = GLACIER_BATCH_SIZE) -> Iterator[List[Dict]]:
+        """Yield bounded batches of Glacier objects that still need a restore request."""
+        return self.restore_queue.iter_glacier_files_needing_restore(batch_size)
+
+    def iter_files_restoring(self, batch_size: int = GLACIER_BATCH_SIZE) -> Iterator[List[Dict]]:
+        """Yield bounded batches of Glacier objects currently restoring."""
+        return self.restore_queue.iter_files_restoring(batch_size)
+
+    def count_glacier_files_needing_restore(self) -> int:
+        """Count Glacier objects that still need a restore request."""
+        return self.restore_queue.count_glacier_files_needing_restore()
+
+    def count_files_restoring(self) -> int:
+        """Count Glacier objects currently restoring."""
+        return self.restore_queue.count_files_restoring()
 
 
 class _BucketOperationsMixin:
@@ -202,6 +262,10 @@ class _BucketOperationsMixin:
         """Persist bucket scan counts and totals."""
         return self.buckets.save_bucket_status(bucket, file_count, total_size, storage_classes, scan_complete)
 
+    def update_bucket_scan_totals(self, bucket: str, file_count: int, total_size: int, storage_classes: Dict[str, int]):
+        """Refresh rescanned totals while keeping sync/verify/delete flags."""
+        return self.buckets.update_bucket_scan_totals(bucket, file_count, total_size, storage_classes)
+
     def mark_bucket_sync_complete(self, bucket: str):
         """Flag that bucket sync finished."""
         return self.buckets.mark_bucket_sync_complete(bucket)
@@ -241,6 +305,10 @@ class _BucketOperationsMixin:
         """Fetch the stored status row for *bucket*."""
         return self.buckets.get_bucket_info(bucket)
 
+    def get_all_bucket_statuses(self) -> List["BucketStatus"]:
+        """Fetch every bucket status row in a single query, ordered by bucket."""
+        return [BucketStatus(row) for row in self.buckets.get_all_bucket_rows()]
+
     def get_bucket_status(self, bucket: str) -> "BucketStatus":
         """Fetch bucket status as a typed object; fail fast if missing."""
         info = self.get_bucket_info(bucket)
@@ -266,18 +334,52 @@ class _PhaseOperationsMixin:
         """Persist the new active migration phase."""
         return self.phases.set_phase(phase)
 
+    def set_metadata(self, key: str, value: str):
+        """Persist a free-form metadata value (e.g. profiling results)."""
+        return self.phases.set_metadata(key, value)
+
+    def get_metadata(self, key: str) -> Optional[str]:
+        """Return a previously stored metadata value, or None."""
+        return self.phases.get_metadata(key)
+
+
+class _LeaseOperationsMixin:
+    """Worker bucket leases delegated to BucketLeaseManager."""
+
+    leases: "BucketLeaseManager"
 
-class MigrationStateV2(_FileOperationsMixin, _BucketOperationsMixin, _PhaseOperationsMixin):
+    def claim_bucket_lease(self, worker_id: str, lease_seconds: float, now: Optional[float] = None) -> Optional["BucketLease"]:
+        """Claim the next unverified bucket that is unleased or whose lease expired."""
+        return self.leases.claim(worker_id, lease_seconds, now)
+
+    def renew_bucket_lease(self, bucket: str, worker_id: str, lease_seconds: float, now: Optional[float] = None) -> bool:
+        """Extend a held lease; False means another worker took it over."""
+        return self.leases.renew(bucket, worker_id, lease_seconds, now)
+
+    def release_bucket_lease(self, bucket: str, worker_id: str):
+        """Drop a lease held by *worker_id*."""
+        return self.leases.release(bucket, worker_id)
+
+    def count_leased_buckets(self, now: Optional[float] = None) -> int:
+        """Count unverified buckets currently leased by a live worker."""
+        return self.leases.count_active(now)
+
+
+class MigrationStateV2(
+    _FileOperationsMixin, RescanOperationsMixin, _BucketOperationsMixin, _PhaseOperationsMixin, _LeaseOperationsMixin
+):
     """Migration state management delegating to specialized managers"""
 
-    def __init__(self, db_path: str):
-        from migration_state_managers import (  # pylint: disable=import-outside-toplevel
-            BucketStateManager,
-            FileStateManager,
-            PhaseManager,
-        )
+    def __init__(self, db_path: str, read_only: bool = False):
+        # pylint: disable=import-outside-toplevel
+        from migration_state_leases import BucketLeaseManager
+        from migration_state_managers import BucketStateManager, FileStateManager, PhaseManager
+        from migration_state_restore_queue import RestoreQueueManager
 
-        self.db_conn = DatabaseConnection(db_path)
+        self.db_conn = DatabaseConnection(db_path, read_only=read_only)
         self.files = FileStateManager(self.db_conn)
+        self.restore_queue = RestoreQueueManager(self.db_conn)
+        self.rescans = RescanManager(self.db_conn)
         self.buckets = BucketStateManager(self.db_conn)
-        self.phases = PhaseManager(self.db_conn)
+        self.phases = PhaseManager(self.db_conn, initialize=not read_only)
+        self.leases = BucketLeaseManager(self.db_conn)
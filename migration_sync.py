@@ -2,31 +2,120 @@
 
 from __future__ import annotations
 
+import os
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from datetime import datetime
 from pathlib import Path
-from typing import Callable, Iterable
+from typing import Callable, Iterable, Iterator, Optional
 
 from botocore.exceptions import ClientError
 
 from cost_toolkit.common.format_utils import format_bytes
 from migration_state_v2 import MigrationStateV2
+from migration_sync_durability import DurabilityPolicy, DurableWriter
+from migration_sync_links import LinkedFiles, is_linked_copy, load_linked_files
 from migration_utils import ProgressTracker, format_duration
 
 
+# Downloads stream into "<name>.s3tmp" and are renamed over the final path once complete.
+TEMP_SUFFIX = ".s3tmp"
+# Large downloads record the object's ETag beside the temp file so an interrupted copy can resume.
+PARTIAL_ETAG_SUFFIX = TEMP_SUFFIX + ".etag"
+RESUME_MIN_BYTES = 64 * 1024 * 1024
+_STALE_PARTIAL_ERRORS = frozenset({"PreconditionFailed", "InvalidRange"})
+# Downloads carry the object's LastModified as mtime; FAT-family drives store it with 2 s granularity.
+MTIME_TOLERANCE_SECONDS = 2.0
+# botocore's iter_chunks() defaults to 1 KiB; copy in large reads and check interrupts/progress per byte budget.
+DEFAULT_READ_SIZE = 8 * 1024 * 1024
+PROGRESS_CHECK_BYTES = 8 * 1024 * 1024
+# Files at least this large reserve their full Size up front so HDD/exFAT targets get contiguous extents.
+PREALLOCATE_MIN_BYTES = 1024 * 1024
+
+
 class SyncInterrupted(RuntimeError):
     """Raised when a sync is interrupted."""
 
 
+class DirectoryCache:
+    """Remembers directories already created so each is mkdir'ed once per run."""
+
+    def __init__(self):
+        self._created = set()
+
+    def ensure(self, directory: Path) -> None:
+        """Create directory (and parents) unless this cache already did."""
+        if directory in self._created:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        self._created.add(directory)
+
+
+def _parent_directory(obj: dict) -> str:
+    return obj["Key"].rpartition("/")[0]
+
+
+def _preallocate(handle, offset: int, size: Optional[int]) -> bool:
+    """Reserve the rest of a file of known size; False when unsupported or not worthwhile."""
+    if not hasattr(os, "posix_fallocate") or size is None or size - offset < PREALLOCATE_MIN_BYTES:
+        return False
+    try:
+        os.posix_fallocate(handle.fileno(), offset, size - offset)
+    except OSError:
+        return False
+    return True
+
+
+def already_downloaded(destination: Path, obj: dict, linked: Optional[LinkedFiles] = None) -> bool:
+    """True when a previous run already renamed a complete copy of this version of obj into place.
+
+    Size and LastModified (kept as the file's mtime) must both match, so an object that was
+    overwritten in S3 with the same size is downloaded again. Files in linked, which
+    duplicate_tree replaced with hard links, carry the kept file's mtime and only need to
+    still be that link at the listed size.
+    """
+    try:
+        stat = destination.stat()
+    except OSError:
+        return False
+    if stat.st_size != obj.get("Size"):
+        return False
+    last_modified = obj.get("LastModified")
+    if last_modified is None or abs(stat.st_mtime - last_modified.timestamp()) < MTIME_TOLERANCE_SECONDS:
+        return True
+    return bool(linked) and is_linked_copy(destination, obj, linked)
+
+
 @dataclass
 class _ProgressState:
     start_time: float
     files_done: int = 0
     bytes_done: int = 0
+    files_skipped: int = 0
+    tracker: ProgressTracker = field(default_factory=lambda: ProgressTracker(update_interval=float("inf")))
+
+
+@dataclass(frozen=True)
+class DownloadOptions:
+    """How one object is written: durability, read size, directory cache and its listed metadata."""
+
+    durability: Optional[DurableWriter] = None
+    read_size: int = DEFAULT_READ_SIZE
+    directories: Optional[DirectoryCache] = None
+    etag: Optional[str] = None
+    size: Optional[int] = None
+    last_modified: Optional[datetime] = None
+
+    def for_listing(self, obj: dict) -> DownloadOptions:
+        """These options with etag, size and last_modified taken from a list_objects_v2 entry."""
+        return replace(self, etag=obj.get("ETag"), size=obj.get("Size"), last_modified=obj.get("LastModified"))
 
 
 def _list_objects(s3_client, bucket: str) -> Iterable[dict]:
-    """Yield objects in a bucket, failing fast on malformed responses."""
+    """Yield objects in a bucket, failing fast on malformed responses.
+
+    Each listing page is regrouped by parent directory so consecutive writes stay in one directory.
+    """
     paginator = s3_client.get_paginator("list_objects_v2")
     for page in paginator.paginate(Bucket=bucket):
         contents = page.get("Contents")
@@ -35,11 +124,122 @@ def _list_objects(s3_client, bucket: str) -> Iterable[dict]:
             if key_count not in (None, 0):
                 raise RuntimeError("list_objects_v2 returned KeyCount without Contents payload")
             continue
-        for obj in contents:
-            key = obj["Key"]
-            if key.endswith("/"):
-                continue
-            yield obj
+        yield from sorted((obj for obj in contents if not obj["Key"].endswith("/")), key=_parent_directory)
+
+
+def _iter_body(body, read_size: int) -> Iterator:
+    """Yield the body in read_size pieces, reusing one buffer when the body supports readinto."""
+    readinto = getattr(body, "readinto", None)
+    if readinto is not None:
+        buffer = bytearray(read_size)
+        view = memoryview(buffer)
+        while count := readinto(buffer):
+            yield view[:count]
+        return
+    read = getattr(body, "read", None)
+    if read is not None:
+        while chunk := read(read_size):
+            yield chunk
+        return
+    yield from body.iter_chunks(read_size)
+
+
+def copy_stream(
+    body,
+    handle,
+    interrupted_check: Callable[[], bool],
+    on_progress: Optional[Callable[[int], None]] = None,
+    *,
+    read_size: int = DEFAULT_READ_SIZE,
+) -> int:
+    """Copy body into handle; interrupt and progress checks run once per PROGRESS_CHECK_BYTES copied."""
+    copied = 0
+    next_check = 0
+    for chunk in _iter_body(body, read_size):
+        if copied >= next_check:
+            if interrupted_check():
+                raise SyncInterrupted()
+            if on_progress is not None:
+                on_progress(copied)
+            next_check = copied + PROGRESS_CHECK_BYTES
+        handle.write(chunk)
+        copied += len(chunk)
+    return copied
+
+
+def _partial_offset(temp_path: Path, marker_path: Path, etag: Optional[str], size: Optional[int]) -> int:
+    """Return the reusable length of a kept partial download of etag, discarding anything stale."""
+    try:
+        saved_etag = marker_path.read_text(encoding="utf-8")
+        offset = temp_path.stat().st_size
+    except OSError:
+        saved_etag, offset = None, 0
+    # A full-size partial was preallocated and never truncated (hard crash), so its length proves nothing.
+    if etag and saved_etag == etag and offset and (size is None or offset < size):
+        return offset
+    temp_path.unlink(missing_ok=True)
+    marker_path.unlink(missing_ok=True)
+    return 0
+
+
+def _open_object_stream(s3_client, bucket: str, key: str, etag: Optional[str], offset: int):
+    """GET the object, or only bytes offset- while its ETag still matches; return (response, offset)."""
+    try:
+        if offset:
+            try:
+                response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={offset}-", IfMatch=etag)
+            except ClientError as exc:
+                if exc.response.get("Error", {}).get("Code") not in _STALE_PARTIAL_ERRORS:
+                    raise
+            else:
+                if response.get("ETag", etag) == etag:
+                    return response, offset
+            print(f"\n  ⚠ {bucket}/{key} changed since it was partially downloaded; restarting")
+        try:
+            return s3_client.get_object(Bucket=bucket, Key=key), 0
+        except TypeError:
+            return s3_client.get_object(bucket, key), 0
+    except ClientError as exc:
+        raise RuntimeError(f"Failed to fetch {bucket}/{key}: {exc}") from exc
+
+
+def _open_for_resume(s3_client, bucket: str, key: str, temp_path: Path, marker_path: Path, options: DownloadOptions):
+    """Open the object stream, resuming a kept partial when possible; return (response, offset).
+
+    The ETag sidecar is dropped when a partial cannot be reused and written when a fresh
+    download is large enough to be worth resuming later.
+    """
+    requested_offset = _partial_offset(temp_path, marker_path, options.etag, options.size)
+    response, offset = _open_object_stream(s3_client, bucket, key, options.etag, requested_offset)
+    if offset:
+        print(f"\n  ↻ Resuming {bucket}/{key} from {format_bytes(offset)}")
+    elif requested_offset:
+        marker_path.unlink(missing_ok=True)
+    if not offset and options.etag and response.get("ContentLength", 0) >= RESUME_MIN_BYTES:
+        marker_path.write_text(options.etag, encoding="utf-8")
+    return response, offset
+
+
+def _write_temp(
+    temp_path: Path,
+    body,
+    offset: int,
+    options: DownloadOptions,
+    interrupted_check: Callable[[], bool],
+    on_progress: Callable[[int], None],
+) -> int:
+    """Copy body into temp_path from offset, preallocating the listed size; return bytes copied."""
+    with temp_path.open("r+b" if offset else "wb") as handle:
+        handle.seek(offset)
+        preallocated = _preallocate(handle, offset, options.size)
+        try:
+            copied = copy_stream(body, handle, interrupted_check, on_progress, read_size=options.read_size)
+        finally:
+            if preallocated:
+                handle.truncate()
+        if options.durability is not None:
+            options.durability.before_close(handle)
+    return copied
 
 
 def _download_object(
@@ -49,34 +249,39 @@ def _download_object(
     destination: Path,
     interrupted_check: Callable[[], bool],
     progress_state: _ProgressState,
-    progress_tracker: ProgressTracker,
+    options: Optional[DownloadOptions] = None,
 ):
-    """Stream an object to disk while checking for interrupts."""
-    destination.parent.mkdir(parents=True, exist_ok=True)
-    try:
-        try:
-            response = s3_client.get_object(Bucket=bucket, Key=key)
-        except TypeError:
-            response = s3_client.get_object(bucket, key)
-    except ClientError as exc:
-        raise RuntimeError(f"Failed to fetch {bucket}/{key}: {exc}") from exc
+    """Stream an object to a temp file, then atomically rename it over destination.
 
-    body = response["Body"]
-    bytes_downloaded = 0
-    with destination.open("wb") as handle:
-        for chunk in body.iter_chunks():
-            if interrupted_check():
-                raise SyncInterrupted()
-            if not chunk:
-                continue
-            handle.write(chunk)
-            bytes_downloaded += len(chunk)
-            if progress_tracker.should_update():
-                _display_progress(
-                    progress_state.start_time,
-                    progress_state.files_done,
-                    progress_state.bytes_done + bytes_downloaded,
-                )
+    Objects of at least RESUME_MIN_BYTES keep their temp file and an ETag sidecar when
+    interrupted; the next attempt requests only the missing byte range. When the listed
+    size is known, large files are preallocated before the first write.
+    """
+    options = options or DownloadOptions()
+    if options.directories is not None:
+        options.directories.ensure(destination.parent)
+    else:
+        destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = destination.with_name(destination.name + TEMP_SUFFIX)
+    marker_path = destination.with_name(destination.name + PARTIAL_ETAG_SUFFIX)
+    response, offset = _open_for_resume(s3_client, bucket, key, temp_path, marker_path, options)
+
+    def _on_progress(copied: int):
+        if progress_state.tracker.should_update():
+            _display_progress(progress_state.start_time, progress_state.files_done, progress_state.bytes_done + copied)
+
+    try:
+        bytes_downloaded = _write_temp(temp_path, response["Body"], offset, options, interrupted_check, _on_progress)
+        if options.last_modified is not None:
+            os.utime(temp_path, (options.last_modified.timestamp(), options.last_modified.timestamp()))
+        os.replace(temp_path, destination)
+    except BaseException:
+        if not marker_path.exists():
+            temp_path.unlink(missing_ok=True)
+        raise
+    marker_path.unlink(missing_ok=True)
+    if options.durability is not None:
+        options.durability.committed(destination, offset + bytes_downloaded)
 
     progress_state.files_done += 1
     progress_state.bytes_done += bytes_downloaded
@@ -86,10 +291,19 @@ def _download_object(
 class BucketSyncer:  # pylint: disable=too-few-public-methods
     """Handles syncing a bucket using boto3 streaming downloads."""
 
-    def __init__(self, s3, state: MigrationStateV2, base_path: Path):
+    def __init__(
+        self,
+        s3,
+        state: MigrationStateV2,
+        base_path: Path,
+        durability: Optional[DurabilityPolicy] = None,
+        read_size: int = DEFAULT_READ_SIZE,
+    ):
         self.s3 = s3
         self.state = state
         self.base_path = base_path
+        self.durability = DurableWriter(durability)
+        self.options = DownloadOptions(durability=self.durability, read_size=read_size, directories=DirectoryCache())
         self.interrupted = False
 
     def sync_bucket(self, bucket: str):
@@ -99,8 +313,8 @@ class BucketSyncer:  # pylint: disable=too-few-public-methods
         print(f"  Syncing s3://{bucket} -> {local_path}/")
         print()
 
-        progress_state = _ProgressState(start_time=time.time())
-        tracker = ProgressTracker(update_interval=1.0)
+        progress_state = _ProgressState(start_time=time.time(), tracker=ProgressTracker(update_interval=1.0))
+        linked = load_linked_files(self.state, local_path)
 
         interrupted = False
         try:
@@ -110,6 +324,9 @@ class BucketSyncer:  # pylint: disable=too-few-public-methods
                     break
                 key = obj["Key"]
                 dest = local_path / key
+                if already_downloaded(dest, obj, linked):
+                    progress_state.files_skipped += 1
+                    continue
                 _download_object(
                     self.s3,
                     bucket,
@@ -117,13 +334,17 @@ class BucketSyncer:  # pylint: disable=too-few-public-methods
                     dest,
                     interrupted_check=lambda: self.interrupted,
                     progress_state=progress_state,
-                    progress_tracker=tracker,
+                    options=self.options.for_listing(obj),
                 )
             if not interrupted:
                 _display_progress(progress_state.start_time, progress_state.files_done, progress_state.bytes_done)
                 _print_sync_summary(progress_state.start_time, progress_state.files_done, progress_state.bytes_done)
         except ClientError as exc:
             raise RuntimeError(f"Sync failed for bucket {bucket}: {exc}") from exc
+        finally:
+            self.durability.flush()
+        if progress_state.files_skipped:
+            print(f"  Skipped {progress_state.files_skipped:,} file(s) already downloaded by a previous run")
         if interrupted:
             print("\n✋ Sync interrupted")
 
@@ -0,0 +1,84 @@
+"""fsync policy for downloads written by migration_sync."""
+
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+DURABILITY_NONE = "none"
+DURABILITY_FILE = "file"
+DURABILITY_BATCH = "batch"
+DURABILITY_MODES = (DURABILITY_NONE, DURABILITY_FILE, DURABILITY_BATCH)
+
+
+@dataclass(frozen=True)
+class DurabilityPolicy:
+    """When downloaded files and their directory entries are fsynced."""
+
+    mode: str = DURABILITY_BATCH
+    batch_files: int = 1000
+    batch_bytes: int = 1024 * 1024 * 1024
+
+    def __post_init__(self):
+        if self.mode not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode {self.mode!r}; expected one of {', '.join(DURABILITY_MODES)}")
+        if self.batch_files < 1 or self.batch_bytes < 1:
+            raise ValueError("Durability batch limits must be positive")
+
+
+def _fsync_path(path: Path) -> None:
+    """fsync a file or (on POSIX) a directory by path."""
+    if path.is_dir() and not hasattr(os, "O_DIRECTORY"):
+        return  # Windows cannot open directories for fsync
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class DurableWriter:
+    """Applies a DurabilityPolicy to downloads; shared safely between transfer threads."""
+
+    def __init__(self, policy: Optional[DurabilityPolicy] = None):
+        self.policy = policy or DurabilityPolicy()
+        self._lock = threading.Lock()
+        self._pending: List[Path] = []
+        self._pending_bytes = 0
+        self.flushes = 0
+
+    def before_close(self, handle) -> None:
+        """fsync the temp file's data when the policy syncs every file."""
+        if self.policy.mode == DURABILITY_FILE:
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def committed(self, path: Path, size: int) -> None:
+        """Record a file renamed into place, syncing now or when the batch fills."""
+        if self.policy.mode == DURABILITY_FILE:
+            _fsync_path(path.parent)
+        elif self.policy.mode == DURABILITY_BATCH:
+            with self._lock:
+                self._pending.append(path)
+                self._pending_bytes += size
+                if len(self._pending) >= self.policy.batch_files or self._pending_bytes >= self.policy.batch_bytes:
+                    self._flush_locked()
+
+    def flush(self) -> None:
+        """Sync every pending file and directory entry."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        for path in self._pending:
+            _fsync_path(path)
+        for directory in dict.fromkeys(path.parent for path in self._pending):
+            _fsync_path(directory)
+        self._pending = []
+        self._pending_bytes = 0
+        self.flushes += 1
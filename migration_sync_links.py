@@ -0,0 +1,51 @@
+"""Files that ``duplicate_tree --link hardlink`` replaced with links, as seen by migration_sync.
+
+A hard link shares the kept file's inode, so the duplicate takes on the kept file's mtime
+and no longer matches its own object's LastModified. Without this check a rescan that
+resets ``sync_complete`` would download every hard-linked duplicate again and the atomic
+rename would swap each link for a fresh copy, undoing the dedupe.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict
+
+from migration_state_v2 import MigrationStateV2
+
+# Linked path -> (kept target, size), as journaled in the duplicate_tree_links table.
+LinkedFiles = Dict[str, tuple[str, int]]
+
+
+def load_linked_files(state: MigrationStateV2, directory: Path) -> LinkedFiles:
+    """Return the journaled links below directory; empty when nothing was ever linked."""
+    prefix = os.path.join(os.path.abspath(directory), "")
+    upper = prefix[:-1] + chr(ord(os.sep) + 1)
+    with state.db_conn.get_connection() as conn:
+        try:
+            rows = conn.execute(
+                "SELECT path, target, size FROM duplicate_tree_links WHERE path >= ? AND path < ?", (prefix, upper)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # duplicate_tree creates the table on its first --link run.
+            return {}
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def is_linked_copy(destination: Path, obj: dict, linked: LinkedFiles) -> bool:
+    """True when destination is still a hard link to its journaled target and has obj's size."""
+    entry = linked.get(os.path.abspath(destination))
+    if entry is None:
+        return False
+    target, size = entry
+    try:
+        destination_stat = destination.stat()
+        target_stat = os.stat(target)
+    except OSError:
+        return False
+    return size == destination_stat.st_size == obj.get("Size") and os.path.samestat(destination_stat, target_stat)
+
+
+__all__ = ["LinkedFiles", "is_linked_copy", "load_linked_files"]
@@ -0,0 +1,282 @@
+"""Cross-bucket transfer scheduling: one shared download pool for every bucket.
+
+Objects from all pending buckets are admitted round-robin into a single thread
+pool, bounded by a bytes-in-flight budget. A bucket is marked ``sync_complete``
+the moment its last object is written, so verification can start on it while
+other buckets are still downloading.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+from botocore.exceptions import ClientError
+
+from migration_state_v2 import MigrationStateV2
+from migration_sync import (
+    DEFAULT_READ_SIZE,
+    DirectoryCache,
+    DownloadOptions,
+    SyncInterrupted,
+    _display_progress,
+    _download_object,
+    _list_objects,
+    _print_sync_summary,
+    _ProgressState,
+    already_downloaded,
+)
+from migration_sync_durability import DurabilityPolicy, DurableWriter
+from migration_sync_links import LinkedFiles, load_linked_files
+from migration_utils import ProgressTracker
+
+DEFAULT_TRANSFER_WORKERS = 8
+DEFAULT_MAX_BYTES_IN_FLIGHT = 1024 * 1024 * 1024
+
+
+@dataclass
+class _BucketCursor:
+    """Listing position and outstanding work for one bucket."""
+
+    bucket: str
+    objects: Iterator[dict]
+    linked: LinkedFiles = field(default_factory=dict)
+    head: Optional[dict] = None
+    exhausted: bool = False
+    in_flight: int = 0
+    files_done: int = 0
+    bytes_done: int = 0
+
+    def peek(self) -> Optional[dict]:
+        """Return the next object to admit without consuming it"""
+        if self.head is None and not self.exhausted:
+            self.head = next(self.objects, None)
+            self.exhausted = self.head is None
+        return self.head
+
+    @property
+    def finished(self) -> bool:
+        """True once every listed object has been written"""
+        return self.exhausted and self.in_flight == 0
+
+
+@dataclass
+class TransferStats:
+    """Aggregate counters for one scheduler run."""
+
+    start_time: float
+    files_done: int = 0
+    bytes_done: int = 0
+    bytes_in_flight: int = 0
+    peak_bytes_in_flight: int = 0
+    completed_buckets: List[str] = field(default_factory=list)
+
+
+class GlobalTransferScheduler:  # pylint: disable=too-many-instance-attributes
+    """Feeds downloads from several buckets into one shared worker pool"""
+
+    def __init__(
+        self,
+        s3,
+        state: MigrationStateV2,
+        base_path: Path,
+        *,
+        workers: int = DEFAULT_TRANSFER_WORKERS,
+        max_bytes_in_flight: int = DEFAULT_MAX_BYTES_IN_FLIGHT,
+        durability: Optional[DurabilityPolicy] = None,
+        read_size: int = DEFAULT_READ_SIZE,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if max_bytes_in_flight < 1:
+            raise ValueError("max_bytes_in_flight must be positive")
+        self.s3 = s3
+        self.state = state
+        self.base_path = base_path
+        self.workers = workers
+        self.max_bytes_in_flight = max_bytes_in_flight
+        self.durability = DurableWriter(durability)
+        self.options = DownloadOptions(durability=self.durability, read_size=read_size, directories=DirectoryCache())
+        self.interrupted = False
+        self.failed_bucket: Optional[str] = None
+        self.stats: Optional[TransferStats] = None
+
+    def sync_buckets(self, buckets: Sequence[str], on_bucket_synced: Optional[Callable[[str], None]] = None) -> List[str]:
+        """Download every object of buckets; return buckets in the order they finished syncing.
+
+        Admission is round-robin across buckets, one object per turn. An object that
+        does not fit the remaining bytes budget blocks admission until enough
+        transfers finish, so large objects are never starved by a stream of small
+        ones; an object larger than the whole budget runs once the pool is idle.
+        """
+        self.stats = TransferStats(start_time=time.time())
+        self.failed_bucket = None
+        print(f"  Syncing {len(buckets)} bucket(s) through {self.workers} shared worker(s)")
+        print()
+        cursors: Deque[_BucketCursor] = deque()
+        for bucket in buckets:
+            (self.base_path / bucket).mkdir(parents=True, exist_ok=True)
+            linked = load_linked_files(self.state, self.base_path / bucket)
+            cursors.append(_BucketCursor(bucket, _list_objects(self.s3, bucket), linked))
+        futures: Dict[Future, tuple] = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="transfer") as pool:
+            try:
+                self._run(pool, cursors, futures, on_bucket_synced)
+            except ClientError as exc:
+                raise RuntimeError(f"Sync failed: {exc}") from exc
+            finally:
+                self.interrupted = self.interrupted or bool(futures)
+                wait(futures)
+                self.durability.flush()
+        if self.interrupted:
+            print("\n✋ Sync interrupted")
+        else:
+            _display_progress(self.stats.start_time, self.stats.files_done, self.stats.bytes_done)
+            _print_sync_summary(self.stats.start_time, self.stats.files_done, self.stats.bytes_done)
+        return self.stats.completed_buckets
+
+    def _run(
+        self,
+        pool: ThreadPoolExecutor,
+        cursors: Deque[_BucketCursor],
+        futures: Dict[Future, tuple],
+        on_bucket_synced: Optional[Callable[[str], None]],
+    ):
+        """Admit, collect and complete buckets until every cursor is drained or the run is interrupted"""
+        tracker = ProgressTracker(update_interval=1.0)
+        while cursors or futures:
+            if not self.interrupted:
+                self._admit(pool, cursors, futures)
+            if not futures:
+                if self.interrupted:
+                    return
+                self._complete_idle_buckets(cursors, on_bucket_synced)
+                continue
+            self._collect_finished(futures)
+            self._complete_idle_buckets(cursors, on_bucket_synced)
+            if tracker.should_update():
+                _display_progress(self.stats.start_time, self.stats.files_done, self.stats.bytes_done)
+
+    def _collect_finished(self, futures: Dict[Future, tuple]):
+        """Wait up to a second for transfers and account for every one that finished"""
+        done, _ = wait(futures, timeout=1.0, return_when=FIRST_COMPLETED)
+        for future in done:
+            cursor, size = futures.pop(future)
+            self._finish(future, cursor, size)
+
+    def _admit(self, pool: ThreadPoolExecutor, cursors: Deque[_BucketCursor], futures: Dict[Future, tuple]):
+        """Submit objects round-robin until the pool or the bytes budget is full"""
+        skipped = 0
+        while cursors and len(futures) < self.workers and skipped < len(cursors):
+            cursor = cursors[0]
+            obj = cursor.peek()
+            if obj is None:
+                cursors.rotate(-1)
+                skipped += 1
+                continue
+            if futures and self.stats.bytes_in_flight + obj.get("Size", 0) > self.max_bytes_in_flight:
+                return
+            self._submit(pool, cursor, obj, futures)
+            cursors.rotate(-1)
+            skipped = 0
+
+    def _submit(self, pool: ThreadPoolExecutor, cursor: _BucketCursor, obj: dict, futures: Dict[Future, tuple]):
+        """Take obj off cursor, charge its size to the bytes budget and start its transfer"""
+        size = obj.get("Size", 0)
+        cursor.head = None
+        cursor.in_flight += 1
+        self.stats.bytes_in_flight += size
+        self.stats.peak_bytes_in_flight = max(self.stats.peak_bytes_in_flight, self.stats.bytes_in_flight)
+        futures[pool.submit(self._transfer, cursor, obj)] = (cursor, size)
+
+    def _transfer(self, cursor: _BucketCursor, obj: dict) -> int:
+        """Download one object unless a previous run already wrote it; runs on a pool thread"""
+        destination = self.base_path / cursor.bucket / obj["Key"]
+        if already_downloaded(destination, obj, cursor.linked):
+            return 0
+        return _download_object(
+            self.s3,
+            cursor.bucket,
+            obj["Key"],
+            destination,
+            interrupted_check=lambda: self.interrupted,
+            progress_state=_ProgressState(start_time=self.stats.start_time),
+            options=self.options.for_listing(obj),
+        )
+
+    def _finish(self, future: Future, cursor: _BucketCursor, size: int):
+        """Account for a finished transfer, stopping new admissions on failure"""
+        cursor.in_flight -= 1
+        self.stats.bytes_in_flight -= size
+        try:
+            written = future.result()
+        except SyncInterrupted:
+            self.interrupted = True
+            return
+        except BaseException:
+            self.interrupted = True
+            self.failed_bucket = cursor.bucket
+            raise
+        cursor.files_done += 1
+        cursor.bytes_done += written
+        self.stats.files_done += 1
+        self.stats.bytes_done += written
+
+    def _complete_idle_buckets(self, cursors: Deque[_BucketCursor], on_bucket_synced: Optional[Callable[[str], None]]):
+        """Mark buckets whose last object has been written as sync_complete"""
+        if self.interrupted:
+            return
+        finished = [c for c in cursors if c.peek() is None and c.finished]
+        if finished:
+            # Renamed files must be on disk before their bucket is recorded as synced.
+            self.durability.flush()
+        for cursor in finished:
+            cursors.remove(cursor)
+            self.state.mark_bucket_sync_complete(cursor.bucket)
+            self.stats.completed_buckets.append(cursor.bucket)
+            if on_bucket_synced is not None:
+                on_bucket_synced(cursor.bucket)
+
+
+class ScheduledSync:  # pylint: disable=too-few-public-methods
+    """Runs a GlobalTransferScheduler in the background and hands out buckets as they finish"""
+
+    _DONE = object()
+
+    def __init__(self, scheduler: GlobalTransferScheduler, buckets: Sequence[str]):
+        self.scheduler = scheduler
+        self.buckets = list(buckets)
+        self._ready: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="transfer-scheduler", daemon=True)
+
+    def _run(self):
+        try:
+            self.scheduler.sync_buckets(self.buckets, on_bucket_synced=self._ready.put)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self._ready.put(exc)
+        finally:
+            self._ready.put(self._DONE)
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield bucket names as soon as each finishes syncing; re-raise scheduler errors"""
+        self._thread.start()
+        item = None
+        try:
+            while True:
+                item = self._ready.get()
+                if item is self._DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if item is not self._DONE and not isinstance(item, Exception):
+                # The consumer stopped early; abort in-flight downloads before returning.
+                self.scheduler.interrupted = True
+            self._thread.join()
@@ -48,7 +48,7 @@ class BucketVerifier:  # pylint: disable=too-few-public-methods
         local_files = self.inventory_checker.scan_local_files(bucket, expected_files)
         expected_keys = set(expected_file_map.keys())
         local_keys = set(local_files.keys())
-        self.inventory_checker.check_inventory(expected_keys, local_keys)
+        self.inventory_checker.check_inventory(expected_keys, local_keys, bucket)
         print(f"  ✓ All {expected_files:,} files present (no missing or extra files)")
         print()
         verify_results = self.checksum_verifier.verify_files(local_files, expected_file_map, expected_files, expected_size)
@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 import os
+from functools import partial
 from importlib import import_module
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, List, Set, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
 
 _PACKAGE_PREFIX = f"{__package__}." if __package__ else ""
 _migration_utils = import_module(f"{_PACKAGE_PREFIX}migration_utils")
@@ -78,11 +79,18 @@ def _inventory_error_messages(missing_files: Set[str], extra_files: Set[str]) ->
     return errors
 
 
-def _validate_inventory(expected_keys: Set[str], local_keys: Set[str]) -> List[str]:
+def _validate_inventory(
+    expected_keys: Set[str], local_keys: Set[str], retained_lookup: Optional[Callable[[Set[str]], Set[str]]] = None
+) -> List[str]:
     print("  Checking file inventory...")
     missing_files, extra_files, ignored_count = _partition_inventory(expected_keys, local_keys)
     if ignored_count > 0:
         print(f"  ℹ Ignoring {ignored_count} system metadata file(s) (.DS_Store, Thumbs.db, etc.)")
+    if extra_files and retained_lookup is not None:
+        retained = retained_lookup(extra_files)
+        if retained:
+            extra_files = extra_files - retained
+            print(f"  ℹ Keeping {len(retained):,} local file(s) whose S3 objects were deleted since the first scan")
     errors = _inventory_error_messages(missing_files, extra_files)
     if errors:
         print("  ✗ File inventory mismatch:")
@@ -109,9 +117,13 @@ class FileInventoryChecker:  # pylint: disable=too-few-public-methods
         """Scan the on-disk directory for the bucket and return discovered files."""
         return _scan_local_directory(self.base_path, bucket, expected_files)
 
-    def check_inventory(self, expected_keys: Set[str], local_keys: Set[str]) -> List[str]:
-        """Compare inventory results and raise when they differ."""
-        return _validate_inventory(expected_keys, local_keys)
+    def check_inventory(self, expected_keys: Set[str], local_keys: Set[str], bucket: Optional[str] = None) -> List[str]:
+        """Compare inventory results and raise when they differ.
+
+        With bucket given, extra local files tombstoned by a rescan are not errors.
+        """
+        retained_lookup = partial(self.state.get_tombstoned_keys, bucket) if bucket is not None else None
+        return _validate_inventory(expected_keys, local_keys, retained_lookup)
 
 
 __all__ = ["FileInventoryChecker"]
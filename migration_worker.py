@@ -0,0 +1,148 @@
+"""Worker mode: several processes share one state DB and claim buckets through leases.
+
+Each worker leases one bucket at a time, keeps the lease alive from a heartbeat
+thread and runs the regular ``BucketMigrator.process_bucket`` pipeline on it.
+A worker that dies stops heartbeating; once its lease expires another worker
+takes the bucket over. Deletion still needs the interactive confirmation, so
+workers stop after verification and leave step 3 to ``python migrate_v2.py``.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional
+
+from migration_orchestrator import BucketMigrator, handle_drive_error, handle_migration_error
+from migration_state_leases import BucketLease
+from migration_state_v2 import MigrationStateV2, Phase
+from migration_sync import SyncInterrupted
+
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_POLL_SECONDS = 30.0
+# Workers only sync and verify, which starts once every Glacier restore is done.
+WORKER_PHASES = frozenset({Phase.SYNCING, Phase.VERIFYING, Phase.DELETING, Phase.COMPLETE})
+
+
+def default_worker_id() -> str:
+    """Return an id that is unique across hosts sharing the state DB"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseHeartbeat:
+    """Renews one bucket lease from a daemon thread until stopped"""
+
+    def __init__(self, state: MigrationStateV2, lease: BucketLease, lease_seconds: float, on_lost: Callable[[], None]):
+        self.state = state
+        self.lease = lease
+        self.lease_seconds = lease_seconds
+        self.interval = lease_seconds / 3
+        self.on_lost = on_lost
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{lease.bucket}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                held = self.state.renew_bucket_lease(self.lease.bucket, self.lease.worker_id, self.lease_seconds)
+            except sqlite3.OperationalError as exc:
+                print(f"  ⚠ Lease heartbeat for {self.lease.bucket} failed: {exc}")
+                continue
+            if not held:
+                self.lost = True
+                self.on_lost()
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+class BucketLeaseWorker:  # pylint: disable=too-many-instance-attributes
+    """Claims buckets through DB leases and runs BucketMigrator.process_bucket on each"""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        state: MigrationStateV2,
+        bucket_migrator: BucketMigrator,
+        drive_checker=None,
+        *,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        poll_seconds: float = DEFAULT_POLL_SECONDS,
+    ):
+        self.state = state
+        self.bucket_migrator = bucket_migrator
+        self.drive_checker = drive_checker
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.completed: List[str] = []
+        self.interrupted = False
+
+    def run(self) -> List[str]:
+        """Process leased buckets until none are left; return the buckets this worker finished"""
+        print("=" * 70)
+        print(f"WORKER {self.worker_id}: MIGRATING LEASED BUCKETS (Sync → Verify)")
+        print("=" * 70)
+        print()
+        while not self.interrupted:
+            lease = self.state.claim_bucket_lease(self.worker_id, self.lease_seconds)
+            if lease is not None:
+                self.process_lease(lease)
+                continue
+            leased = self.state.count_leased_buckets()
+            if not leased:
+                break
+            print(f"Waiting for {leased} bucket(s) leased by other workers...")
+            self._wait(self.poll_seconds)
+        print("=" * 70)
+        print(f"WORKER {self.worker_id} DONE: {len(self.completed)} bucket(s) synced and verified")
+        print("=" * 70)
+        return self.completed
+
+    def process_lease(self, lease: BucketLease):
+        """Run the bucket pipeline while a heartbeat keeps the lease alive"""
+        bucket = lease.bucket
+        if lease.claim_count > 1:
+            print(f"↻ Taking over expired lease on {bucket} (claim #{lease.claim_count})")
+        if self.drive_checker is not None:
+            self.drive_checker.check_available()
+        print("╔" + "=" * 68 + "╗")
+        print(f"║ LEASED BUCKET: {bucket.ljust(52)}║")
+        print("╚" + "=" * 68 + "╝")
+        print()
+        heartbeat = LeaseHeartbeat(self.state, lease, self.lease_seconds, self._lease_lost)
+        try:
+            with heartbeat:
+                self.bucket_migrator.process_bucket(bucket)
+        except (FileNotFoundError, PermissionError, OSError) as e:
+            handle_drive_error(e)
+        except (RuntimeError, ValueError) as e:
+            if not (heartbeat.lost and isinstance(e, SyncInterrupted)):
+                handle_migration_error(bucket, e)
+        finally:
+            self.state.release_bucket_lease(bucket, self.worker_id)
+        if heartbeat.lost:
+            self.bucket_migrator.interrupted = False
+            self.bucket_migrator.syncer.interrupted = False
+            print(f"✗ Lost lease on {bucket}; another worker took it over")
+            print()
+            return
+        self.completed.append(bucket)
+        print(f"✓ Worker finished: {bucket}")
+        print()
+
+    def _lease_lost(self):
+        """Stop the current bucket without marking it complete"""
+        self.bucket_migrator.interrupted = True
+        self.bucket_migrator.syncer.interrupted = True
+
+    def _wait(self, seconds: float):
+        time.sleep(seconds)
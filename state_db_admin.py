@@ -4,146 +4,153 @@
 
 from __future__ import annotations
 
-import os
+import argparse
 import sqlite3
-from datetime import datetime, timezone
+import sys
 from pathlib import Path
-from typing import Iterator, Union
-
-from migration_state_v2 import MigrationStateV2
-
-Pathish = Union[str, Path]
-BATCH_INSERT_SIZE = 1000
-
-
-def recreate_state_db(db_path: Pathish) -> Path:
-    """Delete and recreate the migrate_v2 state database schema."""
-
+from typing import Optional
+
+from cost_toolkit.common.format_utils import format_bytes
+from migration_state_compact_convert import (
+    DEFAULT_COMPACT_BATCH_SIZE,
+    CompactResult,
+    compact_files_table,
+)
+from migration_state_maintenance import (
+    add_maintenance_arguments,
+    run_maintenance_command,
+    run_state_db_maintenance,
+)
+from migration_state_v2 import DatabaseConnection
+from state_db_reseed import (
+    BATCH_INSERT_SIZE,
+    DEFAULT_RESEED_WORKERS,
+    RESEED_MARKER_PREFIX,
+    Pathish,
+    ReseedOptions,
+    recreate_state_db,
+    reseed_state_db_from_local_drive,
+)
+
+
+def compact_state_db(
+    db_path: Pathish,
+    *,
+    batch_size: int = DEFAULT_COMPACT_BATCH_SIZE,
+    vacuum: bool = False,
+) -> CompactResult:
+    """Convert a state DB to the compact files layout; safe to re-run or resume."""
     path = Path(db_path).expanduser()
-    if not path.is_absolute():
-        path = path.resolve()
-    path.parent.mkdir(parents=True, exist_ok=True)
-    if path.exists():
-        path.unlink()
-    # Instantiating MigrationStateV2 runs the schema bootstrap logic.
-    MigrationStateV2(str(path))
-    return path
-
-
-def _bucket_dirs(base: Path) -> Iterator[tuple[str, Path]]:
-    """Yield bucket name and directory path pairs from base path."""
-    for child in sorted(base.iterdir()):
-        if not child.is_dir():
-            continue
-        yield child.name, child
-
-
-def _iter_files(bucket_dir: Path) -> Iterator[Path]:
-    """Recursively yield all file paths within a bucket directory."""
-    for root, _, files in os.walk(bucket_dir):
-        root_path = Path(root)
-        for name in files:
-            yield root_path / name
-
-
-def _build_file_row(
-    bucket_name: str,
-    file_path: Path,
-    bucket_dir: Path,
-    created_at: str,
-    default_state: str,
-) -> tuple | None:
-    """Build a database row tuple for a single file, or None if file is inaccessible.
-
-    Args:
-        bucket_name: Name of the S3 bucket
-        file_path: Path to the local file
-        bucket_dir: Directory containing the bucket files
-        created_at: ISO timestamp for record creation
-        default_state: Default state value for the file record
-
-    Returns:
-        Tuple of file metadata for database insertion, or None if file cannot be accessed.
-
-    Note:
-        Returns None for inaccessible files to allow batch processing to continue.
-        Callers should handle None values appropriately.
-    """
-    try:
-        stat = file_path.stat()
-    except OSError:
-        # File may have been deleted or permissions changed during scan
-        return None
-    key = file_path.relative_to(bucket_dir).as_posix()
-    last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat()
-    return (
-        bucket_name,
-        key,
-        stat.st_size,
-        None,
-        "STANDARD",
-        last_modified,
-        str(file_path),
-        None,
-        default_state,
-        None,
-        None,
-        None,
-        created_at,
-        last_modified,
+    if not path.exists():
+        raise FileNotFoundError(f"State DB does not exist: {path}")
+    # Opening through DatabaseConnection brings the rest of the schema up to date first.
+    DatabaseConnection(str(path))
+
+    def _progress(rows: int) -> None:
+        print(f"\r  Copied {rows:,} rows", end="", flush=True)
+
+    result = compact_files_table(str(path), batch_size=batch_size, progress=_progress)
+    if result.batches:
+        print()
+    if vacuum:
+        with sqlite3.connect(str(path)) as conn:
+            conn.execute("VACUUM")
+    return result
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Maintain the migrate_v2 state database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compact = subparsers.add_parser("compact", help="Convert the files table to the compact layout (online)")
+    compact.add_argument("--db-path", help="Path to the state DB (default: config.STATE_DB_PATH)")
+    compact.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_COMPACT_BATCH_SIZE,
+        help="Rows copied per transaction (default: %(default)s)",
     )
+    compact.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to return freed pages to the OS")
+    reseed = subparsers.add_parser("reseed", help="Rebuild the state DB from the files on the local drive")
+    reseed.add_argument("--db-path", help="Path to the state DB (default: config.STATE_DB_PATH)")
+    reseed.add_argument("--base-path", help="Local drive root holding one directory per bucket (default: config.LOCAL_BASE_PATH)")
+    reseed.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_RESEED_WORKERS,
+        help="Threads scanning directories concurrently (default: %(default)s)",
+    )
+    reseed.add_argument("--hash", action="store_true", help="Fill in MD5 (etag) and SHA-256 (local_checksum) for every file")
+    reseed.add_argument("--hash-workers", type=int, help="Threads hashing files (default: CPU count)")
+    reseed.add_argument("--resume", action="store_true", help="Keep the existing DB and skip buckets a previous reseed finished")
+    reseed.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_INSERT_SIZE,
+        help="Rows written per transaction (default: %(default)s)",
+    )
+    maintain = subparsers.add_parser(
+        "maintain",
+        help="Check integrity, back up, refresh planner statistics and reclaim free pages",
+    )
+    add_maintenance_arguments(maintain)
+    return parser
+
+
+def _run_reseed(args: argparse.Namespace, db_path: str) -> int:
+    base_path = args.base_path
+    if base_path is None:
+        import config  # pylint: disable=import-outside-toplevel
+
+        base_path = config.LOCAL_BASE_PATH
+    options = ReseedOptions(
+        workers=args.workers,
+        hash_files=args.hash,
+        hash_workers=args.hash_workers,
+        resume=args.resume,
+        batch_size=args.batch_size,
+    )
+    db_file, file_count, total_bytes = reseed_state_db_from_local_drive(base_path, db_path, options)
+    print(f"✓ Seeded {db_file} with {file_count:,} files ({format_bytes(total_bytes)})")
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """CLI entry point."""
+    args = _build_parser().parse_args(argv)
+    db_path = args.db_path
+    if db_path is None:
+        import config  # pylint: disable=import-outside-toplevel
+
+        db_path = config.STATE_DB_PATH
+    if args.command == "reseed":
+        return _run_reseed(args, db_path)
+    if args.command == "maintain":
+        return run_maintenance_command(args, db_path)
+    size_before = Path(db_path).expanduser().stat().st_size if Path(db_path).expanduser().exists() else 0
+    result = compact_state_db(db_path, batch_size=args.batch_size, vacuum=args.vacuum)
+    if result.already_compact:
+        print(f"{db_path} already uses the compact layout")
+        return 0
+    size_after = Path(db_path).expanduser().stat().st_size
+    print(
+        f"✓ Compacted {result.rows_copied:,} rows in {result.batches:,} batches "
+        f"({result.pending_replayed:,} concurrent changes replayed)"
+    )
+    print(f"  DB size: {format_bytes(size_before)} → {format_bytes(size_after)}")
+    return 0
 
 
-def _insert_file_rows(
-    conn: sqlite3.Connection,
-    rows: list[tuple],
-    insert_sql: str,
-):
-    """Insert accumulated rows and commit to database."""
-    if rows:
-        conn.executemany(insert_sql, rows)
-        conn.commit()
+__all__ = [
+    "BATCH_INSERT_SIZE",
+    "DEFAULT_RESEED_WORKERS",
+    "RESEED_MARKER_PREFIX",
+    "ReseedOptions",
+    "compact_state_db",
+    "recreate_state_db",
+    "reseed_state_db_from_local_drive",
+    "run_state_db_maintenance",
+]
 
 
-def reseed_state_db_from_local_drive(
-    base_path: Pathish,
-    db_path: Pathish,
-    *,
-    default_state: str = "synced",
-) -> tuple[Path, int, int]:
-    """Rebuild the migrate_v2 database by scanning the local drive layout."""
-    base = Path(base_path).expanduser().resolve()
-    if not base.exists():
-        raise FileNotFoundError(f"Base path does not exist: {base}")
-    db_file = recreate_state_db(db_path)
-    created_at = datetime.now(timezone.utc).isoformat()
-
-    insert_sql = """
-        INSERT INTO files (
-            bucket, key, size, etag, storage_class, last_modified,
-            local_path, local_checksum, state, error_message,
-            glacier_restore_requested_at, glacier_restored_at,
-            created_at, updated_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """
-    total_files = 0
-    total_bytes = 0
-    rows: list[tuple] = []
-
-    with sqlite3.connect(str(db_file)) as conn:
-        for bucket_name, bucket_dir in _bucket_dirs(base):
-            for file_path in _iter_files(bucket_dir):
-                row = _build_file_row(bucket_name, file_path, bucket_dir, created_at, default_state)
-                if row is None:
-                    continue
-                rows.append(row)
-                total_files += 1
-                total_bytes += row[2]
-                if len(rows) >= BATCH_INSERT_SIZE:
-                    _insert_file_rows(conn, rows, insert_sql)
-                    rows.clear()
-        _insert_file_rows(conn, rows, insert_sql)
-    return db_file, total_files, total_bytes
-
-
-__all__ = ["recreate_state_db", "reseed_state_db_from_local_drive"]
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+"""Rebuild the migrate_v2 state database from the files already on the local drive.
+
+Each top-level directory under the base path is one bucket. Directory trees are
+scanned on a thread pool, rows are committed in batches, finished buckets are
+recorded so an interrupted run can resume, and MD5/SHA-256 can be filled in after.
+"""
+
+# ruff: noqa: TRY003 - library emits contextual error messages
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from migration_state_v2 import DatabaseConnection, MigrationStateV2
+
+Pathish = Union[str, Path]
+BATCH_INSERT_SIZE = 50_000
+# Directory scans are dominated by stat() latency, so more threads than cores still help on HDD/NAS.
+DEFAULT_RESEED_WORKERS = 16
+HASH_READ_SIZE = 8 * 1024 * 1024
+RESEED_MARKER_PREFIX = "reseed:scanned:"
+
+
+def recreate_state_db(db_path: Pathish) -> Path:
+    """Delete and recreate the migrate_v2 state database schema."""
+
+    path = Path(db_path).expanduser()
+    if not path.is_absolute():
+        path = path.resolve()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+    # Instantiating MigrationStateV2 runs the schema bootstrap logic.
+    MigrationStateV2(str(path))
+    return path
+
+
+def _bucket_dirs(base: Path) -> Iterator[tuple[str, Path]]:
+    """Yield bucket name and directory path pairs from base path."""
+    for child in sorted(base.iterdir()):
+        if not child.is_dir():
+            continue
+        yield child.name, child
+
+
+def _scan_directory(directory: str) -> tuple[list[tuple[str, int, float]], list[str]]:
+    """Return (path, size, mtime) for the files directly in directory, plus its subdirectories.
+
+    Entries that vanish or cannot be stat'ed while scanning are skipped, like os.walk does.
+    """
+    files: list[tuple[str, int, float]] = []
+    subdirs: list[str] = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        files.append((entry.path, stat.st_size, stat.st_mtime))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def _iter_file_batches(pool: ThreadPoolExecutor, bucket_dir: Path) -> Iterator[list[tuple[str, int, float]]]:
+    """Scan a bucket directory tree with every subdirectory queued on pool as soon as it is found."""
+    pending = {pool.submit(_scan_directory, str(bucket_dir))}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            files, subdirs = future.result()
+            pending.update(pool.submit(_scan_directory, subdir) for subdir in subdirs)
+            if files:
+                yield files
+
+
+def _build_file_row(
+    bucket_name: str,
+    bucket_prefix: str,
+    scanned: tuple[str, int, float],
+    created_at: str,
+    default_state: str,
+) -> tuple:
+    """Build a database row tuple for one scanned (path, size, mtime) file under bucket_prefix."""
+    file_path, size, mtime = scanned
+    # Scanned paths all start with the bucket directory, so slicing avoids pathlib parsing per file.
+    key = file_path[len(bucket_prefix) :].replace(os.sep, "/")
+    last_modified = datetime.fromtimestamp(mtime, tz=timezone.utc).isoformat()
+    return (
+        bucket_name,
+        key,
+        size,
+        None,
+        "STANDARD",
+        last_modified,
+        file_path,
+        None,
+        default_state,
+        None,
+        None,
+        None,
+        created_at,
+        last_modified,
+    )
+
+
+def _insert_file_rows(
+    conn: sqlite3.Connection,
+    rows: list[tuple],
+    insert_sql: str,
+):
+    """Insert accumulated rows and commit to database."""
+    if rows:
+        conn.executemany(insert_sql, rows)
+        conn.commit()
+
+
+def _hash_file(path: str) -> tuple[str, str]:
+    """Return the (MD5, SHA-256) hex digests of a file read once; hashlib releases the GIL per chunk."""
+    md5 = hashlib.md5(usedforsecurity=False)
+    sha256 = hashlib.sha256()
+    buffer = bytearray(HASH_READ_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as handle:
+        while count := handle.readinto(buffer):
+            md5.update(view[:count])
+            sha256.update(view[:count])
+    return md5.hexdigest(), sha256.hexdigest()
+
+
+def _hash_or_none(path: str) -> Optional[tuple[str, str]]:
+    try:
+        return _hash_file(path)
+    except OSError:
+        # Leave the checksum empty so a resumed reseed retries the file.
+        return None
+
+
+def _hash_unhashed_files(conn: sqlite3.Connection, buckets: list[str], workers: int, batch_size: int) -> int:
+    """Fill etag (MD5) and local_checksum (SHA-256) for every row of buckets still missing a checksum.
+
+    Rows are hashed in key order and committed per batch, so an interrupted run
+    resumes with the first unhashed row.
+    """
+    hashed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reseed-hash") as pool:
+        for bucket in buckets:
+            after = ""
+            while rows := conn.execute(
+                """SELECT key, local_path FROM files
+                WHERE bucket = ? AND key > ? AND local_checksum IS NULL AND local_path IS NOT NULL
+                ORDER BY key LIMIT ?""",
+                (bucket, after, batch_size),
+            ).fetchall():
+                digests = pool.map(_hash_or_none, [row[1] for row in rows])
+                updates = [(*digest, bucket, row[0]) for row, digest in zip(rows, digests) if digest is not None]
+                conn.executemany("UPDATE files SET etag = ?, local_checksum = ? WHERE bucket = ? AND key = ?", updates)
+                conn.commit()
+                hashed += len(updates)
+                after = rows[-1][0]
+                print(f"\r  Hashed {hashed:,} files", end="", flush=True)
+    return hashed
+
+
+def _open_reseed_db(db_path: Pathish, resume: bool) -> Path:
+    """Return the DB to seed: the existing one when resuming, otherwise a fresh schema."""
+    path = Path(db_path).expanduser()
+    if resume and path.exists():
+        # Opening through DatabaseConnection brings an older schema up to date.
+        DatabaseConnection(str(path))
+        return path.resolve()
+    return recreate_state_db(path)
+
+
+@dataclass(frozen=True)
+class ReseedOptions:
+    """How reseed_state_db_from_local_drive scans the drive and fills in rows."""
+
+    default_state: str = "synced"
+    workers: int = DEFAULT_RESEED_WORKERS
+    hash_files: bool = False
+    hash_workers: Optional[int] = None
+    resume: bool = False
+    batch_size: int = BATCH_INSERT_SIZE
+
+
+_RESEED_INSERT_SQL = """
+    INSERT OR IGNORE INTO files (
+        bucket, key, size, etag, storage_class, last_modified,
+        local_path, local_checksum, state, error_message,
+        glacier_restore_requested_at, glacier_restored_at,
+        created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _bucket_already_seeded(conn: sqlite3.Connection, bucket_name: str) -> bool:
+    """True when a previous reseed recorded bucket_name as fully scanned."""
+    marker = f"{RESEED_MARKER_PREFIX}{bucket_name}"
+    return conn.execute("SELECT 1 FROM migration_metadata WHERE key = ?", (marker,)).fetchone() is not None
+
+
+def _mark_bucket_seeded(conn: sqlite3.Connection, bucket_name: str) -> None:
+    """Record bucket_name as fully scanned so a resumed reseed skips it."""
+    conn.execute(
+        "INSERT OR REPLACE INTO migration_metadata (key, value, updated_at) VALUES (?, 'scanned', ?)",
+        (f"{RESEED_MARKER_PREFIX}{bucket_name}", datetime.now(timezone.utc).isoformat()),
+    )
+    conn.commit()
+
+
+def _seed_bucket(
+    conn: sqlite3.Connection,
+    pool: ThreadPoolExecutor,
+    bucket: tuple[str, Path],
+    created_at: str,
+    options: ReseedOptions,
+) -> tuple[int, int]:
+    """Insert a row for every file under one (name, directory) bucket; returns (files, bytes)."""
+    bucket_name, bucket_dir = bucket
+    bucket_prefix = os.path.join(str(bucket_dir), "")
+    file_count = 0
+    total_bytes = 0
+    rows: list[tuple] = []
+    for files in _iter_file_batches(pool, bucket_dir):
+        for scanned in files:
+            rows.append(_build_file_row(bucket_name, bucket_prefix, scanned, created_at, options.default_state))
+            total_bytes += scanned[1]
+        file_count += len(files)
+        if len(rows) >= options.batch_size:
+            _insert_file_rows(conn, rows, _RESEED_INSERT_SQL)
+            rows.clear()
+    _insert_file_rows(conn, rows, _RESEED_INSERT_SQL)
+    return file_count, total_bytes
+
+
+def reseed_state_db_from_local_drive(
+    base_path: Pathish,
+    db_path: Pathish,
+    options: Optional[ReseedOptions] = None,
+) -> tuple[Path, int, int]:
+    """Rebuild the migrate_v2 database by scanning the local drive layout.
+
+    Subdirectories are scanned concurrently by options.workers threads and rows are
+    committed options.batch_size at a time. Each fully scanned bucket is recorded in
+    migration_metadata, so options.resume keeps the existing DB and skips those buckets.
+    options.hash_files then fills in MD5 and SHA-256 for every row that has no checksum
+    yet. The returned counts cover the files seeded by this call.
+    """
+    options = options or ReseedOptions()
+    base = Path(base_path).expanduser().resolve()
+    if not base.exists():
+        raise FileNotFoundError(f"Base path does not exist: {base}")
+    db_file = _open_reseed_db(db_path, options.resume)
+    created_at = datetime.now(timezone.utc).isoformat()
+    total_files = 0
+    total_bytes = 0
+
+    with sqlite3.connect(str(db_file)) as conn, ThreadPoolExecutor(
+        max_workers=options.workers, thread_name_prefix="reseed-scan"
+    ) as pool:
+        buckets = list(_bucket_dirs(base))
+        for bucket in buckets:
+            if _bucket_already_seeded(conn, bucket[0]):
+                continue
+            file_count, byte_count = _seed_bucket(conn, pool, bucket, created_at, options)
+            _mark_bucket_seeded(conn, bucket[0])
+            total_files += file_count
+            total_bytes += byte_count
+        if options.hash_files:
+            hash_workers = options.hash_workers or os.cpu_count() or 1
+            if _hash_unhashed_files(conn, [name for name, _ in buckets], hash_workers, options.batch_size):
+                print()
+    return db_file, total_files, total_bytes
+
+
+__all__ = [
+    "BATCH_INSERT_SIZE",
+    "DEFAULT_RESEED_WORKERS",
+    "RESEED_MARKER_PREFIX",
+    "ReseedOptions",
+    "recreate_state_db",
+    "reseed_state_db_from_local_drive",
+]
@@ -210,6 +210,12 @@ def state_mock():
     return mock.Mock(spec=MigrationStateV2)
 
 
+def stub_restore_queue(state_mock, queue: str, *polls: list) -> None:
+    """Stub ``count_<queue>``/``iter_<queue>`` so each poll streams its files as one batch"""
+    getattr(state_mock, f"count_{queue}").side_effect = [len(files) for files in polls]
+    getattr(state_mock, f"iter_{queue}").side_effect = [iter([files]) for files in polls]
+
+
 @pytest.fixture
 def scanner(request):
     """Create BucketScanner instance for migration scanner tests"""
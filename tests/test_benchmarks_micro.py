@@ -0,0 +1,100 @@
+"""Tests for the micro-benchmark harness and its synthetic fixtures."""
+
+import hashlib
+import json
+import sqlite3
+
+from benchmarks.fixtures import TreeShape, build_state_db, generate_entries, materialize_tree
+from benchmarks.micro import CASES, MicroOptions, main, run_cases, summarize
+
+
+def test_generate_entries_is_reproducible(tmp_path):
+    """The same shape and seed always produce the same files and ETags."""
+    shape = TreeShape(buckets=1, top_level_dirs=2, subdirs_per_dir=2, files_per_dir=3, seed=7)
+    entries = generate_entries(shape)
+    assert entries == generate_entries(shape)
+    assert len(entries) == shape.total_files
+
+    materialize_tree(tmp_path, entries)
+    first = entries[0]
+    data = (tmp_path / first.bucket / first.key).read_bytes()
+    assert len(data) == first.size
+    assert hashlib.md5(data, usedforsecurity=False).hexdigest() == first.etag
+
+
+def test_build_state_db_uses_migration_schema(tmp_path):
+    """Generated DBs contain one files row per entry."""
+    entries = generate_entries(TreeShape(buckets=1, top_level_dirs=1, subdirs_per_dir=1, files_per_dir=4))
+    db_path = build_state_db(tmp_path / "state.db", entries)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] == 4
+
+
+def test_summarize_reports_statistics():
+    """summarize returns min/median/mean/stdev over the runs."""
+    stats = summarize([1.0, 2.0, 3.0])
+    assert stats["min"] == 1.0
+    assert stats["median"] == 2.0
+    assert stats["mean"] == 2.0
+    assert stats["runs"] == 3
+    assert summarize([0.5])["stdev"] == 0.0
+
+
+def test_run_cases_records_median_per_case(tmp_path):
+    """Selected cases run and report their median timing."""
+    names = [
+        "directory_index_add_file",
+        "directory_index_finalize",
+        "find_exact_duplicates_pruning",
+        "should_skip_by_suffix",
+        "scan_local_directory",
+    ]
+    report = run_cases(MicroOptions(repeat=2), tmp_path, names)
+    assert [measurement.name for measurement in report.measurements] == names
+    for measurement in report.measurements:
+        assert measurement.seconds == measurement.extra["median"]
+        assert measurement.extra["runs"] == 2
+        assert measurement.items > 0
+    assert set(names) <= set(CASES)
+
+
+def test_directory_index_memory_case_records_traced_peak(tmp_path):
+    """The memory case adds its heap figures to the timing statistics."""
+    report = run_cases(MicroOptions(repeat=1), tmp_path, ["directory_index_memory"])
+    extra = report.measurements[0].extra
+    assert extra["traced_peak_bytes"] > 0
+    assert extra["traced_bytes_per_file"] > 0
+
+
+def test_main_compare_flags_regressions(tmp_path, capsys):
+    """--baseline returns 1 when a case got slower than the threshold allows."""
+    output = tmp_path / "micro.json"
+    args = ["--case", "should_skip_by_suffix", "--repeat", "1", "--workdir", str(tmp_path / "work")]
+    assert main(args + ["--output", str(output)]) == 0
+
+    baseline = json.loads(output.read_text(encoding="utf-8"))
+    baseline["measurements"][0]["seconds"] = 1e-9
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(baseline), encoding="utf-8")
+    assert main(args + ["--baseline", str(baseline_path)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def test_download_copy_cases_report_cpu_per_gb(tmp_path):
+    """Both download copy loops record CPU seconds per GB so before/after can be compared."""
+    report = run_cases(MicroOptions(repeat=1), tmp_path, ["download_copy_legacy", "download_copy_stream"])
+    for measurement in report.measurements:
+        assert measurement.bytes > 0
+        assert measurement.extra["cpu_seconds_per_gb"] > 0
+
+
+def test_main_never_removes_a_user_chosen_workdir(tmp_path, capsys):
+    """--workdir may hold other files, so it is left in place even without --keep."""
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    (workdir / "unrelated.txt").write_text("keep me", encoding="utf-8")
+
+    assert main(["--case", "should_skip_by_suffix", "--repeat", "1", "--workdir", str(workdir)]) == 0
+
+    capsys.readouterr()
+    assert (workdir / "unrelated.txt").read_text(encoding="utf-8") == "keep me"
@@ -0,0 +1,114 @@
+"""Tests for the synthetic S3 throughput benchmark."""
+
+import hashlib
+import json
+
+import pytest
+
+from benchmarks.migration_throughput import ThroughputOptions, main, run_benchmark
+from benchmarks.results import compare_reports, load_report
+from benchmarks.synthetic_s3 import (
+    SizeDistribution,
+    SyntheticBucketSpec,
+    SyntheticS3Client,
+    parse_storage_mix,
+)
+from migrate_v2_smoke_simulated import _SimulatedS3Client
+
+
+def _client(count=25, **spec_kwargs):
+    spec = SyntheticBucketSpec(name="bench", object_count=count, sizes=SizeDistribution(kind="fixed", median=3000), **spec_kwargs)
+    return SyntheticS3Client([spec])
+
+
+def test_synthetic_objects_are_deterministic_and_match_etag():
+    """Listings are stable across clients and single-part ETags are real MD5s."""
+    first = list(_client().get_paginator("list_objects_v2").paginate(Bucket="bench"))
+    second = list(_client().get_paginator("list_objects_v2").paginate(Bucket="bench"))
+    assert first == second
+    entries = first[0]["Contents"]
+    assert [entry["Key"] for entry in entries] == sorted(entry["Key"] for entry in entries)
+
+    client = _client()
+    entry = entries[3]
+    body = client.get_object(Bucket="bench", Key=entry["Key"])["Body"]
+    data = b"".join(body.iter_chunks(chunk_size=1024))
+    assert len(data) == entry["Size"]
+    assert hashlib.md5(data, usedforsecurity=False).hexdigest() == entry["ETag"].strip('"')
+
+
+def test_synthetic_large_objects_use_multipart_etags():
+    """Objects above the multipart threshold advertise a part-count ETag."""
+    client = _client(count=2, multipart_threshold=1024)
+    page = next(client.get_paginator("list_objects_v2").paginate(Bucket="bench"))
+    assert all(entry["ETag"].strip('"').endswith("-1") for entry in page["Contents"])
+
+
+def test_synthetic_delete_removes_versions_and_bucket():
+    """Deleted keys disappear from listings and deleted buckets are no longer listed."""
+    client = _client(count=3)
+    versions = next(client.get_paginator("list_object_versions").paginate(Bucket="bench"))["Versions"]
+    client.delete_objects(Bucket="bench", Delete={"Objects": versions[:2]})
+    remaining = next(client.get_paginator("list_object_versions").paginate(Bucket="bench"))["Versions"]
+    assert [entry["Key"] for entry in remaining] == [versions[2]["Key"]]
+    client.delete_bucket(Bucket="bench")
+    assert client.list_buckets() == {"Buckets": []}
+
+
+def test_synthetic_client_covers_the_smoke_test_client_api():
+    """Every call the offline smoke-test client answers is answered by the benchmark client too"""
+    smoke_api = {name for name in vars(_SimulatedS3Client) if not name.startswith("_")}
+    assert smoke_api <= {name for name in vars(SyntheticS3Client) if not name.startswith("_")}
+
+
+def test_parse_storage_mix_normalizes_weights():
+    """Weights are normalized and invalid mixes are rejected."""
+    assert parse_storage_mix("standard=3, glacier=1") == (("STANDARD", 0.75), ("GLACIER", 0.25))
+    with pytest.raises(ValueError):
+        parse_storage_mix("")
+
+
+def test_run_benchmark_times_every_phase(tmp_path):
+    """A small end-to-end run migrates every object and reports each phase."""
+    options = ThroughputOptions(buckets=2, objects_per_bucket=30, median_size=2048, storage_mix="STANDARD=1,GLACIER=1")
+    report = run_benchmark(options, tmp_path)
+
+    names = [measurement.name for measurement in report.measurements]
+    assert names == ["scan", "glacier_restore", "glacier_wait", "sync", "verify", "delete"]
+    by_name = {measurement.name: measurement for measurement in report.measurements}
+    assert by_name["scan"].items == 60
+    assert by_name["sync"].bytes == report.parameters["total_bytes"] > 0
+    assert by_name["glacier_restore"].items == report.parameters["request_counts"]["restore_object"]
+    assert report.peak_rss_bytes > 0
+    assert report.to_dict()["peak_rss_bytes"] == report.peak_rss_bytes
+
+
+def test_main_writes_results_and_flags_regressions(tmp_path, capsys):
+    """--output writes JSON; --baseline exits non-zero when timings regress."""
+    output = tmp_path / "results.json"
+    args = ["--buckets", "1", "--objects", "10", "--workdir", str(tmp_path / "work")]
+    assert main(args + ["--output", str(output)]) == 0
+    report = load_report(output)
+    assert report["suite"] == "migration_throughput"
+
+    for entry in report["measurements"]:
+        entry["seconds"] = 1e-9
+    comparisons = compare_reports(load_report(output), report)
+    assert all(comparison.is_regression(0.1) for comparison in comparisons)
+
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report), encoding="utf-8")
+    assert main(args + ["--baseline", str(baseline)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def test_main_never_removes_a_user_chosen_workdir(tmp_path, capsys):
+    """--workdir may hold other files, so it is left in place even without --keep."""
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    (workdir / "unrelated.txt").write_text("keep me", encoding="utf-8")
+
+    assert main(["--buckets", "1", "--objects", "5", "--workdir", str(workdir)]) == 0
+
+    capsys.readouterr()
+    assert (workdir / "unrelated.txt").read_text(encoding="utf-8") == "keep me"
@@ -13,6 +13,7 @@ import pytest
 
 # pylint: disable=no-name-in-module
 from cleanup_temp_artifacts import categories, core_scanner, db_loader
+from migration_state_compact import create_compact_schema
 from tests.assertions import assert_equal
 from tests.conftest_test_values import TEST_MIN_SIZE_BYTES
 
@@ -88,6 +89,29 @@ def test_get_db_file_stats_requires_rowid(tmp_path):
     conn.close()
 
 
+def test_get_db_file_stats_tracks_changes_in_compact_db(tmp_path):
+    """Compact DBs have no rowid, so the marker follows file_records.updated_ms instead."""
+    conn = sqlite3.connect(tmp_path / "compact.db")
+    create_compact_schema(conn)
+    insert_sql = """
+        INSERT INTO files (bucket, key, size, etag, storage_class, last_modified, state, created_at, updated_at)
+        VALUES (?, ?, 10, NULL, 'STANDARD', ?, 'discovered', ?, ?)
+    """
+    first = "2025-10-31T00:00:00+00:00"
+    conn.execute(insert_sql, ("b1", "k1", first, first, first))
+    conn.commit()
+
+    total_files, first_marker = _get_db_file_stats(conn)
+
+    later = "2025-11-01T00:00:00+00:00"
+    conn.execute(insert_sql, ("b1", "k2", later, later, later))
+    conn.commit()
+    assert_equal(total_files, 1)
+    assert first_marker > 0
+    assert _get_db_file_stats(conn)[1] > first_marker
+    conn.close()
+
+
 def test_create_db_connection_success(tmp_path):
     """Test _create_db_connection creates valid connection."""
     db_path = tmp_path / "test.db"
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import shutil
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
@@ -333,8 +332,8 @@ class TestDeletePathsErrors:
             assert_equal(len(errors), 1)
             assert isinstance(errors[0][1], PermissionError)
 
-    def test_delete_directory_with_shutil_error(self, make_candidate):
-        """Test deletion handles shutil errors."""
+    def test_delete_directory_with_rmdir_error(self, make_candidate):
+        """Test deletion handles a directory that cannot be removed."""
         with tempfile.TemporaryDirectory() as tmpdir:
             root = Path(tmpdir).resolve()
             test_dir = root / "testdir"
@@ -342,9 +341,8 @@ class TestDeletePathsErrors:
 
             candidates = [make_candidate(test_dir, "cat1")]
 
-            # Mock rmtree to raise shutil.Error
-            with patch("shutil.rmtree", side_effect=shutil.Error("Removal failed")):
+            with patch("os.rmdir", side_effect=PermissionError("Removal failed")):
                 errors = delete_paths(candidates, root=root)
 
             assert_equal(len(errors), 1)
-            assert isinstance(errors[0][1], shutil.Error)
+            assert isinstance(errors[0][1], PermissionError)
@@ -0,0 +1,35 @@
+"""Tests for the duplicate_files CLI."""
+
+import sqlite3
+
+from duplicate_files.cli import main
+from tests.assertions import assert_equal
+
+
+def test_main_reports_duplicate_sets_and_read_summary(tmp_path, capsys):
+    """The report lists each set with its reclaimable bytes and how much data was read"""
+    base_path = tmp_path / "drive"
+    db_path = tmp_path / "state.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE files (bucket TEXT, key TEXT, size INTEGER, local_checksum TEXT, etag TEXT)")
+        for bucket, key, data in (("a", "x.bin", b"1" * 2048), ("b", "y.bin", b"1" * 2048), ("b", "z.bin", b"2" * 2048)):
+            path = base_path / bucket / key
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            conn.execute("INSERT INTO files VALUES (?, ?, ?, NULL, NULL)", (bucket, key, len(data)))
+
+    exit_code = main(["--db-path", str(db_path), "--base-path", str(base_path), "--min-size", "1K"])
+
+    output = capsys.readouterr().out
+    assert_equal(exit_code, 0)
+    assert "[1] 2 copies of 2.00 KiB, 2.00 KiB reclaimable" in output
+    assert f"  - {base_path / 'a' / 'x.bin'}\n" in output
+    assert "Read from disk:      6.00 KiB (100.00% of the 6.00 KiB a full hash would read)" in output
+
+
+def test_main_requires_state_db(tmp_path, capsys):
+    """A missing DB is reported instead of created"""
+    exit_code = main(["--db-path", str(tmp_path / "missing.db"), "--base-path", str(tmp_path)])
+
+    assert_equal(exit_code, 1)
+    assert "State DB not found" in capsys.readouterr().err
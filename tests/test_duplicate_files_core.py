@@ -0,0 +1,115 @@
+"""Tests for the staged size/partial/full duplicate file pipeline in duplicate_files/core.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+import os
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from duplicate_files import core
+from duplicate_files.core import PARTIAL_READ_BYTES, find_duplicate_files
+from tests.assertions import assert_equal
+
+LARGE = 4 * PARTIAL_READ_BYTES
+
+
+def _payload(seed: int, size: int = LARGE) -> bytes:
+    return bytes((seed + index) % 251 for index in range(size))
+
+
+@pytest.fixture
+def drive(tmp_path: Path):
+    """A drive root and state DB describing files written with _write"""
+    base_path = tmp_path / "drive"
+    conn = sqlite3.connect(tmp_path / "state.db")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE files (bucket TEXT, key TEXT, size INTEGER, local_checksum TEXT, etag TEXT)")
+
+    def _write(bucket: str, key: str, data: bytes) -> Path:
+        path = base_path / bucket / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        conn.execute("INSERT INTO files VALUES (?, ?, ?, NULL, NULL)", (bucket, key, len(data)))
+        return path
+
+    yield base_path, conn, _write
+    conn.close()
+
+
+def _sets(base_path: Path, conn, stats=None):
+    return [
+        [(candidate.bucket, candidate.key) for candidate in duplicate_set.files]
+        for duplicate_set in find_duplicate_files(conn, base_path, min_size=1, stats=stats)
+    ]
+
+
+def test_stages_separate_same_size_files_and_report_reclaimable_bytes(drive):
+    """Equal sizes with a different head, or a different middle, never end up in a duplicate set"""
+    base_path, conn, write = drive
+    original = _payload(1)
+    middle_changed = bytearray(original)
+    middle_changed[LARGE // 2] ^= 0xFF
+    write("a", "original.bin", original)
+    write("b", "copy.bin", original)
+    write("b", "nested/copy2.bin", original)
+    write("c", "middle.bin", bytes(middle_changed))
+    write("c", "head.bin", _payload(2))
+    write("c", "unique-size.bin", _payload(3, LARGE + 1))
+    stats: Counter = Counter()
+
+    sets = find_duplicate_files(conn, base_path, min_size=1, stats=stats)
+
+    expected = [[("a", "original.bin"), ("b", "copy.bin"), ("b", "nested/copy2.bin")]]
+    assert_equal([[(f.bucket, f.key) for f in s.files] for s in sets], expected)
+    assert_equal(sets[0].reclaimable_bytes, 2 * LARGE)
+    assert_equal((stats["size_candidates"], stats["partial_candidates"]), (5, 4))
+    assert_equal(stats["bytes_read"], 5 * 2 * PARTIAL_READ_BYTES + 4 * LARGE)
+
+
+def test_small_files_are_fully_hashed_by_the_partial_stage(drive):
+    """Files no larger than the head and tail reads are never read a second time"""
+    base_path, conn, write = drive
+    write("a", "small.txt", b"same")
+    write("b", "small.txt", b"same")
+
+    with mock.patch.object(core, "full_hash", side_effect=AssertionError("full hash not needed")):
+        assert_equal(_sets(base_path, conn), [[("a", "small.txt"), ("b", "small.txt")]])
+
+
+def test_hash_cache_skips_unchanged_files_and_rehashes_modified_ones(drive):
+    """A second run reads nothing; touching a file invalidates only its cached hashes"""
+    base_path, conn, write = drive
+    for bucket in ("a", "b", "c"):
+        write(bucket, "data.bin", _payload(5))
+    find_duplicate_files(conn, base_path, min_size=1)
+
+    stats: Counter = Counter()
+    with mock.patch.object(core, "partial_hash", side_effect=AssertionError("cached")):
+        _sets(base_path, conn, stats)
+    assert_equal((stats["partial_cached"], stats["full_cached"], stats["bytes_read"]), (3, 3, 0))
+
+    changed = base_path / "c" / "data.bin"
+    changed.write_bytes(_payload(6))
+    os.utime(changed, ns=(1, 1))
+    stats = Counter()
+    assert_equal(_sets(base_path, conn, stats), [[("a", "data.bin"), ("b", "data.bin")]])
+    assert_equal((stats["partial_cached"], stats["bytes_read"]), (2, 2 * PARTIAL_READ_BYTES))
+
+
+def test_missing_files_and_existing_hard_links_are_skipped(drive):
+    """Rows without a local file and paths already linked to the same inode are not reported"""
+    base_path, conn, write = drive
+    first = write("a", "one.bin", _payload(7))
+    write("a", "gone.bin", _payload(7)).unlink()
+    linked = base_path / "b" / "linked.bin"
+    linked.parent.mkdir(parents=True)
+    os.link(first, linked)
+    conn.execute("INSERT INTO files VALUES ('b', 'linked.bin', ?, NULL, NULL)", (LARGE,))
+    stats: Counter = Counter()
+
+    assert_equal(_sets(base_path, conn, stats), [])
+    assert_equal((stats["missing_local_files"], stats["already_linked"]), (1, 1))
@@ -9,18 +9,15 @@ from unittest.mock import patch
 import pytest
 
 from duplicate_tree.analysis import (
-    ScanFingerprint,
     apply_thresholds,
     build_directory_index_from_db,
-    cache_key,
     clusters_to_rows,
     format_bytes,
     path_on_disk,
-    recompute_clusters_for_deletion,
     render_report_rows,
     sort_node_rows,
 )
-from duplicate_tree.core import DirectoryIndex, DuplicateCluster
+from duplicate_tree.core import DuplicateCluster
 from duplicate_tree_models import DirectoryNode, FilesTableReadError
 
 
@@ -98,15 +95,6 @@ def test_apply_thresholds_removes_single_node_clusters():
     assert len(filtered) == 0
 
 
-def test_cache_key_format():
-    """Test cache key format includes all parameters."""
-    fingerprint = ScanFingerprint(total_files=100, checksum="abc123")
-    key = cache_key(fingerprint, min_files=5, min_bytes=1000)
-    assert "abc123" in key
-    assert "files>5" in key
-    assert "bytes>=1000" in key
-
-
 def test_clusters_to_rows_empty_nodes():
     """Test clusters_to_rows skips clusters with no nodes."""
     cluster = DuplicateCluster(signature="sig1", nodes=[])
@@ -183,16 +171,3 @@ def test_path_on_disk():
     node_path = ("bucket1", "dir1", "subdir")
     result = path_on_disk(base, node_path)
     assert result == Path("/mnt/drive/bucket1/dir1/subdir")
-
-
-def test_recompute_clusters_for_deletion():
-    """Test recompute_clusters_for_deletion returns sorted cluster rows."""
-    index = DirectoryIndex()
-    index.add_file("bucket", "dir1/file1.txt", 1000000, "abc")
-    index.add_file("bucket", "dir1/file2.txt", 1000000, "def")
-    index.add_file("bucket", "dir2/file1.txt", 1000000, "abc")
-    index.add_file("bucket", "dir2/file2.txt", 1000000, "def")
-    index.finalize()
-
-    rows = recompute_clusters_for_deletion(index, min_files=0, min_bytes=0)
-    assert isinstance(rows, list)
@@ -2,160 +2,109 @@
 
 from __future__ import annotations
 
-import json
 import sqlite3
 
+import pytest
+
 from duplicate_tree.analysis import (
-    MIN_REPORT_BYTES,
-    MIN_REPORT_FILES,
     ScanFingerprint,
-    cache_key,
+    apply_thresholds,
+    clusters_to_rows,
 )
 from duplicate_tree.cache import (
-    EXACT_TOLERANCE,
-    ensure_cache_table,
+    LEGACY_CACHE_TABLE,
+    ensure_cache_tables,
     load_cached_report,
     store_cached_report,
 )
 from duplicate_tree.core import DuplicateCluster
 from duplicate_tree_models import DirectoryNode
+from tests.assertions import assert_equal
 
-
-def test_ensure_cache_table_idempotent(tmp_path):
-    """Test that ensure_cache_table can be called multiple times safely."""
-    db_path = tmp_path / "cache.db"
-    conn = sqlite3.connect(str(db_path))
-
-    ensure_cache_table(conn)
-    ensure_cache_table(conn)
-
-    cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='duplicate_tree_cache'")
-    result = cursor.fetchone()
-    assert result is not None
-    conn.close()
+FINGERPRINT = ScanFingerprint(total_files=10, checksum="abc123")
 
 
-def test_load_cached_report_no_match(tmp_path):
-    """Test load_cached_report returns None when no match exists."""
-    db_path = tmp_path / "cache.db"
-    fingerprint = ScanFingerprint(total_files=10, checksum="nonexistent")
+def _cluster(signature: str, *nodes: tuple[str, int, int]) -> DuplicateCluster:
+    return DuplicateCluster(
+        signature=signature,
+        nodes=[DirectoryNode(path=("bucket", name), total_files=files, total_size=size) for name, files, size in nodes],
+    )
 
-    result = load_cached_report(str(db_path), fingerprint, "/base/path")
-    assert result is None
 
+CLUSTERS = [
+    _cluster("small", ("a1", 3, 100), ("a2", 3, 100)),
+    _cluster("large", ("b1", 9, 5000), ("b2", 9, 5000), ("b3", 9, 5000)),
+    _cluster("mixed", ("c1", 1, 10), ("c2", 6, 800), ("c3", 6, 800)),
+    _cluster("tied", ("d1", 4, 800), ("d2", 4, 800)),
+]
 
-def test_load_cached_report_file_count_mismatch(tmp_path):
-    """Test load_cached_report returns None when file count doesn't match."""
-    db_path = tmp_path / "cache.db"
-    conn = sqlite3.connect(str(db_path))
-    ensure_cache_table(conn)
-
-    fingerprint = ScanFingerprint(total_files=10, checksum="abc123")
-    key = cache_key(fingerprint, min_files=2, min_bytes=512 * 1024 * 1024)
-
-    conn.execute(
-        """
-        INSERT INTO duplicate_tree_cache (
-            fingerprint, tolerance, base_path, total_files, generated_at, report
-        ) VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        (key, EXACT_TOLERANCE, "/base/path", 99, "2024-01-01T00:00:00", "[]"),
-    )
-    conn.commit()
-    conn.close()
 
-    result = load_cached_report(str(db_path), fingerprint, "/base/path")
-    assert result is None
+def _expected_rows(min_files: int, min_bytes: int):
+    clusters = apply_thresholds(CLUSTERS, min_files, min_bytes)
+    return clusters_to_rows(sorted(clusters, key=lambda c: c.nodes[0].total_size, reverse=True))
 
 
-def test_load_cached_report_invalid_json(tmp_path):
-    """Test load_cached_report handles invalid JSON gracefully."""
-    db_path = tmp_path / "cache.db"
-    conn = sqlite3.connect(str(db_path))
-    ensure_cache_table(conn)
+def test_ensure_cache_tables_idempotent_and_drops_legacy_blob_table(tmp_path):
+    """Tables can be ensured repeatedly; the old single-blob cache table is removed"""
+    conn = sqlite3.connect(str(tmp_path / "cache.db"))
+    conn.execute(f"CREATE TABLE {LEGACY_CACHE_TABLE} (report TEXT)")
 
-    fingerprint = ScanFingerprint(total_files=10, checksum="abc123")
-    key = cache_key(fingerprint, min_files=2, min_bytes=512 * 1024 * 1024)
+    ensure_cache_tables(conn)
+    ensure_cache_tables(conn)
 
-    conn.execute(
-        """
-        INSERT INTO duplicate_tree_cache (
-            fingerprint, tolerance, base_path, total_files, generated_at, report
-        ) VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        (key, EXACT_TOLERANCE, "/base/path", 10, "2024-01-01T00:00:00", "INVALID JSON"),
-    )
-    conn.commit()
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
     conn.close()
+    assert {"duplicate_tree_cluster_sets", "duplicate_tree_clusters", "duplicate_tree_cluster_members"} <= tables
+    assert LEGACY_CACHE_TABLE not in tables
 
-    result = load_cached_report(str(db_path), fingerprint, "/base/path")
-    assert result is not None
-    assert "report" in result
-    assert result["report"] == "INVALID JSON"
-
-
-def test_load_cached_report_valid_payload(tmp_path):
-    """Test load_cached_report returns parsed rows on valid payload."""
-    db_path = tmp_path / "cache.db"
-    conn = sqlite3.connect(str(db_path))
-    ensure_cache_table(conn)
-
-    fingerprint = ScanFingerprint(total_files=2, checksum="good")
-    key = cache_key(fingerprint, min_files=MIN_REPORT_FILES, min_bytes=MIN_REPORT_BYTES)
-    payload = '[{"total_files": 2, "total_size": 10, "nodes": []}]'
-
-    conn.execute(
-        """
-        INSERT INTO duplicate_tree_cache (
-            fingerprint, tolerance, base_path, total_files, generated_at, report
-        ) VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        (key, EXACT_TOLERANCE, "/base/path", 2, "2024-01-02T00:00:00", payload),
-    )
-    conn.commit()
-    conn.close()
 
-    result = load_cached_report(str(db_path), fingerprint, "/base/path")
+def test_load_cached_report_no_match(tmp_path):
+    """Test load_cached_report returns None when no snapshot is stored."""
+    assert load_cached_report(str(tmp_path / "cache.db"), FINGERPRINT, 0, 0) is None
+
 
-    assert result is not None
-    assert result["rows"] == [{"total_files": 2, "total_size": 10, "nodes": []}]
-    assert result["total_files"] == "2"
+def test_load_cached_report_file_count_mismatch(tmp_path):
+    """Test load_cached_report returns None when file count doesn't match."""
+    db_path = str(tmp_path / "cache.db")
+    store_cached_report(db_path, FINGERPRINT, CLUSTERS)
 
+    assert load_cached_report(db_path, ScanFingerprint(total_files=99, checksum="abc123"), 0, 0) is None
 
-def test_store_cached_report_with_clusters(tmp_path):
-    """Test store_cached_report persists cluster data correctly."""
-    db_path = tmp_path / "cache.db"
-    fingerprint = ScanFingerprint(total_files=10, checksum="abc123")
 
-    node1 = DirectoryNode(path=("bucket", "dir1"), total_files=5, total_size=1000)
-    node2 = DirectoryNode(path=("bucket", "dir2"), total_files=5, total_size=1000)
-    cluster = DuplicateCluster(signature="sig1", nodes=[node1, node2])
+@pytest.mark.parametrize("min_files,min_bytes", [(0, 0), (2, 512), (3, 100), (5, 900), (10, 0)])
+def test_cached_thresholds_match_apply_thresholds(tmp_path, min_files, min_bytes):
+    """Any threshold served from SQL equals filtering and sorting the clusters in Python"""
+    db_path = str(tmp_path / "cache.db")
+    store_cached_report(db_path, FINGERPRINT, CLUSTERS)
 
-    store_cached_report(str(db_path), fingerprint, "/base/path", [cluster])
+    cached = load_cached_report(db_path, FINGERPRINT, min_files, min_bytes)
 
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
-    rows = conn.execute("SELECT * FROM duplicate_tree_cache").fetchall()
-    conn.close()
+    assert cached is not None
+    expected = _expected_rows(min_files, min_bytes)
+    assert_equal(cached["rows"], expected)
+    assert_equal((cached["total_clusters"], cached["total_files"]), (len(expected), 10))
 
-    assert len(rows) == 1
-    assert rows[0]["total_files"] == 10
 
-    report_data = json.loads(rows[0]["report"])
-    assert len(report_data) == 1
-    assert report_data[0]["total_files"] == 5
+def test_cached_report_pages(tmp_path):
+    """limit/offset return consecutive slices of the sorted report"""
+    db_path = str(tmp_path / "cache.db")
+    store_cached_report(db_path, FINGERPRINT, CLUSTERS)
+    expected = _expected_rows(0, 0)
 
+    pages = [load_cached_report(db_path, FINGERPRINT, 0, 0, limit=2, offset=offset) for offset in (0, 2, 4)]
 
-def test_store_cached_report_replaces_existing(tmp_path):
-    """Test store_cached_report replaces existing entries."""
-    db_path = tmp_path / "cache.db"
-    fingerprint = ScanFingerprint(total_files=10, checksum="abc123")
+    assert_equal([page["rows"] for page in pages], [expected[:2], expected[2:4], []])
+    assert_equal({page["total_clusters"] for page in pages}, {len(expected)})
 
-    store_cached_report(str(db_path), fingerprint, "/base/path", [])
-    store_cached_report(str(db_path), fingerprint, "/base/path", [])
 
-    conn = sqlite3.connect(str(db_path))
-    count = conn.execute("SELECT COUNT(*) FROM duplicate_tree_cache").fetchone()[0]
-    conn.close()
+def test_store_cached_report_replaces_previous_snapshot(tmp_path):
+    """Only the latest snapshot is kept"""
+    db_path = str(tmp_path / "cache.db")
+    store_cached_report(db_path, ScanFingerprint(total_files=1, checksum="old"), CLUSTERS)
+    store_cached_report(db_path, FINGERPRINT, CLUSTERS[:1])
 
-    assert count == 1
+    with sqlite3.connect(db_path) as conn:
+        tables = ("duplicate_tree_cluster_sets", "duplicate_tree_clusters")
+        counts = [conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables]
+    assert_equal(counts, [1, 1])
+    assert load_cached_report(db_path, ScanFingerprint(total_files=1, checksum="old"), 0, 0) is None
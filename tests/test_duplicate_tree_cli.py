@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import sqlite3
 from pathlib import Path
+from unittest import mock
 
 from duplicate_tree.analysis import ScanFingerprint, build_directory_index_from_db
 from duplicate_tree.cache import load_cached_report, store_cached_report
@@ -57,15 +58,10 @@ def test_cache_round_trip(tmp_path):
     """Test caching and loading report."""
     db_path = tmp_path / "cache.db"
     fingerprint = ScanFingerprint(total_files=4, checksum="abc123")
-    store_cached_report(
-        str(db_path),
-        fingerprint,
-        base_path="/drive",
-        clusters=[],
-    )
-    cached = load_cached_report(str(db_path), fingerprint, "/drive")
+    store_cached_report(str(db_path), fingerprint, clusters=[])
+    cached = load_cached_report(str(db_path), fingerprint, min_files=0, min_bytes=0)
     assert cached is not None
-    assert "rows" in cached
+    assert_equal(cached["rows"], [])
 
 
 def test_cli_main_end_to_end(tmp_path, capsys):
@@ -102,6 +98,27 @@ def test_cli_main_end_to_end(tmp_path, capsys):
     assert "cached duplicate analysis" in cached_output
 
 
+def test_cli_cache_hit_skips_the_index_build_until_files_change(tmp_path, capsys):
+    """An unchanged DB is answered from the cache without loading the index; a new row forces an update"""
+    db_path = _write_sample_db(tmp_path)
+    base_path = tmp_path / "drive"
+    base_path.mkdir()
+    args = ["--db-path", str(db_path), "--base-path", str(base_path)]
+    assert_equal(main(args), 0)
+    capsys.readouterr()
+
+    with mock.patch("duplicate_tree.cli.load_incremental_directory_index", side_effect=AssertionError("index built")):
+        assert_equal(main(args), 0)
+    assert "cached duplicate analysis" in capsys.readouterr().out
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO files (bucket, key, size, local_checksum) VALUES ('bucket', 'dirC/new.txt', 1, 'ddd')")
+    assert_equal(main(args), 0)
+    output = capsys.readouterr().out
+    assert "cached duplicate analysis" not in output
+    assert "(2 recomputed)" in output
+
+
 def test_threshold_filters_small_clusters(tmp_path, capsys):
     """Test that threshold filters out small clusters."""
     db_path = tmp_path / "small.db"
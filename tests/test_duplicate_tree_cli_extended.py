@@ -6,6 +6,8 @@ import sqlite3
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
+
 from cost_toolkit.common.cli_utils import confirm_reset_state_db
 from duplicate_tree.cli import (
     handle_state_db_reset,
@@ -53,6 +55,13 @@ def test_parse_args_with_delete():
     assert args.delete is True
 
 
+def test_parse_args_with_link_modes():
+    """--link defaults to auto, accepts an explicit mode and cannot be combined with --delete."""
+    assert_equal((parse_args(["--link"]).link, parse_args(["--link", "hardlink"]).link, parse_args([]).link), ("auto", "hardlink", None))
+    with pytest.raises(SystemExit):
+        parse_args(["--delete", "--link"])
+
+
 def test_parse_args_with_min_files():
     """Test parse_args with min_files option."""
     args = parse_args(["--min-files", "10"])
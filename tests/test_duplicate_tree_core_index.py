@@ -0,0 +1,92 @@
+"""Tests for the columnar DirectoryIndex storage in duplicate_tree/core.py"""
+
+from duplicate_tree.core import NO_PARENT, DirectoryIndex, find_exact_duplicates
+from duplicate_tree.signatures import DIGEST_BYTES, compute_signature
+from tests.assertions import assert_equal
+
+
+def _index(*keys: str) -> DirectoryIndex:
+    index = DirectoryIndex()
+    for key in keys:
+        index.add_file("bucket", key, 10, f"etag-{key.rsplit('/', 1)[-1]}")
+    index.finalize()
+    return index
+
+
+def test_components_are_interned_and_paths_rebuilt_from_parents():
+    """Repeated directory names are stored once; node ids resolve back to full paths"""
+    index = _index("a/data/f1", "b/data/f1", "b/data/sub/f2")
+
+    data_ids = [index.find(("bucket", name, "data")) for name in ("a", "b")]
+    assert_equal([index.path_of(node_id) for node_id in data_ids], [("bucket", "a", "data"), ("bucket", "b", "data")])
+    assert_equal(index.parent_id(index.find(("bucket",))), NO_PARENT)
+    assert_equal(sorted(set(index._components)), ["a", "b", "bucket", "data", "sub"])  # pylint: disable=protected-access
+    assert index.find(("bucket", "c")) is None
+
+
+def test_nodes_view_materializes_directory_nodes():
+    """index.nodes behaves like the old path-keyed dict of DirectoryNode objects"""
+    index = _index("a/f1", "a/sub/f2")
+
+    node = index.nodes[("bucket", "a")]
+
+    assert_equal((node.direct_files, node.total_files, node.total_size), (1, 2, 20))
+    assert_equal(node.signature, index.raw_signature(node.node_id).hex())
+    assert_equal(sorted(index.nodes), [("bucket",), ("bucket", "a"), ("bucket", "a", "sub")])
+    assert ("bucket", "missing") not in index.nodes
+
+
+def test_nested_clusters_are_pruned_by_ancestor_chain():
+    """Clusters inside a reported cluster are dropped unless one member lies outside it"""
+    index = _index("a/x/f1", "a/x/sub/f2", "b/x/f1", "b/x/sub/f2", "c/sub/f2", "c/f3")
+
+    clusters = find_exact_duplicates(index)
+
+    assert_equal(
+        [[node.path[1:] for node in cluster.nodes] for cluster in clusters],
+        [[("a",), ("b",)], [("c", "sub"), ("a", "x", "sub"), ("b", "x", "sub")]],
+    )
+
+
+def test_refinalize_removes_emptied_directories_and_matches_a_fresh_build():
+    """Removing the last file drops the node; the remaining signatures equal a rebuild"""
+    index = _index("a/f1", "a/sub/f2", "b/f3")
+
+    dirty = index.apply_change("bucket", "a/sub/f2", 10, "etag-f2", -1)
+    updated, removed = index.refinalize([dirty])
+
+    assert_equal(removed, [dirty])
+    assert_equal(sorted(index.path_of(node_id) for node_id in updated), [("bucket",), ("bucket", "a")])
+    expected = _index("a/f1", "b/f3")
+    assert_equal(
+        {path: node.signature for path, node in index.nodes.items()},
+        {path: node.signature for path, node in expected.nodes.items()},
+    )
+
+
+def test_parallel_finalize_matches_serial_signatures(monkeypatch):
+    """Signing levels in worker processes yields exactly the serial signatures"""
+    keys = [f"d{outer}/s{inner}/f{inner % 3}" for outer in range(4) for inner in range(6)]
+    serial = _index(*keys)
+    monkeypatch.setattr("duplicate_tree.signatures.PARALLEL_MIN_LEVEL_NODES", 1)
+    parallel = DirectoryIndex()
+    for key in keys:
+        parallel.add_file("bucket", key, 10, f"etag-{key.rsplit('/', 1)[-1]}")
+    parallel.finalize(workers=2)
+
+    assert_equal(
+        {path: node.signature for path, node in parallel.nodes.items()},
+        {path: node.signature for path, node in serial.nodes.items()},
+    )
+
+
+def test_signature_encoding_separates_child_names_from_signatures():
+    """Child names are length-prefixed, so shifting bytes between a name and its neighbour changes the hash"""
+    files = bytes(DIGEST_BYTES)
+    signature = bytes(range(32))
+
+    assert compute_signature(files, [(b"ab", signature)]) != compute_signature(files, [(b"a", b"b" + signature[:-1])])
+    assert_equal(
+        compute_signature(files, [(b"x", signature), (b"y", files)]),
+        compute_signature(files, [(b"y", files), (b"x", signature)]),
+    )
@@ -186,7 +186,7 @@ def test_perform_deletions_with_permission_error(tmp_path, capsys):
     cluster = _create_cluster_row([("bucket", "keep"), ("bucket", "protected")], [1000, 1000])
     deletion_groups, _, _ = build_deletion_groups([cluster])
 
-    with patch("shutil.rmtree", side_effect=PermissionError("Access denied")):
+    with patch("os.rmdir", side_effect=PermissionError("Access denied")):
         errors = perform_deletions(deletion_groups, tmp_path)
 
     assert len(errors) > 0
@@ -250,7 +250,7 @@ def test_delete_duplicate_directories_with_errors(tmp_path, capsys):
 
     with (
         patch("builtins.input", return_value="y"),
-        patch("shutil.rmtree", side_effect=OSError("Deletion failed")),
+        patch("os.rmdir", side_effect=OSError("Deletion failed")),
     ):
         delete_duplicate_directories([cluster], tmp_path)
 
@@ -0,0 +1,170 @@
+"""Tests for the persisted, incrementally updated DirectoryIndex in duplicate_tree/incremental.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+import sqlite3
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from duplicate_tree.analysis import build_directory_index_from_db
+from duplicate_tree.core import DirectoryIndex, find_exact_duplicates
+from duplicate_tree.incremental import drop_incremental_index, load_incremental_directory_index, load_persisted_fingerprint
+from migration_state_compact import LAYOUT_COMPACT, LAYOUT_LEGACY
+from migration_state_v2 import FILE_TABLE_SQL, MigrationStateV2
+from tests.assertions import assert_equal
+
+LAST_MODIFIED = "2024-01-01T00:00:00Z"
+MD5 = "0123456789abcdef0123456789abcdef"
+
+
+@pytest.fixture(params=[LAYOUT_COMPACT, LAYOUT_LEGACY])
+def state(request, tmp_path: Path):
+    """State DB holding two identical photo trees plus a distinct docs tree"""
+    db_path = tmp_path / "state.db"
+    if request.param == LAYOUT_LEGACY:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(FILE_TABLE_SQL)
+    migration_state = MigrationStateV2(str(db_path))
+    for root in ("photos", "backup/photos"):
+        for name in ("a.jpg", "b.jpg", "2020/c.jpg"):
+            migration_state.add_file("bucket", f"{root}/{name}", 10, MD5, "STANDARD", LAST_MODIFIED)
+    migration_state.add_file("other", "docs/readme.txt", 5, "plain-etag", "STANDARD", LAST_MODIFIED)
+    return migration_state
+
+
+def _db_path(state) -> str:
+    return str(state.db_conn.db_path)
+
+
+def _execute(state, sql: str, params: tuple = ()) -> None:
+    with state.db_conn.get_connection() as conn:
+        conn.execute(sql, params)
+        conn.commit()
+
+
+def _snapshot(index):
+    return {path: (node.total_files, node.total_size, node.signature) for path, node in index.nodes.items()}
+
+
+def _assert_matches_full_build(state, index):
+    expected, _ = build_directory_index_from_db(_db_path(state))
+    assert_equal(_snapshot(index), _snapshot(expected))
+
+
+def test_first_run_persists_nodes_and_matches_in_memory_build(state):
+    """The full build stores one row per directory and finds the same duplicates"""
+    index, fingerprint = load_incremental_directory_index(_db_path(state))
+
+    _assert_matches_full_build(state, index)
+    assert_equal(fingerprint.total_files, 7)
+    clusters = find_exact_duplicates(index)
+    assert_equal(sorted(node.path for node in clusters[0].nodes), [("bucket", "backup", "photos"), ("bucket", "photos")])
+    with state.db_conn.get_connection() as conn:
+        assert_equal(conn.execute("SELECT COUNT(*) FROM duplicate_tree_nodes").fetchone()[0], len(index.nodes))
+
+
+def test_writers_are_not_locked_out_during_the_first_build(state):
+    """A write during the full build neither waits for its lock nor goes missing from the index"""
+    finalize = DirectoryIndex.finalize
+
+    def finalize_while_syncing(index, **kwargs):
+        with sqlite3.connect(_db_path(state), timeout=0.1) as writer:
+            writer.execute("DELETE FROM files WHERE bucket = 'other'")
+        state.add_file("bucket", "photos/new/d.jpg", 3, MD5, "STANDARD", LAST_MODIFIED)
+        return finalize(index, **kwargs)
+
+    with mock.patch.object(DirectoryIndex, "finalize", autospec=True, side_effect=finalize_while_syncing):
+        index, _ = load_incremental_directory_index(_db_path(state))
+
+    _assert_matches_full_build(state, index)
+    assert ("other",) not in index.nodes
+    with state.db_conn.get_connection() as conn:
+        assert_equal(conn.execute("SELECT COUNT(*) FROM duplicate_tree_changes").fetchone()[0], 0)
+    reloaded, _ = load_incremental_directory_index(_db_path(state))
+    assert_equal(_snapshot(reloaded), _snapshot(index))
+
+
+def test_logged_changes_resign_only_affected_directories(state, capsys):
+    """Edits, inserts and deletes are applied from the change log on the next run"""
+    load_incremental_directory_index(_db_path(state))
+    _, before = load_incremental_directory_index(_db_path(state))
+    _execute(state, "UPDATE files SET size = 11 WHERE bucket = 'bucket' AND key = 'photos/a.jpg'")
+    _execute(state, "UPDATE files SET state = 'verified' WHERE bucket = 'other'")
+    state.add_file("bucket", "photos/new/d.jpg", 3, MD5, "STANDARD", LAST_MODIFIED)
+    _execute(state, "DELETE FROM files WHERE bucket = 'other'")
+    capsys.readouterr()
+
+    index, after = load_incremental_directory_index(_db_path(state))
+
+    _assert_matches_full_build(state, index)
+    assert ("other",) not in index.nodes
+    assert_equal((after.total_files, after.checksum != before.checksum), (7, True))
+    assert "(5 recomputed)" in capsys.readouterr().out
+    with state.db_conn.get_connection() as conn:
+        assert_equal(conn.execute("SELECT COUNT(*) FROM duplicate_tree_changes").fetchone()[0], 0)
+
+
+def test_persisted_fingerprint_is_available_only_without_pending_changes(state):
+    """The O(1) fingerprint matches the loaded index and disappears while changes are unapplied"""
+    assert load_persisted_fingerprint(_db_path(state)) is None
+    _, fingerprint = load_incremental_directory_index(_db_path(state))
+
+    assert_equal(load_persisted_fingerprint(_db_path(state)), fingerprint)
+    _execute(state, "UPDATE files SET state = 'synced'")
+    assert_equal(load_persisted_fingerprint(_db_path(state)), fingerprint)
+    _execute(state, "DELETE FROM files WHERE key = 'photos/a.jpg'")
+    assert load_persisted_fingerprint(_db_path(state)) is None
+
+
+def test_reverting_a_change_restores_the_original_signatures(state):
+    """The files digest is order independent, so undoing an edit yields the same fingerprint"""
+    _, original = load_incremental_directory_index(_db_path(state))
+    _execute(state, "UPDATE files SET local_checksum = 'changed' WHERE key = 'photos/2020/c.jpg'")
+    load_incremental_directory_index(_db_path(state))
+    _execute(state, "UPDATE files SET local_checksum = NULL WHERE key = 'photos/2020/c.jpg'")
+
+    _, restored = load_incremental_directory_index(_db_path(state))
+
+    assert_equal(restored, original)
+
+
+def test_missing_triggers_force_a_full_rebuild(state):
+    """Changes made while tracking was off are picked up by rebuilding from scratch"""
+    load_incremental_directory_index(_db_path(state))
+    with state.db_conn.get_connection() as conn:
+        drop_incremental_index(conn)
+        conn.commit()
+    _execute(state, "DELETE FROM files WHERE key = 'backup/photos/a.jpg'")
+
+    index, _ = load_incremental_directory_index(_db_path(state))
+
+    _assert_matches_full_build(state, index)
+    assert_equal([node.path for cluster in find_exact_duplicates(index) for node in cluster.nodes if len(node.path) == 2], [])
+
+
+def test_signature_version_change_forces_a_full_rebuild(state):
+    """Nodes signed by an older signature scheme are never mixed with new signatures"""
+    load_incremental_directory_index(_db_path(state))
+    _execute(state, "UPDATE duplicate_tree_index_meta SET value = '1' WHERE key = 'signature_version'")
+    _execute(state, "UPDATE duplicate_tree_nodes SET signature = '00'")
+
+    index, _ = load_incremental_directory_index(_db_path(state))
+
+    _assert_matches_full_build(state, index)
+
+
+def test_untrackable_files_view_falls_back_to_full_builds(tmp_path):
+    """A files view that is not the compact layout is scanned in memory without installing triggers"""
+    db_path = tmp_path / "minimal.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE objects (bucket TEXT, key TEXT, size INTEGER, etag TEXT, local_checksum TEXT)")
+        conn.execute("CREATE VIEW files AS SELECT * FROM objects")
+        conn.execute("INSERT INTO objects VALUES ('bucket', 'dir/a.txt', 1, NULL, 'x')")
+
+    index, fingerprint = load_incremental_directory_index(str(db_path))
+
+    assert_equal((fingerprint.total_files, sorted(index.nodes)), (1, [("bucket",), ("bucket", "dir")]))
+    with sqlite3.connect(db_path) as conn:
+        assert_equal(conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0], 0)
@@ -0,0 +1,105 @@
+"""Tests for replacing duplicate tree files with links in duplicate_tree/linking.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+import errno
+import shutil
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from duplicate_tree import linking
+from duplicate_tree.deletion import build_deletion_groups
+from duplicate_tree.linking import FileMismatchError, LinkTask, link_duplicate_directories, link_file, perform_links
+from tests.assertions import assert_equal
+
+
+@pytest.fixture
+def trees(tmp_path: Path):
+    """Two copies of the same tree under one bucket plus the deletion groups for them"""
+    base_path = tmp_path / "drive"
+    for copy in ("first", "second"):
+        for name, data in (("a.txt", b"alpha"), ("sub/b.bin", b"beta" * 1000)):
+            path = base_path / "bucket" / copy / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+    rows = [{"nodes": [{"path": ["bucket", copy], "total_size": 4005} for copy in ("first", "second")]}]
+    groups, _, _ = build_deletion_groups(rows)
+    return base_path, groups, rows, str(tmp_path / "state.db")
+
+
+def _same_inode(left: Path, right: Path) -> bool:
+    return left.stat().st_ino == right.stat().st_ino
+
+
+def _fake_reflink(source: Path, destination: Path):
+    shutil.copyfile(source, destination)
+
+
+def test_hardlink_mode_keeps_every_path_and_links_to_the_kept_copy(trees):
+    """Each duplicate file becomes a hard link; contents and paths are unchanged"""
+    base_path, groups, _, db_path = trees
+
+    stats, errors = perform_links(groups, base_path, db_path, mode="hardlink", workers=2)
+
+    assert_equal((errors, stats["hardlink"], stats["bytes"]), ([], 2, 4005))
+    for name in ("a.txt", "sub/b.bin"):
+        assert _same_inode(base_path / "bucket" / "first" / name, base_path / "bucket" / "second" / name)
+    assert_equal((base_path / "bucket" / "second" / "sub" / "b.bin").read_bytes(), b"beta" * 1000)
+    assert not list((base_path / "bucket" / "second").rglob(f"*{linking.LINK_TEMP_SUFFIX}"))
+
+
+def test_auto_mode_falls_back_to_hard_links_when_reflinks_are_unsupported(trees):
+    """EOPNOTSUPP from FICLONE means hard link in auto mode and a per-file error in reflink mode"""
+    base_path, groups, _, db_path = trees
+    unsupported = OSError(errno.EOPNOTSUPP, "not supported")
+
+    with mock.patch.object(linking, "reflink", side_effect=unsupported):
+        _, errors = perform_links(groups, base_path, db_path, mode="reflink")
+        assert_equal([type(exc) for _, exc in errors], [OSError, OSError])
+        stats, errors = perform_links(groups, base_path, db_path, mode="auto")
+
+    assert_equal((errors, stats["hardlink"]), ([], 2))
+
+
+def test_mismatched_files_are_reported_and_left_untouched(trees):
+    """A same-size file with different content is never replaced"""
+    base_path, groups, _, db_path = trees
+    changed = base_path / "bucket" / "second" / "a.txt"
+    changed.write_bytes(b"ALPHA")
+
+    stats, errors = perform_links(groups, base_path, db_path, mode="hardlink")
+
+    assert_equal([(path, type(exc)) for path, exc in errors], [(changed, FileMismatchError)])
+    assert_equal((changed.read_bytes(), stats["hardlink"]), (b"ALPHA", 1))
+    with pytest.raises(FileMismatchError, match="size"):
+        changed.write_bytes(b"longer content")
+        link_file(LinkTask(kept=base_path / "bucket" / "first" / "a.txt", duplicate=changed))
+
+
+def test_interrupted_runs_resume_from_the_journal(trees):
+    """Reflinked files journaled by an earlier run are not hashed again"""
+    base_path, groups, _, db_path = trees
+    with mock.patch.object(linking, "reflink", side_effect=_fake_reflink):
+        first, _ = perform_links(groups, base_path, db_path, mode="reflink")
+
+    with mock.patch.object(linking, "_sha256", side_effect=AssertionError("already verified")):
+        second, errors = perform_links(groups, base_path, db_path, mode="reflink")
+
+    assert_equal((first["reflink"], second["resumed"], errors), (2, 2, []))
+
+
+def test_link_duplicate_directories_requires_confirmation(trees, capsys):
+    """Nothing is linked unless the prompt is confirmed"""
+    base_path, _, rows, db_path = trees
+
+    with mock.patch.object(linking, "confirm_action", return_value=False):
+        link_duplicate_directories(rows, base_path, db_path, mode="hardlink")
+    assert "Linking cancelled." in capsys.readouterr().out
+    assert not _same_inode(base_path / "bucket" / "first" / "a.txt", base_path / "bucket" / "second" / "a.txt")
+
+    with mock.patch.object(linking, "confirm_action", return_value=True):
+        link_duplicate_directories(rows, base_path, db_path, mode="hardlink")
+    assert "Linking complete." in capsys.readouterr().out
+    assert _same_inode(base_path / "bucket" / "first" / "a.txt", base_path / "bucket" / "second" / "a.txt")
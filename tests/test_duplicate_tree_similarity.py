@@ -0,0 +1,92 @@
+"""Tests for MinHash/LSH near-duplicate detection in duplicate_tree/similarity.py"""
+
+import sqlite3
+from pathlib import Path
+
+from duplicate_tree.analysis import build_directory_index_from_db
+from duplicate_tree.cli import main
+from duplicate_tree.signatures import file_entry_digest
+from duplicate_tree.similarity import (
+    add_entry,
+    empty_sketch,
+    estimate_similarity,
+    find_near_duplicates,
+    merge_sketches,
+    sketch_directories,
+)
+from tests.assertions import assert_equal
+
+
+def _sketch(entries):
+    sketch = empty_sketch()
+    for entry in entries:
+        add_entry(sketch, file_entry_digest(f"file-{entry}", 100, f"md5-{entry}"))
+    return sketch
+
+
+def _write_library_db(tmp_path: Path) -> str:
+    """A photo library, a copy of it with one extra file, and an unrelated tree"""
+    db_path = tmp_path / "state.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE files (bucket TEXT, key TEXT, size INTEGER, local_checksum TEXT, etag TEXT)")
+        rows = [
+            (copy, f"album{number % 4}/photo{number}.jpg", number)
+            for copy in ("photos", "photos-copy")
+            for number in range(40)
+        ]
+        rows += [("photos-copy", "album0/extra.jpg", 7), ("docs", "notes.txt", 99)]
+        conn.executemany(
+            "INSERT INTO files VALUES ('bucket', ?, ?, ?, NULL)",
+            [(f"{root}/{name}", 1000 + number, f"md5-{number}") for root, name, number in rows],
+        )
+    return str(db_path)
+
+
+def test_estimated_similarity_tracks_jaccard_and_merges_like_set_union():
+    """Sketches estimate |A & B| / |A | B| and merging sketches equals sketching the union"""
+    left = _sketch(range(0, 1000))
+    right = _sketch(range(200, 1200))
+
+    assert abs(estimate_similarity(left, right) - 800 / 1200) < 0.15
+    assert_equal(estimate_similarity(left, left), 1.0)
+    assert_equal(merge_sketches(_sketch(range(0, 500)), _sketch(range(500, 1000))), left)
+    assert_equal(estimate_similarity(empty_sketch(), empty_sketch()), 0.0)
+
+
+def test_near_duplicate_library_is_reported_once_without_nested_or_exact_pairs(tmp_path):
+    """The copy with one extra file pairs with the original; its albums and ancestors are not repeated"""
+    db_path = _write_library_db(tmp_path)
+    index, _ = build_directory_index_from_db(db_path)
+
+    sketches = sketch_directories(db_path, index, lambda node_id: True)
+    pairs = find_near_duplicates(index, sketches, threshold=0.8)
+
+    assert_equal([[node.path for node in pair.nodes] for pair in pairs], [[("bucket", "photos-copy"), ("bucket", "photos")]])
+    assert 0.8 <= pairs[0].similarity < 1.0
+    assert 0 < pairs[0].reclaimable_bytes <= pairs[0].nodes[1].total_size
+
+
+def test_candidate_filter_limits_sketches_kept(tmp_path):
+    """Only directories accepted by is_candidate keep a sketch, but they cover their whole subtree"""
+    db_path = _write_library_db(tmp_path)
+    index, _ = build_directory_index_from_db(db_path)
+    root = index.find(("bucket",))
+
+    sketches = sketch_directories(db_path, index, lambda node_id: node_id == root)
+
+    assert_equal(list(sketches), [root])
+    every = sketch_directories(db_path, index, lambda node_id: True)
+    docs, photos, copy = (every[index.find(("bucket", name))] for name in ("docs", "photos", "photos-copy"))
+    assert_equal(sketches[root], merge_sketches(merge_sketches(docs, photos), copy))
+
+
+def test_cli_similarity_flag_reports_near_duplicates(tmp_path, capsys):
+    """--similarity appends the near-duplicate section after the exact clusters"""
+    db_path = _write_library_db(tmp_path)
+
+    exit_code = main(["--db-path", db_path, "--base-path", "/drive", "--min-files", "0", "--min-size-gb", "0", "--similarity"])
+
+    output = capsys.readouterr().out
+    assert_equal(exit_code, 0)
+    assert output.index("EXACT DUPLICATE TREES") < output.index("NEAR-DUPLICATE TREES (similarity >= 80%)")
+    assert "/drive/bucket/photos-copy\n" in output
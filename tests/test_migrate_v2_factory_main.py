@@ -4,14 +4,19 @@ Tests cover:
 - create_migrator factory function
 - main entry point with argparse handling
 - Edge cases for main() function
+- Read-only status path
+- Worker command
+- Rescan command
 """
 
+import subprocess
 import sys
 from unittest import mock
 
 import pytest
 
-from migrate_v2 import S3MigrationV2, create_migrator, main
+from migrate_v2 import S3MigrationV2, create_migrator, main, run_worker, show_migration_status
+from migration_state_v2 import MigrationStateV2, Phase
 
 
 class TestCreateMigrator:
@@ -29,7 +34,7 @@ class TestCreateMigrator:
         """create_migrator returns S3MigrationV2 instance."""
         with (
             mock.patch("migrate_v2.MigrationStateV2"),
-            mock.patch("migrate_v2.boto3.client"),
+            mock.patch("boto3.client"),
             mock.patch("migrate_v2.Path"),
             mock.patch("migrate_v2.DriveChecker"),
             mock.patch("migrate_v2.BucketScanner"),
@@ -55,7 +60,7 @@ class TestCreateMigrator:
         """create_migrator creates all required dependencies."""
         with (
             mock.patch("migrate_v2.MigrationStateV2") as mock_state_class,
-            mock.patch("migrate_v2.boto3.client") as mock_boto3,
+            mock.patch("boto3.client") as mock_boto3,
             mock.patch("migrate_v2.Path"),
             mock.patch("migrate_v2.DriveChecker") as mock_drive_checker_class,
             mock.patch("migrate_v2.BucketScanner") as mock_scanner_class,
@@ -102,12 +107,14 @@ class TestMain:
         mock_migrator.reset.assert_not_called()
 
     def test_main_status_command_shows_status(self, mock_migrator, monkeypatch):
-        """main() shows status when 'status' command provided."""
+        """main() shows status without building the migrator when 'status' command provided."""
         monkeypatch.setattr(sys, "argv", ["migrate_v2.py", "status"])
 
-        main()
+        with mock.patch("migrate_v2.show_migration_status") as mock_show:
+            main()
 
-        mock_migrator.show_status.assert_called_once()
+        mock_show.assert_called_once_with()
+        mock_migrator.show_status.assert_not_called()
         mock_migrator.run.assert_not_called()
         mock_migrator.reset.assert_not_called()
 
@@ -163,9 +170,115 @@ class TestMainEdgeCases:
         for command in ["status", "reset"]:
             monkeypatch.setattr(sys, "argv", ["migrate_v2.py", command])
 
-            with mock.patch("migrate_v2.create_migrator") as mock_create:
+            with (
+                mock.patch("migrate_v2.create_migrator") as mock_create,
+                mock.patch("migrate_v2.show_migration_status"),
+            ):
                 mock_migrator_instance = mock.Mock(spec=S3MigrationV2)
                 mock_create.return_value = mock_migrator_instance
 
                 # Should not raise
                 main()
+
+
+class TestShowMigrationStatus:
+    """Tests for the read-only status path."""
+
+    def test_missing_state_db_prints_message(self, tmp_path, capsys):
+        """show_migration_status reports a missing DB instead of creating one."""
+        db_path = tmp_path / "missing.db"
+        with mock.patch("migrate_v2.config") as mock_cfg:
+            mock_cfg.STATE_DB_PATH = str(db_path)
+            show_migration_status()
+
+        assert "No migration state found" in capsys.readouterr().out
+        assert not db_path.exists()
+
+    def test_reads_existing_state_without_s3(self, tmp_path, capsys):
+        """show_migration_status opens the DB read-only and never creates an S3 client."""
+        db_path = tmp_path / "state.db"
+        MigrationStateV2(str(db_path)).save_bucket_status("bucket-1", 3, 300, {"STANDARD": 3}, True)
+        with (
+            mock.patch("migrate_v2.config") as mock_cfg,
+            mock.patch("boto3.client") as mock_client,
+        ):
+            mock_cfg.STATE_DB_PATH = str(db_path)
+            show_migration_status()
+
+        mock_client.assert_not_called()
+        assert "bucket-1" in capsys.readouterr().out
+
+    def test_import_does_not_load_boto3(self):
+        """Importing migrate_v2 leaves boto3 unloaded so status starts quickly."""
+        code = "import sys, migrate_v2; sys.exit(1 if 'boto3' in sys.modules else 0)"
+        result = subprocess.run([sys.executable, "-c", code], check=False, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+
+class TestRunWorker:
+    """Tests for the lease-based worker command."""
+
+    def test_main_worker_command_exits_with_worker_status(self, monkeypatch):
+        """main() hands worker options to run_worker and exits with its code."""
+        monkeypatch.setattr(sys, "argv", ["migrate_v2.py", "worker", "--worker-id", "w1", "--lease-seconds", "90"])
+
+        with (
+            mock.patch("migrate_v2.run_worker", return_value=0) as mock_run,
+            mock.patch("migrate_v2.create_migrator") as mock_create,
+            pytest.raises(SystemExit) as exc_info,
+        ):
+            main()
+
+        assert exc_info.value.code == 0
+        mock_run.assert_called_once_with("w1", 90.0)
+        mock_create.assert_not_called()
+
+    def test_run_worker_waits_for_glacier_phases(self, tmp_path, capsys):
+        """Workers refuse to start before the single-process scan and restore phases finish."""
+        with (
+            mock.patch("migrate_v2.config") as mock_cfg,
+            mock.patch("boto3.client") as mock_client,
+        ):
+            mock_cfg.STATE_DB_PATH = str(tmp_path / "state.db")
+            assert run_worker("w1") == 1
+
+        mock_client.assert_not_called()
+        assert "current phase: scanning" in capsys.readouterr().out
+
+    def test_run_worker_defers_deletes(self, tmp_path):
+        """Workers build a migrator that never prompts for deletion."""
+        db_path = tmp_path / "state.db"
+        MigrationStateV2(str(db_path)).set_current_phase(Phase.SYNCING)
+        with (
+            mock.patch("migrate_v2.config") as mock_cfg,
+            mock.patch("boto3.client"),
+            mock.patch("migrate_v2.BucketMigrator") as mock_migrator_class,
+            mock.patch("migrate_v2.BucketLeaseWorker") as mock_worker_class,
+        ):
+            mock_cfg.STATE_DB_PATH = str(db_path)
+            mock_cfg.LOCAL_BASE_PATH = str(tmp_path / "drive")
+            assert run_worker("w1", 45.0) == 0
+
+        assert mock_migrator_class.call_args.kwargs["confirm_delete"] is False
+        assert mock_worker_class.call_args.kwargs == {"worker_id": "w1", "lease_seconds": 45.0}
+        mock_worker_class.return_value.run.assert_called_once_with()
+
+
+class TestRunRescan:
+    """Tests for the incremental rescan command."""
+
+    def test_main_rescan_command_exits_with_rescan_status(self, monkeypatch):
+        """main() runs the rescan without building the full migrator."""
+        monkeypatch.setattr(sys, "argv", ["migrate_v2.py", "rescan"])
+
+        with (
+            mock.patch("migrate_v2.run_rescan", return_value=0) as mock_run,
+            mock.patch("migrate_v2.config") as mock_cfg,
+            mock.patch("migrate_v2.create_migrator") as mock_create,
+            pytest.raises(SystemExit) as exc_info,
+        ):
+            main()
+
+        assert exc_info.value.code == 0
+        mock_run.assert_called_once_with(mock_cfg.STATE_DB_PATH)
+        mock_create.assert_not_called()
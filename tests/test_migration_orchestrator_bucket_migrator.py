@@ -188,6 +188,56 @@ def test_process_bucket_already_verified_recomputes_stats(migrator, mock_depende
     migrator.verifier.verify_bucket.assert_called_once()
 
 
+def test_process_bucket_defers_delete_without_confirmation(migrator, mock_dependencies):  # pylint: disable=redefined-outer-name
+    """Worker-mode migrators stop after verification and never prompt"""
+    migrator.confirm_delete = False
+    mock_dependencies["state"].get_bucket_info.return_value = {
+        "sync_complete": True,
+        "verify_complete": True,
+        "delete_complete": False,
+        "file_count": 1,
+        "total_size": 1,
+        "local_file_count": 1,
+        "verified_file_count": 1,
+        "size_verified_count": 1,
+        "checksum_verified_count": 1,
+        "total_bytes_verified": 1,
+    }
+
+    with mock.patch("builtins.input") as mock_input:
+        migrator.process_bucket("test-bucket")
+
+    mock_input.assert_not_called()
+    migrator.deleter.delete_bucket.assert_not_called()
+    mock_dependencies["state"].mark_bucket_delete_complete.assert_not_called()
+
+
+def test_process_bucket_interrupted_sync_is_not_marked_complete(migrator, mock_dependencies):  # pylint: disable=redefined-outer-name
+    """An interrupt raised during sync leaves the bucket unsynced"""
+    mock_dependencies["state"].get_bucket_info.return_value = {
+        "sync_complete": False,
+        "verify_complete": False,
+        "delete_complete": False,
+        "file_count": 1,
+        "total_size": 1,
+        "local_file_count": None,
+        "verified_file_count": None,
+        "size_verified_count": None,
+        "checksum_verified_count": None,
+        "total_bytes_verified": None,
+    }
+
+    def _interrupt(_bucket):
+        migrator.interrupted = True
+
+    migrator.syncer.sync_bucket.side_effect = _interrupt
+
+    migrator.process_bucket("test-bucket")
+
+    mock_dependencies["state"].mark_bucket_sync_complete.assert_not_called()
+    migrator.verifier.verify_bucket.assert_not_called()
+
+
 def test_delete_with_confirmation_user_confirms_yes(migrator, mock_dependencies):  # pylint: disable=redefined-outer-name
     """Test _delete_with_confirmation when user inputs 'yes'"""
     bucket = "test-bucket"
@@ -272,3 +272,52 @@ class TestCompletionStatusReporting:
         assert "MIGRATION PAUSED" in printed_text
         assert "Completed: 1/3" in printed_text
         assert "Remaining: 2" in printed_text
+
+
+class TestOrchestratorTransferScheduler:
+    """Tests for verifying buckets in the order the shared transfer scheduler syncs them"""
+
+    @staticmethod
+    def _orchestrator(mock_dependencies, scheduler):  # pylint: disable=redefined-outer-name
+        return BucketMigrationOrchestrator(
+            mock_dependencies["s3"],
+            mock_dependencies["state"],
+            mock_dependencies["base_path"],
+            mock_dependencies["drive_checker"],
+            mock_dependencies["bucket_migrator"],
+            transfer_scheduler=scheduler,
+        )
+
+    def test_buckets_processed_as_scheduler_finishes_them(self, mock_dependencies):  # pylint: disable=redefined-outer-name
+        """Already-synced buckets go first, then buckets in the order their sync completes"""
+        state = mock_dependencies["state"]
+        state.get_all_buckets.return_value = ["bucket-1", "bucket-2", "bucket-3"]
+        state.get_completed_buckets_for_phase.side_effect = lambda field: ["bucket-2"] if field == "sync_complete" else []
+        scheduler = mock.Mock(interrupted=False, failed_bucket=None)
+
+        def _sync(buckets, on_bucket_synced):
+            assert_equal(buckets, ["bucket-1", "bucket-3"])
+            on_bucket_synced("bucket-3")
+            on_bucket_synced("bucket-1")
+
+        scheduler.sync_buckets.side_effect = _sync
+
+        with mock.patch("builtins.print"):
+            self._orchestrator(mock_dependencies, scheduler).migrate_all_buckets()
+
+        processed = [call.args[0] for call in mock_dependencies["bucket_migrator"].process_bucket.call_args_list]
+        assert_equal(processed, ["bucket-2", "bucket-3", "bucket-1"])
+
+    def test_scheduler_error_is_fatal(self, mock_dependencies):  # pylint: disable=redefined-outer-name
+        """Transfer failures stop the migration and name the failing bucket"""
+        state = mock_dependencies["state"]
+        state.get_all_buckets.return_value = ["bucket-1"]
+        state.get_completed_buckets_for_phase.return_value = []
+        scheduler = mock.Mock(interrupted=False, failed_bucket="bucket-1")
+        scheduler.sync_buckets.side_effect = RuntimeError("Failed to fetch bucket-1/key")
+
+        with mock.patch("builtins.print") as mock_print, pytest.raises(MigrationFatalError):
+            self._orchestrator(mock_dependencies, scheduler).migrate_all_buckets()
+
+        assert mock.call("Bucket: bucket-1") in mock_print.call_args_list
+        mock_dependencies["bucket_migrator"].process_bucket.assert_not_called()
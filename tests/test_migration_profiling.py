@@ -0,0 +1,134 @@
+"""Tests for per-phase profiling in migration_profiling.py and migrate_v2 wiring."""
+
+import hashlib
+import json
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+import migrate_v2
+from migrate_v2 import S3MigrationV2
+from migration_profiling import PhaseProfiler, profile_metadata_key
+from migration_state_v2 import MigrationStateV2, Phase
+
+
+def _busy_work():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(2000)])
+    conn.close()
+    digest = hashlib.md5()
+    for _ in range(200):
+        digest.update(b"x" * 4096)
+    return digest.hexdigest()
+
+
+def test_profile_writes_stats_summary_and_metadata(tmp_path, temp_db):
+    """Profiling a block writes pstats/summary files and stores timings in metadata."""
+    state = MigrationStateV2(temp_db)
+    profiler = PhaseProfiler(tmp_path / "profiles", state)
+
+    with profiler.profile("scanning"):
+        _busy_work()
+
+    assert len(profiler.results) == 1
+    result = profiler.results[0]
+    assert result.phase == "scanning"
+    assert result.wall_seconds >= 0
+    assert (tmp_path / "profiles" / f"{profiler.run_id}-scanning.pstats").exists()
+    summary = open(result.summary_path, encoding="utf-8").read()
+    assert "Phase: scanning" in summary
+    assert "cumulative time" in summary
+    assert set(result.breakdown) == {"sqlite", "hashing", "s3_network", "disk_io", "python"}
+    assert result.breakdown["sqlite"] > 0
+
+    stored = json.loads(state.get_metadata(profile_metadata_key(profiler.run_id, "scanning")))
+    assert stored["phase"] == "scanning"
+    assert stored["run_id"] == profiler.run_id
+    assert "wait_seconds" in stored
+
+
+def test_profile_attributes_worker_thread_time_and_keeps_each_run(tmp_path, temp_db):
+    """Hashing done in pool workers lands in the breakdown; a second run does not overwrite the first"""
+    state = MigrationStateV2(temp_db)
+    first = PhaseProfiler(tmp_path, state)
+    first.run_id = "run-1"
+
+    with first.profile("syncing"), ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda _: _busy_work(), range(4)))
+
+    result = first.results[0]
+    assert result.threads == 3
+    assert result.breakdown["hashing"] > 0
+    assert "Threads:    3" in open(result.summary_path, encoding="utf-8").read()
+
+    second = PhaseProfiler(tmp_path, state)
+    second.run_id = "run-2"
+    with second.profile("syncing"):
+        pass
+    assert json.loads(state.get_metadata(profile_metadata_key("run-1", "syncing")))["threads"] == 3
+    assert json.loads(state.get_metadata(profile_metadata_key("run-2", "syncing")))["run_id"] == "run-2"
+
+
+def test_profile_records_results_when_phase_raises(tmp_path):
+    """A failing phase still produces a profile so the slow path can be inspected."""
+    profiler = PhaseProfiler(tmp_path)
+
+    try:
+        with profiler.profile("syncing"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert [result.phase for result in profiler.results] == ["syncing"]
+
+
+def test_metadata_round_trip_and_missing_key(temp_db):
+    """get_metadata returns None for unknown keys and the stored value otherwise."""
+    state = MigrationStateV2(temp_db)
+    assert state.get_metadata("profile:missing") is None
+    state.set_metadata("profile:x", "1")
+    state.set_metadata("profile:x", "2")
+    assert state.get_metadata("profile:x") == "2"
+    assert state.get_current_phase() == Phase.SCANNING
+
+
+def test_run_profiles_each_executed_phase(tmp_path, migrator, mock_dependencies, capsys):
+    """run() wraps every executed phase in the profiler and prints a summary."""
+    migrator.profiler = PhaseProfiler(tmp_path)
+    mock_dependencies["state"].get_current_phase.side_effect = [Phase.GLACIER_RESTORE, Phase.COMPLETE]
+
+    with mock.patch("migrate_v2.shutil.which", return_value="/usr/local/bin/aws"):
+        migrator.run()
+
+    phases = [result.phase for result in migrator.profiler.results]
+    assert phases == ["glacier_restore", "glacier_wait", "syncing"]
+    assert "PROFILE SUMMARY" in capsys.readouterr().out
+
+
+def test_migrator_without_profiler_defaults_to_none(migrator):
+    """Profiling is opt-in."""
+    assert isinstance(migrator, S3MigrationV2)
+    assert migrator.profiler is None
+
+
+def test_main_profile_flag_requires_directory(monkeypatch, tmp_path):
+    """--profile DIR is forwarded to create_migrator and never swallows the command"""
+    for argv, expected in (
+        (["migrate_v2.py", "--profile", str(tmp_path)], str(tmp_path)),
+        (["migrate_v2.py", f"--profile={tmp_path}", "reset"], str(tmp_path)),
+        (["migrate_v2.py"], None),
+    ):
+        monkeypatch.setattr(sys, "argv", argv)
+        with mock.patch("migrate_v2.create_migrator") as mock_create:
+            mock_create.return_value = mock.Mock(spec=S3MigrationV2)
+            migrate_v2.main()
+        mock_create.assert_called_once_with(profile_dir=expected)
+
+    monkeypatch.setattr(sys, "argv", ["migrate_v2.py", "--profile"])
+    with mock.patch("migrate_v2.create_migrator") as mock_create, pytest.raises(SystemExit):
+        migrate_v2.main()
+    mock_create.assert_not_called()
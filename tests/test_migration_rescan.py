@@ -0,0 +1,79 @@
+"""Tests for BucketRescanner and the rescan command in migration_rescan.py"""
+
+from datetime import datetime, timezone
+from unittest import mock
+
+import pytest
+
+from migration_rescan import BucketRescanner, run_rescan
+from migration_scanner import BucketScanner
+from migration_state_v2 import MigrationStateV2, Phase
+from tests.assertions import assert_equal
+
+LAST_MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _obj(key: str, etag: str = "etag", size: int = 10) -> dict:
+    return {"Key": key, "Size": size, "ETag": f'"{etag}"', "StorageClass": "STANDARD", "LastModified": LAST_MODIFIED}
+
+
+def _s3(buckets: dict) -> mock.Mock:
+    """S3 mock whose paginator yields one page per inner list"""
+    s3 = mock.Mock()
+    s3.list_buckets.return_value = {"Buckets": [{"Name": name} for name in buckets]}
+    s3.get_paginator.return_value.paginate.side_effect = lambda Bucket: [{"Contents": page} for page in buckets[Bucket]]
+    return s3
+
+
+def test_rescan_bucket_reconciles_every_page_and_the_tail(tmp_path, capsys):
+    """Changes in any page and deletions after the last listed key are all detected"""
+    state = MigrationStateV2(str(tmp_path / "state.db"))
+    original = {"bucket": [[_obj("a"), _obj("b")], [_obj("c"), _obj("d")]]}
+    BucketScanner(_s3(original), state).scan_bucket("bucket")
+    state.mark_bucket_sync_complete("bucket")
+
+    current = {"bucket": [[_obj("a"), _obj("b", etag="new")], [_obj("c"), _obj("dir/"), _obj("e", size=5)]]}
+    delta = BucketRescanner(_s3(current), state).rescan_bucket("bucket")
+
+    assert_equal((delta.added, delta.changed, delta.deleted, delta.unchanged), (1, 1, 1, 2))
+    assert_equal(state.get_tombstoned_keys("bucket", ["d", "e"]), {"d"})
+    info = state.get_bucket_info("bucket")
+    assert_equal((info["file_count"], info["total_size"], info["sync_complete"]), (4, 35, 0))
+    assert "1 new, 1 changed, 1 deleted, 2 unchanged" in capsys.readouterr().out
+
+
+def test_rescan_all_buckets_reports_only_changed_buckets(tmp_path):
+    """Unchanged and deleted buckets are left alone; unscanned buckets get a full scan"""
+    state = MigrationStateV2(str(tmp_path / "state.db"))
+    listing = {"same": [[_obj("a")]], "edited": [[_obj("a")]], "gone": [[_obj("a")]], "fresh": [[_obj("a")]]}
+    scanner = BucketScanner(_s3(listing), state)
+    for bucket in ("same", "edited", "gone"):
+        scanner.scan_bucket(bucket)
+    state.mark_bucket_delete_complete("gone")
+
+    listing["edited"] = [[_obj("a", etag="new")]]
+    listing["gone"] = [[]]
+    changed = BucketRescanner(_s3(listing), state).rescan_all_buckets()
+
+    assert_equal(changed, ["edited", "fresh"])
+    assert_equal(state.get_tombstoned_keys("gone", ["a"]), set())
+
+
+@pytest.mark.parametrize(
+    ("phase", "changed", "expected"),
+    [
+        (Phase.COMPLETE, ["bucket-1"], Phase.GLACIER_RESTORE),
+        (Phase.SYNCING, ["bucket-1"], Phase.GLACIER_RESTORE),
+        (Phase.COMPLETE, [], Phase.COMPLETE),
+        (Phase.SCANNING, ["bucket-1"], Phase.SCANNING),
+    ],
+)
+def test_run_rescan_reopens_pipeline_only_when_buckets_changed(tmp_path, phase, changed, expected):
+    """Changed buckets send a finished migration back through restore, sync and verify."""
+    db_path = tmp_path / "state.db"
+    MigrationStateV2(str(db_path)).set_current_phase(phase)
+    with mock.patch("boto3.client"), mock.patch("migration_rescan.BucketRescanner") as mock_rescanner_class:
+        mock_rescanner_class.return_value.rescan_all_buckets.return_value = changed
+        assert run_rescan(str(db_path)) == 0
+
+    assert MigrationStateV2(str(db_path)).get_current_phase() == expected
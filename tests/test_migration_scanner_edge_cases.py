@@ -8,6 +8,7 @@ from unittest import mock
 from migration_scanner import BucketScanner, GlacierWaiter
 from migration_state_v2 import MigrationStateV2
 from tests.assertions import assert_equal
+from tests.conftest_helpers import stub_restore_queue
 
 
 def test_scan_bucket_respects_pagination_interrupt():
@@ -168,13 +169,15 @@ def test_wait_for_restores_prints_restored_files(waiter, state_mock, capsys):
     # Mock _check_restore_status to return True for both files
     waiter.check_restore_status = mock.Mock(return_value=True)
 
-    state_mock.get_files_restoring.side_effect = [
+    stub_restore_queue(
+        state_mock,
+        "files_restoring",
         [
             {"bucket": "test-bucket", "key": "file1.txt"},
             {"bucket": "test-bucket", "key": "file2.txt"},
         ],
         [],
-    ]
+    )
 
     with mock.patch.object(waiter, "_wait_with_interrupt"):
         waiter.wait_for_restores()
@@ -3,6 +3,7 @@
 from migration_scanner import GlacierRestorer
 from migration_state_v2 import Phase
 from tests.assertions import assert_equal
+from tests.conftest_helpers import stub_restore_queue
 
 
 def test_restorer_initialization(s3_mock, state_mock):
@@ -15,7 +16,7 @@ def test_restorer_initialization(s3_mock, state_mock):
 
 def test_request_all_restores_no_glacier_files(restorer, state_mock, capsys):
     """Test when no Glacier files need restore"""
-    state_mock.get_glacier_files_needing_restore.return_value = []
+    stub_restore_queue(state_mock, "glacier_files_needing_restore", [])
 
     restorer.request_all_restores()
 
@@ -26,7 +27,8 @@ def test_request_all_restores_no_glacier_files(restorer, state_mock, capsys):
 
 def test_request_all_restores_with_files(restorer, s3_mock, state_mock):
     """Test requesting restores for Glacier files"""
-    state_mock.get_glacier_files_needing_restore.return_value = [{"bucket": "test-bucket", "key": "file.txt", "storage_class": "GLACIER"}]
+    glacier_file = {"bucket": "test-bucket", "key": "file.txt", "storage_class": "GLACIER"}
+    stub_restore_queue(state_mock, "glacier_files_needing_restore", [glacier_file])
 
     restorer.request_all_restores()
 
@@ -37,11 +39,15 @@ def test_request_all_restores_with_files(restorer, s3_mock, state_mock):
 
 def test_request_all_restores_multiple_files(restorer, s3_mock, state_mock):
     """Test requesting restores for multiple files"""
-    state_mock.get_glacier_files_needing_restore.return_value = [
-        {"bucket": "bucket1", "key": "file1.txt", "storage_class": "GLACIER"},
-        {"bucket": "bucket2", "key": "file2.txt", "storage_class": "GLACIER"},
-        {"bucket": "bucket1", "key": "file3.txt", "storage_class": "DEEP_ARCHIVE"},
-    ]
+    stub_restore_queue(
+        state_mock,
+        "glacier_files_needing_restore",
+        [
+            {"bucket": "bucket1", "key": "file1.txt", "storage_class": "GLACIER"},
+            {"bucket": "bucket2", "key": "file2.txt", "storage_class": "GLACIER"},
+            {"bucket": "bucket1", "key": "file3.txt", "storage_class": "DEEP_ARCHIVE"},
+        ],
+    )
 
     restorer.request_all_restores()
 
@@ -51,10 +57,14 @@ def test_request_all_restores_multiple_files(restorer, s3_mock, state_mock):
 
 def test_request_all_restores_respects_interrupt(restorer, s3_mock, state_mock):
     """Test that request_all_restores stops on interrupt"""
-    state_mock.get_glacier_files_needing_restore.return_value = [
-        {"bucket": "test-bucket", "key": "file1.txt", "storage_class": "GLACIER"},
-        {"bucket": "test-bucket", "key": "file2.txt", "storage_class": "GLACIER"},
-    ]
+    stub_restore_queue(
+        state_mock,
+        "glacier_files_needing_restore",
+        [
+            {"bucket": "test-bucket", "key": "file1.txt", "storage_class": "GLACIER"},
+            {"bucket": "test-bucket", "key": "file2.txt", "storage_class": "GLACIER"},
+        ],
+    )
 
     def interrupt_on_first_call(*_args, **_kwargs):
         restorer.interrupted = True
@@ -5,6 +5,7 @@ from unittest import mock
 from migration_scanner import GlacierWaiter
 from migration_state_v2 import Phase
 from tests.assertions import assert_equal
+from tests.conftest_helpers import stub_restore_queue
 
 
 def test_waiter_initialization(s3_mock, state_mock):
@@ -20,7 +21,7 @@ class TestGlacierWaiterBasicWaiting:
 
     def test_wait_for_restores_no_restoring_files(self, waiter, state_mock, capsys):
         """Test when no files are restoring"""
-        state_mock.get_files_restoring.return_value = []
+        stub_restore_queue(state_mock, "files_restoring", [])
 
         waiter.wait_for_restores()
 
@@ -34,10 +35,12 @@ class TestGlacierWaiterBasicWaiting:
         # Mock _check_restore_status to avoid side_effect issues
         waiter.check_restore_status = mock.Mock(return_value=False)
 
-        state_mock.get_files_restoring.side_effect = [
+        stub_restore_queue(
+            state_mock,
+            "files_restoring",
             [{"bucket": "test-bucket", "key": "file.txt"}],
             [],  # Next check shows no files
-        ]
+        )
 
         with mock.patch.object(waiter, "_wait_with_interrupt") as mock_wait:
             waiter.wait_for_restores()
@@ -60,10 +63,14 @@ class TestGlacierWaiterInterruption:
 
     def test_wait_for_restores_stops_on_interrupt_during_check(self, waiter, state_mock):
         """Test interrupt during restore status check"""
-        state_mock.get_files_restoring.return_value = [
-            {"bucket": "test-bucket", "key": "file1.txt"},
-            {"bucket": "test-bucket", "key": "file2.txt"},
-        ]
+        stub_restore_queue(
+            state_mock,
+            "files_restoring",
+            [
+                {"bucket": "test-bucket", "key": "file1.txt"},
+                {"bucket": "test-bucket", "key": "file2.txt"},
+            ],
+        )
 
         def interrupt_on_second_file(*_args, **_kwargs):
             waiter.interrupted = True
@@ -83,14 +90,17 @@ def test_wait_for_restores_loops_until_complete(waiter, state_mock):
     waiter.check_restore_status = mock.Mock(return_value=False)
 
     # Simulate 2 check cycles
-    state_mock.get_files_restoring.side_effect = [
+    stub_restore_queue(
+        state_mock,
+        "files_restoring",
         [{"bucket": "test-bucket", "key": "file.txt"}],
         [{"bucket": "test-bucket", "key": "file.txt"}],
         [],  # All done
-    ]
+    )
 
     with mock.patch.object(waiter, "_wait_with_interrupt"):
         waiter.wait_for_restores()
 
-    # Should call get_files_restoring 3 times
-    assert_equal(state_mock.get_files_restoring.call_count, 3)
+    # Should poll the restoring count 3 times and stream the queue twice
+    assert_equal(state_mock.count_files_restoring.call_count, 3)
+    assert_equal(state_mock.iter_files_restoring.call_count, 2)
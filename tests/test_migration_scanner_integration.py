@@ -10,6 +10,7 @@ from botocore.exceptions import ClientError
 
 from migration_scanner import BucketScanner, GlacierRestorer, GlacierWaiter
 from migration_state_v2 import MigrationStateV2, Phase
+from tests.conftest_helpers import stub_restore_queue
 
 
 class TestPhaseTransitions:
@@ -30,7 +31,7 @@ class TestPhaseTransitions:
         """Test GlacierRestorer transitions to GLACIER_WAIT phase"""
         mock_s3 = mock.Mock()
         mock_state = mock.Mock(spec=MigrationStateV2)
-        mock_state.get_glacier_files_needing_restore.return_value = []
+        stub_restore_queue(mock_state, "glacier_files_needing_restore", [])
 
         restorer = GlacierRestorer(mock_s3, mock_state)
         restorer.request_all_restores()
@@ -41,7 +42,7 @@ class TestPhaseTransitions:
         """Test GlacierWaiter transitions to SYNCING phase"""
         mock_s3 = mock.Mock()
         mock_state = mock.Mock(spec=MigrationStateV2)
-        mock_state.get_files_restoring.return_value = []
+        stub_restore_queue(mock_state, "files_restoring", [])
 
         waiter = GlacierWaiter(mock_s3, mock_state)
         waiter.wait_for_restores()
@@ -118,11 +119,15 @@ def test_glacier_restorer_early_exit_on_interrupt():
     """Test early exit on interrupt in restore loop"""
     mock_s3 = mock.Mock()
     mock_state = mock.Mock(spec=MigrationStateV2)
-    mock_state.get_glacier_files_needing_restore.return_value = [
-        {"bucket": "bucket1", "key": "file1.txt", "storage_class": "GLACIER"},
-        {"bucket": "bucket2", "key": "file2.txt", "storage_class": "GLACIER"},
-        {"bucket": "bucket3", "key": "file3.txt", "storage_class": "GLACIER"},
-    ]
+    stub_restore_queue(
+        mock_state,
+        "glacier_files_needing_restore",
+        [
+            {"bucket": "bucket1", "key": "file1.txt", "storage_class": "GLACIER"},
+            {"bucket": "bucket2", "key": "file2.txt", "storage_class": "GLACIER"},
+            {"bucket": "bucket3", "key": "file3.txt", "storage_class": "GLACIER"},
+        ],
+    )
 
     restorer = GlacierRestorer(mock_s3, mock_state)
 
@@ -176,7 +181,8 @@ def test_glacier_restorer_handles_non_restore_error():
     """Test that non-RestoreAlreadyInProgress errors propagate"""
     mock_s3 = mock.Mock()
     mock_state = mock.Mock(spec=MigrationStateV2)
-    mock_state.get_glacier_files_needing_restore.return_value = [{"bucket": "test-bucket", "key": "file.txt", "storage_class": "GLACIER"}]
+    glacier_file = {"bucket": "test-bucket", "key": "file.txt", "storage_class": "GLACIER"}
+    stub_restore_queue(mock_state, "glacier_files_needing_restore", [glacier_file])
     error = ClientError(
         {"Error": {"Code": "NoSuchBucket", "Message": "Bucket does not exist"}},
         "RestoreObject",
@@ -194,7 +200,7 @@ def test_glacier_waiter_raises_on_head_object_error():
     mock_s3 = mock.Mock()
     mock_state = mock.Mock(spec=MigrationStateV2)
     # Use side_effect to return files on first call
-    mock_state.get_files_restoring.return_value = [{"bucket": "test-bucket", "key": "file.txt"}]
+    stub_restore_queue(mock_state, "files_restoring", [{"bucket": "test-bucket", "key": "file.txt"}])
     mock_s3.head_object.side_effect = ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not found"}}, "HeadObject")
 
     waiter = GlacierWaiter(mock_s3, mock_state)
@@ -0,0 +1,202 @@
+"""Unit tests for the compact files layout in migration_state_compact.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from migration_state_compact import LAYOUT_COMPACT, LAYOUT_LEGACY, create_compact_schema, files_layout
+from migration_state_compact_convert import compact_files_table
+from migration_state_compact_records import encode_etag, iso_to_epoch_ms
+from migration_state_v2 import FILE_TABLE_SQL, MigrationStateV2
+from tests.assertions import assert_equal
+
+MD5_ETAG = "d41d8cd98f00b204e9800998ecf8427e"
+INSERT_SQL = """
+    INSERT INTO files (bucket, key, size, etag, storage_class, last_modified, state, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+TIMESTAMP = "2025-10-31T00:00:00+00:00"
+
+
+def _row(bucket, key, size=10, etag=MD5_ETAG, storage_class="STANDARD", state="discovered"):
+    return (bucket, key, size, etag, storage_class, TIMESTAMP, state, TIMESTAMP, TIMESTAMP)
+
+
+@pytest.fixture
+def compact_conn():
+    """In-memory database with the compact schema"""
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    create_compact_schema(conn)
+    yield conn
+    conn.close()
+
+
+def _legacy_db(path: Path, rows) -> str:
+    """Create a legacy-layout state DB containing rows"""
+    with sqlite3.connect(path) as conn:
+        conn.execute(FILE_TABLE_SQL)
+    state = MigrationStateV2(str(path))
+    assert_equal(state.db_conn.layout, LAYOUT_LEGACY)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(INSERT_SQL, rows)
+    return str(path)
+
+
+def _files(db_path: str):
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT bucket, key, size, etag, storage_class, last_modified, state FROM files ORDER BY bucket, key"
+        ).fetchall()
+    return [(*row[:5], iso_to_epoch_ms(row[5]), row[6]) for row in rows]
+
+
+def test_encode_etag_packs_md5_and_multipart():
+    """MD5 and multipart ETags become 16-byte blobs; anything else stays text"""
+    assert encode_etag(MD5_ETAG) == bytes.fromhex(MD5_ETAG)
+    assert encode_etag(f"{MD5_ETAG}-12") == bytes.fromhex(MD5_ETAG) + b"-12"
+    assert encode_etag("not-an-md5") == "not-an-md5"
+    assert encode_etag(MD5_ETAG.upper()) == MD5_ETAG.upper()
+    assert encode_etag(None) is None
+
+
+def test_iso_to_epoch_ms_handles_offsets_and_naive_values():
+    """Timestamps convert to UTC epoch milliseconds"""
+    assert_equal(iso_to_epoch_ms("2025-10-31T00:00:00Z"), 1761868800000)
+    assert_equal(iso_to_epoch_ms("2025-10-31T02:00:00.123456+02:00"), 1761868800123)
+    assert_equal(iso_to_epoch_ms("2025-10-31T00:00:00"), 1761868800000)
+    assert_equal(iso_to_epoch_ms("2025-10-31T00:00:00.500z"), 1761868800500)
+    assert iso_to_epoch_ms(None) is None
+
+
+def test_iso_to_epoch_ms_rejects_non_iso_values():
+    """Unparseable timestamps raise instead of being stored as NULL"""
+    with pytest.raises(ValueError):
+        iso_to_epoch_ms("garbage")
+
+
+def test_view_round_trips_legacy_columns(compact_conn):
+    """Rows written through the files view read back in the legacy representation"""
+    compact_conn.execute(INSERT_SQL, _row("bucket-a", "dir/file.txt", etag=f"{MD5_ETAG}-3", storage_class="GLACIER"))
+
+    row = dict(compact_conn.execute("SELECT * FROM files").fetchone())
+
+    assert row["bucket"] == "bucket-a"
+    assert row["etag"] == f"{MD5_ETAG}-3"
+    assert row["storage_class"] == "GLACIER"
+    assert row["state"] == "discovered"
+    assert row["last_modified"] == "2025-10-31T00:00:00.000+00:00"
+    assert row["glacier_restored_at"] is None
+
+
+def test_view_update_keeps_binary_etag(compact_conn):
+    """Updating other columns through the view does not re-encode the stored ETag"""
+    compact_conn.execute(INSERT_SQL, _row("bucket-a", "k"))
+    compact_conn.execute("UPDATE file_records SET etag = ?", (encode_etag(MD5_ETAG),))
+
+    compact_conn.execute("UPDATE files SET state = 'synced', local_path = '/x' WHERE bucket = 'bucket-a' AND key = 'k'")
+
+    stored = compact_conn.execute("SELECT typeof(etag), local_path FROM file_records").fetchone()
+    assert tuple(stored) == ("blob", "/x")
+    assert compact_conn.execute("SELECT state FROM files").fetchone()[0] == "synced"
+
+
+def test_view_insert_or_replace_keeps_bucket_id(compact_conn):
+    """INSERT OR REPLACE through the view replaces the row without re-interning the bucket"""
+    compact_conn.execute(INSERT_SQL, _row("bucket-a", "k", size=1))
+    compact_conn.execute(INSERT_SQL.replace("INSERT", "INSERT OR REPLACE"), _row("bucket-a", "k", size=2))
+
+    assert [tuple(row) for row in compact_conn.execute("SELECT bucket_id, name FROM buckets")] == [(1, "bucket-a")]
+    assert compact_conn.execute("SELECT size FROM files").fetchone()[0] == 2
+
+
+def test_view_duplicate_insert_raises_unique_error(compact_conn):
+    """Plain duplicate inserts still fail with a UNIQUE constraint error"""
+    compact_conn.execute(INSERT_SQL, _row("bucket-a", "k"))
+
+    with pytest.raises(sqlite3.IntegrityError, match="UNIQUE constraint failed"):
+        compact_conn.execute(INSERT_SQL, _row("bucket-a", "k"))
+
+
+def test_view_delete_removes_record(compact_conn):
+    """Deleting through the view removes the file_records row"""
+    compact_conn.execute(INSERT_SQL, _row("bucket-a", "k"))
+    compact_conn.execute("DELETE FROM files WHERE bucket = 'bucket-a'")
+
+    assert compact_conn.execute("SELECT COUNT(*) FROM file_records").fetchone()[0] == 0
+
+
+def test_compact_files_table_converts_legacy_db(tmp_path: Path):
+    """Legacy rows are copied in batches and the table is swapped for the view"""
+    rows = [_row(f"bucket-{i % 3}", f"key-{i:03d}", size=i, etag=MD5_ETAG if i % 2 else "plain") for i in range(25)]
+    db_path = _legacy_db(tmp_path / "state.db", rows)
+    before = _files(db_path)
+
+    result = compact_files_table(db_path, batch_size=4)
+
+    assert_equal(result.rows_copied, 25)
+    assert_equal(result.batches, 7)
+    assert _files(db_path) == before
+    with sqlite3.connect(db_path) as conn:
+        assert files_layout(conn) == LAYOUT_COMPACT
+        assert conn.execute("SELECT COUNT(*) FROM migration_metadata WHERE key = 'compact:cursor'").fetchone()[0] == 0
+    assert_equal(MigrationStateV2(db_path).db_conn.layout, LAYOUT_COMPACT)
+
+
+def test_compact_files_table_replays_concurrent_changes(tmp_path: Path):
+    """Writes behind the copy cursor during the migration are replayed before the swap"""
+    rows = [_row("bucket-a", f"key-{i:02d}") for i in range(10)]
+    db_path = _legacy_db(tmp_path / "state.db", rows)
+    writer = sqlite3.connect(db_path)
+
+    def _write_behind_cursor(copied):
+        if copied == 4:
+            writer.execute("UPDATE files SET state = 'synced' WHERE key = 'key-00'")
+            writer.execute("DELETE FROM files WHERE key = 'key-01'")
+            writer.execute(INSERT_SQL, _row("bucket-a", "key-000"))
+            writer.commit()
+
+    try:
+        result = compact_files_table(db_path, batch_size=4, progress=_write_behind_cursor)
+    finally:
+        writer.close()
+
+    assert_equal(result.pending_replayed, 3)
+    keys = {row[1]: row[6] for row in _files(db_path)}
+    assert keys["key-00"] == "synced"
+    assert "key-01" not in keys
+    assert "key-000" in keys
+    assert_equal(len(keys), 10)
+
+
+def test_compact_files_table_resumes_from_cursor(tmp_path: Path):
+    """An interrupted migration continues from its saved cursor"""
+    rows = [_row("bucket-a", f"key-{i:02d}") for i in range(10)]
+    db_path = _legacy_db(tmp_path / "state.db", rows)
+
+    def _interrupt(copied):
+        if copied >= 4:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        compact_files_table(db_path, batch_size=4, progress=_interrupt)
+    with sqlite3.connect(db_path) as conn:
+        assert files_layout(conn) == LAYOUT_LEGACY
+
+    result = compact_files_table(db_path, batch_size=4)
+
+    assert_equal(result.rows_copied, 6)
+    assert_equal(len(_files(db_path)), 10)
+
+
+def test_compact_files_table_is_noop_when_already_compact(tmp_path: Path):
+    """Running against a compact DB reports already_compact"""
+    db_path = str(tmp_path / "state.db")
+    MigrationStateV2(db_path)
+
+    result = compact_files_table(db_path)
+
+    assert result.already_compact is True
@@ -0,0 +1,134 @@
+"""Tests for state DB maintenance steps in migration_state_maintenance.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+import sqlite3
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from migration_state_maintenance import MaintenanceOptions, backup_database, maintain_state_db
+from migration_state_v2 import MigrationStateV2
+from tests.assertions import assert_equal
+
+LAST_MODIFIED = "2024-01-01T00:00:00Z"
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> Path:
+    """State DB with a few thousand file rows"""
+    path = tmp_path / "state.db"
+    state = MigrationStateV2(str(path))
+    with state.db_conn.get_connection() as conn:
+        for idx in range(3000):
+            conn.execute(
+                """INSERT INTO files (bucket, key, size, etag, storage_class, last_modified, state, created_at, updated_at)
+                VALUES ('bucket-a', ?, 10, NULL, 'STANDARD', ?, 'discovered', ?, ?)""",
+                (f"dir/key-{idx:05d}-{'x' * 64}", LAST_MODIFIED, LAST_MODIFIED, LAST_MODIFIED),
+            )
+        conn.commit()
+    return path
+
+
+def _pragma(path: Path, name: str):
+    with sqlite3.connect(path) as conn:
+        return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def test_default_run_checks_integrity_and_gathers_statistics(db_path):
+    """The default steps leave planner statistics behind without rebuilding the file"""
+    result = maintain_state_db(str(db_path), MaintenanceOptions())
+
+    assert result.integrity_ok
+    assert_equal([step.name for step in result.steps], ["quick integrity check", "analyze + optimize", "incremental vacuum"])
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+    assert result.size_before > 0 and result.size_after > 0
+
+
+def test_online_backup_runs_while_another_connection_is_writing(db_path, tmp_path):
+    """The backup API copies a consistent snapshot while a writer holds its lock"""
+    writer = sqlite3.connect(db_path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("UPDATE migration_metadata SET value = value")
+    try:
+        result = maintain_state_db(str(db_path), MaintenanceOptions(backup_path=tmp_path / "backup" / "copy.db", analyze=False))
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+    assert_equal(result.steps[1].name, "online backup")
+    with sqlite3.connect(tmp_path / "backup" / "copy.db") as conn:
+        assert_equal(conn.execute("SELECT COUNT(*) FROM files").fetchone()[0], 3000)
+    assert not (tmp_path / "backup" / "copy.db.backup-tmp").exists()
+
+
+
+def test_backup_copies_one_snapshot_while_a_writer_commits_between_steps(db_path, tmp_path):
+    """In WAL mode, commits from another connection during the copy neither restart it nor leak into it"""
+    writer = sqlite3.connect(db_path, isolation_level=None)
+    writer.execute("PRAGMA journal_mode = WAL").fetchall()
+    steps = []
+
+    def _progress(remaining: int, total: int) -> None:
+        steps.append((remaining, total))
+        if len(steps) > 10:
+            return
+        writer.execute(
+            """INSERT INTO files (bucket, key, size, etag, storage_class, last_modified, state, created_at, updated_at)
+            VALUES ('bucket-b', ?, 10, NULL, 'STANDARD', ?, 'discovered', ?, ?)""",
+            (f"new-{len(steps)}", LAST_MODIFIED, LAST_MODIFIED, LAST_MODIFIED),
+        )
+
+    source = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        backup_database(source, tmp_path / "copy.db", pages=4, progress=_progress)
+        assert not source.in_transaction
+    finally:
+        source.close()
+        writer.close()
+
+    total_pages = steps[0][1]
+    assert_equal((len(steps), steps[-1][0]), (-(-total_pages // 4), 0))
+    with sqlite3.connect(tmp_path / "copy.db") as conn:
+        assert_equal(conn.execute("SELECT COUNT(*) FROM files").fetchone()[0], 3000)
+        assert_equal(conn.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+    with sqlite3.connect(db_path) as conn:
+        assert_equal(conn.execute("SELECT COUNT(*) FROM files WHERE bucket = 'bucket-b'").fetchone()[0], 10)
+
+
+def test_rebuild_migrates_page_size_and_auto_vacuum_then_incremental_vacuum_reclaims(db_path):
+    """A rebuild applies the new page layout; later runs release free pages incrementally"""
+    maintain_state_db(str(db_path), MaintenanceOptions(page_size=8192, auto_vacuum="incremental"))
+    assert_equal((_pragma(db_path, "page_size"), _pragma(db_path, "auto_vacuum")), (8192, 2))
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM files")
+    assert _pragma(db_path, "freelist_count") > 0
+
+    result = maintain_state_db(str(db_path), MaintenanceOptions(integrity="none", analyze=False))
+
+    assert_equal(_pragma(db_path, "freelist_count"), 0)
+    assert "released" in result.steps[0].detail
+    assert result.size_after < result.size_before
+
+
+def test_failed_integrity_check_skips_remaining_steps(db_path, tmp_path):
+    """Nothing is backed up or rebuilt from a DB that fails its integrity check"""
+    with mock.patch("migration_state_maintenance.check_integrity", return_value=["row 1 missing from index"]):
+        result = maintain_state_db(str(db_path), MaintenanceOptions(backup_path=tmp_path / "copy.db", vacuum=True))
+
+    assert not result.integrity_ok
+    assert_equal(len(result.steps), 1)
+    assert not (tmp_path / "copy.db").exists()
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"integrity": "sometimes"}, {"auto_vacuum": "weekly"}, {"page_size": 3000}],
+)
+def test_options_reject_invalid_values(kwargs):
+    """Typos fail before the DB is touched"""
+    with pytest.raises(ValueError):
+        MaintenanceOptions(**kwargs)
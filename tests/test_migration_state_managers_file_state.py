@@ -2,11 +2,12 @@
 
 # pylint: disable=redefined-outer-name  # pytest fixtures
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import pytest
 
 from migration_state_managers import FileStateManager
+from migration_state_restore_queue import RestoreQueueManager
 from tests.assertions import assert_equal
 
 
@@ -72,8 +73,8 @@ def test_add_file_is_idempotent(file_mgr, db_conn):
 
 
 def test_add_file_sets_timestamps(file_mgr, db_conn):
-    """Test that created_at and updated_at are set"""
-    before_time = datetime.now(timezone.utc).isoformat()
+    """Test that created_at and updated_at are set (stored at millisecond precision)"""
+    before_time = datetime.now(timezone.utc) - timedelta(milliseconds=1)
     file_mgr.add_file(
         bucket="test-bucket",
         key="file.txt",
@@ -82,7 +83,7 @@ def test_add_file_sets_timestamps(file_mgr, db_conn):
         storage_class="STANDARD",
         last_modified="2024-01-01T00:00:00Z",
     )
-    after_time = datetime.now(timezone.utc).isoformat()
+    after_time = datetime.now(timezone.utc)
 
     with db_conn.get_connection() as conn:
         row = conn.execute(
@@ -92,7 +93,7 @@ def test_add_file_sets_timestamps(file_mgr, db_conn):
 
     assert row["created_at"] is not None
     assert row["updated_at"] is not None
-    assert before_time <= row["created_at"] <= after_time
+    assert before_time <= datetime.fromisoformat(row["created_at"]) <= after_time
 
 
 def test_mark_glacier_restore_requested(file_mgr, db_conn):
@@ -140,7 +141,7 @@ def test_mark_glacier_restored(file_mgr, db_conn):
     assert row["glacier_restored_at"] is not None
 
 
-def test_get_glacier_files_needing_restore(file_mgr):
+def test_get_glacier_files_needing_restore(file_mgr, db_conn):
     """Test retrieving Glacier files that need restore"""
     file_mgr.add_file(
         bucket="test-bucket",
@@ -179,7 +180,7 @@ def test_get_glacier_files_needing_restore(file_mgr):
     )
     file_mgr.mark_glacier_restore_requested("test-bucket", "glacier2.txt")
 
-    files = file_mgr.get_glacier_files_needing_restore()
+    files = RestoreQueueManager(db_conn).get_glacier_files_needing_restore()
 
     keys = [f["key"] for f in files]
     assert "glacier1.txt" in keys
@@ -189,7 +190,7 @@ def test_get_glacier_files_needing_restore(file_mgr):
     assert_equal(len(files), 2)
 
 
-def test_get_files_restoring(file_mgr):
+def test_get_files_restoring(file_mgr, db_conn):
     """Test retrieving files currently being restored"""
     file_mgr.add_file(
         bucket="test-bucket",
@@ -230,7 +231,7 @@ def test_get_files_restoring(file_mgr):
     file_mgr.mark_glacier_restore_requested("test-bucket", "glacier3.txt")
     file_mgr.mark_glacier_restored("test-bucket", "glacier3.txt")
 
-    files = file_mgr.get_files_restoring()
+    files = RestoreQueueManager(db_conn).get_files_restoring()
 
     keys = [f["key"] for f in files]
     assert "glacier2.txt" in keys
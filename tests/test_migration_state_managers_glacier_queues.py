@@ -0,0 +1,90 @@
+"""Unit tests for the streamed Glacier work queues in migration_state_restore_queue.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from migration_state_compact import LAYOUT_COMPACT, LAYOUT_LEGACY
+from migration_state_v2 import FILE_TABLE_SQL, MigrationStateV2
+from tests.assertions import assert_equal
+
+LAST_MODIFIED = "2024-01-01T00:00:00Z"
+
+
+@pytest.fixture(params=[LAYOUT_COMPACT, LAYOUT_LEGACY])
+def state(request, tmp_path: Path):
+    """MigrationStateV2 on a fresh DB in each files layout"""
+    db_path = tmp_path / "state.db"
+    if request.param == LAYOUT_LEGACY:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(FILE_TABLE_SQL)
+    migration_state = MigrationStateV2(str(db_path))
+    assert_equal(migration_state.db_conn.layout, request.param)
+    return migration_state
+
+
+def _add_files(state, bucket: str, count: int, storage_class: str = "GLACIER"):
+    for idx in range(count):
+        state.add_file(bucket, f"key-{idx:03d}", 10, f"etag{idx}", storage_class, LAST_MODIFIED)
+
+
+def _plan(state, sql: str) -> str:
+    with state.db_conn.get_connection() as conn:
+        return " ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+
+
+def test_iter_glacier_files_needing_restore_pages_in_key_order(state):
+    """Pending files stream in bounded batches, grouped by bucket, and skip non-Glacier classes"""
+    _add_files(state, "bucket-a", 4)
+    _add_files(state, "bucket-b", 3, "DEEP_ARCHIVE")
+    _add_files(state, "bucket-c", 2, "STANDARD")
+
+    batches = list(state.iter_glacier_files_needing_restore(batch_size=3))
+
+    assert_equal([len(batch) for batch in batches], [3, 3, 1])
+    keys = [(file["bucket"], file["key"]) for batch in batches for file in batch]
+    assert keys == sorted(keys)
+    assert_equal(state.count_glacier_files_needing_restore(), 7)
+
+
+def test_iter_glacier_files_needing_restore_survives_marks_between_batches(state):
+    """Marking files as requested while iterating neither skips nor repeats files"""
+    _add_files(state, "bucket-a", 7)
+
+    seen = []
+    for batch in state.iter_glacier_files_needing_restore(batch_size=2):
+        for file in batch:
+            seen.append(file["key"])
+            state.mark_glacier_restore_requested(file["bucket"], file["key"])
+
+    assert_equal(seen, [f"key-{idx:03d}" for idx in range(7)])
+    assert_equal(state.count_glacier_files_needing_restore(), 0)
+    assert_equal(state.count_files_restoring(), 7)
+
+
+def test_iter_files_restoring_excludes_restored(state):
+    """Restored files leave the restoring queue"""
+    _add_files(state, "bucket-a", 3)
+    for idx in range(3):
+        state.mark_glacier_restore_requested("bucket-a", f"key-{idx:03d}")
+    state.mark_glacier_restored("bucket-a", "key-001")
+
+    batches = list(state.iter_files_restoring(batch_size=1))
+
+    assert_equal([file["key"] for batch in batches for file in batch], ["key-000", "key-002"])
+    assert_equal(state.count_files_restoring(), 2)
+
+
+def test_restore_queues_use_partial_indexes(state):
+    """Both queues are served by their partial indexes rather than a table scan"""
+    manager = state.restore_queue
+    with state.db_conn.get_connection() as conn:
+        pending = manager._queue_where(conn, "restore_pending")  # pylint: disable=protected-access
+        restoring = manager._queue_where(conn, "restoring")  # pylint: disable=protected-access
+    table = "file_records r" if state.db_conn.layout == LAYOUT_COMPACT else "files"
+
+    assert "_restore_pending" in _plan(state, f"SELECT COUNT(*) FROM {table} WHERE {pending}")
+    assert "_restoring" in _plan(state, f"SELECT COUNT(*) FROM {table} WHERE {restoring}")
@@ -0,0 +1,78 @@
+"""Unit tests for BucketLeaseManager from migration_state_leases.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+from pathlib import Path
+
+import pytest
+
+from migration_state_v2 import MigrationStateV2
+from tests.assertions import assert_equal
+
+NOW = 1_000_000.0
+
+
+@pytest.fixture
+def state(tmp_path: Path):
+    """State DB with three scanned buckets"""
+    migration_state = MigrationStateV2(str(tmp_path / "state.db"))
+    for bucket in ("bucket-a", "bucket-b", "bucket-c"):
+        migration_state.save_bucket_status(bucket, 1, 10, {"STANDARD": 1}, True)
+    return migration_state
+
+
+def test_claim_hands_out_each_bucket_once(state):
+    """Concurrent workers receive distinct buckets in bucket order"""
+    first = state.claim_bucket_lease("w1", 60, now=NOW)
+    second = state.claim_bucket_lease("w2", 60, now=NOW)
+    third = state.claim_bucket_lease("w3", 60, now=NOW)
+
+    assert_equal([first.bucket, second.bucket, third.bucket], ["bucket-a", "bucket-b", "bucket-c"])
+    assert_equal(first.expires_at, NOW + 60)
+    assert state.claim_bucket_lease("w4", 60, now=NOW) is None
+    assert_equal(state.count_leased_buckets(now=NOW), 3)
+
+
+def test_claim_skips_verified_buckets(state):
+    """Verified buckets no longer need a worker"""
+    state.mark_bucket_verify_complete("bucket-a", 1, 1, 1, 10, 1)
+
+    lease = state.claim_bucket_lease("w1", 60, now=NOW)
+
+    assert_equal(lease.bucket, "bucket-b")
+
+
+def test_expired_lease_is_taken_over(state):
+    """A lease that stopped heartbeating is reclaimed and the old owner can no longer renew it"""
+    state.claim_bucket_lease("dead", 60, now=NOW)
+    state.claim_bucket_lease("w2", 600, now=NOW)
+    state.claim_bucket_lease("w3", 600, now=NOW)
+
+    lease = state.claim_bucket_lease("w4", 60, now=NOW + 61)
+
+    assert_equal((lease.bucket, lease.worker_id, lease.claim_count), ("bucket-a", "w4", 2))
+    assert state.renew_bucket_lease("bucket-a", "dead", 60, now=NOW + 62) is False
+    assert state.renew_bucket_lease("bucket-a", "w4", 60, now=NOW + 62) is True
+
+
+def test_renew_keeps_lease_from_expiring(state):
+    """Heartbeats push expiry forward so other workers cannot steal the bucket"""
+    state.claim_bucket_lease("w1", 60, now=NOW)
+    state.mark_bucket_verify_complete("bucket-b", 1, 1, 1, 10, 1)
+    state.mark_bucket_verify_complete("bucket-c", 1, 1, 1, 10, 1)
+
+    assert state.renew_bucket_lease("bucket-a", "w1", 60, now=NOW + 50) is True
+
+    assert state.claim_bucket_lease("w2", 60, now=NOW + 100) is None
+
+
+def test_release_frees_bucket_and_ignores_other_workers(state):
+    """Only the owner's release drops the lease"""
+    state.claim_bucket_lease("w1", 60, now=NOW)
+
+    state.release_bucket_lease("bucket-a", "w2")
+    assert_equal(state.count_leased_buckets(now=NOW), 1)
+
+    state.release_bucket_lease("bucket-a", "w1")
+    assert_equal(state.count_leased_buckets(now=NOW), 0)
+    assert_equal(state.claim_bucket_lease("w2", 60, now=NOW).bucket, "bucket-a")
@@ -0,0 +1,108 @@
+"""Unit tests for incremental rescans and file tombstones in migration_state_rescan.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from migration_state_compact import LAYOUT_COMPACT, LAYOUT_LEGACY
+from migration_state_v2 import FILE_TABLE_SQL, MigrationStateV2
+from tests.assertions import assert_equal
+
+LAST_MODIFIED = "2024-01-01T00:00:00Z"
+BUCKET = "bucket-a"
+
+
+@pytest.fixture(params=[LAYOUT_COMPACT, LAYOUT_LEGACY])
+def state(request, tmp_path: Path):
+    """Scanned, synced and verified bucket holding key-0..key-3 in each files layout"""
+    db_path = tmp_path / "state.db"
+    if request.param == LAYOUT_LEGACY:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(FILE_TABLE_SQL)
+    migration_state = MigrationStateV2(str(db_path))
+    for idx in range(4):
+        migration_state.add_file(BUCKET, f"key-{idx}", 10, f"etag{idx}", "STANDARD", LAST_MODIFIED)
+    migration_state.save_bucket_status(BUCKET, 4, 40, {"STANDARD": 4}, True)
+    migration_state.mark_bucket_sync_complete(BUCKET)
+    migration_state.mark_bucket_verify_complete(BUCKET, 4, 4, 4, 40, 4)
+    return migration_state
+
+
+def _listing(*overrides):
+    rows = {f"key-{idx}": (f"key-{idx}", 10, f"etag{idx}", "STANDARD", LAST_MODIFIED) for idx in range(4)}
+    for row in overrides:
+        if row[1] is None:
+            rows.pop(row[0])
+        else:
+            rows[row[0]] = row
+    return [rows[key] for key in sorted(rows)]
+
+
+def _file(state, key):
+    with state.db_conn.get_connection() as conn:
+        row = conn.execute("SELECT * FROM files WHERE bucket = ? AND key = ?", (BUCKET, key)).fetchone()
+    return dict(row) if row else None
+
+
+def test_unchanged_listing_keeps_bucket_flags(state):
+    """A listing identical to the stored rows writes nothing and leaves the bucket verified"""
+    delta = state.rescan_files(BUCKET, _listing(), None, None)
+
+    assert_equal((delta.unchanged, delta.modified), (4, 0))
+    info = state.get_bucket_info(BUCKET)
+    assert info["sync_complete"] and info["verify_complete"]
+
+
+def test_changed_object_is_reset_and_bucket_reopened(state):
+    """A new ETag resets the row to discovered and clears sync/verify in the same transaction"""
+    with state.db_conn.get_connection() as conn:
+        conn.execute("UPDATE files SET state = 'verified', local_path = '/drive/key-1' WHERE key = 'key-1'")
+        conn.commit()
+
+    delta = state.rescan_files(BUCKET, _listing(("key-1", 12, "new-etag", "GLACIER", LAST_MODIFIED)), None, None)
+
+    assert_equal((delta.changed, delta.unchanged), (1, 3))
+    row = _file(state, "key-1")
+    assert_equal(
+        (row["size"], row["etag"], row["storage_class"], row["state"], row["local_path"]), (12, "new-etag", "GLACIER", "discovered", None)
+    )
+    info = state.get_bucket_info(BUCKET)
+    assert not info["sync_complete"] and not info["verify_complete"]
+    assert info["scan_complete"]
+
+
+def test_missing_object_is_tombstoned_until_it_reappears(state):
+    """Deleted keys move to file_tombstones; listing them again restores the row"""
+    delta = state.rescan_files(BUCKET, _listing(("key-2", None)), None, None)
+
+    assert_equal(delta.deleted, 1)
+    assert _file(state, "key-2") is None
+    assert_equal(state.get_tombstoned_keys(BUCKET, ["key-1", "key-2"]), {"key-2"})
+
+    delta = state.rescan_files(BUCKET, _listing(), None, None)
+
+    assert_equal(delta.added, 1)
+    assert_equal(_file(state, "key-2")["state"], "discovered")
+    assert_equal(state.get_tombstoned_keys(BUCKET, ["key-2"]), set())
+
+
+def test_range_bounds_limit_tombstoning_to_the_page(state):
+    """Only stored keys inside (after, through] are compared with a page"""
+    first = state.rescan_files(BUCKET, _listing()[:2], None, "key-1")
+    tail = state.rescan_files(BUCKET, [("key-3", 10, "etag3", "STANDARD", LAST_MODIFIED)], "key-1", None)
+
+    assert_equal((first.unchanged, first.deleted), (2, 0))
+    assert_equal((tail.unchanged, tail.deleted), (1, 1))
+    assert_equal(state.get_tombstoned_keys(BUCKET, [f"key-{idx}" for idx in range(4)]), {"key-2"})
+
+
+def test_update_bucket_scan_totals_keeps_pipeline_flags(state):
+    """Refreshing totals after a rescan does not reset sync/verify like save_bucket_status does"""
+    state.update_bucket_scan_totals(BUCKET, 5, 50, {"STANDARD": 5})
+
+    info = state.get_bucket_info(BUCKET)
+    assert_equal((info["file_count"], info["total_size"]), (5, 50))
+    assert info["sync_complete"] and info["verify_complete"]
@@ -1,8 +1,11 @@
 """Unit tests for MigrationStateV2 bucket operations and phase management."""
 
 import json
+import sqlite3
 from pathlib import Path
 
+import pytest
+
 from migration_state_v2 import MigrationStateV2, Phase
 
 DEFAULT_BUCKET = "test-bucket"
@@ -236,3 +239,35 @@ def test_migration_state_v2_phase_transition_sequence(tmp_path: Path):
     for expected_phase in phases:
         state.set_current_phase(expected_phase)
         assert state.get_current_phase() == expected_phase
+
+
+def test_migration_state_v2_get_all_bucket_statuses(tmp_path: Path):
+    """get_all_bucket_statuses returns every bucket row in name order."""
+    state = MigrationStateV2(str(tmp_path / "test.db"))
+    state.save_bucket_status("bucket-b", MEDIUM_FILE_COUNT, MEDIUM_TOTAL_SIZE, {"STANDARD": MEDIUM_FILE_COUNT}, True)
+    state.save_bucket_status("bucket-a", SMALL_FILE_COUNT, SMALL_TOTAL_SIZE, {"STANDARD": SMALL_FILE_COUNT}, True)
+    state.mark_bucket_sync_complete("bucket-a")
+
+    statuses = state.get_all_bucket_statuses()
+
+    assert [status.bucket for status in statuses] == ["bucket-a", "bucket-b"]
+    assert statuses[0].sync_complete is True
+    assert statuses[1].file_count == MEDIUM_FILE_COUNT
+
+
+def test_migration_state_v2_read_only_does_not_write(tmp_path: Path):
+    """A read-only state reads existing rows and rejects writes."""
+    db_path = tmp_path / "test.db"
+    writer = MigrationStateV2(str(db_path))
+    writer.save_bucket_status(DEFAULT_BUCKET, DEFAULT_FILE_COUNT, DEFAULT_TOTAL_SIZE, DEFAULT_STORAGE, True)
+    writer.set_current_phase(Phase.SYNCING)
+    mtime = db_path.stat().st_mtime_ns
+
+    reader = MigrationStateV2(str(db_path), read_only=True)
+
+    assert reader.get_current_phase() == Phase.SYNCING
+    assert reader.get_scan_summary()["storage_classes"] == DEFAULT_STORAGE
+    assert [status.bucket for status in reader.get_all_bucket_statuses()] == [DEFAULT_BUCKET]
+    with pytest.raises(sqlite3.OperationalError):
+        reader.set_current_phase(Phase.COMPLETE)
+    assert db_path.stat().st_mtime_ns == mtime
@@ -6,7 +6,8 @@ from pathlib import Path
 import pytest
 
 from migration_state_managers import PhaseManager
-from migration_state_v2 import DatabaseConnection
+from migration_state_compact import LAYOUT_COMPACT, LAYOUT_LEGACY
+from migration_state_v2 import FILE_TABLE_SQL, DatabaseConnection
 
 
 def test_database_connection_initialization(tmp_path: Path):
@@ -40,14 +41,30 @@ def test_database_connection_closes_properly(tmp_path: Path):
         conn.execute("SELECT 1")
 
 
-def test_schema_files_table_created(tmp_path: Path):
-    """DatabaseConnection creates files table."""
+def test_schema_files_view_created(tmp_path: Path):
+    """DatabaseConnection creates the compact file_records table behind a files view."""
     db_path = tmp_path / "test.db"
     db_conn = DatabaseConnection(str(db_path))
 
+    with db_conn.get_connection() as conn:
+        objects = dict(conn.execute("SELECT name, type FROM sqlite_master WHERE name IN ('files', 'file_records')"))
+
+    assert objects == {"files": "view", "file_records": "table"}
+    assert db_conn.layout == LAYOUT_COMPACT
+
+
+def test_existing_legacy_files_table_is_kept(tmp_path: Path):
+    """DatabaseConnection leaves an existing legacy files table in place."""
+    db_path = tmp_path / "test.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(FILE_TABLE_SQL)
+
+    db_conn = DatabaseConnection(str(db_path))
+
     with db_conn.get_connection() as conn:
         cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='files'")
         assert cursor.fetchone() is not None
+    assert db_conn.layout == LAYOUT_LEGACY
 
 
 def test_schema_bucket_status_table_created(tmp_path: Path):
@@ -75,13 +92,31 @@ def test_schema_indices_created(tmp_path: Path):
     db_path = tmp_path / "test.db"
     db_conn = DatabaseConnection(str(db_path))
 
+    with db_conn.get_connection() as conn:
+        cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        indices = {row[0] for row in cursor.fetchall()}
+
+        assert "idx_file_records_state" in indices
+        assert "idx_file_records_restore_pending" in indices
+        assert "idx_file_records_restoring" in indices
+
+
+def test_legacy_schema_indices_created(tmp_path: Path):
+    """DatabaseConnection keeps the legacy indices on a legacy files table."""
+    db_path = tmp_path / "test.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(FILE_TABLE_SQL)
+    db_conn = DatabaseConnection(str(db_path))
+
     with db_conn.get_connection() as conn:
         cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
         indices = {row[0] for row in cursor.fetchall()}
 
         assert "idx_files_state" in indices
-        assert "idx_files_storage_class" in indices
         assert "idx_files_bucket" in indices
+        assert "idx_files_restore_pending" in indices
+        assert "idx_files_restoring" in indices
+        assert "idx_files_storage_class" not in indices
 
 
 def test_database_schema_migration_idempotent(tmp_path: Path):
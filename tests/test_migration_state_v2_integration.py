@@ -65,7 +65,7 @@ def test_multiple_buckets_independent_status(tmp_path: Path):
 
 
 def test_storage_classes_aggregation(tmp_path: Path):
-    """Test storage classes are properly aggregated in scan summary."""
+    """Test per-bucket storage class counters are summed in scan summary."""
     db_path = tmp_path / "test.db"
     state = MigrationStateV2(str(db_path))
 
@@ -75,8 +75,8 @@ def test_storage_classes_aggregation(tmp_path: Path):
     state.add_file("b2", "k4", 400, "e4", "GLACIER_IR", "2025-10-31T00:00:00Z")
     state.add_file("b2", "k5", 100, "e5", "GLACIER", "2025-10-31T00:00:00Z")
 
-    state.save_bucket_status("b1", 3, 600, {}, True)
-    state.save_bucket_status("b2", 2, 500, {}, True)
+    state.save_bucket_status("b1", 3, 600, {"STANDARD": 1, "GLACIER": 1, "DEEP_ARCHIVE": 1}, True)
+    state.save_bucket_status("b2", 2, 500, {"GLACIER_IR": 1, "GLACIER": 1}, True)
 
     summary = state.get_scan_summary()
 
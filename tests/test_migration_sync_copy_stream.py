@@ -0,0 +1,75 @@
+"""Tests for the buffered copy_stream download loop in migration_sync.py"""
+
+from __future__ import annotations
+
+from io import BytesIO
+from unittest import mock
+
+import pytest
+
+from migrate_v2_smoke_simulated import _InMemoryBody
+from migration_sync import SyncInterrupted, copy_stream
+from tests.assertions import assert_equal
+
+PAYLOAD = bytes(range(256)) * 40
+
+
+class _ChunksOnlyBody:
+    """Body exposing only iter_chunks, like older fakes"""
+
+    def __init__(self, payload: bytes):
+        self.payload = payload
+        self.chunk_sizes: list[int] = []
+
+    def iter_chunks(self, chunk_size=1024):
+        """Yield payload pieces and record the requested size"""
+        self.chunk_sizes.append(chunk_size)
+        for idx in range(0, len(self.payload), chunk_size):
+            yield self.payload[idx : idx + chunk_size]
+
+
+def test_copy_stream_reuses_one_buffer_with_readinto():
+    """Bodies with readinto are copied through a single reusable buffer"""
+    body = _InMemoryBody(PAYLOAD)
+    handle = BytesIO()
+
+    with mock.patch.object(body, "readinto", wraps=body.readinto) as readinto:
+        copied = copy_stream(body, handle, lambda: False, read_size=1000)
+
+    assert_equal(copied, len(PAYLOAD))
+    assert_equal(handle.getvalue(), PAYLOAD)
+    buffers = {id(call.args[0]) for call in readinto.call_args_list}
+    assert_equal(len(buffers), 1)
+
+
+def test_copy_stream_falls_back_to_iter_chunks_with_read_size():
+    """Bodies without read/readinto are asked for read_size chunks instead of the 1 KiB default"""
+    body = _ChunksOnlyBody(PAYLOAD)
+    handle = BytesIO()
+
+    copy_stream(body, handle, lambda: False, read_size=4096)
+
+    assert_equal(body.chunk_sizes, [4096])
+    assert_equal(handle.getvalue(), PAYLOAD)
+
+
+def test_checks_run_once_per_progress_budget():
+    """Interrupt and progress checks are amortized over PROGRESS_CHECK_BYTES, not per read"""
+    interrupted_check = mock.Mock(return_value=False)
+    progress = []
+
+    with mock.patch("migration_sync.PROGRESS_CHECK_BYTES", 4000):
+        copy_stream(_InMemoryBody(PAYLOAD), BytesIO(), interrupted_check, progress.append, read_size=1000)
+
+    assert_equal(interrupted_check.call_count, 3)
+    assert_equal(progress, [0, 4000, 8000])
+
+
+def test_interrupt_is_checked_before_the_first_write():
+    """An already-interrupted sync writes nothing"""
+    handle = BytesIO()
+
+    with pytest.raises(SyncInterrupted):
+        copy_stream(_InMemoryBody(PAYLOAD), handle, lambda: True)
+
+    assert_equal(handle.getvalue(), b"")
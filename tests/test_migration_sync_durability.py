@@ -0,0 +1,188 @@
+"""Tests for atomic temp-file downloads in migration_sync.py and the fsync DurabilityPolicy in migration_sync_durability.py"""
+
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from migration_sync import TEMP_SUFFIX, BucketSyncer, DownloadOptions, SyncInterrupted, _download_object, _ProgressState
+from migration_sync_durability import DurabilityPolicy, DurableWriter
+from tests.assertions import assert_equal
+
+
+class _Body:
+    """Streaming body that can interrupt itself after the first chunk"""
+
+    def __init__(self, payload: bytes, on_first_chunk=None):
+        self._payload = payload
+        self._on_first_chunk = on_first_chunk
+
+    def iter_chunks(self, chunk_size=4):
+        """Yield the payload in small chunks"""
+        stream = BytesIO(self._payload)
+        first = True
+        while chunk := stream.read(chunk_size):
+            yield chunk
+            if first and self._on_first_chunk is not None:
+                self._on_first_chunk()
+            first = False
+
+
+class _S3:
+    """Single-bucket fake S3 that records fetched keys"""
+
+    def __init__(self, objects: dict[str, bytes]):
+        self.objects = objects
+        self.fetched: list[str] = []
+
+    def get_paginator(self, _name):
+        """Act as our own paginator"""
+        return self
+
+    def paginate(self, **_kwargs):
+        """Yield one page of objects"""
+        yield {"Contents": [{"Key": key, "Size": len(data)} for key, data in self.objects.items()]}
+
+    def get_object(self, Bucket, Key, **_kwargs):  # pylint: disable=invalid-name,unused-argument  # noqa: N803 - boto3 casing
+        """Return the object body"""
+        self.fetched.append(Key)
+        return {"Body": _Body(self.objects[Key])}
+
+
+def _download(s3, destination: Path, durability=None, interrupted_check=lambda: False, read_size=4):
+    return _download_object(
+        s3,
+        "bucket",
+        destination.name,
+        destination,
+        interrupted_check=interrupted_check,
+        progress_state=_ProgressState(start_time=time.time()),
+        options=DownloadOptions(durability=durability, read_size=read_size),
+    )
+
+
+def test_download_renames_temp_file_into_place(tmp_path):
+    """The final path only appears once the whole object is written"""
+    s3 = _S3({"a.bin": b"0123456789"})
+    destination = tmp_path / "a.bin"
+
+    with mock.patch("migration_sync.os.replace", wraps=os.replace) as replace:
+        written = _download(s3, destination)
+
+    assert_equal(written, 10)
+    assert_equal(destination.read_bytes(), b"0123456789")
+    replace.assert_called_once_with(tmp_path / f"a.bin{TEMP_SUFFIX}", destination)
+    assert not (tmp_path / f"a.bin{TEMP_SUFFIX}").exists()
+
+
+def test_interrupted_download_leaves_no_partial_file(tmp_path):
+    """An interrupt mid-stream removes the temp file and never creates the final path"""
+    flag = {"stop": False}
+    s3 = _S3({})
+    s3.get_object = lambda **_kwargs: {"Body": _Body(b"0123456789", on_first_chunk=lambda: flag.update(stop=True))}
+    destination = tmp_path / "drive" / "a.bin"
+
+    with mock.patch("migration_sync.PROGRESS_CHECK_BYTES", 4), pytest.raises(SyncInterrupted):
+        _download(s3, destination, interrupted_check=lambda: flag["stop"])
+
+    assert_equal(list(destination.parent.iterdir()), [])
+
+
+def test_file_policy_fsyncs_data_and_directory(tmp_path):
+    """mode='file' fsyncs each file before the rename and its directory after"""
+    writer = DurableWriter(DurabilityPolicy(mode="file"))
+
+    with mock.patch("migration_sync_durability.os.fsync") as fsync, mock.patch("migration_sync_durability._fsync_path") as fsync_path:
+        _download(_S3({"a.bin": b"abc"}), tmp_path / "a.bin", durability=writer)
+
+    assert_equal(fsync.call_count, 1)
+    fsync_path.assert_called_once_with(tmp_path)
+
+
+def test_batch_policy_flushes_every_n_files(tmp_path):
+    """mode='batch' syncs files then each distinct directory once the file batch fills"""
+    writer = DurableWriter(DurabilityPolicy(mode="batch", batch_files=3))
+    paths = [tmp_path / "x" / "1", tmp_path / "x" / "2", tmp_path / "y" / "3"]
+
+    with mock.patch("migration_sync_durability._fsync_path") as fsync_path:
+        for path in paths[:2]:
+            writer.committed(path, 1)
+        assert_equal(fsync_path.call_count, 0)
+        writer.committed(paths[2], 1)
+
+    synced = [call.args[0] for call in fsync_path.call_args_list]
+    assert_equal(synced, paths + [tmp_path / "x", tmp_path / "y"])
+    assert_equal(writer.flushes, 1)
+
+
+def test_batch_policy_flushes_on_byte_threshold(tmp_path):
+    """A large file fills the batch by bytes before the file count is reached"""
+    writer = DurableWriter(DurabilityPolicy(mode="batch", batch_files=100, batch_bytes=10))
+
+    with mock.patch("migration_sync_durability._fsync_path"):
+        writer.committed(tmp_path / "small", 4)
+        assert_equal(writer.flushes, 0)
+        writer.committed(tmp_path / "large", 6)
+
+    assert_equal(writer.flushes, 1)
+
+
+def test_none_policy_never_fsyncs(tmp_path):
+    """mode='none' leaves flushing to the OS"""
+    writer = DurableWriter(DurabilityPolicy(mode="none"))
+
+    with mock.patch("migration_sync_durability.os.fsync") as fsync, mock.patch("migration_sync_durability._fsync_path") as fsync_path:
+        _download(_S3({"a.bin": b"abc"}), tmp_path / "a.bin", durability=writer)
+        writer.flush()
+
+    fsync.assert_not_called()
+    fsync_path.assert_not_called()
+
+
+def test_policy_rejects_unknown_mode():
+    """Config typos fail fast"""
+    with pytest.raises(ValueError, match="Unknown durability mode"):
+        DurabilityPolicy(mode="sometimes")
+
+
+def test_sync_bucket_skips_complete_files_and_flushes_before_returning(tmp_path):
+    """Files renamed into place by an earlier run are skipped; pending fsyncs finish before sync returns"""
+    s3 = _S3({"done.txt": b"hello", "short.txt": b"data!", "new.txt": b"xyz"})
+    bucket_path = tmp_path / "bucket"
+    bucket_path.mkdir()
+    (bucket_path / "done.txt").write_bytes(b"hello")
+    (bucket_path / "short.txt").write_bytes(b"da")
+    syncer = BucketSyncer(s3, mock.MagicMock(), tmp_path, DurabilityPolicy(mode="batch", batch_files=100))
+
+    syncer.sync_bucket("bucket")
+
+    assert_equal(sorted(s3.fetched), ["new.txt", "short.txt"])
+    assert_equal((bucket_path / "short.txt").read_bytes(), b"data!")
+    assert_equal(syncer.durability.flushes, 1)
+
+
+def test_same_size_object_with_new_last_modified_is_downloaded_again(tmp_path):
+    """Downloads keep LastModified as mtime, so a same-size overwrite in S3 is not skipped"""
+    s3 = _S3({"same.txt": b"new!", "kept.txt": b"data"})
+    first, second = datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 6, 1, tzinfo=timezone.utc)
+    listed = {"same.txt": second, "kept.txt": first}
+    s3.paginate = lambda **_kwargs: iter(
+        [{"Contents": [{"Key": key, "Size": 4, "LastModified": listed[key]} for key in s3.objects]}]
+    )
+    bucket_path = tmp_path / "bucket"
+    bucket_path.mkdir()
+    for key in ("same.txt", "kept.txt"):
+        (bucket_path / key).write_bytes(b"old!")
+        os.utime(bucket_path / key, (first.timestamp(), first.timestamp()))
+
+    BucketSyncer(s3, mock.MagicMock(), tmp_path).sync_bucket("bucket")
+
+    assert_equal(s3.fetched, ["same.txt"])
+    assert_equal((bucket_path / "same.txt").read_bytes(), b"new!")
+    assert_equal((bucket_path / "same.txt").stat().st_mtime, second.timestamp())
@@ -0,0 +1,101 @@
+"""Tests for skipping duplicate_tree hard links on a re-sync in migration_sync_links.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+import io
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from duplicate_tree.deletion import build_deletion_groups
+from duplicate_tree.linking import perform_links
+from migration_state_v2 import MigrationStateV2
+from migration_sync import BucketSyncer
+from migration_sync_links import is_linked_copy, load_linked_files
+from migration_transfer_scheduler import GlobalTransferScheduler
+from tests.assertions import assert_equal
+
+DATA = b"duplicate" * 100
+LISTED = {
+    "first/a.bin": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    "second/a.bin": datetime(2024, 6, 1, tzinfo=timezone.utc),
+}
+
+
+class _S3:
+    """One bucket holding the same bytes under two keys with different LastModified"""
+
+    def __init__(self):
+        self.fetched: list[str] = []
+
+    def get_paginator(self, _name):
+        """Act as our own paginator"""
+        return self
+
+    def paginate(self, **_kwargs):
+        """Yield one page of objects"""
+        yield {"Contents": [{"Key": key, "Size": len(DATA), "LastModified": when} for key, when in LISTED.items()]}
+
+    def get_object(self, Bucket, Key, **_kwargs):  # pylint: disable=invalid-name,unused-argument  # noqa: N803 - boto3 casing
+        """Return the object body"""
+        self.fetched.append(Key)
+        return {"Body": io.BytesIO(DATA)}
+
+
+def _sync_with_bucket_syncer(s3, state: MigrationStateV2, base_path: Path):
+    BucketSyncer(s3, state, base_path).sync_bucket("bucket")
+
+
+def _sync_with_scheduler(s3, state: MigrationStateV2, base_path: Path):
+    GlobalTransferScheduler(s3, state, base_path, workers=2).sync_buckets(["bucket"])
+
+
+@pytest.fixture
+def linked_drive(tmp_path: Path):
+    """Both objects downloaded, then the second hard-linked to the first by duplicate_tree"""
+    state = MigrationStateV2(str(tmp_path / "state.db"))
+    state.save_bucket_status("bucket", 0, 0, {}, True)
+    base_path = tmp_path / "drive"
+    s3 = _S3()
+    _sync_with_bucket_syncer(s3, state, base_path)
+    rows = [{"nodes": [{"path": ["bucket", copy], "total_size": len(DATA)} for copy in ("first", "second")]}]
+    groups, _, _ = build_deletion_groups(rows)
+    stats, errors = perform_links(groups, base_path, str(tmp_path / "state.db"), mode="hardlink")
+    assert_equal((errors, stats["hardlink"]), ([], 1))
+    s3.fetched.clear()
+    return s3, state, base_path
+
+
+@pytest.mark.parametrize("sync", [_sync_with_bucket_syncer, _sync_with_scheduler])
+def test_hard_linked_duplicate_survives_a_resync(linked_drive, sync):
+    """A rescan-triggered re-sync neither downloads the linked file again nor breaks the link"""
+    s3, state, base_path = linked_drive
+    first, second = base_path / "bucket" / "first" / "a.bin", base_path / "bucket" / "second" / "a.bin"
+
+    sync(s3, state, base_path)
+
+    assert_equal(s3.fetched, [])
+    assert_equal(second.stat().st_ino, first.stat().st_ino)
+    assert_equal(second.read_bytes(), DATA)
+
+
+def test_a_broken_or_resized_link_is_not_trusted(linked_drive):
+    """Only a path that is still the journaled hard link, at the listed size, is skipped"""
+    _, state, base_path = linked_drive
+    second = base_path / "bucket" / "second" / "a.bin"
+    linked = load_linked_files(state, base_path / "bucket")
+    listed = {"Key": "second/a.bin", "Size": len(DATA)}
+
+    assert is_linked_copy(second, listed, linked)
+    assert not is_linked_copy(second, {**listed, "Size": len(DATA) + 1}, linked)
+    second.unlink()
+    second.write_bytes(DATA)
+    assert not is_linked_copy(second, listed, linked)
+
+
+def test_state_db_without_links_table_has_no_linked_files(tmp_path):
+    """Buckets are synced normally before duplicate_tree ever ran --link"""
+    state = MigrationStateV2(str(tmp_path / "state.db"))
+
+    assert_equal(load_linked_files(state, tmp_path / "drive" / "bucket"), {})
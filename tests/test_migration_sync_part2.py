@@ -54,7 +54,7 @@ class _FakeS3:
 def test_sync_bucket_downloads_files(tmp_path):
     """BucketSyncer writes downloaded objects to disk."""
     fake_s3 = _FakeS3({"file1.txt": b"hello", "dir/file2.bin": b"data"})
-    syncer = BucketSyncer(fake_s3, mock.Mock(), tmp_path)
+    syncer = BucketSyncer(fake_s3, mock.MagicMock(), tmp_path)
 
     syncer.sync_bucket("my-bucket")
 
@@ -65,7 +65,7 @@ def test_sync_bucket_downloads_files(tmp_path):
 def test_sync_bucket_respects_interrupt(tmp_path):
     """Sync stops when interrupted flag is set."""
     fake_s3 = _FakeS3({"file1.txt": b"hello", "file2.txt": b"data"})
-    syncer = BucketSyncer(fake_s3, mock.Mock(), tmp_path)
+    syncer = BucketSyncer(fake_s3, mock.MagicMock(), tmp_path)
     syncer.interrupted = True
 
     # Should not raise but also not download files
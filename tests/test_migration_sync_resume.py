@@ -0,0 +1,131 @@
+"""Tests for resuming interrupted large downloads with Range requests in migration_sync.py"""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from benchmarks.synthetic_s3 import SizeDistribution, SyntheticBucketSpec, SyntheticS3Client
+from migration_sync import PARTIAL_ETAG_SUFFIX, TEMP_SUFFIX, DownloadOptions, SyncInterrupted, _download_object, _ProgressState
+from tests.assertions import assert_equal
+
+SIZE = 64 * 1024
+
+
+def _client():
+    spec = SyntheticBucketSpec(name="bucket", object_count=1, sizes=SizeDistribution(kind="fixed", median=SIZE), seed=7)
+    return SyntheticS3Client([spec])
+
+
+def _listed(client) -> dict:
+    return next(iter(client.get_paginator("list_objects_v2").paginate(Bucket="bucket")))["Contents"][0]
+
+
+def _download(client, obj: dict, destination: Path, interrupted_check=lambda: False, read_size=4096):
+    return _download_object(
+        client,
+        "bucket",
+        obj["Key"],
+        destination,
+        interrupted_check=interrupted_check,
+        progress_state=_ProgressState(start_time=time.time()),
+        options=DownloadOptions(etag=obj["ETag"], read_size=read_size),
+    )
+
+
+def _interrupt_after(calls: int):
+    seen = {"count": 0}
+
+    def _check():
+        seen["count"] += 1
+        return seen["count"] > calls
+
+    return _check
+
+
+@pytest.fixture(autouse=True)
+def _resume_small_objects():
+    with mock.patch("migration_sync.RESUME_MIN_BYTES", 1), mock.patch("migration_sync.PROGRESS_CHECK_BYTES", 4096):
+        yield
+
+
+def _expected_bytes(tmp_path: Path, obj: dict) -> bytes:
+    reference = tmp_path / "reference" / "copy"
+    _download(_client(), obj, reference)
+    return reference.read_bytes()
+
+
+def test_interrupted_download_keeps_partial_with_etag(tmp_path):
+    """Large objects leave their temp file and ETag sidecar behind when interrupted"""
+    client = _client()
+    obj = _listed(client)
+    destination = tmp_path / "drive" / "obj"
+
+    with pytest.raises(SyncInterrupted):
+        _download(client, obj, destination, interrupted_check=_interrupt_after(3))
+
+    assert not destination.exists()
+    assert_equal((tmp_path / "drive" / f"obj{TEMP_SUFFIX}").stat().st_size, 3 * 4096)
+    assert_equal((tmp_path / "drive" / f"obj{PARTIAL_ETAG_SUFFIX}").read_text(encoding="utf-8"), obj["ETag"])
+
+
+def test_resume_fetches_only_the_remaining_range(tmp_path):
+    """A rerun requests bytes=N- with If-Match and produces the same file as a fresh download"""
+    client = _client()
+    obj = _listed(client)
+    destination = tmp_path / "drive" / "obj"
+    with pytest.raises(SyncInterrupted):
+        _download(client, obj, destination, interrupted_check=_interrupt_after(3))
+
+    with mock.patch.object(client, "get_object", wraps=client.get_object) as get_object:
+        written = _download(client, obj, destination)
+
+    get_object.assert_called_once_with(Bucket="bucket", Key=obj["Key"], Range="bytes=12288-", IfMatch=obj["ETag"])
+    assert_equal(written, SIZE - 12288)
+    assert_equal(destination.read_bytes(), _expected_bytes(tmp_path, obj))
+    assert_equal(sorted(path.name for path in destination.parent.iterdir()), ["obj"])
+
+
+def test_partial_for_a_different_etag_is_discarded(tmp_path):
+    """A sidecar recording another ETag means the object changed, so the download restarts"""
+    client = _client()
+    obj = _listed(client)
+    destination = tmp_path / "drive" / "obj"
+    destination.parent.mkdir(parents=True)
+    destination.with_name(f"obj{TEMP_SUFFIX}").write_bytes(b"stale bytes")
+    destination.with_name(f"obj{PARTIAL_ETAG_SUFFIX}").write_text('"old-etag"', encoding="utf-8")
+
+    with mock.patch.object(client, "get_object", wraps=client.get_object) as get_object:
+        written = _download(client, obj, destination)
+
+    get_object.assert_called_once_with(Bucket="bucket", Key=obj["Key"])
+    assert_equal(written, SIZE)
+    assert_equal(destination.read_bytes(), _expected_bytes(tmp_path, obj))
+
+
+def test_precondition_failure_restarts_from_zero(tmp_path, capsys):
+    """If S3 rejects If-Match the partial is dropped and the whole object is fetched"""
+    client = _client()
+    obj = _listed(client)
+    destination = tmp_path / "drive" / "obj"
+    destination.parent.mkdir(parents=True)
+    destination.with_name(f"obj{TEMP_SUFFIX}").write_bytes(b"x" * 100)
+    destination.with_name(f"obj{PARTIAL_ETAG_SUFFIX}").write_text(obj["ETag"], encoding="utf-8")
+    real_get = client.get_object
+    precondition = ClientError({"Error": {"Code": "PreconditionFailed"}}, "GetObject")
+
+    def _get_object(**kwargs):
+        if "Range" in kwargs:
+            raise precondition
+        return real_get(**kwargs)
+
+    with mock.patch.object(client, "get_object", side_effect=_get_object):
+        written = _download(client, obj, destination)
+
+    assert_equal(written, SIZE)
+    assert_equal(destination.read_bytes(), _expected_bytes(tmp_path, obj))
+    assert "restarting" in capsys.readouterr().out
@@ -0,0 +1,130 @@
+"""Tests for the directory cache, preallocation and directory ordering in migration_sync.py"""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic_s3 import SizeDistribution, SyntheticBucketSpec, SyntheticS3Client
+from migration_sync import (
+    PARTIAL_ETAG_SUFFIX,
+    TEMP_SUFFIX,
+    DirectoryCache,
+    DownloadOptions,
+    SyncInterrupted,
+    _download_object,
+    _list_objects,
+    _ProgressState,
+)
+from tests.assertions import assert_equal
+
+SIZE = 64 * 1024
+needs_fallocate = pytest.mark.skipif(not hasattr(os, "posix_fallocate"), reason="posix_fallocate unavailable")
+
+
+def _client(object_count=1, keys_per_directory=100):
+    sizes = SizeDistribution(kind="fixed", median=SIZE)
+    spec = SyntheticBucketSpec(name="bucket", object_count=object_count, sizes=sizes, keys_per_directory=keys_per_directory, seed=3)
+    return SyntheticS3Client([spec])
+
+
+def _download(client, obj: dict, destination: Path, interrupted_check=lambda: False, directories=None):
+    return _download_object(
+        client,
+        "bucket",
+        obj["Key"],
+        destination,
+        interrupted_check=interrupted_check,
+        progress_state=_ProgressState(start_time=time.time()),
+        options=DownloadOptions(read_size=4096, directories=directories).for_listing(obj),
+    )
+
+
+@pytest.fixture(autouse=True)
+def _small_thresholds():
+    with mock.patch("migration_sync.PREALLOCATE_MIN_BYTES", 1), mock.patch("migration_sync.PROGRESS_CHECK_BYTES", 4096):
+        yield
+
+
+def test_directory_cache_creates_each_directory_once(tmp_path):
+    """Files sharing an existing directory trigger one mkdir instead of one per file"""
+    client = _client(object_count=6, keys_per_directory=3)
+    directories = DirectoryCache()
+    real_mkdir = Path.mkdir
+    for obj in _list_objects(client, "bucket"):
+        (tmp_path / obj["Key"]).parent.mkdir(parents=True, exist_ok=True)
+
+    with mock.patch("pathlib.Path.mkdir", autospec=True, side_effect=real_mkdir) as mkdir:
+        for obj in _list_objects(client, "bucket"):
+            _download(client, obj, tmp_path / obj["Key"], directories=directories)
+
+    assert_equal(mkdir.call_count, 2)
+    assert_equal(len(list(tmp_path.rglob("*.bin"))), 6)
+
+
+def test_list_objects_groups_each_page_by_directory():
+    """Keys interleaved by S3's lexicographic order are regrouped per directory"""
+    keys = ["a/b.txt", "a/b/c.txt", "a/c.txt", "a/b/d.txt"]
+    s3 = mock.Mock()
+    s3.get_paginator.return_value.paginate.return_value = [{"Contents": [{"Key": key} for key in keys]}]
+
+    listed = [obj["Key"] for obj in _list_objects(s3, "bucket")]
+
+    assert_equal(listed, ["a/b.txt", "a/c.txt", "a/b/c.txt", "a/b/d.txt"])
+
+
+@needs_fallocate
+def test_known_size_is_preallocated_before_writing(tmp_path):
+    """posix_fallocate reserves the listed Size and the result is byte-identical"""
+    client = _client()
+    obj = next(iter(_list_objects(client, "bucket")))
+
+    with mock.patch("migration_sync.os.posix_fallocate", wraps=os.posix_fallocate) as fallocate:
+        written = _download(client, obj, tmp_path / "obj")
+
+    assert_equal(fallocate.call_args.args[1:], (0, SIZE))
+    assert_equal(written, SIZE)
+    assert_equal((tmp_path / "obj").stat().st_size, SIZE)
+
+
+@needs_fallocate
+def test_interrupted_preallocated_file_is_truncated_for_resume(tmp_path):
+    """A graceful interrupt trims the reservation so the partial length stays a valid resume offset"""
+    client = _client()
+    obj = next(iter(_list_objects(client, "bucket")))
+    calls = iter([False, False, True])
+
+    with mock.patch("migration_sync.RESUME_MIN_BYTES", 1), pytest.raises(SyncInterrupted):
+        _download(client, obj, tmp_path / "obj", interrupted_check=lambda: next(calls))
+
+    assert_equal((tmp_path / f"obj{TEMP_SUFFIX}").stat().st_size, 2 * 4096)
+
+
+def test_full_size_partial_from_a_crash_is_discarded(tmp_path):
+    """A partial as long as the object was preallocated before a crash, so it is not trusted"""
+    client = _client()
+    obj = next(iter(_list_objects(client, "bucket")))
+    (tmp_path / f"obj{TEMP_SUFFIX}").write_bytes(b"\0" * SIZE)
+    (tmp_path / f"obj{PARTIAL_ETAG_SUFFIX}").write_text(obj["ETag"], encoding="utf-8")
+
+    with mock.patch.object(client, "get_object", wraps=client.get_object) as get_object:
+        _download(client, obj, tmp_path / "obj")
+
+    get_object.assert_called_once_with(Bucket="bucket", Key=obj["Key"])
+    assert b"\0" * 4096 not in (tmp_path / "obj").read_bytes()
+
+
+def test_unsupported_preallocation_falls_back_to_plain_writes(tmp_path):
+    """Filesystems that reject fallocate still receive the file"""
+    client = _client()
+    obj = next(iter(_list_objects(client, "bucket")))
+
+    with mock.patch("migration_sync.os.posix_fallocate", side_effect=OSError(95, "Operation not supported"), create=True):
+        written = _download(client, obj, tmp_path / "obj")
+
+    assert_equal(written, SIZE)
+    assert_equal((tmp_path / "obj").stat().st_size, SIZE)
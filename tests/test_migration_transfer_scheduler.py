@@ -0,0 +1,141 @@
+"""Tests for the cross-bucket GlobalTransferScheduler in migration_transfer_scheduler.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+from __future__ import annotations
+
+import threading
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from benchmarks.synthetic_s3 import SizeDistribution, SyntheticBucketSpec, SyntheticS3Client
+from migration_state_v2 import MigrationStateV2
+from migration_transfer_scheduler import GlobalTransferScheduler, ScheduledSync
+from tests.assertions import assert_equal
+
+
+class _GatedBody:
+    """Body that blocks until gate is set, then yields payload"""
+
+    def __init__(self, payload: bytes, gate: threading.Event | None):
+        self._payload = payload
+        self._gate = gate
+
+    def iter_chunks(self, chunk_size=8192):
+        """Wait for the gate, then yield the payload"""
+        if self._gate is not None:
+            assert self._gate.wait(timeout=10), "gate never opened"
+        stream = BytesIO(self._payload)
+        while chunk := stream.read(chunk_size):
+            yield chunk
+
+
+class _BucketsS3:
+    """Multi-bucket fake S3 whose gated keys block until released"""
+
+    def __init__(self, buckets: dict[str, dict[str, bytes]], gates: dict[str, threading.Event] | None = None):
+        self.buckets = buckets
+        self.gates = gates or {}
+        self.requested: list[str] = []
+        self._lock = threading.Lock()
+
+    def get_paginator(self, _name):
+        """Act as our own list_objects_v2 paginator"""
+        return self
+
+    def paginate(self, Bucket, **_kwargs):  # pylint: disable=invalid-name  # noqa: N803 - boto3 casing
+        """Yield the bucket's objects"""
+        yield {"Contents": [{"Key": key, "Size": len(data or b"")} for key, data in self.buckets[Bucket].items()]}
+
+    def get_object(self, Bucket, Key, **_kwargs):  # pylint: disable=invalid-name  # noqa: N803 - boto3 casing
+        """Return a possibly gated body"""
+        with self._lock:
+            self.requested.append(f"{Bucket}/{Key}")
+        data = self.buckets[Bucket][Key]
+        if data is None:
+            raise RuntimeError(f"Failed to fetch {Bucket}/{Key}")
+        return {"Body": _GatedBody(data, self.gates.get(f"{Bucket}/{Key}"))}
+
+
+@pytest.fixture
+def state(tmp_path: Path):
+    """Fresh state DB with the scheduler's buckets registered"""
+    migration_state = MigrationStateV2(str(tmp_path / "state.db"))
+    for bucket in ("big", "small", "bench-0", "bench-1", "bench-2"):
+        migration_state.save_bucket_status(bucket, 0, 0, {}, True)
+    return migration_state
+
+
+def test_sync_buckets_downloads_every_bucket_through_shared_pool(tmp_path, state):
+    """Objects from all buckets land on disk and each bucket is marked synced"""
+    sizes = SizeDistribution(kind="uniform", median=2048, minimum=1)
+    specs = [SyntheticBucketSpec(name=f"bench-{idx}", object_count=20, sizes=sizes, seed=idx) for idx in range(3)]
+    client = SyntheticS3Client(specs)
+    scheduler = GlobalTransferScheduler(client, state, tmp_path / "drive", workers=4, max_bytes_in_flight=8192)
+
+    completed = scheduler.sync_buckets(["bench-0", "bench-1", "bench-2"])
+
+    assert_equal(sorted(completed), ["bench-0", "bench-1", "bench-2"])
+    assert_equal(scheduler.stats.files_done, 60)
+    assert scheduler.stats.peak_bytes_in_flight <= 8192
+    for bucket in completed:
+        assert state.get_bucket_info(bucket)["sync_complete"]
+        written = [path for path in (tmp_path / "drive" / bucket).rglob("*") if path.is_file()]
+        assert_equal(len(written), 20)
+
+
+def test_small_bucket_is_marked_synced_while_large_object_is_still_downloading(tmp_path, state):
+    """A bucket is marked sync_complete as soon as its last object is written"""
+    gate = threading.Event()
+    client = _BucketsS3({"big": {"huge.bin": b"x" * 4096}, "small": {f"f{i}": b"y" for i in range(5)}}, {"big/huge.bin": gate})
+    scheduler = GlobalTransferScheduler(client, state, tmp_path, workers=2, max_bytes_in_flight=1 << 20)
+    seen = []
+
+    def _on_synced(bucket):
+        seen.append((bucket, bool(state.get_bucket_info("big")["sync_complete"])))
+        gate.set()
+
+    completed = scheduler.sync_buckets(["big", "small"], on_bucket_synced=_on_synced)
+
+    assert_equal(completed, ["small", "big"])
+    assert_equal(seen, [("small", False), ("big", True)])
+
+
+def test_object_larger_than_budget_waits_for_an_idle_pool(tmp_path, state):
+    """Objects are admitted in round-robin order and an oversized one runs alone"""
+    client = _BucketsS3({"big": {"huge.bin": b"x" * 100}, "small": {"a": b"1" * 10, "b": b"2" * 10}})
+    scheduler = GlobalTransferScheduler(client, state, tmp_path, workers=4, max_bytes_in_flight=50)
+
+    scheduler.sync_buckets(["small", "big"])
+
+    assert_equal(client.requested[:2], ["small/a", "big/huge.bin"])
+    assert_equal(scheduler.stats.peak_bytes_in_flight, 100)
+
+
+def test_download_error_stops_scheduler_and_names_bucket(tmp_path, state):
+    """A failed transfer propagates and leaves its bucket unsynced"""
+    client = _BucketsS3({"small": {"ok": b"1", "bad": None}})
+    scheduler = GlobalTransferScheduler(client, state, tmp_path, workers=1)
+
+    with pytest.raises(RuntimeError, match="small/bad"):
+        scheduler.sync_buckets(["small"])
+
+    assert_equal(scheduler.failed_bucket, "small")
+    assert not state.get_bucket_info("small")["sync_complete"]
+
+
+def test_scheduled_sync_aborts_downloads_when_consumer_stops(tmp_path, state):
+    """Abandoning ScheduledSync interrupts the scheduler and leaves unfinished buckets unsynced"""
+    gate = threading.Event()
+    client = _BucketsS3({"small": {"a": b"1"}, "big": {"huge.bin": b"x" * 10}}, {"big/huge.bin": gate})
+    scheduler = GlobalTransferScheduler(client, state, tmp_path, workers=2)
+
+    synced = iter(ScheduledSync(scheduler, ["small", "big"]))
+    assert_equal(next(synced), "small")
+    threading.Timer(0.2, gate.set).start()
+    synced.close()
+
+    assert scheduler.interrupted is True
+    assert not state.get_bucket_info("big")["sync_complete"]
@@ -41,6 +41,29 @@ def test_check_inventory_shows_many_extra_files():
     assert "18 extra" in str(exc_info.value)
 
 
+def test_check_inventory_keeps_files_tombstoned_by_rescan(capsys):
+    """Extra local files whose S3 objects a rescan recorded as deleted are not errors"""
+    mock_state = mock.Mock()
+    mock_state.get_tombstoned_keys.return_value = {"deleted.txt"}
+    checker = FileInventoryChecker(mock_state, Path("/tmp"))
+
+    errors = checker.check_inventory({"kept.txt"}, {"kept.txt", "deleted.txt"}, "bucket")
+
+    assert_equal(errors, [])
+    mock_state.get_tombstoned_keys.assert_called_once_with("bucket", {"deleted.txt"})
+    assert "Keeping 1 local file(s)" in capsys.readouterr().out
+
+
+def test_check_inventory_still_fails_on_untombstoned_extra_files():
+    """Only tombstoned keys are excused; other extra files still fail verification"""
+    mock_state = mock.Mock()
+    mock_state.get_tombstoned_keys.return_value = set()
+    checker = FileInventoryChecker(mock_state, Path("/tmp"))
+
+    with pytest.raises(ValueError, match="1 extra"):
+        checker.check_inventory({"kept.txt"}, {"kept.txt", "stray.txt"}, "bucket")
+
+
 def test_verify_files_shows_many_verification_errors(tmp_path):
     """Test verify_files shows summary when >10 verification errors"""
     # Create files with size mismatches
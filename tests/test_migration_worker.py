@@ -0,0 +1,154 @@
+"""Unit and multi-process tests for the lease-based worker mode in migration_worker.py"""
+
+# pylint: disable=redefined-outer-name  # pytest fixtures
+
+import io
+import multiprocessing
+import sqlite3
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic_s3 import SizeDistribution, SyntheticBucketSpec, SyntheticS3Client
+from migration_orchestrator import BucketMigrator, MigrationFatalError
+from migration_scanner import BucketScanner
+from migration_state_v2 import MigrationStateV2, Phase
+from migration_worker import BucketLeaseWorker
+from tests.assertions import assert_equal
+
+BUCKETS = ("bucket-a", "bucket-b", "bucket-c", "bucket-d")
+
+
+def _specs():
+    sizes = SizeDistribution(kind="fixed", median=512)
+    return [SyntheticBucketSpec(name=name, object_count=15, sizes=sizes, seed=idx) for idx, name in enumerate(BUCKETS)]
+
+
+@pytest.fixture
+def state(tmp_path: Path):
+    """State DB with two scanned, unsynced buckets"""
+    migration_state = MigrationStateV2(str(tmp_path / "state.db"))
+    for bucket in BUCKETS[:2]:
+        migration_state.save_bucket_status(bucket, 1, 10, {"STANDARD": 1}, True)
+    return migration_state
+
+
+def _migrator(state):
+    migrator = mock.Mock()
+    migrator.interrupted = False
+    migrator.syncer.interrupted = False
+
+    def _verify(bucket):
+        state.mark_bucket_verify_complete(bucket, 1, 1, 1, 10, 1)
+
+    migrator.process_bucket.side_effect = _verify
+    return migrator
+
+
+def test_worker_processes_every_claimable_bucket(state, capsys):
+    """A lone worker drains the queue and releases its leases"""
+    migrator = _migrator(state)
+    worker = BucketLeaseWorker(state, migrator, worker_id="w1", lease_seconds=60)
+
+    completed = worker.run()
+
+    assert_equal(completed, ["bucket-a", "bucket-b"])
+    assert_equal(state.count_leased_buckets(), 0)
+    assert "WORKER w1 DONE: 2 bucket(s)" in capsys.readouterr().out
+
+
+def test_worker_waits_for_buckets_leased_elsewhere(state):
+    """Buckets leased by a live worker are waited on, then picked up once the lease is released"""
+    state.claim_bucket_lease("other", 600)
+    migrator = _migrator(state)
+    worker = BucketLeaseWorker(state, migrator, worker_id="w1", lease_seconds=60)
+    worker._wait = mock.Mock(side_effect=lambda _s: state.release_bucket_lease("bucket-a", "other"))  # pylint: disable=protected-access
+
+    completed = worker.run()
+
+    assert_equal(sorted(completed), ["bucket-a", "bucket-b"])
+    worker._wait.assert_called_once_with(worker.poll_seconds)  # pylint: disable=protected-access
+
+
+def test_worker_stops_bucket_when_lease_is_lost(state, capsys):
+    """Losing the lease interrupts the pipeline; the bucket is retried after the thief's lease expires"""
+    state.mark_bucket_verify_complete("bucket-b", 1, 1, 1, 10, 1)
+    migrator = _migrator(state)
+    calls = []
+
+    def _stolen_then_verified(bucket):
+        calls.append(bucket)
+        if len(calls) > 1:
+            state.mark_bucket_verify_complete(bucket, 1, 1, 1, 10, 1)
+            return
+        with sqlite3.connect(state.db_conn.db_path) as conn:
+            conn.execute("UPDATE bucket_leases SET worker_id = 'thief'")
+        deadline = time.monotonic() + 5
+        while not migrator.interrupted and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    migrator.process_bucket.side_effect = _stolen_then_verified
+    worker = BucketLeaseWorker(state, migrator, worker_id="w1", lease_seconds=0.3, poll_seconds=0.1)
+
+    completed = worker.run()
+
+    assert_equal(calls, ["bucket-a", "bucket-a"])
+    assert_equal(completed, ["bucket-a"])
+    assert migrator.interrupted is False
+    assert "Lost lease on bucket-a" in capsys.readouterr().out
+
+
+def test_worker_releases_lease_on_fatal_error(state):
+    """Pipeline errors stop the worker like the interactive run, without holding the lease"""
+    migrator = _migrator(state)
+    migrator.process_bucket.side_effect = RuntimeError("boom")
+    worker = BucketLeaseWorker(state, migrator, worker_id="w1", lease_seconds=60)
+
+    with pytest.raises(MigrationFatalError):
+        worker.run()
+
+    assert_equal(state.count_leased_buckets(), 0)
+
+
+def _worker_process(db_path: str, base_path: str, worker_id: str, results):
+    """Entry point for one worker process sharing the state DB"""
+    state = MigrationStateV2(db_path)
+    migrator = BucketMigrator(SyntheticS3Client(_specs()), state, Path(base_path), confirm_delete=False)
+    worker = BucketLeaseWorker(state, migrator, worker_id=worker_id, lease_seconds=30, poll_seconds=0.05)
+    with redirect_stdout(io.StringIO()):
+        results.put((worker_id, worker.run()))
+
+
+def test_workers_in_separate_processes_share_buckets(tmp_path: Path):
+    """Several local worker processes sync and verify every bucket exactly once"""
+    db_path = str(tmp_path / "state.db")
+    base_path = tmp_path / "drive"
+    base_path.mkdir()
+    state = MigrationStateV2(db_path)
+    scanner = BucketScanner(SyntheticS3Client(_specs()), state)
+    with redirect_stdout(io.StringIO()):
+        for bucket in BUCKETS:
+            scanner.scan_bucket(bucket)
+    state.set_current_phase(Phase.SYNCING)
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=_worker_process, args=(db_path, str(base_path), f"w{idx}", results)) for idx in range(3)]
+    for process in workers:
+        process.start()
+    finished = dict(results.get(timeout=120) for _ in workers)
+    for process in workers:
+        process.join(timeout=30)
+        assert_equal(process.exitcode, 0)
+
+    processed = [bucket for buckets in finished.values() for bucket in buckets]
+    assert_equal(sorted(processed), list(BUCKETS))
+    for bucket in BUCKETS:
+        info = state.get_bucket_info(bucket)
+        assert info["sync_complete"] and info["verify_complete"]
+        assert not info["delete_complete"]
+        assert_equal(info["verified_file_count"], 15)
+    assert_equal(state.count_leased_buckets(), 0)
@@ -2,11 +2,33 @@
 
 from __future__ import annotations
 
+import hashlib
 import sqlite3
 
 import pytest
 
-from state_db_admin import reseed_state_db_from_local_drive
+from migration_state_v2 import FILE_TABLE_SQL
+from state_db_admin import RESEED_MARKER_PREFIX, ReseedOptions, compact_state_db, main, reseed_state_db_from_local_drive
+
+
+def _make_tree(base_path):
+    """Two buckets with nested directories; returns {(bucket, key): bytes}"""
+    contents = {}
+    for bucket in ("bucket-a", "bucket-b"):
+        for depth in range(3):
+            for idx in range(4):
+                key = "/".join([f"d{level}" for level in range(depth)] + [f"f{idx}.bin"])
+                data = f"{bucket}:{key}".encode()
+                path = base_path / bucket / key
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(data)
+                contents[(bucket, key)] = data
+    return contents
+
+
+def _rows(db_file):
+    with sqlite3.connect(db_file) as conn:
+        return {(row[0], row[1]): row[2:] for row in conn.execute("SELECT bucket, key, size, etag, local_checksum FROM files")}
 
 
 def test_reseed_state_db_populates_files(tmp_path):
@@ -35,3 +57,97 @@ def test_reseed_state_db_requires_base_path(tmp_path):
     missing_path = tmp_path / "missing"
     with pytest.raises(FileNotFoundError):
         reseed_state_db_from_local_drive(missing_path, tmp_path / "state.db")
+
+
+def test_parallel_reseed_finds_every_nested_file(tmp_path):
+    """Concurrent directory scans seed each file once, with batches smaller than a bucket"""
+    contents = _make_tree(tmp_path / "drive")
+
+    db_file, file_count, total_bytes = reseed_state_db_from_local_drive(
+        tmp_path / "drive", tmp_path / "state.db", ReseedOptions(workers=4, batch_size=5)
+    )
+
+    rows = _rows(db_file)
+    assert set(rows) == set(contents)
+    assert file_count == len(contents)
+    assert total_bytes == sum(len(data) for data in contents.values())
+    assert all(etag is None and checksum is None for _, etag, checksum in rows.values())
+
+
+def test_reseed_hash_fills_md5_and_sha256(tmp_path):
+    """hash_files stores the MD5 as etag and the SHA-256 as local_checksum"""
+    contents = _make_tree(tmp_path / "drive")
+
+    options = ReseedOptions(hash_files=True, hash_workers=3)
+    db_file, _, _ = reseed_state_db_from_local_drive(tmp_path / "drive", tmp_path / "state.db", options)
+
+    for ident, (size, etag, checksum) in _rows(db_file).items():
+        data = contents[ident]
+        assert (size, etag, checksum) == (len(data), hashlib.md5(data).hexdigest(), hashlib.sha256(data).hexdigest())
+
+
+def test_reseed_resume_skips_finished_buckets_and_hashes_the_rest(tmp_path):
+    """A resumed reseed keeps earlier rows, re-scans unfinished buckets and hashes only unhashed files"""
+    contents = _make_tree(tmp_path / "drive")
+    db_file, _, _ = reseed_state_db_from_local_drive(tmp_path / "drive", tmp_path / "state.db")
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("DELETE FROM migration_metadata WHERE key = ?", (f"{RESEED_MARKER_PREFIX}bucket-b",))
+        conn.execute("DELETE FROM files WHERE bucket = 'bucket-b' AND key LIKE 'd0/%'")
+        conn.execute("UPDATE files SET local_checksum = 'kept' WHERE bucket = 'bucket-a' AND key = 'f0.bin'")
+
+    _, file_count, _ = reseed_state_db_from_local_drive(tmp_path / "drive", db_file, ReseedOptions(resume=True, hash_files=True))
+
+    rows = _rows(db_file)
+    assert set(rows) == set(contents)
+    assert file_count == 12
+    assert rows[("bucket-a", "f0.bin")][2] == "kept"
+    assert rows[("bucket-b", "d0/d1/f1.bin")][2] == hashlib.sha256(contents[("bucket-b", "d0/d1/f1.bin")]).hexdigest()
+
+
+def test_reseed_cli_uses_given_paths(tmp_path, capsys):
+    """The reseed subcommand seeds the DB and reports the totals."""
+    contents = _make_tree(tmp_path / "drive")
+    db_path = tmp_path / "state.db"
+
+    assert main(["reseed", "--db-path", str(db_path), "--base-path", str(tmp_path / "drive"), "--workers", "2"]) == 0
+
+    assert f"with {len(contents):,} files" in capsys.readouterr().out
+    assert set(_rows(db_path)) == set(contents)
+
+
+def test_compact_state_db_cli_converts_legacy_layout(tmp_path, capsys):
+    """The compact subcommand converts a legacy DB and reports the row count."""
+    db_path = tmp_path / "state.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(FILE_TABLE_SQL)
+        conn.execute(
+            """INSERT INTO files (bucket, key, size, etag, storage_class, last_modified, state, created_at, updated_at)
+            VALUES ('bucket-alpha', 'a.txt', 5, NULL, 'STANDARD', NULL, 'synced', 'now', 'now')"""
+        )
+
+    assert main(["compact", "--db-path", str(db_path), "--batch-size", "10"]) == 0
+
+    assert "Compacted 1 rows" in capsys.readouterr().out
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'files'").fetchone()[0] == "view"
+        assert conn.execute("SELECT bucket, key, size FROM files").fetchone() == ("bucket-alpha", "a.txt", 5)
+
+
+def test_compact_state_db_requires_existing_db(tmp_path):
+    """compact_state_db refuses to create a missing database."""
+    with pytest.raises(FileNotFoundError):
+        compact_state_db(tmp_path / "missing.db")
+
+
+def test_maintain_cli_reports_steps_and_sizes(tmp_path, capsys):
+    """The maintain subcommand backs up, analyzes and prints before/after sizes."""
+    db_path = tmp_path / "state.db"
+    _make_tree(tmp_path / "drive")
+    reseed_state_db_from_local_drive(tmp_path / "drive", db_path)
+
+    assert main(["maintain", "--db-path", str(db_path), "--backup", str(tmp_path / "copy.db"), "--vacuum"]) == 0
+
+    output = capsys.readouterr().out
+    assert "online backup" in output and "vacuum rebuild" in output
+    assert "DB size:" in output
+    assert (tmp_path / "copy.db").exists()
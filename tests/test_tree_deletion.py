@@ -0,0 +1,106 @@
+"""Tests for the parallel tree deletion engine in tree_deletion.py"""
+
+import io
+import os
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+import tree_deletion
+from tests.assertions import assert_equal
+from tree_deletion import DeletionProgress, TreeDeleter
+
+
+def _build_tree(root: Path, directories: int = 6, files_per_directory: int = 50) -> int:
+    """Nested directories full of small files; returns the total bytes written"""
+    total = 0
+    for index in range(directories):
+        directory = root.joinpath(*[f"level{depth}" for depth in range(index)])
+        directory.mkdir(parents=True, exist_ok=True)
+        for number in range(files_per_directory):
+            data = b"x" * (number + 1)
+            (directory / f"file{number}.bin").write_bytes(data)
+            total += len(data)
+    return total
+
+
+def test_deletes_nested_tree_and_counts_files_bytes_and_directories(tmp_path):
+    """Every file and directory is removed, including the root, and the totals add up"""
+    root = tmp_path / "tree"
+    total = _build_tree(root)
+    progress = DeletionProgress(stream=io.StringIO())
+
+    with mock.patch.object(tree_deletion, "UNLINK_BATCH_SIZE", 7), TreeDeleter(workers=3, progress=progress) as deleter:
+        deleter.delete(root)
+
+    assert not root.exists()
+    assert_equal((progress.files, progress.bytes_freed, progress.directories), (300, total, 6))
+    assert "Deleted 300 files, 6 directories" in progress.summary()
+
+
+def test_symlinks_are_removed_without_touching_their_targets(tmp_path):
+    """A symlinked directory inside the tree, or given as the path, is unlinked, never walked"""
+    target = tmp_path / "target"
+    target.mkdir()
+    (target / "keep.txt").write_text("keep")
+    root = tmp_path / "tree"
+    root.mkdir()
+    (root / "link").symlink_to(target)
+    top_link = tmp_path / "top-link"
+    top_link.symlink_to(target)
+
+    with TreeDeleter(progress=DeletionProgress(stream=io.StringIO())) as deleter:
+        deleter.delete(root)
+        deleter.delete(top_link)
+
+    assert not root.exists() and not top_link.is_symlink()
+    assert_equal((target / "keep.txt").read_text(), "keep")
+
+
+def test_hard_linked_files_free_no_bytes_until_their_last_link(tmp_path):
+    """Bytes freed only counts files whose data actually goes away"""
+    root = tmp_path / "tree"
+    root.mkdir()
+    (root / "data.bin").write_bytes(b"d" * 100)
+    os.link(root / "data.bin", tmp_path / "outside.bin")
+    progress = DeletionProgress(stream=io.StringIO())
+
+    with TreeDeleter(progress=progress) as deleter:
+        deleter.delete(root)
+
+    assert_equal((progress.files, progress.bytes_freed), (1, 0))
+
+
+def test_failures_are_raised_after_the_rest_of_the_tree_is_removed(tmp_path):
+    """One file that cannot be unlinked leaves only itself and its parents behind"""
+    root = tmp_path / "tree"
+    _build_tree(root, directories=3, files_per_directory=5)
+    stuck = root / "level0" / "file2.bin"
+    real_unlink = os.unlink
+
+    def _unlink(path, *args, **kwargs):
+        if path == str(stuck):
+            raise PermissionError(13, "Permission denied", path)
+        return real_unlink(path, *args, **kwargs)
+
+    with mock.patch("os.unlink", side_effect=_unlink), TreeDeleter(progress=DeletionProgress(stream=io.StringIO())) as deleter:
+        with pytest.raises(PermissionError) as excinfo:
+            deleter.delete(root)
+
+    assert_equal(excinfo.value.filename, str(stuck))
+    assert_equal(sorted(path.relative_to(root).as_posix() for path in root.rglob("*")), ["level0", "level0/file2.bin"])
+
+
+def test_progress_line_reports_rates_and_ends_before_the_next_message(tmp_path):
+    """The \\r progress line shows files/s and bytes/s and is closed by a newline"""
+    root = tmp_path / "tree"
+    _build_tree(root, directories=1, files_per_directory=3)
+    stream = io.StringIO()
+
+    with TreeDeleter(progress=DeletionProgress(stream=stream)) as deleter:
+        deleter.delete(root)
+
+    output = stream.getvalue()
+    assert output.startswith("\r  Deleted 3 files")
+    assert "files/s" in output and output.endswith("/s)\n")
@@ -0,0 +1,186 @@
+"""Parallel tree deletion with files/s and bytes/s progress.
+
+Trees are walked with os.scandir (symlinks are removed, never followed), files are
+unlinked in batches on a thread pool so slow network or USB storage always has several
+requests in flight, and directories are removed deepest level first once their files
+are gone. Used by duplicate_tree --delete and cleanup_temp_artifacts --delete.
+"""
+
+from __future__ import annotations
+
+import os
+import stat
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, TextIO
+
+from cost_toolkit.common.format_utils import format_bytes
+
+DEFAULT_DELETE_WORKERS = 8
+UNLINK_BATCH_SIZE = 256
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+
+@dataclass
+class DeletionBatchResult:
+    """Files removed by one worker batch and the errors it hit."""
+
+    files: int = 0
+    bytes_freed: int = 0
+    errors: List[OSError] = field(default_factory=list)
+
+
+def unlink_batch(paths: List[str]) -> DeletionBatchResult:
+    """Unlink each path, counting its size only when this was its last link (runs in worker threads)."""
+    result = DeletionBatchResult()
+    for path in paths:
+        try:
+            info = os.lstat(path)
+            os.unlink(path)
+        except OSError as exc:
+            result.errors.append(exc)
+            continue
+        result.files += 1
+        if info.st_nlink <= 1:
+            result.bytes_freed += info.st_size
+    return result
+
+
+def remove_directories(paths: List[str]) -> List[OSError]:
+    """rmdir each (already emptied) directory, returning the errors (runs in worker threads)."""
+    errors: List[OSError] = []
+    for path in paths:
+        try:
+            os.rmdir(path)
+        except OSError as exc:
+            errors.append(exc)
+    return errors
+
+
+@dataclass
+class DeletionProgress:
+    """Running totals for a deletion session, printed as a single \\r-updated line."""
+
+    stream: TextIO = field(default_factory=lambda: sys.stdout)
+    files: int = 0
+    bytes_freed: int = 0
+    directories: int = 0
+    started: float = field(default_factory=time.monotonic)
+    _last_report: float = 0.0
+    _line_open: bool = False
+
+    def add(self, result: DeletionBatchResult):
+        """Fold one finished batch into the totals and refresh the progress line at most once per interval."""
+        self.files += result.files
+        self.bytes_freed += result.bytes_freed
+        now = time.monotonic()
+        if now - self._last_report >= PROGRESS_INTERVAL_SECONDS:
+            self._last_report = now
+            print(f"\r  {self.summary()}", end="", file=self.stream, flush=True)
+            self._line_open = True
+
+    def end_line(self):
+        """Terminate the progress line so the caller's next message starts on its own line."""
+        if self._line_open:
+            print(file=self.stream)
+            self._line_open = False
+
+    def summary(self) -> str:
+        """Totals so far with their per-second rates."""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (
+            f"Deleted {self.files:,} files, {self.directories:,} directories, {format_bytes(self.bytes_freed)} freed "
+            f"({self.files / elapsed:,.0f} files/s, {format_bytes(int(self.bytes_freed / elapsed))}/s)"
+        )
+
+
+class TreeDeleter:
+    """Delete files and directory trees on a shared worker pool; use as a context manager."""
+
+    def __init__(self, workers: int = DEFAULT_DELETE_WORKERS, progress: Optional[DeletionProgress] = None):
+        self.workers = max(1, workers)
+        self.progress = progress if progress is not None else DeletionProgress()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tree-delete")
+
+    def __enter__(self) -> "TreeDeleter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self._pool.shutdown(wait=True)
+
+    def delete(self, path: Path):
+        """Remove path (file, symlink or whole directory tree), raising the first OSError it hit.
+
+        A failure inside a tree does not stop the rest of it from being removed, so only the
+        failed entries and their parent directories are left behind.
+        """
+        info = path.lstat()
+        if not stat.S_ISDIR(info.st_mode):
+            path.unlink()
+            self.progress.add(DeletionBatchResult(files=1, bytes_freed=info.st_size if info.st_nlink <= 1 else 0))
+            self.progress.end_line()
+            return
+        try:
+            errors = self._delete_tree(str(path))
+        finally:
+            self.progress.end_line()
+        if errors:
+            raise errors[0]
+
+    def _collect(self, futures: Set[Future], errors: List[OSError], return_when: str):
+        done, _ = wait(futures, return_when=return_when)
+        for future in done:
+            futures.discard(future)
+            result = future.result()
+            errors.extend(result.errors)
+            self.progress.add(result)
+
+    def _submit(self, batch: List[str], futures: Set[Future], errors: List[OSError]):
+        futures.add(self._pool.submit(unlink_batch, batch))
+        if len(futures) >= 4 * self.workers:
+            self._collect(futures, errors, FIRST_COMPLETED)
+
+    def _unlink_files(self, root: str, errors: List[OSError]) -> Dict[int, List[str]]:
+        """Walk root with scandir, unlinking its files in batches on the pool; returns its directories by depth."""
+        levels: Dict[int, List[str]] = {0: [root]}
+        stack = [(root, 0)]
+        futures: Set[Future] = set()
+        batch: List[str] = []
+        while stack:
+            directory, depth = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            levels.setdefault(depth + 1, []).append(entry.path)
+                            stack.append((entry.path, depth + 1))
+                            continue
+                        batch.append(entry.path)
+                        if len(batch) >= UNLINK_BATCH_SIZE:
+                            self._submit(batch, futures, errors)
+                            batch = []
+            except OSError as exc:
+                errors.append(exc)
+        if batch:
+            futures.add(self._pool.submit(unlink_batch, batch))
+        if futures:
+            self._collect(futures, errors, ALL_COMPLETED)
+        return levels
+
+    def _remove_levels(self, levels: Dict[int, List[str]], errors: List[OSError]):
+        """rmdir each depth level deepest first, in chunks on the pool."""
+        for depth in sorted(levels, reverse=True):
+            directories = levels[depth]
+            chunks = [directories[start : start + UNLINK_BATCH_SIZE] for start in range(0, len(directories), UNLINK_BATCH_SIZE)]
+            for chunk, chunk_errors in zip(chunks, self._pool.map(remove_directories, chunks)):
+                errors.extend(chunk_errors)
+                self.progress.directories += len(chunk) - len(chunk_errors)
+
+    def _delete_tree(self, root: str) -> List[OSError]:
+        """Unlink every file below root on the pool while walking, then rmdir each depth level bottom-up."""
+        errors: List[OSError] = []
+        self._remove_levels(self._unlink_files(root, errors), errors)
+        return errors